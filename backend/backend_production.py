@@ -68,7 +68,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Depends, WebSocket, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from service.server.server import ConversationServer
 from service.websocket_streamer import get_websocket_streamer, cleanup_websocket_streamer
 from service.websocket_server import set_auth_service
@@ -343,16 +343,14 @@ async def execute_scheduled_workflow(workflow_name: str, session_id: str, timeou
     # This allows scheduled workflows to search memory and access uploaded documents
     scheduler_session_id = session_id
     
-    from service.workflow_service import WorkflowService
+    from service.workflow_service import get_workflow_service
+    from service.chat_history_service import run_in_db_executor
     from service.agent_registry import get_registry, get_session_registry
-    import threading
     import asyncio
     import time
     
-    workflow_service = WorkflowService()
-    
-    # Find workflow by name
-    workflow = workflow_service.get_workflow_by_name(workflow_name)
+    # Read the definition as stored now: it may have been edited on another replica
+    workflow = await run_in_db_executor(get_workflow_service().fetch_workflow_by_name, workflow_name)
     if not workflow:
         return {"success": False, "error": f"Workflow '{workflow_name}' not found"}
     
@@ -502,10 +500,12 @@ async def wake_up_remote_agents():
     """Wake up all remote agents with public URLs on backend startup.
     
     This is useful when agents are running on scale-to-zero containers (like Azure Container Apps).
-    Sending a health check request will wake them up so they're ready when users make queries.
+    Probing their health endpoint through the shared health monitor wakes them up so they're
+    ready when users make queries, and seeds the health table the catalog reads from.
     This runs asynchronously in the background without blocking startup.
     """
     import asyncio
+    from service.agent_health import get_health_monitor
     
     log_info("[STARTUP] Waking up remote agents with public URLs...")
     
@@ -514,49 +514,24 @@ async def wake_up_remote_agents():
         agents = registry.get_all_agents()
         
         # Filter agents with public URLs (https://)
-        remote_agents = [
-            agent for agent in agents 
+        remote_urls = [
+            agent.get('url', '') for agent in agents
             if agent.get('url', '').startswith('https://')
         ]
         
-        if not remote_agents:
+        if not remote_urls:
             log_info("[STARTUP] No remote agents with public URLs found")
             return
 
-        log_info(f"[STARTUP] Found {len(remote_agents)} remote agents to wake up")
-        
-        # Wake up agents in parallel with a short timeout
-        async def ping_agent(agent: dict) -> tuple:
-            """Ping an agent's health endpoint to wake it up."""
-            url = agent.get('url', '').rstrip('/')
-            name = agent.get('name', 'Unknown')
-            health_url = f"{url}/health"
-            
-            try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(health_url)
-                    if response.status_code == 200:
-                        log_debug(f"[STARTUP] {name}: AWAKE (status: {response.status_code})")
-                        return (name, True)
-                    else:
-                        log_warning(f"[STARTUP] {name}: responded with status {response.status_code}")
-                        return (name, False)
-            except httpx.TimeoutException:
-                log_debug(f"[STARTUP] {name}: still waking up (timeout - container starting)")
-                return (name, False)
-            except Exception as e:
-                log_warning(f"[STARTUP] {name}: error - {type(e).__name__}: {e}")
-                return (name, False)
+        log_info(f"[STARTUP] Found {len(remote_urls)} remote agents to wake up")
+        health_monitor = get_health_monitor()
         
         # Background task to ping agents without blocking startup
         async def ping_agents_background():
-            """Run agent pings in background and log results."""
-            tasks = [ping_agent(agent) for agent in remote_agents]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Summary
-            awake_count = sum(1 for r in results if isinstance(r, tuple) and r[1])
-            log_info(f"[STARTUP] Wake-up complete: {awake_count}/{len(remote_agents)} agents responded")
+            """Probe agents in background and log results."""
+            results = await health_monitor.check_many(remote_urls, max_age=0)
+            awake_count = sum(1 for online in results.values() if online)
+            log_info(f"[STARTUP] Wake-up complete: {awake_count}/{len(remote_urls)} agents responded")
         
         # Fire and forget - don't wait for completion
         asyncio.create_task(ping_agents_background())
@@ -566,6 +541,63 @@ async def wake_up_remote_agents():
         log_error(f"[STARTUP] Error during agent wake-up: {type(e).__name__}: {e}")
 
 
+async def scheduled_warmup_urls() -> List[str]:
+    """Agent URLs needed by enabled schedules due within the warm-up lead time.
+
+    Used by the health monitor to wake scale-to-zero agents before a scheduled
+    workflow starts, so its pre-flight doesn't wait for cold starts.
+    """
+    from datetime import datetime, timedelta, timezone
+    from service.agent_health import WARMUP_LEAD_SECONDS
+
+    if not workflow_scheduler:
+        return []
+    now = datetime.now(timezone.utc)
+    horizon = now + timedelta(seconds=WARMUP_LEAD_SECONDS)
+    due_workflows = set()
+    for schedule in workflow_scheduler.list_schedules():
+        if not schedule.enabled or not schedule.next_run:
+            continue
+        try:
+            next_run = datetime.fromisoformat(schedule.next_run)
+        except ValueError:
+            continue
+        if next_run.tzinfo is None:
+            next_run = next_run.replace(tzinfo=timezone.utc)
+        if now <= next_run <= horizon:
+            due_workflows.add(schedule.workflow_name)
+    if not due_workflows:
+        return []
+
+    def resolve_urls() -> List[str]:
+        from service.workflow_service import get_workflow_service
+        workflow_service = get_workflow_service()
+        registry = get_registry()
+        urls = []
+        for workflow_name in due_workflows:
+            workflow = workflow_service.get_workflow_by_name(workflow_name)
+            for step in (workflow.steps or []) if workflow else []:
+                config = registry.get_agent(step.get('agentName') or step.get('agent') or '')
+                if config:
+                    # Scheduled workflows always use production URLs (see execute_scheduled_workflow)
+                    urls.append(config.get('production_url') or config.get('url', ''))
+        return urls
+
+    return await asyncio.to_thread(resolve_urls)
+
+
+async def _emit_agent_health_change(agent_url: str, health) -> None:
+    """Push warm/cold transitions to the UI."""
+    if not websocket_streamer:
+        return
+    await websocket_streamer._send_event("agent_health", {
+        "agentPath": agent_url,
+        "status": "online" if health.online else "offline",
+        "latencyMs": health.latency_ms,
+        "error": health.error,
+    }, "system_agent_registry")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan context manager for startup and shutdown."""
@@ -626,6 +658,31 @@ async def lifespan(app: FastAPI):
         log_warning(f"Failed to initialize workflow scheduler: {type(e).__name__}: {e}")
         # Continue startup even if scheduler fails
     
+    # Shared agent health monitor: background refresh, warm/cold events and
+    # predictive warm-up for agents needed by upcoming scheduled workflows
+    try:
+        from service.agent_health import get_health_monitor
+        health_monitor = get_health_monitor()
+        health_monitor.add_listener(_emit_agent_health_change)
+        health_monitor.set_warmup_source(scheduled_warmup_urls)
+        health_monitor.start()
+    except Exception as e:
+        log_warning(f"Failed to start agent health monitor: {type(e).__name__}: {e}")
+
+    # Load the planner's token encoding off the event loop (may download it)
+    try:
+        from hosts.multiagent.prompt_assembly import warm_encoding
+        warm_encoding()
+    except Exception as e:
+        log_warning(f"Failed to start token encoding load: {type(e).__name__}: {e}")
+
+    # Background reconciliation of the /api/files session index
+    try:
+        from service.file_index import get_file_index
+        get_file_index().start()
+    except Exception as e:
+        log_warning(f"Failed to start file index reconciler: {type(e).__name__}: {e}")
+
     # Wake up all remote agents with public URLs (for scale-to-zero containers)
     try:
         await wake_up_remote_agents()
@@ -652,6 +709,62 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             log_warning(f"Error stopping workflow scheduler: {e}")
 
+    # Let queued status events and memory/history writes finish before closing their clients
+    try:
+        from service.task_supervisor import get_task_supervisor
+        await get_task_supervisor().drain()
+    except Exception as e:
+        log_warning(f"Error draining background tasks: {e}")
+
+    # Compact the local memory index journal into its snapshot
+    try:
+        from hosts.multiagent.a2a_memory_service import a2a_memory_service
+        a2a_memory_service.close()
+    except Exception as e:
+        log_warning(f"Error closing memory index: {e}")
+
+    # Close pooled OpenAI clients held by the host agent
+    if agent_server and hasattr(agent_server, 'manager') and hasattr(agent_server.manager, 'shutdown_async'):
+        try:
+            await agent_server.manager.shutdown_async()
+        except Exception as e:
+            log_warning(f"Error shutting down host manager: {e}")
+
+    # Return pooled chat-history database connections
+    try:
+        from service import chat_history_service
+        chat_history_service.close_pool()
+    except Exception as e:
+        log_warning(f"Error closing chat history pool: {e}")
+
+    # Stop the agent health monitor and its probe client
+    try:
+        from service.agent_health import get_health_monitor
+        await get_health_monitor().stop()
+    except Exception as e:
+        log_warning(f"Error stopping agent health monitor: {e}")
+
+    # Stop the file index reconciler
+    try:
+        from service.file_index import get_file_index
+        await get_file_index().stop()
+    except Exception as e:
+        log_warning(f"Error stopping file index: {e}")
+
+    # Close the shared blob storage client
+    try:
+        from service.blob_uploads import get_blob_store
+        await get_blob_store().aclose()
+    except Exception as e:
+        log_warning(f"Error closing blob storage client: {e}")
+
+    # Close per-agent connection pools
+    try:
+        from hosts.multiagent.remote_agent_connection import close_agent_transports
+        await close_agent_transports()
+    except Exception as e:
+        log_warning(f"Error closing agent transports: {e}")
+
     await httpx_client_wrapper.stop()
     await cleanup_websocket_streamer()
     log_info("A2A Backend API shutdown complete")
@@ -694,6 +807,12 @@ def main():
             "client_id": os.environ.get("AZURE_CLIENT_ID", "not_set")
         }
 
+    @app.get("/api/background-tasks/stats")
+    async def background_task_stats():
+        """Queue depth, drops, failures and latency of the background task pools."""
+        from service.task_supervisor import get_task_supervisor
+        return {"success": True, "pools": get_task_supervisor().stats()}
+
     # Host Agent Model Selection
     @app.get("/api/host-agent/model")
     async def get_host_model():
@@ -737,10 +856,16 @@ def main():
     # Agent Registry Endpoints
     @app.get("/api/agents")
     async def get_all_agents():
-        """Get all agents from the registry."""
+        """Get all agents from the registry, with last known health (no probing)."""
         try:
+            from service.agent_health import get_health_monitor
             registry = get_registry()
-            agents = registry.get_all_agents()
+            health_monitor = get_health_monitor()
+            agents = []
+            for agent in registry.get_all_agents():
+                health = health_monitor.get(agent.get('url', ''))
+                status = 'unknown' if health is None else ('online' if health.online else 'offline')
+                agents.append({**agent, 'status': status})
             return {
                 "success": True,
                 "agents": agents
@@ -876,36 +1001,25 @@ def main():
 
     @app.get("/api/agents/health/{agent_url:path}")
     async def check_agent_health(agent_url: str):
-        """Check health status of an agent."""
-        try:
-            from log_config import log_debug
-            import httpx
-            # Clean up the URL to avoid double slashes
-            # Default to https:// for Azure Container Apps (localhost uses http://)
-            if not agent_url.startswith('http'):
-                base_url = f"https://{agent_url}" if not agent_url.startswith('localhost') else f"http://{agent_url}"
-            else:
-                base_url = agent_url
-            # Remove trailing slash and add /health
-            health_url = base_url.rstrip('/') + '/health'
-            log_debug(f"Health check: agent_url='{agent_url}' -> health_url='{health_url}'")
-            
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(health_url)
-                log_debug(f"Health response: {response.status_code}")
-                return {
-                    "success": True,
-                    "online": response.status_code == 200,
-                    "status_code": response.status_code
-                }
-        except Exception as e:
-            from log_config import log_debug
-            log_debug(f"Health check error: {e}")
-            return {
-                "success": True,
-                "online": False,
-                "error": str(e)
-            }
+        """Check health status of an agent (served from the shared health monitor)."""
+        from service.agent_health import get_health_monitor
+        # Default to https:// for Azure Container Apps (localhost uses http://)
+        if not agent_url.startswith('http'):
+            base_url = f"https://{agent_url}" if not agent_url.startswith('localhost') else f"http://{agent_url}"
+        else:
+            base_url = agent_url
+        health_monitor = get_health_monitor()
+        online = await health_monitor.check(base_url, allow_stale=True)
+        health = health_monitor.get(base_url)
+        response = {
+            "success": True,
+            "online": online,
+            "status_code": health.status_code if health else None,
+            "checked_seconds_ago": round(health.age, 1) if health else None,
+        }
+        if health and health.error:
+            response["error"] = health.error
+        return response
 
     # Authentication Models
     class LoginRequest(BaseModel):
@@ -1820,7 +1934,8 @@ def main():
     @app.get("/api/schedules/upcoming")
     async def get_upcoming_runs(limit: int = 10):
         """
-        Get upcoming scheduled workflow runs.
+        Get upcoming scheduled workflow runs, plus this replica's run-queue
+        metrics (queue depth, running count, start lag, leadership).
         
         Example curl:
             curl http://localhost:12000/api/schedules/upcoming
@@ -1829,7 +1944,8 @@ def main():
         upcoming = scheduler.get_upcoming_runs(limit)
         return {
             "upcoming": upcoming,
-            "count": len(upcoming)
+            "count": len(upcoming),
+            "metrics": scheduler.stats()
         }
     
     @app.get("/api/schedules/history")
@@ -2103,112 +2219,20 @@ def main():
                 "message": f"Error clearing memory: {str(e)}"
             }
 
-    # Helper function to upload to Azure Blob Storage
-    def upload_to_azure_blob(file_id: str, file_name: str, file_bytes: bytes, mime_type: str, session_id: str = None) -> str:
-        """Upload file to Azure Blob Storage and return public SAS URL.
-        
-        Args:
-            file_id: Unique file identifier
-            file_name: Original filename
-            file_bytes: File content bytes
-            mime_type: MIME type of the file
-            session_id: Optional session ID for tenant isolation (scopes blob path)
-        """
-        # Build local fallback path (session-scoped if session_id provided)
-        local_fallback = f"/uploads/{session_id}/{file_id}" if session_id else f"/uploads/{file_id}"
-        
-        try:
-            from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions, ContentSettings
-            from azure.identity import DefaultAzureCredential
-            
-            # Get Azure connection details
-            connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-            storage_account_name = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
-            
-            # Initialize blob client with managed identity or connection string
-            if storage_account_name and not connection_string:
-                # Use managed identity authentication
-                account_url = f"https://{storage_account_name}.blob.core.windows.net"
-                credential = DefaultAzureCredential()
-                blob_service_client = BlobServiceClient(account_url, credential=credential)
-                log_debug(f"Using managed identity for blob storage: {account_url}")
-            elif connection_string:
-                # Use connection string authentication (legacy)
-                blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-                log_debug("Using connection string for blob storage")
-            else:
-                log_warning("No Azure Storage configuration found, returning local path")
-                return local_fallback
-            
-            container_name = os.getenv('AZURE_BLOB_CONTAINER', 'a2a-files')
-            
-            # Generate blob name with session scope for tenant isolation
-            safe_file_name = file_name.replace('/', '_').replace('\\', '_')
-            if session_id:
-                blob_name = f"uploads/{session_id}/{file_id}/{safe_file_name}"
-            else:
-                blob_name = f"uploads/{file_id}/{safe_file_name}"
-            
-            # Upload to blob
-            blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-            content_settings = ContentSettings(
-                content_type=mime_type,
-                content_disposition=f'inline; filename="{file_name}"'
-            )
-            
-            blob_client.upload_blob(
-                file_bytes,
-                content_settings=content_settings,
-                metadata={
-                    'file_id': file_id,
-                    'original_name': file_name,
-                    'upload_time': datetime.now(UTC).isoformat()
-                },
-                overwrite=True
-            )
-            
-            # Generate SAS token if using connection string (has account key)
-            if connection_string:
-                account_key = None
-                for part in connection_string.split(';'):
-                    if part.startswith('AccountKey='):
-                        account_key = part.split('=', 1)[1]
-                        break
-                
-                if account_key:
-                    sas_token = generate_blob_sas(
-                        account_name=blob_client.account_name,
-                        container_name=container_name,
-                        blob_name=blob_name,
-                        account_key=account_key,
-                        permission=BlobSasPermissions(read=True),
-                        expiry=datetime.now(UTC) + timedelta(hours=24),
-                        version="2023-11-03"
-                    )
-                    blob_url = f"{blob_client.url}?{sas_token}"
-                    log_warning(f"[BLOB_UPLOAD] SUCCESS (connection string + SAS): {blob_url[:100]}...")
-                    return blob_url
-            
-            # For managed identity, return blob URL directly (container must be public or use user delegation SAS)
-            log_warning(f"[BLOB_UPLOAD] SUCCESS (managed identity): {blob_client.url}")
-            return blob_client.url
-
-        except Exception as e:
-            import traceback
-            log_error(f"[BLOB_UPLOAD] Azure Blob upload FAILED: {e}")
-            log_error(f"[BLOB_UPLOAD] Traceback: {traceback.format_exc()}")
-            log_error(f"[BLOB_UPLOAD] Falling back to local path: {local_fallback}")
-            return local_fallback
-
     # Add file upload endpoint
     @app.post("/upload")
     async def upload_file(file: UploadFile = File(...), request: Request = None):
         """Upload a file and return file information for A2A processing.
         
         Supports session isolation via X-Session-ID header.
-        Files are stored in session-scoped directories.
+        Files are stored in session-scoped directories. The upload is streamed
+        to disk and staged to Azure Blob Storage chunk by chunk, so large files
+        never block the event loop or sit in memory.
         """
         try:
+            from azure.storage.blob import ContentSettings
+            from service.blob_uploads import UploadDeduper, get_blob_store, stream_upload, upload_deduper
+
             # Extract session_id from header for tenant isolation
             session_id = None
             if request:
@@ -2230,39 +2254,85 @@ def main():
                 session_upload_dir = UPLOADS_DIR / session_id
                 session_upload_dir.mkdir(parents=True, exist_ok=True)
                 file_path = session_upload_dir / filename
-                local_uri = f"/uploads/{session_id}/{filename}"
             else:
                 file_path = UPLOADS_DIR / filename
-                local_uri = f"/uploads/{filename}"
 
-            # Read file content
-            content = await file.read()
-            
-            from log_config import log_debug
-            # Save file locally (as backup)
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
-            
-            log_debug(f"File uploaded: {file.filename} -> {file_path} ({len(content)} bytes) [session: {session_id or 'none'}]")
-            
-            # Upload to Azure Blob and get public SAS URL (session-scoped)
-            blob_url = upload_to_azure_blob(
-                file_id=file_id,
-                file_name=file.filename or filename,
-                file_bytes=content,
-                mime_type=file.content_type or 'application/octet-stream',
-                session_id=session_id
+            # Blob name is session-scoped for tenant isolation
+            file_name = file.filename or filename
+            mime_type = file.content_type or 'application/octet-stream'
+            safe_file_name = file_name.replace('/', '_').replace('\\', '_')
+
+            def blob_name_for(upload_id: str) -> str:
+                if session_id:
+                    return f"uploads/{session_id}/{upload_id}/{safe_file_name}"
+                return f"uploads/{upload_id}/{safe_file_name}"
+
+            blob_store = get_blob_store()
+            blob_client = blob_store.blob_client(blob_name_for(file_id))
+            if blob_client is None:
+                log_warning("No Azure Storage configuration found, returning local path")
+
+            result = await stream_upload(
+                file,
+                file_path,
+                blob_client=blob_client,
+                commit_kwargs={
+                    "content_settings": ContentSettings(
+                        content_type=mime_type,
+                        content_disposition=f'inline; filename="{file_name}"'
+                    ),
+                    "metadata": {
+                        'file_id': file_id,
+                        'original_name': file_name,
+                        'upload_time': datetime.now(UTC).isoformat()
+                    },
+                },
+                dedupe_scope=UploadDeduper.scope(session_id, file_name),
+                deduper=upload_deduper,
             )
+
+            if result.duplicate is not None:
+                duplicate = dict(result.duplicate)
+                log_debug(f"File upload deduplicated: {file.filename} -> {duplicate['file_id']} [session: {session_id or 'none'}]")
+                # The remembered SAS may be near (or past) its expiry: sign a fresh one
+                if not duplicate["uri"].startswith("/uploads/"):
+                    duplicate_client = blob_store.blob_client(blob_name_for(duplicate["file_id"]))
+                    if duplicate_client is not None:
+                        duplicate["uri"] = await blob_store.sas_url(duplicate_client)
+                return {**duplicate, "deduplicated": True}
+
+            log_debug(f"File uploaded: {file.filename} -> {file_path} ({result.size} bytes) [session: {session_id or 'none'}]")
+
+            # Public SAS URL when the blob was committed, otherwise the local path (session-scoped)
+            sas_expiry = None
+            if result.blob_client is not None:
+                blob_url, sas_expiry = await blob_store.signed_url(result.blob_client)
+                log_debug(f"[BLOB_UPLOAD] SUCCESS: {blob_url[:100]}...")
+            else:
+                blob_url = f"/uploads/{session_id}/{file_id}" if session_id else f"/uploads/{file_id}"
             
-            return {
+            response = {
                 "success": True,
                 "filename": file.filename,
                 "file_id": file_id,
                 "uri": blob_url,  # Now returns Azure Blob SAS URL
-                "size": len(content),
+                "size": result.size,
                 "content_type": file.content_type,
                 "session_id": session_id
             }
+            upload_deduper.remember(UploadDeduper.scope(session_id, file_name), result.sha256, response)
+            if session_id:
+                from service.file_index import IndexedFile, get_file_index, uri_refresh_time
+                get_file_index().file_added(session_id, IndexedFile(
+                    id=file_id,
+                    filename=safe_file_name,
+                    size=result.size,
+                    content_type=mime_type,
+                    uploaded_at=datetime.now(UTC).isoformat(),
+                    uri=blob_url,
+                    uri_refresh_at=uri_refresh_time(sas_expiry),
+                ))
+            return response
             
         except Exception as e:
             log_error(f"File upload failed: {e}")
@@ -2273,11 +2343,13 @@ def main():
 
     # Add endpoint to list user files
     @app.get("/api/files")
-    async def list_user_files(request: Request):
-        """List all files for a user from blob storage (with local fallback).
+    async def list_user_files(request: Request, offset: int = 0, limit: Optional[int] = None):
+        """List all files for a user from the session file index.
         
-        Returns files stored under uploads/{session_id}/ in blob storage,
-        or from local filesystem if blob storage is unavailable.
+        The index is loaded from blob storage (or the local filesystem when blob
+        storage is unavailable) on first use and then kept current by upload,
+        delete and processing events. Responses carry an ETag; a matching
+        If-None-Match gets 304 Not Modified. Pass offset/limit to paginate.
         """
         try:
             # Extract session_id from header
@@ -2285,134 +2357,26 @@ def main():
             if not session_id:
                 return {"success": False, "error": "Missing X-Session-ID header"}
             
-            files = []
-            
-            # Get processed filenames from Azure Search (fast single query)
-            from hosts.multiagent.a2a_memory_service import a2a_memory_service
-            processed_filenames = a2a_memory_service.get_processed_filenames(session_id)
-            log_debug(f"Found {len(processed_filenames)} processed files in memory for session {session_id}")
-            
-            # Try blob storage first
-            try:
-                from azure.storage.blob import BlobServiceClient
-                from azure.identity import DefaultAzureCredential
-                from datetime import datetime, UTC
-                
-                # Get Azure connection details
-                connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-                storage_account_name = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
-                
-                if storage_account_name and not connection_string:
-                    # Use managed identity
-                    account_url = f"https://{storage_account_name}.blob.core.windows.net"
-                    credential = DefaultAzureCredential()
-                    blob_service_client = BlobServiceClient(account_url, credential=credential)
-                elif connection_string:
-                    # Use connection string
-                    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-                else:
-                    raise Exception("No Azure Storage configuration found")
-                
-                container_name = os.getenv('AZURE_BLOB_CONTAINER', 'a2a-files')
-                container_client = blob_service_client.get_container_client(container_name)
-                
-                # List blobs for this session - filter by path prefix for speed
-                prefix = f"uploads/{session_id}/"
-                for blob in container_client.list_blobs(name_starts_with=prefix):
-                    # Skip if 0 bytes (empty/failed uploads)
-                    if blob.size == 0:
-                        log_debug(f"Skipping 0-byte blob: {blob.name}")
-                        continue
-                    
-                    # Parse blob path to extract file_id and filename
-                    parts = blob.name.split('/')
-                    if len(parts) >= 4:
-                        # uploads/{session_id}/{file_id}/{filename}
-                        file_id = parts[2]
-                        filename = parts[3]
-                        
-                        # Get status from Azure Search (processed files are "in memory")
-                        file_status = "analyzed" if filename in processed_filenames else "uploaded"
-                        
-                        # Generate fresh SAS URL
-                        blob_url = None
-                        if connection_string:
-                            from azure.storage.blob import generate_blob_sas, BlobSasPermissions
-                            from datetime import timedelta
-                            
-                            account_key = None
-                            for part in connection_string.split(';'):
-                                if part.startswith('AccountKey='):
-                                    account_key = part.split('=', 1)[1]
-                                    break
-                            
-                            if account_key:
-                                # Generate fresh 7-day SAS token
-                                sas_token = generate_blob_sas(
-                                    account_name=blob_service_client.account_name,
-                                    container_name=container_name,
-                                    blob_name=blob.name,
-                                    account_key=account_key,
-                                    permission=BlobSasPermissions(read=True),
-                                    expiry=datetime.now(UTC) + timedelta(days=7),  # 7 days instead of 24 hours
-                                    version="2023-11-03"
-                                )
-                                blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob.name)
-                                blob_url = f"{blob_client.url}?{sas_token}"
-                        
-                        files.append({
-                            "id": file_id,
-                            "filename": filename,
-                            "originalName": filename,
-                            "size": blob.size,
-                            "contentType": blob.content_settings.content_type if blob.content_settings else "application/octet-stream",
-                            "uploadedAt": blob.last_modified.isoformat() if blob.last_modified else None,
-                            "uri": blob_url or blob.name,
-                            "status": file_status
-                        })
-                
-                log_debug(f"Listed {len(files)} files from blob storage for session: {session_id}")
+            from service.file_index import get_file_index
+            file_index = get_file_index()
+            cache_headers = {"Cache-Control": "private, no-cache", "Vary": "X-Session-ID"}
 
-            except Exception as blob_error:
-                log_warning(f"Blob storage unavailable, falling back to local filesystem: {blob_error}")
-                
-                # Fallback to local filesystem
-                local_dir = UPLOADS_DIR / session_id
-                if local_dir.exists():
-                    for file_path in local_dir.rglob("*"):
-                        if file_path.is_file():
-                            # Try to extract file_id from parent directory structure
-                            rel_path = file_path.relative_to(local_dir)
-                            file_id = str(rel_path.parent) if rel_path.parent != Path('.') else str(uuid.uuid4())
-                            filename = file_path.name
-                            
-                            # Get status from Azure Search (processed files are "in memory")
-                            file_status = "analyzed" if filename in processed_filenames else "uploaded"
-                            
-                            files.append({
-                                "id": file_id,
-                                "filename": filename,
-                                "originalName": filename,
-                                "size": file_path.stat().st_size,
-                                "contentType": "application/octet-stream",
-                                "uploadedAt": datetime.fromtimestamp(file_path.stat().st_mtime, UTC).isoformat(),
-                                "uri": f"/uploads/{session_id}/{file_id}",
-                                "status": file_status
-                            })
-                
-                log_debug(f"Listed {len(files)} files from local filesystem for session: {session_id}")
-            
-            # NO DEDUPLICATION - show all files from blob storage as-is
-            # Each file has a unique ID (file_id from path), even if filenames are identical
-            # The file history should be the source of truth for what's in blob storage
-            
-            # Sort by upload date (most recent first)
-            files.sort(key=lambda f: f.get('uploadedAt', ''), reverse=True)
+            if file_index.not_modified(session_id, request.headers.get("If-None-Match"), offset, limit):
+                return Response(status_code=304, headers={**cache_headers, "ETag": file_index.etag(session_id, offset, limit)})
+
+            page = await file_index.list_files(session_id, offset=offset, limit=limit)
+            log_debug(f"Listed {len(page['files'])} of {page['total']} files for session: {session_id}")
             
-            return {
-                "success": True,
-                "files": files
-            }
+            return JSONResponse(
+                {
+                    "success": True,
+                    "files": page["files"],
+                    "total": page["total"],
+                    "offset": page["offset"],
+                    "next_offset": page["next_offset"],
+                },
+                headers={**cache_headers, "ETag": page["etag"]},
+            )
             
         except Exception as e:
             log_error(f"Failed to list files: {e}")
@@ -2551,6 +2515,13 @@ def main():
             except Exception as registry_error:
                 log_warning(f"Agent file registry delete failed (this is OK): {registry_error}")
             
+            # Re-uploading the same bytes must store them again, not return this file_id
+            from service.blob_uploads import upload_deduper
+            upload_deduper.forget(session_id, filename, file_id=file_id)
+
+            from service.file_index import get_file_index
+            get_file_index().file_removed(session_id, file_id, filename)
+            
             # Always return success (idempotent operation)
             return {
                 "success": True,
@@ -2726,13 +2697,11 @@ def main():
             filename = f"voice_{file_id}.wav"
             file_path = voice_dir / filename
 
-            from log_config import log_debug
-            # Save file
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
+            # Stream to disk off the event loop
+            from service.blob_uploads import stream_upload
+            upload = await stream_upload(file, file_path)
             
-            log_debug(f"Voice file uploaded: {file.filename} -> {file_path} ({len(content)} bytes) [session: {session_id or 'none'}]")
+            log_debug(f"Voice file uploaded: {file.filename} -> {file_path} ({upload.size} bytes) [session: {session_id or 'none'}]")
             
             # Import the document processor to handle audio transcription
             try:
@@ -2743,21 +2712,12 @@ def main():
                     sys.path.insert(0, str(BASE_DIR))
 
                 # Now import using the full module path inside backend/hosts
-                from hosts.multiagent.a2a_document_processor import process_audio
+                from hosts.multiagent.a2a_document_processor import process_audio_async
 
-                # Process audio file to get transcription
+                # Process audio file to get transcription (analyzer templates resolve
+                # relative to the module, so no working-directory change is needed)
                 log_debug(f"Processing audio file for transcription: {file_path}")
-
-                # Change to the multiagent directory so relative paths work
-                original_cwd = os.getcwd()
-                try:
-                    multiagent_dir = HOSTS_DIR / "multiagent"
-                    os.chdir(multiagent_dir)
-
-                    transcript = process_audio(str(file_path), return_text=True)
-                finally:
-                    # Always restore original working directory
-                    os.chdir(original_cwd)
+                transcript = await process_audio_async(str(file_path), return_text=True)
                 
                 if transcript and transcript.strip():
                     log_debug(f"Audio transcription successful. Length: {len(transcript)} characters")
@@ -2766,7 +2726,7 @@ def main():
                         "filename": file.filename or filename,
                         "file_id": file_id,
                         "uri": f"/voice_recordings/{filename}",
-                        "size": len(content),
+                        "size": upload.size,
                         "content_type": "audio/wav",
                         "transcript": transcript.strip(),
                         "message": "Voice recording transcribed successfully"
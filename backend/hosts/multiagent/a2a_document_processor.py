@@ -1,20 +1,24 @@
 #!/usr/bin/env python3
 
+import asyncio
+import hashlib
 import os
 import re
 import sys
-import concurrent.futures
+import time
 import uuid
 import platform
 import subprocess
-from functools import partial
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 import json
 
 # Utils - using the user's proven working imports
 from . import doc2md_utils
-from .content_understanding_client import AzureContentUnderstandingClient
+from .content_understanding_client import AsyncContentUnderstandingClient, AzureContentUnderstandingClient
 
 from log_config import log_debug, log_info, log_warning, log_error
 
@@ -146,289 +150,424 @@ def text_to_speech(text: str, output_path: str = None) -> str:
         log_error(f"Error in text_to_speech: {e}")
         return None
 
-def process_audio(audio_path: str, return_text: bool = False):
+# Analyzers are created once per template and reused (the ID embeds a hash of
+# the template, so editing a template creates a fresh analyzer)
+ANALYZER_TEMPLATE_DIR = Path(__file__).resolve().parent / "analyzer_templates"
+ANALYZER_TEMPLATES = {
+    "audio": "audio_transcription.json",
+    "video": "video_content_understanding.json",
+    "document": "content_document.json",
+}
+
+# Extraction results keyed by content hash, so re-uploads and duplicate
+# attachments skip analysis. Set CU_RESULT_CACHE_DIR="" to keep them in memory only.
+CU_RESULT_CACHE_ENTRIES = int(os.getenv("CU_RESULT_CACHE_ENTRIES", "256"))
+CU_RESULT_CACHE_DIR = os.getenv("CU_RESULT_CACHE_DIR", str(RUNTIME_DIR / "cu_cache"))
+# Disk cache limits (0 disables a limit); checked on the first write and every
+# CU_RESULT_CACHE_PRUNE_EVERY writes after that
+CU_RESULT_CACHE_MAX_MB = float(os.getenv("CU_RESULT_CACHE_MAX_MB", "512"))
+CU_RESULT_CACHE_MAX_AGE_DAYS = float(os.getenv("CU_RESULT_CACHE_MAX_AGE_DAYS", "30"))
+CU_RESULT_CACHE_PRUNE_EVERY = 32
+CU_ANALYZE_TIMEOUT_SECONDS = float(os.getenv("CU_ANALYZE_TIMEOUT_SECONDS", "300"))
+
+
+@lru_cache(maxsize=None)
+def load_analyzer_template(kind: str) -> Tuple[str, dict]:
+    """(analyzer_id, template) for a file kind; the ID is stable per template content."""
+    raw = (ANALYZER_TEMPLATE_DIR / ANALYZER_TEMPLATES[kind]).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    return f"a2a-{kind}-analyzer-{digest}", json.loads(raw)
+
+
+class ExtractionResultCache:
+    """LRU of Content Understanding results keyed by analyzer + content hash.
+
+    Results are also written as JSON files under ``disk_dir`` (when set) so
+    they survive restarts. Files older than ``max_age_seconds`` are deleted,
+    then the least recently used ones until the directory fits ``max_bytes``.
     """
-    Process audio file - from user's original working code.
-    If return_text is True, returns the transcript text instead of JSON file paths.
+
+    def __init__(self, max_entries: int = CU_RESULT_CACHE_ENTRIES, disk_dir: Optional[str] = CU_RESULT_CACHE_DIR,
+                 max_bytes: float = CU_RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 max_age_seconds: float = CU_RESULT_CACHE_MAX_AGE_DAYS * 86400):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._writes_until_prune = 0
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_pruned": 0}
+
+    @staticmethod
+    def key(analyzer_id: str, data: bytes) -> str:
+        return f"{analyzer_id}-{hashlib.sha256(data).hexdigest()}"
+
+    def get(self, key: str) -> Optional[dict]:
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.metrics["memory_hits"] += 1
+            return result
+        if self._disk_dir is not None:
+            path = self._disk_dir / f"{key}.json"
+            try:
+                result = json.loads(path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                result = None
+            except Exception as e:
+                log_warning(f"[A2ADocumentProcessor] Ignoring unreadable cached result {path.name}: {e}")
+                result = None
+            if result is not None:
+                self.metrics["disk_hits"] += 1
+                self._remember(key, result)
+                try:
+                    os.utime(path)  # recently used: pruned last
+                except OSError:
+                    pass
+                return result
+        self.metrics["misses"] += 1
+        return None
+
+    def put(self, key: str, result: dict) -> None:
+        self._remember(key, result)
+        if self._disk_dir is not None:
+            try:
+                self._disk_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._disk_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+                tmp_path.write_text(json.dumps(result), encoding="utf-8")
+                os.replace(tmp_path, self._disk_dir / f"{key}.json")
+            except Exception as e:
+                log_warning(f"[A2ADocumentProcessor] Could not persist extraction result: {e}")
+            self._writes_until_prune -= 1
+            if self._writes_until_prune <= 0:
+                self._writes_until_prune = CU_RESULT_CACHE_PRUNE_EVERY
+                self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """Apply the age and size limits to the disk cache; returns files deleted."""
+        if self._disk_dir is None:
+            return 0
+        now = time.time()
+        entries = []
+        try:
+            paths = list(self._disk_dir.iterdir())
+        except OSError:
+            return 0
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # Leave temp files of writes that may still be in progress
+            if path.suffix == ".tmp" and now - stat.st_mtime < 3600:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:  # oldest first
+            expired = self.max_age_seconds > 0 and now - mtime > self.max_age_seconds
+            if not expired and (self.max_bytes <= 0 or total <= self.max_bytes):
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self.metrics["disk_pruned"] += removed
+            log_debug(f"[A2ADocumentProcessor] Pruned {removed} cached extraction results")
+        return removed
+
+    def _remember(self, key: str, result: dict) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.metrics, "memory_entries": len(self._memory)}
+
+
+extraction_cache = ExtractionResultCache()
+_async_cu_client: Optional[AsyncContentUnderstandingClient] = None
+_inflight_analyses: Dict[tuple, asyncio.Future] = {}
+
+
+def get_async_content_understanding_client() -> Optional[AsyncContentUnderstandingClient]:
+    """Shared async Content Understanding client (None when not configured)."""
+    global _async_cu_client
+    if _async_cu_client is not None:
+        return _async_cu_client
+
+    endpoint = (
+        os.getenv("AZURE_CONTENT_UNDERSTANDING_ENDPOINT")
+        or os.getenv("AZURE_AI_SERVICE_ENDPOINT")
+    )
+    if not endpoint:
+        log_warning("Missing AZURE_CONTENT_UNDERSTANDING_ENDPOINT (or AZURE_AI_SERVICE_ENDPOINT) environment variable.")
+        return None
+    api_version = os.getenv("AZURE_CONTENT_UNDERSTANDING_API_VERSION", "2024-12-01-preview")
+    api_key = os.getenv("AZURE_CONTENT_UNDERSTANDING_API_KEY")
+
+    try:
+        if api_key:
+            _async_cu_client = AsyncContentUnderstandingClient(
+                endpoint=endpoint.strip(),
+                api_version=api_version,
+                subscription_key=api_key,
+                x_ms_useragent="azure-ai-content-understanding-python/content_extraction"
+            )
+        else:
+            from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+            token_provider = get_bearer_token_provider(DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default")
+            _async_cu_client = AsyncContentUnderstandingClient(
+                endpoint=endpoint.strip(),
+                api_version=api_version,
+                token_provider=token_provider,
+                x_ms_useragent="azure-ai-content-understanding-python/content_extraction"
+            )
+    except Exception as e:
+        log_error(f"Error initializing Content Understanding client: {e}")
+        return None
+    return _async_cu_client
+
+
+async def analyze_with_content_understanding(kind: str, file_path: str) -> Optional[dict]:
+    """Content Understanding result for a file, from the cache when possible.
+
+    Returns None when the service isn't configured. Concurrent requests for
+    the same content share one analysis.
     """
-    log_debug(f"Processing audio: {audio_path}")
-    client = get_content_understanding_client()
-    
+    client = get_async_content_understanding_client()
     if client is None:
-        log_warning("Content Understanding client not available. Skipping audio processing.")
-        return None if return_text else []
-    
-    analyzer_id = f"audio-analyzer-{str(uuid.uuid4())}"
-    
+        return None
+
+    analyzer_id, template = load_analyzer_template(kind)
+    data = await asyncio.to_thread(Path(file_path).read_bytes)
+    key = extraction_cache.key(analyzer_id, data)
+    cached = extraction_cache.get(key)
+    if cached is not None:
+        log_debug(f"[A2ADocumentProcessor] Reusing cached {kind} extraction for {os.path.basename(file_path)}")
+        return cached
+
+    loop = asyncio.get_running_loop()
+    inflight_key = (id(loop), key)
+    pending = _inflight_analyses.get(inflight_key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    future = loop.create_future()
+    _inflight_analyses[inflight_key] = future
     try:
-        # Create the audio analyzer using the template
-        response = client.begin_create_analyzer(
-            analyzer_id=analyzer_id,
-            analyzer_template_path="analyzer_templates/audio_transcription.json"
-        )
-        result = client.poll_result(response)
-        log_debug(f"Successfully created analyzer: {analyzer_id}")
-
-        # Analyze the audio content
-        log_debug(f"Starting analysis of audio file: {audio_path}")
-        response = client.begin_analyze(analyzer_id, audio_path)
-        log_debug("Analysis request sent, polling for results...")
-        result = client.poll_result(response)
-        log_debug(f"Successfully analyzed audio with analyzer: {analyzer_id}")
-        log_debug(f"Analysis result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
-        
-        # Extract transcript from the result
-        audio_content = result["result"]
+        log_debug(f"Starting {kind} analysis of {os.path.basename(file_path)} with analyzer: {analyzer_id}")
+        result = await client.analyze(analyzer_id, data, template, timeout_seconds=CU_ANALYZE_TIMEOUT_SECONDS)
+        extraction_cache.put(key, result)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+        raise
+    finally:
+        _inflight_analyses.pop(inflight_key, None)
+
+
+def _log_content_understanding_error(kind: str, e: Exception) -> None:
+    log_error(f"Error processing {kind}: {e}")
+    log_error(f"Error type: {type(e).__name__}")
+    response = getattr(e, 'response', None)
+    if response is not None:
+        log_error(f"HTTP Response status: {response.status_code}")
+        try:
+            log_error(f"HTTP Response body: {response.text}")
+        except Exception:
+            log_error("Could not get response body")
+
+
+def format_audio_result(result: dict, audio_path: str, return_text: bool = False) -> str:
+    """Transcript (``return_text``) or summary + transcript text for an audio result."""
+    audio_content = result["result"]
+    transcript = ""
+    summary = ""
+
+    if "contents" in audio_content and len(audio_content["contents"]) > 0:
+        content = audio_content["contents"][0]
+
+        # Extract summary if available
+        if "fields" in content and "Summary" in content["fields"]:
+            summary = content["fields"]["Summary"]["valueString"]
+
+        # Extract full transcript
+        if "transcriptPhrases" in content:
+            for phrase in content["transcriptPhrases"]:
+                if "speaker" in phrase and "text" in phrase:
+                    transcript += f"{phrase['text']} "  # Just get text without speaker for TTS
+
+    if return_text:
+        return transcript.strip()
+
+    # Create full content for A2A memory
+    full_content = f"Audio file: {os.path.basename(audio_path)}\n\n"
+    if summary:
+        full_content += f"Summary: {summary}\n\n"
+    full_content += f"Transcript:\n{transcript}"
+    return full_content
+
+
+def format_video_result(result: dict, video_path: str) -> str:
+    """Per-segment description + transcript text for a video result."""
+    video_content = result["result"]["contents"]
+
+    full_content = f"Video file: {os.path.basename(video_path)}\n\n"
+
+    for content in video_content:
+        # Extract relevant information
+        if "fields" in content and "segmentDescription" in content["fields"]:
+            description = content["fields"]["segmentDescription"]["valueString"]
+        else:
+            description = ""
+
         transcript = ""
-        summary = ""
-        
-        if "contents" in audio_content and len(audio_content["contents"]) > 0:
-            content = audio_content["contents"][0]
-            
-            # Extract summary if available
-            if "fields" in content and "Summary" in content["fields"]:
-                summary = content["fields"]["Summary"]["valueString"]
-            
-            # Extract full transcript
-            if "transcriptPhrases" in content:
-                for phrase in content["transcriptPhrases"]:
-                    if "speaker" in phrase and "text" in phrase:
-                        transcript += f"{phrase['text']} "  # Just get text without speaker for TTS
-        
-        # Cleanup
-        client.delete_analyzer(analyzer_id)
-        
-        if return_text:
-            return transcript.strip()
-        
-        # Create full content for A2A memory
-        full_content = f"Audio file: {os.path.basename(audio_path)}\n\n"
-        if summary:
-            full_content += f"Summary: {summary}\n\n"
-        full_content += f"Transcript:\n{transcript}"
-        
-        return full_content
-            
-    except Exception as e:
-        log_error(f"Error processing audio: {e}")
-        log_error(f"Error type: {type(e).__name__}")
+        if "transcriptPhrases" in content:
+            for phrase in content["transcriptPhrases"]:
+                if "text" in phrase:
+                    transcript += f"{phrase['text']} "
 
-        # Try to get more details from the exception
-        if hasattr(e, 'response'):
-            log_error(f"HTTP Response status: {e.response.status_code}")
-            try:
-                log_error(f"HTTP Response body: {e.response.text}")
-            except:
-                log_error("Could not get response body")
+        # Create content for this segment
+        time_range = f"{content['startTimeMs']/1000:.1f}s-{content['endTimeMs']/1000:.1f}s"
 
-        # If it's a RuntimeError from poll_result, try to extract more info
-        if isinstance(e, RuntimeError) and "Request failed" in str(e):
-            log_error("This is a RuntimeError from Azure Content Understanding service")
-            log_error("The actual error details should be in the Azure service logs")
+        full_content += f"Video Segment {time_range}: {description}\n\nTranscript: {transcript}\n\n"
 
-        try:
-            client.delete_analyzer(analyzer_id)
-        except Exception as cleanup_error:
-            log_error(f"Error during cleanup: {cleanup_error}")
-        
+    return full_content
+
+
+def format_document_result(result: dict, document_path: str) -> str:
+    """Markdown/text plus extracted fields for a document result."""
+    document_content = result.get("result", {})
+
+    full_content = f"Document: {os.path.basename(document_path)}\n\n"
+
+    # Extract text content from the analysis result
+    if "contents" in document_content:
+        log_debug(f"Found {len(document_content['contents'])} content sections")
+        for content in document_content["contents"]:
+            # Extract markdown/text content if available
+            if "markdown" in content:
+                full_content += content["markdown"] + "\n\n"
+            elif "text" in content:
+                full_content += content["text"] + "\n\n"
+            elif "content" in content:
+                full_content += content["content"] + "\n\n"
+
+            # Extract any fields (tables, key-value pairs, etc.)
+            if "fields" in content:
+                for field_name, field_value in content["fields"].items():
+                    if isinstance(field_value, dict) and "valueString" in field_value:
+                        full_content += f"{field_name}: {field_value['valueString']}\n"
+                    elif isinstance(field_value, dict) and "content" in field_value:
+                        full_content += f"{field_name}: {field_value['content']}\n"
+
+    # Also check for top-level markdown or content
+    if "markdown" in document_content:
+        full_content += document_content["markdown"]
+    elif "content" in document_content:
+        full_content += document_content["content"]
+
+    return full_content
+
+
+async def process_audio_async(audio_path: str, return_text: bool = False):
+    """
+    Process audio file with a reused audio analyzer.
+    If return_text is True, returns the transcript text instead of the memory content.
+    """
+    log_debug(f"Processing audio: {audio_path}")
+    try:
+        result = await analyze_with_content_understanding("audio", audio_path)
+        if result is None:
+            log_warning("Content Understanding client not available. Skipping audio processing.")
+            return None if return_text else []
+        return format_audio_result(result, audio_path, return_text=return_text)
+    except Exception as e:
+        _log_content_understanding_error("audio", e)
         return None if return_text else []
 
-def process_video(video_path):
-    """Process video files - from user's original working code"""
+
+async def process_video_async(video_path):
+    """Process video files with a reused video analyzer"""
     log_debug(f"Processing video: {video_path}")
-    client = get_content_understanding_client()
-    
-    # Check if client is available
-    if client is None:
-        log_warning("Content Understanding client not available. Skipping video processing.")
-        return []
-    
-    # Create a unique analyzer ID for the video
-    analyzer_id = f"video-analyzer-{str(uuid.uuid4())}"
-    
     try:
-        # Create the video analyzer using the template
-        # Get the directory where this module is located
-        module_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(module_dir, "analyzer_templates", "video_content_understanding.json")
-        log_debug(f"Looking for video analyzer template at: {template_path}")
-        
-        response = client.begin_create_analyzer(
-            analyzer_id=analyzer_id,
-            analyzer_template_path=template_path
-        )
-        result = client.poll_result(response)
-        log_debug(f"Successfully created video analyzer: {analyzer_id}")
-
-        # Analyze the video content
-        response = client.begin_analyze(analyzer_id, video_path)
-        result = client.poll_result(response)
-        log_debug(f"Successfully analyzed video with analyzer: {analyzer_id}")
-        
-        # Process the results
-        video_content = result["result"]["contents"]
-        
-        full_content = f"Video file: {os.path.basename(video_path)}\n\n"
-        
-        for i, content in enumerate(video_content):
-            # Extract relevant information
-            if "fields" in content and "segmentDescription" in content["fields"]:
-                description = content["fields"]["segmentDescription"]["valueString"]
-            else:
-                description = ""
-                
-            transcript = ""
-            if "transcriptPhrases" in content:
-                for phrase in content["transcriptPhrases"]:
-                    if "text" in phrase:
-                        transcript += f"{phrase['text']} "
-            
-            # Create content for this segment
-            time_range = f"{content['startTimeMs']/1000:.1f}s-{content['endTimeMs']/1000:.1f}s"
-            
-            full_content += f"Video Segment {time_range}: {description}\n\nTranscript: {transcript}\n\n"
-        
-        # Cleanup
-        client.delete_analyzer(analyzer_id)
-        return full_content
-        
+        result = await analyze_with_content_understanding("video", video_path)
+        if result is None:
+            log_warning("Content Understanding client not available. Skipping video processing.")
+            return []
+        return format_video_result(result, video_path)
     except Exception as e:
-        log_error(f"Error processing video: {e}")
-        # Try to clean up analyzer even if there was an error
-        try:
-            client.delete_analyzer(analyzer_id)
-        except:
-            pass
+        _log_content_understanding_error("video", e)
         return []
 
-def process_document(document_path):
-    """Process document files using Azure Content Understanding (like video/audio)"""
+
+async def process_document_async(document_path):
+    """Process document files with a reused document analyzer, falling back to GPT-4 Vision"""
     log_debug(f"Processing document: {document_path}")
-    client = get_content_understanding_client()
-    
-    # Check if client is available
-    if client is None:
-        log_warning("Content Understanding client not available. Falling back to GPT-4 Vision method.")
-        return process_document_legacy(document_path)
-    
-    # Create a unique analyzer ID for the document
-    analyzer_id = f"document-analyzer-{str(uuid.uuid4())}"
-    
     try:
-        # Create the document analyzer using the template
-        module_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(module_dir, "analyzer_templates", "content_document.json")
-        log_debug(f"Looking for document analyzer template at: {template_path}")
-        
-        response = client.begin_create_analyzer(
-            analyzer_id=analyzer_id,
-            analyzer_template_path=template_path
-        )
-        result = client.poll_result(response)
-        log_debug(f"Successfully created document analyzer: {analyzer_id}")
-
-        # Analyze the document content
-        response = client.begin_analyze(analyzer_id, document_path)
-        result = client.poll_result(response)
-        log_debug(f"Successfully analyzed document with analyzer: {analyzer_id}")
-
-        # Log the result structure for debugging
-        log_debug(f"Result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
-        if "result" in result:
-            log_debug(f"result['result'] keys: {list(result['result'].keys()) if isinstance(result.get('result'), dict) else 'Not a dict'}")
-        
-        # Extract content from the result
-        document_content = result.get("result", {})
-        
-        full_content = f"Document: {os.path.basename(document_path)}\n\n"
-        
-        # Extract text content from the analysis result
-        if "contents" in document_content:
-            log_debug(f"Found {len(document_content['contents'])} content sections")
-            for i, content in enumerate(document_content["contents"]):
-                log_debug(f"Content {i} keys: {list(content.keys()) if isinstance(content, dict) else 'Not a dict'}")
-                
-                # Extract markdown/text content if available
-                if "markdown" in content:
-                    full_content += content["markdown"] + "\n\n"
-                elif "text" in content:
-                    full_content += content["text"] + "\n\n"
-                elif "content" in content:
-                    full_content += content["content"] + "\n\n"
-                    
-                # Extract any fields (tables, key-value pairs, etc.)
-                if "fields" in content:
-                    for field_name, field_value in content["fields"].items():
-                        if isinstance(field_value, dict) and "valueString" in field_value:
-                            full_content += f"{field_name}: {field_value['valueString']}\n"
-                        elif isinstance(field_value, dict) and "content" in field_value:
-                            full_content += f"{field_name}: {field_value['content']}\n"
-        
-        # Also check for top-level markdown or content
-        if "markdown" in document_content:
-            full_content += document_content["markdown"]
-        elif "content" in document_content:
-            full_content += document_content["content"]
-
-        # Cleanup
-        client.delete_analyzer(analyzer_id)
-
+        result = await analyze_with_content_understanding("document", document_path)
+        if result is None:
+            log_warning("Content Understanding client not available. Falling back to GPT-4 Vision method.")
+            return await process_document_legacy_async(document_path)
+        full_content = format_document_result(result, document_path)
         log_debug(f"Document extracted content length: {len(full_content)} chars")
         return full_content
-        
     except Exception as e:
         log_error(f"Error processing document with Content Understanding: {e}")
         import traceback
         log_error(traceback.format_exc())
-        
-        # Try to clean up analyzer even if there was an error
-        try:
-            client.delete_analyzer(analyzer_id)
-        except:
-            pass
-        
+
         # Fall back to legacy GPT-4 Vision method
         log_warning("Falling back to GPT-4 Vision method...")
-        return process_document_legacy(document_path)
+        return await process_document_legacy_async(document_path)
 
 
-def process_document_legacy(document_path):
-    """Legacy document processing using GPT-4 Vision (fallback method)"""
+def process_audio(audio_path: str, return_text: bool = False):
+    """Synchronous wrapper for ``process_audio_async`` (call from threads, not the event loop)."""
+    return asyncio.run(process_audio_async(audio_path, return_text=return_text))
+
+
+def process_video(video_path):
+    """Synchronous wrapper for ``process_video_async`` (call from threads, not the event loop)."""
+    return asyncio.run(process_video_async(video_path))
+
+
+def process_document(document_path):
+    """Synchronous wrapper for ``process_document_async`` (call from threads, not the event loop)."""
+    return asyncio.run(process_document_async(document_path))
+
+
+async def process_document_legacy_async(document_path):
+    """Legacy document processing using GPT-4 Vision (fallback method).
+
+    Pages are rendered in memory and extracted concurrently by
+    ``doc2md_utils``; nothing is written to the shared images/markdown dirs.
+    """
     log_debug(f"Processing document (legacy): {document_path}")
-    
-    # Convert file to PDF
-    pdf_path = doc2md_utils.convert_to_pdf(document_path)
-    if not pdf_path:
+
+    pages = await doc2md_utils.document_to_markdown_pages(document_path)
+    if pages is None:
         log_error(f"Could not convert {document_path} to PDF")
         return []
+    log_debug(f"Total Pages Processed: {len(pages)}")
 
-    # Extract PDF pages to images
-    doc_id = doc2md_utils.extract_pdf_pages_to_images(pdf_path, image_path)
-    pdf_images_dir = os.path.join(image_path, doc_id)
-    files = doc2md_utils.get_all_files(pdf_images_dir)
-    log_debug(f"Total Image Files to Process: {len(files)}")
+    # Combine all markdown content in page order
+    return "".join(f"{markdown}\n\n" for markdown in pages)
 
-    # Convert images to markdown in parallel
-    markdown_out_dir = os.path.join(markdown_path, doc_id)
-    doc2md_utils.ensure_directory_exists(markdown_out_dir)
-    
-    partial_process_image = partial(doc2md_utils.process_image, markdown_out_dir=markdown_out_dir)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=15) as executor:
-        results = list(executor.map(partial_process_image, files))
-    
-    # Get markdown files exactly like in the user's code
-    files = os.listdir(markdown_out_dir)
-    txt_files = [f for f in files if f.endswith('.txt')]
-    log_debug(f"Total Markdown Files: {len(txt_files)}")
-    
-    # Combine all markdown content
-    combined_content = ""
-    for txt_file in sorted(txt_files):
-        txt_path = os.path.join(markdown_out_dir, txt_file)
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            combined_content += f.read() + "\n\n"
-    
-    return combined_content
+
+def process_document_legacy(document_path):
+    """Synchronous wrapper for ``process_document_legacy_async`` (call from threads, not the event loop)."""
+    return asyncio.run(process_document_legacy_async(document_path))
 
 def process_image(image_path):
     """Process a single image file - from user's original working code"""
@@ -483,8 +622,8 @@ def process_text_file(text_file_path):
         log_error(traceback.format_exc())
         return ""
 
-def process_file(file_path):
-    """Process a file based on its type - from user's original working code"""
+async def process_file_async(file_path):
+    """Process a file based on its type; Content Understanding calls stay on the event loop"""
     if not os.path.exists(file_path):
         log_error(f"File {file_path} does not exist")
         return ""
@@ -496,23 +635,27 @@ def process_file(file_path):
     log_debug(f"Processing {file_type} file: {abs_file_path}")
     
     if file_type == "audio":
-        return process_audio(abs_file_path, return_text=True)
+        return await process_audio_async(abs_file_path, return_text=True)
     elif file_type == "video":
-        return process_video(abs_file_path)
+        return await process_video_async(abs_file_path)
     elif file_type == "image":
-        return process_image(abs_file_path)
+        return await asyncio.to_thread(process_image, abs_file_path)
     elif file_type == "document":
         # Special handling for .txt files
         if abs_file_path.lower().endswith('.txt'):
-            return process_text_file(abs_file_path)
+            return await asyncio.to_thread(process_text_file, abs_file_path)
         else:
-            return process_document(abs_file_path)
+            return await process_document_async(abs_file_path)
     elif file_type == "text":
-        return process_text_file(abs_file_path)
+        return await asyncio.to_thread(process_text_file, abs_file_path)
     else:
         log_error(f"Unsupported file type for {abs_file_path}")
         return ""
 
+def process_file(file_path):
+    """Synchronous wrapper for ``process_file_async`` (call from threads, not the event loop)."""
+    return asyncio.run(process_file_async(file_path))
+
 # A2A Integration Function
 async def process_file_part(file_part, artifact_info=None, session_id: str = None):
     """
@@ -594,11 +737,8 @@ async def process_file_part(file_part, artifact_info=None, session_id: str = Non
         with open(temp_file_path, 'wb') as f:
             f.write(file_bytes)
         
-        # Process the file using the user's proven working logic
-        # Run in thread pool to avoid blocking the async event loop
-        import asyncio
-        loop = asyncio.get_event_loop()
-        processed_content = await loop.run_in_executor(None, process_file, temp_file_path)
+        # Content Understanding is awaited directly; local parsing runs in threads
+        processed_content = await process_file_async(temp_file_path)
         
         # Clean up temporary file
         try:
@@ -650,6 +790,8 @@ async def process_file_part(file_part, artifact_info=None, session_id: str = Non
             store_success = await a2a_memory_service.store_interaction(interaction_data, session_id=session_id)
             if store_success:
                 log_info(f"[A2ADocumentProcessor] Successfully stored in memory: {filename} (session: {session_id}, chunks: {chunks_stored})")
+                from service.file_index import get_file_index
+                get_file_index().file_processed(session_id, filename)
             else:
                 log_error(f"[A2ADocumentProcessor] FAILED to store in memory: {filename} (session: {session_id}) -- store_interaction returned False")
                 chunks_stored = 0  # Correct the estimate since storage actually failed
@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict, Any
+import asyncio
 import os
 import json
 import uuid
@@ -17,7 +18,6 @@ from azure.search.documents.indexes.models import (
 )
 import time
 from azure.core.exceptions import ResourceNotFoundError
-import openai
 import sys
 
 ROOT_ENV_PATH = Path(__file__).resolve().parents[3] / ".env"
@@ -29,6 +29,9 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from log_config import log_memory_debug, log_info, log_success, log_warning, log_error, log_debug
+from .embedding_cache import EmbeddingCache
+from .embedding_engine import EmbeddingEngine
+from .memory_backends import LocalVectorIndex, MemorySearchBackend, TieredSearchClient
 
 # Azure Cognitive Search configuration
 service_endpoint = os.getenv("AZURE_SEARCH_SERVICE_ENDPOINT")
@@ -42,9 +45,41 @@ vector_algorithm_name = os.getenv("AZURE_SEARCH_VECTOR_ALGORITHM", "a2a-hnsw-con
 azure_openai_endpoint = os.getenv("AZURE_OPENAI_EMBEDDINGS_ENDPOINT")
 azure_openai_key = os.getenv("AZURE_OPENAI_EMBEDDINGS_KEY")
 azure_openai_deployment = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT")
+embedding_batch_size = int(os.getenv("A2A_EMBEDDING_BATCH_SIZE", "16"))
+embedding_concurrency = int(os.getenv("A2A_EMBEDDING_CONCURRENCY", "4"))
+embedding_cache_max_mb = int(os.getenv("A2A_EMBEDDING_CACHE_MAX_MB", "64"))
+embedding_cache_dir = os.getenv("A2A_EMBEDDING_CACHE_DIR")  # Enables the on-disk tier
+embedding_cache_disk_entries = int(os.getenv("A2A_EMBEDDING_CACHE_DISK_ENTRIES", "50000"))
+
+# Memory search backend: "azure" (Azure AI Search), "local" (in-process NumPy index)
+# or "tiered" (local L1 for hot sessions in front of Azure AI Search)
+memory_backend = os.getenv("A2A_MEMORY_BACKEND", "azure").strip().lower()
+memory_local_dir = os.getenv("A2A_MEMORY_LOCAL_DIR")  # Persist the local index here (memory only if unset)
+memory_hot_sessions = int(os.getenv("A2A_MEMORY_HOT_SESSIONS", "32"))
+memory_hot_ttl = float(os.getenv("A2A_MEMORY_HOT_TTL_SECONDS", "300"))  # Re-hydrate hot sessions after this
 
 class A2AMemoryService:
-    def __init__(self):
+    def __init__(
+        self,
+        search_client: Optional[MemorySearchBackend] = None,
+        embedding_engine: Optional[EmbeddingEngine] = None,
+    ):
+        self.index_name = index_name
+        self.backend = memory_backend
+
+        # An injected backend (tests, benchmarks) or A2A_MEMORY_BACKEND=local
+        # runs entirely in-process without Azure AI Search
+        if search_client is not None or memory_backend == "local":
+            self.credential = None
+            self.index_client = None
+            self.embedding_engine = embedding_engine or self._build_embedding_engine()
+            self.search_client = search_client or LocalVectorIndex(vector_dimension, memory_local_dir)
+            if search_client is not None:
+                self.backend = "custom"
+            self._enabled = True
+            log_info(f"Memory service using {self.backend} search backend")
+            return
+
         # Initialize the search clients only if environment variables are available
         if not admin_key or not service_endpoint:
             log_warning(f"Azure Search not configured (admin_key: {admin_key is not None}, service_endpoint: {service_endpoint is not None})")
@@ -53,6 +88,7 @@ class A2AMemoryService:
             self.index_client = None
             self.search_client = None
             self.azure_openai_client = None
+            self.embedding_engine = None
             self._enabled = False
             return
             
@@ -64,19 +100,9 @@ class A2AMemoryService:
             )
             
             # Initialize other clients only if Azure OpenAI config is available
-            if azure_openai_endpoint and azure_openai_key and azure_openai_deployment:
-                self.openai_client = openai.AzureOpenAI(
-                    azure_endpoint=azure_openai_endpoint,
-                    api_key=azure_openai_key,
-                    api_version="2024-02-01"
-                )
-                log_info("Azure OpenAI client initialized")
-            else:
-                log_warning("Azure OpenAI not configured - embeddings disabled")
-                self.openai_client = None
+            self.embedding_engine = embedding_engine or self._build_embedding_engine()
             
             self.search_client = None
-            self.index_name = index_name
             
             self._enabled = True
             log_info("Azure Search initialized successfully")
@@ -84,16 +110,48 @@ class A2AMemoryService:
             # Create index on initialization
             self._create_index_if_not_exists()
             
+            if memory_backend == "tiered" and self.search_client:
+                self.search_client = TieredSearchClient(
+                    LocalVectorIndex(vector_dimension, memory_local_dir),
+                    self.search_client,
+                    max_hot_sessions=memory_hot_sessions,
+                    hot_ttl=memory_hot_ttl,
+                )
+                log_info(f"Memory service using local L1 index for up to {memory_hot_sessions} hot sessions")
+            
         except Exception as e:
             log_error(f"Failed to initialize Azure Search: {e}")
             self.credential = None
             self.index_client = None
             self.search_client = None
             self.azure_openai_client = None
-            self.openai_client = None
+            self.embedding_engine = None
             self._enabled = False
             return
 
+    def _build_embedding_engine(self) -> Optional[EmbeddingEngine]:
+        """Create the embedding engine if Azure OpenAI embeddings are configured."""
+        if not (azure_openai_endpoint and azure_openai_key and azure_openai_deployment):
+            log_warning("Azure OpenAI not configured - embeddings disabled")
+            return None
+        engine = EmbeddingEngine(
+            endpoint=azure_openai_endpoint,
+            api_key=azure_openai_key,
+            deployment=azure_openai_deployment,
+            api_version="2024-02-01",
+            max_batch_size=embedding_batch_size,
+            max_concurrency=embedding_concurrency,
+            cache=EmbeddingCache(
+                deployment=azure_openai_deployment,
+                dim=vector_dimension,
+                max_memory_bytes=embedding_cache_max_mb * 1024 * 1024,
+                disk_dir=embedding_cache_dir,
+                disk_capacity=embedding_cache_disk_entries,
+            ),
+        )
+        log_info("Azure OpenAI embedding engine initialized")
+        return engine
+
     def _create_index_if_not_exists(self):
         """Create index if it doesn't exist - wrapper for _ensure_index_exists"""
         return self._ensure_index_exists()
@@ -264,23 +322,39 @@ class A2AMemoryService:
 
     async def _create_embedding(self, text: str) -> List[float]:
         """Create embedding for text using Azure OpenAI"""
-        log_memory_debug(f"_create_embedding called with text length: {len(text)}")
-        try:
-            log_memory_debug("Calling Azure OpenAI embeddings API...")
-            response = self.openai_client.embeddings.create(
-                model=azure_openai_deployment,
-                input=text
-            )
-            log_memory_debug("Azure OpenAI embeddings API returned successfully")
-            embedding = response.data[0].embedding
-            log_memory_debug(f"Extracted embedding with {len(embedding)} dimensions")
-            return embedding
-        except Exception as e:
-            log_memory_debug(f"Error creating embedding: {str(e)}")
-            log_memory_debug(f"Exception type: {type(e).__name__}")
-            import traceback
-            log_memory_debug(f"Traceback: {traceback.format_exc()}")
-            return []
+        embeddings = await self._create_embeddings([text])
+        return embeddings[0]
+
+    async def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embeddings for many texts in batched, non-blocking requests.
+
+        Returns one list per input (empty when that input failed).
+        """
+        if not self.embedding_engine:
+            log_memory_debug("Embedding engine not configured")
+            return [[] for _ in texts]
+        log_memory_debug(f"_create_embeddings called with {len(texts)} text(s)")
+        return await self.embedding_engine.embed_many(texts)
+
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss and size metrics of the embedding cache (empty when disabled)."""
+        if not self.embedding_engine or not self.embedding_engine.cache:
+            return {}
+        return self.embedding_engine.cache.stats()
+
+    def close(self) -> None:
+        """Persist pending local index writes (LocalVectorIndex / tiered L1)."""
+        if isinstance(self.search_client, (LocalVectorIndex, TieredSearchClient)):
+            self.search_client.close()
+
+    def get_search_backend_stats(self) -> Dict[str, Any]:
+        """L1 hit and hydration metrics when the tiered backend is active."""
+        stats = {"backend": self.backend}
+        if isinstance(self.search_client, TieredSearchClient):
+            stats.update(self.search_client.stats())
+        elif isinstance(self.search_client, LocalVectorIndex):
+            stats["documents"] = len(self.search_client)
+        return stats
 
     def _chunk_text(self, text: str, chunk_size: int = 6000, overlap: int = 500) -> List[Dict[str, Any]]:
         """Split text into overlapping chunks for embedding.
@@ -444,7 +518,7 @@ class A2AMemoryService:
                 "interaction_vector": embedding
             }
 
-            self.search_client.upload_documents([document])
+            await asyncio.to_thread(self.search_client.upload_documents, [document])
             log_debug(f"[MEMORY] Stored document {document['id']} (agent: {interaction_data.get('agent_name', '')}, session: {session_id})")
             return True
 
@@ -468,18 +542,21 @@ class A2AMemoryService:
             
             documents_to_upload = []
             
-            for chunk in chunks:
-                chunk_id = f"{base_id}_chunk_{chunk['chunk_index']}"
-                
-                # Create embedding for this chunk
-                searchable_text = f"""
+            # Embed every chunk in one batched pass
+            searchable_texts = [
+                f"""
                 Document: {filename}
                 Agent: {agent_name}
                 Chunk {chunk['chunk_index'] + 1} of {chunk['total_chunks']}:
                 {chunk['text']}
-                """
+                """.strip()
+                for chunk in chunks
+            ]
+            embeddings = await self._create_embeddings(searchable_texts)
+            
+            for chunk, embedding in zip(chunks, embeddings):
+                chunk_id = f"{base_id}_chunk_{chunk['chunk_index']}"
                 
-                embedding = await self._create_embedding(searchable_text.strip())
                 if not embedding or len(embedding) != vector_dimension:
                     log_memory_debug(f"Failed to create embedding for chunk {chunk['chunk_index']}")
                     continue
@@ -511,8 +588,8 @@ class A2AMemoryService:
                 documents_to_upload.append(document)
             
             if documents_to_upload:
-                # Upload all chunks in batch
-                self.search_client.upload_documents(documents_to_upload)
+                # Upload all chunks in batch (off the event loop)
+                await asyncio.to_thread(self.search_client.upload_documents, documents_to_upload)
                 log_success(f"Successfully stored {len(documents_to_upload)} chunks for document {base_id} (session: {session_id})")
                 return True
             else:
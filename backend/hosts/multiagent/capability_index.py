@@ -0,0 +1,175 @@
+"""
+Capability index over registered agent cards, used to shortlist agents for
+routing and planning prompts.
+
+Each card's weighted keyword terms (name, skills, tags, descriptions) are
+computed once when the card is registered and only recomputed when the card
+changes, so re-registering a session's agents on every request is cheap. A
+goal or step is scored against the index with the same keyword scoring as
+``AgentRegistry.search_agents``; when an embedding function is configured,
+cosine similarity of cached card embeddings is added to the score.
+
+Only the top ``AGENT_SHORTLIST_SIZE`` agents get their full card in the
+planner prompt; the rest are listed by name so the planner can still pick
+them.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[2]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_debug, log_warning
+from service.agent_registry import agent_terms, inverse_document_frequencies, keyword_score, keyword_terms
+
+AGENT_SHORTLIST_SIZE = int(os.getenv("AGENT_SHORTLIST_SIZE", "8"))
+AGENT_SHORTLIST_EMBEDDINGS = os.getenv("AGENT_SHORTLIST_EMBEDDINGS", "false").lower() == "true"
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def card_to_dict(card) -> Dict[str, Any]:
+    """The routing-relevant fields of an AgentCard, in the registry's dict shape."""
+    skills = []
+    for skill in getattr(card, 'skills', None) or []:
+        skills.append({
+            "id": getattr(skill, 'id', ''),
+            "name": getattr(skill, 'name', ''),
+            "description": getattr(skill, 'description', ''),
+            "tags": list(getattr(skill, 'tags', None) or []),
+            "examples": list(getattr(skill, 'examples', None) or []),
+        })
+    return {"name": card.name, "description": getattr(card, 'description', '') or '', "skills": skills}
+
+
+@dataclass
+class _IndexedAgent:
+    fingerprint: str
+    text: str
+    terms: Dict[str, float]
+    vector: Optional[np.ndarray] = None
+
+
+class CapabilityIndex:
+    """Incrementally maintained keyword (and optional embedding) index of agent cards.
+
+    Args:
+        embed: Optional async function embedding a list of texts; enables
+            semantic scoring on top of keyword scoring
+        shortlist_size: Default number of agents returned by ``shortlist``
+    """
+
+    def __init__(self, embed: Optional[EmbedFn] = None, shortlist_size: int = AGENT_SHORTLIST_SIZE):
+        self.embed = embed
+        self.shortlist_size = shortlist_size
+        self._agents: Dict[str, _IndexedAgent] = {}
+        self._idf: Optional[Dict[str, float]] = None
+        self.reindexed = 0
+
+    def index_card(self, card) -> bool:
+        """Add or update a card. Returns False if it was already indexed unchanged."""
+        data = card_to_dict(card)
+        fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+        existing = self._agents.get(data["name"])
+        if existing is not None and existing.fingerprint == fingerprint:
+            return False
+        text = " ".join(
+            [data["name"], data["description"]]
+            + [f"{s['name']}: {s['description']} {' '.join(s['tags'])}" for s in data["skills"]]
+        )
+        self._agents[data["name"]] = _IndexedAgent(fingerprint, text, agent_terms(data))
+        self._idf = None
+        self.reindexed += 1
+        log_debug(f"[CapabilityIndex] Indexed {data['name']} ({len(self._agents)} agents)")
+        return True
+
+    def remove(self, name: str) -> None:
+        if self._agents.pop(name, None) is not None:
+            self._idf = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._agents
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def keyword_scores(self, query: str, names: Iterable[str]) -> Dict[str, float]:
+        if self._idf is None:
+            self._idf = inverse_document_frequencies([agent.terms for agent in self._agents.values()])
+        query_terms = keyword_terms(query)
+        return {
+            name: keyword_score(query_terms, self._agents[name].terms, self._idf)
+            for name in names if name in self._agents
+        }
+
+    async def _semantic_scores(self, query: str, names: List[str]) -> Dict[str, float]:
+        missing = [name for name in names if self._agents[name].vector is None]
+        try:
+            vectors = await self.embed([query] + [self._agents[name].text for name in missing])
+        except Exception as e:
+            log_warning(f"[CapabilityIndex] Embedding failed, using keyword scores only: {e}")
+            return {}
+        for name, vector in zip(missing, vectors[1:]):
+            if vector:
+                self._agents[name].vector = _unit(vector)
+        if not vectors or not vectors[0]:
+            return {}
+        query_vector = _unit(vectors[0])
+        return {
+            name: float(np.dot(query_vector, self._agents[name].vector))
+            for name in names if self._agents[name].vector is not None
+        }
+
+    async def shortlist(
+        self,
+        query: str,
+        names: Iterable[str],
+        size: Optional[int] = None,
+        always_include: Iterable[str] = (),
+    ) -> List[str]:
+        """The most relevant of ``names`` for ``query``, in their original order.
+
+        Agents named in the query, ``always_include`` and names that aren't
+        indexed (nothing is known about them) are always kept.
+        All names are returned when they already fit, or when nothing in the
+        query matches any card (there is no signal to shortlist on).
+        """
+        names = list(names)
+        size = self.shortlist_size if size is None else size
+        if len(names) <= size:
+            return names
+
+        query_lower = (query or "").lower()
+        keep = {name for name in always_include if name in names}
+        keep.update(name for name in names if name.lower() in query_lower or name not in self._agents)
+
+        indexed = [name for name in names if name in self._agents]
+        scores = self.keyword_scores(query, indexed)
+        if self.embed is not None and indexed:
+            for name, similarity in (await self._semantic_scores(query, indexed)).items():
+                scores[name] = scores.get(name, 0.0) + similarity
+        if not any(score > 0 for score in scores.values()):
+            return names
+
+        ranked = sorted((name for name in scores if scores[name] > 0), key=lambda name: -scores[name])
+        for name in ranked:
+            if len(keep) >= size:
+                break
+            keep.add(name)
+        log_debug(f"[CapabilityIndex] Shortlisted {len(keep)}/{len(names)} agents")
+        return [name for name in names if name in keep]
+
+
+def _unit(vector) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else array
@@ -1,10 +1,13 @@
+import asyncio
 import requests
 from requests.models import Response
+import httpx
 import logging
 import json
 import sys
 import time
 from pathlib import Path
+from typing import Dict, Optional, Union
 
 # Add backend directory to path for log_config import
 backend_dir = Path(__file__).resolve().parent.parent
@@ -13,6 +16,21 @@ if str(backend_dir) not in sys.path:
 
 from log_config import log_debug, log_error
 
+# Polling backoff for long-running operations when the service sends no Retry-After
+POLL_INITIAL_DELAY_SECONDS = 0.5
+POLL_MAX_DELAY_SECONDS = 8.0
+
+
+def next_poll_delay(headers, delay: float) -> float:
+    """Seconds to wait before the next poll: ``Retry-After`` if present, else ``delay``."""
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
 
 class AzureContentUnderstandingClient:
     def __init__(
@@ -276,15 +294,18 @@ class AzureContentUnderstandingClient:
         self,
         response: Response,
         timeout_seconds: int = 300,
-        polling_interval_seconds: int = 2,
+        polling_interval_seconds: float = POLL_INITIAL_DELAY_SECONDS,
     ):
         """
         Polls the result of an asynchronous operation until it completes or times out.
 
+        Honors the service's ``Retry-After`` header; otherwise the delay starts at
+        ``polling_interval_seconds`` and doubles up to ``POLL_MAX_DELAY_SECONDS``.
+
         Args:
             response (Response): The initial response object containing the operation location.
             timeout_seconds (int, optional): The maximum number of seconds to wait for the operation to complete. Defaults to 300.
-            polling_interval_seconds (int, optional): The number of seconds to wait between polling attempts. Defaults to 2.
+            polling_interval_seconds (float, optional): The initial number of seconds to wait between polling attempts. Defaults to 0.5.
 
         Raises:
             ValueError: If the operation location is not found in the response headers.
@@ -302,6 +323,7 @@ class AzureContentUnderstandingClient:
         headers.update(self._headers)
 
         start_time = time.time()
+        delay = polling_interval_seconds
         while True:
             elapsed_time = time.time() - start_time
             if elapsed_time > timeout_seconds:
@@ -326,4 +348,195 @@ class AzureContentUnderstandingClient:
                 self._logger.info(
                     f"Request {operation_location.split('/')[-1].split('?')[0]} in progress ..."
                 )
-            time.sleep(polling_interval_seconds)
+            time.sleep(next_poll_delay(response.headers, delay))
+            delay = min(delay * 2, POLL_MAX_DELAY_SECONDS)
+
+
+class AsyncContentUnderstandingClient:
+    """Async Content Understanding client for long-lived, reused analyzers.
+
+    Unlike ``AzureContentUnderstandingClient`` it keeps one pooled
+    ``httpx.AsyncClient``, fetches a fresh bearer token per request (the
+    token provider caches it), and creates each analyzer at most once:
+    ``ensure_analyzer`` is idempotent and concurrent callers share the
+    creation.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_version: str,
+        subscription_key: str = None,
+        token_provider: callable = None,
+        x_ms_useragent: str = "cu-sample-code",
+        timeout_seconds: float = 60.0,
+    ):
+        if not subscription_key and not token_provider:
+            raise ValueError(
+                "Either subscription key or token provider must be provided."
+            )
+        if not api_version:
+            raise ValueError("API version must be provided.")
+        if not endpoint:
+            raise ValueError("Endpoint must be provided.")
+
+        self._endpoint = endpoint.rstrip("/")
+        self._api_version = api_version
+        self._subscription_key = subscription_key
+        self._token_provider = token_provider
+        self._useragent = x_ms_useragent
+        self._timeout = timeout_seconds
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop = None
+        self._ready_analyzers = set()
+        self._creating: Dict[tuple, asyncio.Future] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # httpx clients are bound to the event loop they were first used on
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self._timeout),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120),
+            )
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    async def _headers(self, extra: Dict[str, str] = None) -> Dict[str, str]:
+        if self._subscription_key:
+            headers = {"Ocp-Apim-Subscription-Key": self._subscription_key}
+        else:
+            token = await asyncio.to_thread(self._token_provider)
+            headers = {"Authorization": f"Bearer {token}"}
+        headers["x-ms-useragent"] = self._useragent
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def _analyzer_url(self, analyzer_id: str, action: str = "") -> str:
+        return f"{self._endpoint}/contentunderstanding/analyzers/{analyzer_id}{action}?api-version={self._api_version}"
+
+    def forget_analyzer(self, analyzer_id: str) -> None:
+        """Drop an analyzer from the ready set (e.g. it was deleted out of band)."""
+        self._ready_analyzers.discard(analyzer_id)
+
+    async def ensure_analyzer(self, analyzer_id: str, analyzer_template: dict) -> None:
+        """Make sure the analyzer exists, creating it from the template if needed."""
+        if analyzer_id in self._ready_analyzers:
+            return
+        key = (id(asyncio.get_running_loop()), analyzer_id)
+        pending = self._creating.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._creating[key] = future
+        try:
+            await self._create_analyzer(analyzer_id, analyzer_template)
+            self._ready_analyzers.add(analyzer_id)
+            future.set_result(None)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._creating.pop(key, None)
+
+    async def _create_analyzer(self, analyzer_id: str, analyzer_template: dict) -> None:
+        response = await self.client.get(self._analyzer_url(analyzer_id), headers=await self._headers())
+        if response.status_code == 200:
+            log_debug(f"Reusing existing analyzer: {analyzer_id}")
+            return
+        if response.status_code != 404:
+            response.raise_for_status()
+
+        response = await self.client.put(
+            self._analyzer_url(analyzer_id),
+            headers=await self._headers({"Content-Type": "application/json"}),
+            json=analyzer_template,
+        )
+        if response.status_code == 409:
+            # Created concurrently by another worker or replica
+            log_debug(f"Analyzer already exists: {analyzer_id}")
+            return
+        response.raise_for_status()
+        if response.headers.get("operation-location"):
+            await self.poll_result(response.headers["operation-location"])
+        log_debug(f"Created analyzer: {analyzer_id}")
+
+    async def begin_analyze(self, analyzer_id: str, data: Union[bytes, str]) -> httpx.Response:
+        """Start analyzing raw bytes or a URL; returns the accepted response."""
+        if isinstance(data, str):
+            response = await self.client.post(
+                self._analyzer_url(analyzer_id, ":analyze"),
+                headers=await self._headers({"Content-Type": "application/json"}),
+                json={"url": data},
+            )
+        else:
+            response = await self.client.post(
+                self._analyzer_url(analyzer_id, ":analyze"),
+                headers=await self._headers({"Content-Type": "application/octet-stream"}),
+                content=data,
+            )
+        if response.status_code == 404:
+            self.forget_analyzer(analyzer_id)
+        response.raise_for_status()
+        return response
+
+    async def poll_result(
+        self,
+        operation_location: str,
+        timeout_seconds: float = 300,
+        initial_delay_seconds: float = POLL_INITIAL_DELAY_SECONDS,
+    ) -> dict:
+        """Poll a long-running operation until it succeeds, fails or times out.
+
+        Honors ``Retry-After``; otherwise backs off exponentially from
+        ``initial_delay_seconds`` to ``POLL_MAX_DELAY_SECONDS``.
+        """
+        start_time = time.monotonic()
+        delay = initial_delay_seconds
+        while True:
+            response = await self.client.get(operation_location, headers=await self._headers())
+            response.raise_for_status()
+            body = response.json()
+            status = (body.get("status") or "").lower()
+            elapsed_time = time.monotonic() - start_time
+            if status == "succeeded":
+                log_debug(f"Request result is ready after {elapsed_time:.2f} seconds.")
+                return body
+            if status == "failed":
+                log_debug(f"Azure Content Understanding failed. Full response: {body}")
+                raise RuntimeError(f"Request failed. Details: {body}")
+
+            wait = next_poll_delay(response.headers, delay)
+            if elapsed_time + wait > timeout_seconds:
+                raise TimeoutError(f"Operation timed out after {timeout_seconds:.2f} seconds.")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, POLL_MAX_DELAY_SECONDS)
+
+    async def analyze(self, analyzer_id: str, data: Union[bytes, str], analyzer_template: dict = None,
+                      timeout_seconds: float = 300) -> dict:
+        """Analyze with a reused analyzer, recreating it once if it disappeared."""
+        for attempt in range(2):
+            if analyzer_template is not None:
+                await self.ensure_analyzer(analyzer_id, analyzer_template)
+            try:
+                response = await self.begin_analyze(analyzer_id, data)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404 and analyzer_template is not None and attempt == 0:
+                    log_debug(f"Analyzer {analyzer_id} not found, recreating")
+                    continue
+                raise
+            operation_location = response.headers.get("operation-location", "")
+            if not operation_location:
+                raise ValueError("Operation location not found in response headers.")
+            return await self.poll_result(operation_location, timeout_seconds=timeout_seconds)
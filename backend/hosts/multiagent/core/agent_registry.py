@@ -26,6 +26,7 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from log_config import log_debug, log_info, log_error
+from service.task_supervisor import spawn
 
 from ..remote_agent_connection import RemoteAgentConnections
 
@@ -327,6 +328,8 @@ class AgentRegistry:
         remote_connection = RemoteAgentConnections(self.httpx_client, card, self.task_callback)
         self.remote_agent_connections[card.name] = remote_connection
         self.cards[card.name] = card
+        # No-op unless the card is new or changed since it was last indexed
+        self.capability_index.index_card(card)
         
         agent_info = []
         for ra in self.list_remote_agents():
@@ -347,7 +350,7 @@ class AgentRegistry:
         self._emit_agent_registration_event(card)
         
         if self.agent:
-            asyncio.create_task(self._update_agent_instructions())
+            spawn("persistence", self._update_agent_instructions())
 
     def list_remote_agents(self) -> List[Dict[str, Any]]:
         """
@@ -372,6 +375,11 @@ class AgentRegistry:
                     }
                     skills_list.append(skill_dict)
                 agent_info['skills'] = skills_list
+
+            # Per-agent latency/error metrics and circuit state from the transport
+            connection = self.remote_agent_connections.get(card.name)
+            if connection is not None:
+                agent_info['metrics'] = connection.get_stats()
             
             agents.append(agent_info)
         
@@ -403,5 +411,5 @@ class AgentRegistry:
                 "status": "info"
             }]
         
-        log_debug(f"[TOOL] list_remote_agents_sync returning: {result}")
+        log_debug("[TOOL] list_remote_agents_sync returning: %s", result)
         return result
@@ -6,6 +6,7 @@ This module contains methods related to:
 - Azure Blob Storage client setup and verification
 - Azure authentication with token caching and retry logic
 - OpenAI endpoint conversion
+- Pooled Azure OpenAI clients with a shared, cached bearer token
 
 These are extracted from foundry_agent_a2a.py to improve code organization.
 The class is designed to be used as a mixin with FoundryHostAgent2.
@@ -13,8 +14,12 @@ The class is designed to be used as a mixin with FoundryHostAgent2.
 
 import asyncio
 import os
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
 
 # Import logging utilities
 import sys
@@ -31,6 +36,14 @@ from log_config import (
     log_foundry_debug,
 )
 
+from ..utils import normalize_env_int
+
+# Token scope for Azure OpenAI / Foundry data-plane calls
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# Refresh the shared bearer token this many seconds before it expires
+TOKEN_REFRESH_BUFFER_SECONDS = 300
+
 
 class AzureClients:
     """
@@ -41,6 +54,7 @@ class AzureClients:
     - Azure Blob Storage client setup
     - Authentication token management with caching
     - OpenAI endpoint conversion
+    - Pooled AsyncAzureOpenAI clients keyed by (endpoint, api_version)
     
     Expected instance attributes (set by main class __init__):
     - self.endpoint: str
@@ -51,6 +65,8 @@ class AzureClients:
     - self._token_expiry: Optional[datetime]
     - self._azure_blob_client: Any
     - self._azure_blob_container: Optional[str]
+    - self._pooled_openai_clients: Dict[Tuple[str, str], Any]
+    - self._shared_token_provider: Optional[Callable[[], str]]
     """
 
     async def _ensure_project_client(self):
@@ -126,6 +142,100 @@ class AzureClients:
             )
             log_foundry_debug(f"OpenAI client ready at {azure_endpoint} (auto-refreshing token)")
 
+    def _get_shared_token_provider(self) -> Callable[[], str]:
+        """
+        Return a bearer token provider shared by every pooled OpenAI client.
+
+        A single DefaultAzureCredential is created for the lifetime of the host
+        agent and its token is cached until shortly before expiry, so planner
+        calls never re-run the credential chain.
+        """
+        if self._shared_token_provider is not None:
+            return self._shared_token_provider
+
+        from azure.identity import DefaultAzureCredential
+
+        credential = DefaultAzureCredential(exclude_interactive_browser_credential=True)
+        lock = threading.Lock()
+        cached: Dict[str, Any] = {"token": None, "expires_on": 0}
+
+        def provider() -> str:
+            with lock:
+                if cached["token"] is None or cached["expires_on"] - time.time() < TOKEN_REFRESH_BUFFER_SECONDS:
+                    access_token = credential.get_token(COGNITIVE_SERVICES_SCOPE)
+                    cached["token"] = access_token.token
+                    cached["expires_on"] = access_token.expires_on
+                    log_foundry_debug(f"Refreshed shared Azure OpenAI token (expires_on={access_token.expires_on})")
+                return cached["token"]
+
+        self._shared_token_credential = credential
+        self._shared_token_provider = provider
+        return provider
+
+    def _build_openai_http_client(self) -> httpx.AsyncClient:
+        """Create the keep-alive connection pool used by one pooled OpenAI client."""
+        max_connections = normalize_env_int(os.environ.get("A2A_OPENAI_MAX_CONNECTIONS"), 20)
+        max_keepalive = normalize_env_int(os.environ.get("A2A_OPENAI_MAX_KEEPALIVE_CONNECTIONS"), 10)
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(connect=10.0, read=180.0, write=60.0, pool=30.0),
+            follow_redirects=True,
+        )
+
+    def _get_pooled_openai_client(self, azure_endpoint: str, api_version: str):
+        """
+        Return a cached AsyncAzureOpenAI client for an endpoint/API version pair.
+
+        Model deployments are chosen per request, so every model served from the
+        same endpoint shares one client and its connection pool. The pool is
+        dropped if the event loop changes (httpx clients are loop-bound).
+        """
+        current_loop = asyncio.get_running_loop()
+        if getattr(self, '_pooled_openai_loop', None) is not current_loop:
+            if self._pooled_openai_clients:
+                log_foundry_debug("Event loop changed, discarding pooled OpenAI clients")
+            self._pooled_openai_clients = {}
+            self._pooled_openai_loop = current_loop
+
+        key: Tuple[str, str] = (azure_endpoint.rstrip('/'), api_version)
+        client = self._pooled_openai_clients.get(key)
+        if client is None:
+            from openai import AsyncAzureOpenAI
+            client = AsyncAzureOpenAI(
+                azure_endpoint=key[0],
+                azure_ad_token_provider=self._get_shared_token_provider(),
+                api_version=api_version,
+                http_client=self._build_openai_http_client(),
+            )
+            self._pooled_openai_clients[key] = client
+            log_foundry_debug(f"Created pooled OpenAI client for {key[0]} (api_version={api_version})")
+        return client
+
+    async def close_openai_clients(self):
+        """Close every pooled OpenAI client and release the shared credential."""
+        clients = list(self._pooled_openai_clients.values())
+        self._pooled_openai_clients = {}
+        self._alt_openai_clients = {}
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                log_debug(f"Error closing pooled OpenAI client: {e}")
+        credential = getattr(self, '_shared_token_credential', None)
+        if credential is not None:
+            try:
+                credential.close()
+            except Exception:
+                pass
+        self._shared_token_credential = None
+        self._shared_token_provider = None
+        if clients:
+            log_foundry_debug(f"Closed {len(clients)} pooled OpenAI client(s)")
+
     def _init_azure_blob_client(self):
         """Initialize Azure Blob Storage client if environment variables are configured."""
         try:
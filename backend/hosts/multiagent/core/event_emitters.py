@@ -42,6 +42,7 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from log_config import log_debug, log_info, log_error
+from service.task_supervisor import spawn
 
 
 class EventEmitters:
@@ -206,6 +207,7 @@ class EventEmitters:
                 # Extract file_id from unified blob path: uploads/{session_id}/{file_id}/{filename}
                 # This ensures the WebSocket event file_id matches the blob storage file_id
                 file_id = None
+                blob_session_id = None
                 try:
                     from urllib.parse import urlparse
                     parsed = urlparse(uri)
@@ -214,6 +216,7 @@ class EventEmitters:
                     for i, part in enumerate(path_parts):
                         if part == 'uploads' and i + 2 < len(path_parts):
                             # path_parts[i+1] = session_id, path_parts[i+2] = file_id
+                            blob_session_id = path_parts[i + 1]
                             file_id = path_parts[i + 2]
                             break
                 except Exception as e:
@@ -245,6 +248,18 @@ class EventEmitters:
                     file_info["parallel_call_id"] = parallel_call_id
                 await streamer.stream_file_uploaded(file_info, context_id)
                 log_debug(f"File uploaded event sent: {filename} from {agent_name} (id={file_id}, status={status})")
+                if blob_session_id:
+                    from datetime import datetime, timezone
+                    from urllib.parse import unquote
+                    from service.file_index import IndexedFile, get_file_index
+                    get_file_index().file_added(blob_session_id, IndexedFile(
+                        id=file_id,
+                        filename=unquote(path_parts[-1]) or filename,
+                        size=size,
+                        content_type=content_type,
+                        uploaded_at=datetime.now(timezone.utc).isoformat(),
+                        uri=uri,
+                    ))
                 return True
             else:
                 log_debug(f"No WebSocket streamer available for file event: {filename}")
@@ -634,7 +649,7 @@ class EventEmitters:
                     except Exception as e:
                         log_error(f"Error streaming A2A task event: {e}")
 
-                asyncio.create_task(stream_task_event())
+                spawn("telemetry", stream_task_event())
 
             except Exception:
                 pass
@@ -664,7 +679,7 @@ class EventEmitters:
                 except Exception as e:
                     log_error(f"Error streaming agent registration event: {e}")
             
-            asyncio.create_task(stream_registration_event())
+            spawn("telemetry", stream_registration_event())
             
         except Exception:
             pass
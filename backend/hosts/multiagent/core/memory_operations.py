@@ -75,6 +75,15 @@ class MemoryOperations:
         except Exception as e:
             return []
 
+    def _prefetch_memory(self, message: str, context_id: Optional[str]) -> None:
+        """Start the memory lookup for an outbound agent message without waiting for it.
+
+        _add_context_to_message picks up the in-flight lookup, so the search
+        overlaps whatever happens between parsing the tool call and sending.
+        """
+        if message and context_id:
+            self.memory_prefetcher.prefetch(message, context_id)
+
     def clear_memory_index(self, context_id: str = None) -> bool:
         """Clear stored interactions from the memory index.
         
@@ -24,6 +24,7 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from log_config import log_debug, log_info
+from service.task_supervisor import spawn
 
 from a2a.types import (
     AgentCard,
@@ -89,13 +90,8 @@ class StreamingHandlers:
                     log_debug(f"Error streaming remote agent activity: {e}")
                     pass
             
-            # Create background task (non-blocking)
-            try:
-                asyncio.create_task(stream_activity())
-            except RuntimeError:
-                # Handle case where no event loop is running
-                log_debug(f"No event loop available for streaming agent activity from {agent_name}")
-                pass
+            # Supervised background task (non-blocking)
+            spawn("progress", stream_activity())
                 
         except Exception as e:
             log_debug(f"Error in _stream_remote_agent_activity: {e}")
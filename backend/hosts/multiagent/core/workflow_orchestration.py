@@ -16,9 +16,10 @@ import asyncio
 import json
 import os
 import re
+import time
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 # Import logging utilities
 import sys
@@ -35,6 +36,7 @@ from log_config import (
     log_info,
     log_warning,
 )
+from service.task_supervisor import spawn
 
 from ..models import (
     SessionContext,
@@ -46,8 +48,14 @@ from ..models import (
     QueryResult,
 )
 from ..tool_context import DummyToolContext
+from ..prompt_assembly import PlannerPromptBuilder
+from ..workflow_dag import WorkflowDAG, WorkflowNode, compile_workflow
 from ..foundry_agent_a2a import _current_parallel_call_id
 
+# "compiled" runs designer/scheduled workflows as a DAG without per-step planner
+# calls; "planner" keeps the LLM deciding every step
+WORKFLOW_EXECUTION_MODE = os.environ.get("WORKFLOW_EXECUTION_MODE", "compiled").lower()
+
 
 class WorkflowOrchestration:
     """
@@ -65,6 +73,7 @@ class WorkflowOrchestration:
     - self._azure_blob_client: Azure blob client
     - self._active_conversations: Dict for conversation tracking
     - self.host_token_usage: Dict for token tracking
+    - self.capability_index: CapabilityIndex used to shortlist agents
     
     Expected methods from other mixins:
     - self._emit_status_event()
@@ -1120,6 +1129,19 @@ that are not in your native format — use the text content provided instead."""
 
             return {"output": output_text, "hitl_pause": False}
 
+    async def _shortlist_agents(self, query: str, always_include: Iterable[str] = ()) -> Tuple[List[str], List[str]]:
+        """Split the session's agents into those relevant to ``query`` and the rest.
+
+        Shortlisted agents get their full card in the prompt; the rest are
+        only named, which keeps prompts small with large agent catalogs.
+        """
+        names = list(self.cards.keys())
+        shortlisted = await self.capability_index.shortlist(query, names, always_include=always_include)
+        others = [name for name in names if name not in shortlisted]
+        if others:
+            log_debug(f"[Shortlist] {len(shortlisted)} of {len(names)} agents described in full: {shortlisted}")
+        return shortlisted, others
+
     async def _intelligent_route_selection(
         self,
         user_message: str,
@@ -1173,8 +1195,10 @@ that are not in your native format — use the text content provided instead."""
         workflows_text = "\n\n".join(workflow_descriptions)
         
         # Build available agents summary
+        shortlisted, other_agents = await self._shortlist_agents(user_message)
         agent_descriptions = []
-        for card in self.cards.values():
+        for name in shortlisted:
+            card = self.cards[name]
             agent_info = f"**{card.name}**: {card.description[:150]}..."
             if hasattr(card, 'skills') and card.skills:
                 skill_names = [s.name for s in card.skills[:3]]  # First 3 skills
@@ -1182,6 +1206,8 @@ that are not in your native format — use the text content provided instead."""
             agent_descriptions.append(agent_info)
         
         agents_text = "\n".join(agent_descriptions) if agent_descriptions else "No agents available"
+        if other_agents:
+            agents_text += f"\n\nAlso available (less likely matches): {', '.join(other_agents)}"
         
         # Debug: Log agents and workflows counts for troubleshooting
         log_debug(f"[Route Selection] Agents in registry: {len(agent_descriptions)}, Workflows: {len(available_workflows)}")
@@ -1406,6 +1432,256 @@ Analyze this request and decide the best approach."""
 
         return None
 
+    async def _run_compiled_workflow(
+        self,
+        dag: WorkflowDAG,
+        plan: AgentModePlan,
+        all_task_outputs: List[str],
+        user_message: str,
+        context_id: str,
+        session_context: SessionContext,
+        workflow: str,
+        extract_text_fn: Callable,
+    ) -> str:
+        """
+        Execute a compiled workflow without asking the planner LLM for each step.
+
+        Every step whose dependencies have finished is dispatched immediately, so
+        parallel siblings and independent branches overlap. The LLM is only used
+        by EVALUATE/QUERY/WEB_SEARCH steps (and the caller's final synthesis);
+        EVALUATE results pick which IF-TRUE/IF-FALSE branch runs.
+
+        A failed step fails every step that depends on it without dispatching
+        them. Steps already completed or failed in ``plan`` (HITL resume) are
+        not run again.
+        Appends outputs to ``all_task_outputs`` and returns how the run ended:
+        "completed", "input_required", "cancelled" or "interrupted" (the
+        interrupt is re-queued so the planner loop can re-plan around it).
+        """
+        states: Dict[str, str] = {}
+        outputs: Dict[str, str] = {}  # label -> output text, in completion order
+        tasks_by_label: Dict[str, AgentModeTask] = {}
+        for task in plan.tasks:
+            step_match = re.match(r'\[Step\s+(\d+[a-z]?)\]', task.task_description)
+            if step_match and step_match.group(1) in dag.nodes:
+                label = step_match.group(1)
+                tasks_by_label[label] = task
+                if task.state == "failed":
+                    states[label] = "failed"
+                elif task.state == "completed":
+                    states[label] = "completed"
+                    output = task.output or {}
+                    text = output.get("result", "") or output.get("text", "")
+                    if output.get("user_response"):
+                        text = f"{text}\n\n[User Response]: {output['user_response']}".strip()
+                    outputs[label] = text
+        # Branches not taken before the pause stay skipped
+        for label, node in dag.nodes.items():
+            if label not in states and node.condition and states.get(node.condition[0]) == "completed":
+                if not self._branch_taken(node, tasks_by_label):
+                    states[label] = "skipped"
+
+        processed_parts = list(getattr(session_context, '_latest_processed_parts', []))
+        timings: Dict[str, tuple] = {}
+        started_at = time.perf_counter()
+        running: Dict[asyncio.Task, str] = {}
+        hitl_pause = False
+        stop_reason = None
+
+        log_info(f"[Workflow DAG] Executing {len(dag.nodes)} compiled steps ({len(states)} already done)")
+        await self._emit_granular_agent_event(
+            "foundry-host-agent", "Executing workflow steps...", context_id,
+            event_type="phase", metadata={"phase": "workflow_compiled", "step_count": len(dag.nodes)}
+        )
+
+        async def run_step(label: str, task: AgentModeTask, context: List[str]) -> Dict[str, Any]:
+            node = dag.nodes[label]
+            # Parallel siblings (2a, 2b, ...) get their own call id for frontend grouping
+            if label[-1].isalpha():
+                _current_parallel_call_id.set(task.task_id)
+            session_context._latest_processed_parts = list(processed_parts)
+            task.state = "running"
+            task.updated_at = datetime.now(timezone.utc)
+            step_started = time.perf_counter()
+            try:
+                result = await self._execute_orchestrated_task(
+                    task=task,
+                    session_context=session_context,
+                    context_id=context_id,
+                    workflow=workflow,
+                    user_message=user_message,
+                    extract_text_fn=extract_text_fn,
+                    previous_task_outputs=context or None
+                )
+            except Exception as e:
+                if session_context.pending_input_agent and session_context.pending_input_agent == task.recommended_agent:
+                    log_info(f"[Workflow DAG] Step {label} exception but HITL triggered")
+                    task.state = "input_required"
+                    result = {"output": str(e), "hitl_pause": True}
+                else:
+                    log_error(f"[Workflow DAG] Step {label} failed: {e}")
+                    task.state = "failed"
+                    task.error_message = str(e)
+                    result = {"error": str(e), "output": None}
+            finally:
+                timings[label] = (step_started - started_at, time.perf_counter() - started_at)
+                task.updated_at = datetime.now(timezone.utc)
+
+            # Eval/Query/WebSearch emit their own completion events
+            if not node.is_host_step and not result.get("hitl_pause"):
+                if task.state == "completed":
+                    await self._emit_granular_agent_event(
+                        task.recommended_agent, f"{task.recommended_agent} completed", context_id,
+                        event_type="agent_complete"
+                    )
+                elif task.state == "failed":
+                    error = task.error_message or result.get("error") or "Unknown error"
+                    await self._emit_granular_agent_event(
+                        task.recommended_agent, f"Error: {error}"[:200], context_id,
+                        event_type="agent_error", metadata={"error": error[:500]}
+                    )
+            return result
+
+        while True:
+            if stop_reason is None and not hitl_pause:
+                if self.is_cancelled(context_id):
+                    stop_reason = "cancelled"
+                else:
+                    interrupt_instruction = self.get_interrupt(context_id)
+                    if interrupt_instruction:
+                        log_info(f"[Workflow DAG] Interrupt received, handing off to planner: {interrupt_instruction[:80]}...")
+                        await self.interrupt_workflow(context_id, interrupt_instruction)
+                        stop_reason = "interrupted"
+
+            if stop_reason is None and not hitl_pause:
+                # Steps downstream of a failure are failed, not dispatched
+                for label, upstream in dag.blocked(states).items():
+                    node = dag.nodes[label]
+                    task = AgentModeTask(
+                        task_id=str(uuid.uuid4()),
+                        task_description=f"[Step {label}] {node.description}",
+                        recommended_agent=node.agent,
+                        state="failed",
+                        error_message=f"Not run: upstream step {upstream} failed, so its output is unavailable",
+                    )
+                    plan.tasks.append(task)
+                    tasks_by_label[label] = task
+                    states[label] = "failed"
+                    log_warning(f"[Workflow DAG] Not running step {label}: upstream step {upstream} failed")
+                for label in dag.ready(states):
+                    node = dag.nodes[label]
+                    if node.condition and not self._branch_taken(node, tasks_by_label):
+                        states[label] = "skipped"
+                        log_info(f"[Workflow DAG] Skipping step {label} (branch not taken)")
+                        continue
+                    task = AgentModeTask(
+                        task_id=str(uuid.uuid4()),
+                        task_description=f"[Step {label}] {node.description}",
+                        recommended_agent=node.agent,
+                        state="pending"
+                    )
+                    plan.tasks.append(task)
+                    tasks_by_label[label] = task
+                    states[label] = "running"
+                    ancestors = set(dag.ancestors(label))
+                    context = [text for dep, text in outputs.items() if dep in ancestors and text]
+                    running[asyncio.create_task(run_step(label, task, context))] = label
+                if dag.ready(states):
+                    continue  # Skipped branches unblocked further steps
+                if running:
+                    plan.updated_at = datetime.now(timezone.utc)
+                    await self._emit_plan_update(plan, context_id, reasoning="Executing compiled workflow")
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                label = running.pop(finished)
+                task = tasks_by_label[label]
+                result = finished.result()
+                if result.get("hitl_pause"):
+                    hitl_pause = True
+                    states[label] = "input_required"
+                else:
+                    states[label] = "completed" if task.state == "completed" else "failed"
+                if result.get("output"):
+                    outputs[label] = result["output"]
+                    all_task_outputs.append(result["output"])
+                # Later steps see files produced by finished steps
+                current_parts = getattr(session_context, '_latest_processed_parts', [])
+                if not running:
+                    processed_parts = list(current_parts)
+                else:
+                    known = {id(part) for part in processed_parts}
+                    processed_parts.extend(part for part in current_parts if id(part) not in known)
+            await self._emit_plan_update(plan, context_id, reasoning="Executing compiled workflow")
+
+        session_context._latest_processed_parts = processed_parts
+        self._record_workflow_timings(dag, timings, time.perf_counter() - started_at)
+        if timings:
+            critical = self.workflow_step_timings["critical_path"]
+            await self._emit_granular_agent_event(
+                "foundry-host-agent",
+                f"Critical path: {' → '.join(critical)} ({self.workflow_step_timings['total_ms']:.0f} ms)",
+                context_id,
+                event_type="info", metadata={"phase": "workflow_timing", **self.workflow_step_timings}
+            )
+
+        if stop_reason == "cancelled":
+            log_info(f"[CANCEL] Compiled workflow cancelled")
+            await self._emit_granular_agent_event(
+                "foundry-host-agent", "Workflow cancelled by user", context_id,
+                event_type="phase", metadata={"phase": "cancelled"}
+            )
+            return "cancelled"
+        if hitl_pause:
+            session_context.current_plan = plan
+            log_info(f"[Workflow DAG] Saved plan for HITL resume")
+            await self._emit_plan_update(plan, context_id, reasoning="Waiting for user input")
+            return "input_required"
+        if stop_reason == "interrupted":
+            return "interrupted"
+
+        plan.goal_status = "completed"
+        plan.updated_at = datetime.now(timezone.utc)
+        completed_count = sum(1 for state in states.values() if state == "completed")
+        log_info(f"[Workflow DAG] Complete: {completed_count}/{len(dag.nodes)} steps completed, no planner calls")
+        await self._emit_plan_update(plan, context_id, reasoning="Goal completed")
+        await self._emit_granular_agent_event(
+            "foundry-host-agent", "Goal achieved! Generating final response...", context_id,
+            event_type="phase", metadata={"phase": "complete", "tasks_completed": completed_count, "iterations": 0}
+        )
+        return "completed"
+
+    @staticmethod
+    def _branch_taken(node: WorkflowNode, tasks_by_label: Dict[str, AgentModeTask]) -> bool:
+        """True if the EVALUATE step guarding ``node`` produced the required result."""
+        eval_label, required = node.condition
+        eval_task = tasks_by_label.get(eval_label)
+        if not eval_task or eval_task.state != "completed" or not eval_task.output:
+            return False  # A failed evaluation takes neither branch
+        result = str(eval_task.output.get("result", "")).strip().upper()
+        return result.startswith("TRUE" if required else "FALSE")
+
+    def _record_workflow_timings(self, dag: WorkflowDAG, timings: Dict[str, tuple], total_seconds: float) -> None:
+        """Store and log per-step timings and the critical path of a compiled run."""
+        critical = dag.critical_path(timings)
+        self.workflow_step_timings = {
+            "steps": {
+                label: {"start_ms": round(start * 1000, 1), "duration_ms": round((end - start) * 1000, 1)}
+                for label, (start, end) in sorted(timings.items(), key=lambda item: item[1][0])
+            },
+            "critical_path": critical,
+            "critical_path_ms": round(sum((timings[l][1] - timings[l][0]) * 1000 for l in critical), 1),
+            "total_ms": round(total_seconds * 1000, 1),
+        }
+        if timings:
+            log_info(
+                f"[Workflow DAG] {len(timings)} steps in {self.workflow_step_timings['total_ms']:.0f} ms, "
+                f"critical path {' → '.join(critical)} ({self.workflow_step_timings['critical_path_ms']:.0f} ms)"
+            )
+
     async def _agent_mode_orchestration_loop(
         self,
         user_message: str,
@@ -1443,7 +1719,10 @@ Analyze this request and decide the best approach."""
         log_debug(f"[Agent Mode] Starting orchestration loop for goal: {user_message[:100]}...")
         
         # Reset host token usage for this workflow
-        self.host_token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        self.host_token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_prompt_tokens": 0}
+        self.planner_latencies_ms = []
+        self.planner_prompt_tokens = []
+        prompt_builder = PlannerPromptBuilder()
         
         # Emit typed init event for structured frontend (replaces old untyped _emit_status_event)
         await self._emit_granular_agent_event(
@@ -1804,6 +2083,27 @@ Do NOT skip steps. Do NOT mark goal as completed until ALL workflow steps are do
 - When agents request information, synthesize their questions and present to the user
 - When the user provides information in a follow-up, create a NEW task with that information"""
         
+        # =====================================================================
+        # COMPILED WORKFLOW: Run the workflow DAG directly when it compiles;
+        # the planner loop below only takes over after a user interrupt
+        # =====================================================================
+        dag = compile_workflow(workflow) if workflow and WORKFLOW_EXECUTION_MODE == "compiled" else None
+        if dag and plan.goal_status == "incomplete":
+            outcome = await self._run_compiled_workflow(
+                dag, plan, all_task_outputs, user_message, context_id,
+                session_context, workflow, extract_text_from_response
+            )
+            if outcome == "cancelled":
+                return all_task_outputs + ["[Workflow cancelled by user]"]
+            if outcome == "input_required":
+                return all_task_outputs
+            if outcome == "interrupted":
+                # Planner continues numbering after the steps already run
+                for task in plan.tasks:
+                    step_match = re.search(r'\[Step\s+(\d+)', task.task_description)
+                    if step_match:
+                        current_step_number = max(current_step_number, int(step_match.group(1)))
+
         while plan.goal_status == "incomplete" and iteration < max_iterations:
             iteration += 1
             log_debug(f"[Agent Mode] Iteration {iteration}/{max_iterations}")
@@ -1857,9 +2157,13 @@ Do NOT skip steps. Do NOT mark goal as completed until ALL workflow steps are do
             # Emit plan at start of each iteration so frontend shows current state
             await self._emit_plan_update(plan, context_id, reasoning=f"Planning step {iteration}...")
             
-            # Build user prompt with current plan state
+            # Build user prompt with current plan state. Only agents relevant to
+            # the goal are described in full; the shortlist depends only on the
+            # goal and workflow, so it stays the same across iterations.
+            shortlisted, other_agents = await self._shortlist_agents(f"{plan.goal}\n{workflow or ''}")
             available_agents = []
-            for card in self.cards.values():
+            for name in shortlisted:
+                card = self.cards[name]
                 agent_info = {
                     "name": card.name,
                     "description": card.description
@@ -1880,23 +2184,26 @@ Do NOT skip steps. Do NOT mark goal as completed until ALL workflow steps are do
                 available_agents.append(agent_info)
 
             # Add built-in pseudo-agents only when the workflow uses them,
-            # so they don't confuse the planner for normal agent-routed steps
+            # so they don't confuse the planner for normal agent-routed steps.
+            # They go first so the catalog token budget never drops them.
+            builtin_agents = []
             workflow_upper = workflow.upper() if workflow else ""
             if '[EVALUATE]' in workflow_upper:
-                available_agents.append({
+                builtin_agents.append({
                     "name": "EVALUATE",
                     "description": "Built-in host orchestrator capability. Evaluates a condition and returns TRUE/FALSE for workflow branching. Set recommended_agent to 'EVALUATE'."
                 })
             if '[QUERY]' in workflow_upper:
-                available_agents.append({
+                builtin_agents.append({
                     "name": "QUERY",
                     "description": "Built-in host orchestrator capability. Analyzes previous workflow outputs and returns structured JSON results. Can also answer general knowledge questions. Set recommended_agent to 'QUERY'."
                 })
             if '[WEB_SEARCH]' in workflow_upper:
-                available_agents.append({
+                builtin_agents.append({
                     "name": "WEB_SEARCH",
                     "description": "Built-in host orchestrator capability. Searches the web using Bing for current, real-time information (exchange rates, weather, news, prices). Set recommended_agent to 'WEB_SEARCH'."
                 })
+            available_agents = builtin_agents + available_agents
 
             # Debug: Log available agents count for troubleshooting
             agent_names = [a.get('name', 'Unknown') for a in available_agents]
@@ -1908,59 +2215,54 @@ Do NOT skip steps. Do NOT mark goal as completed until ALL workflow steps are do
                     event_type="info", metadata={"agents_count": len(available_agents), "agent_names": agent_names[:5]}
                 )
             
-            # Build a compact version of the plan for the LLM prompt.
-            # Full task outputs can be huge (agent responses) — truncate them
-            # so the LLM can still reason about what happened without blowing
-            # up the context window or degrading decision quality.
-            compact_plan = plan.model_dump()
-            for task_entry in compact_plan.get("tasks", []):
-                output = task_entry.get("output")
-                if output and isinstance(output, dict):
-                    # Keep result field but truncate if too long
-                    result_val = output.get("result")
-                    if isinstance(result_val, str) and len(result_val) > 500:
-                        output["result"] = result_val[:500] + "... [truncated]"
-                    # Drop bulky nested fields the planner doesn't need
-                    for drop_key in ("artifacts", "task_id"):
-                        output.pop(drop_key, None)
-
             # In workflow mode, add an explicit step-completion map so the
             # LLM doesn't have to parse [Step X] prefixes from descriptions.
             workflow_progress = ""
             if workflow and workflow.strip():
                 completed_steps = []
                 pending_steps = []
-                for task_entry in compact_plan.get("tasks", []):
-                    step_match = re.search(r'\[Step\s+(\d+[a-z]?)\]', task_entry.get("task_description", ""))
+                for task in plan.tasks:
+                    step_match = re.search(r'\[Step\s+(\d+[a-z]?)\]', task.task_description or "")
                     if step_match:
                         label = step_match.group(1)
-                        state = task_entry.get("state", "pending")
-                        if state == "completed":
+                        if task.state == "completed":
                             completed_steps.append(label)
                         else:
-                            pending_steps.append(f"{label} ({state})")
+                            pending_steps.append(f"{label} ({task.state})")
                 if completed_steps or pending_steps:
                     workflow_progress = f"\n\nWorkflow Progress:\n- Completed steps: {', '.join(completed_steps) if completed_steps else 'none'}\n- Pending/in-progress: {', '.join(pending_steps) if pending_steps else 'none'}"
 
-            user_prompt = f"""Goal:
-{plan.goal}
-
-Current Plan (JSON):
-{json.dumps(compact_plan, indent=2, default=str)}
-
-Available Agents (JSON):
-{json.dumps(available_agents, indent=2)}{workflow_progress}
-
-Analyze the plan and determine the next step."""
+            # Goal and agent catalog first, then one compact line per task and
+            # the status delta last: consecutive iterations share everything up
+            # to the newest task, which the service can serve from its prompt
+            # cache. Task outputs are cut to a token budget instead of 500 chars.
+            prompt = prompt_builder.build(
+                goal=plan.goal,
+                agents=available_agents,
+                tasks=plan.tasks,
+                goal_status=plan.goal_status,
+                other_agents=other_agents,
+                progress=workflow_progress,
+            )
+            user_prompt = prompt.text
+            self.planner_prompt_tokens.append(prompt.total_tokens)
+            log_info(
+                f"[Agent Mode] Planner prompt {iteration}: {prompt.total_tokens} tokens "
+                f"({prompt.stable_prefix_tokens} unchanged prefix, sections={prompt.section_tokens})"
+            )
             
             # Get next step from orchestrator
             try:
+                planner_started = time.perf_counter()
                 next_step = await self._call_azure_openai_structured(
                     system_prompt=system_prompt,
                     user_prompt=user_prompt,
                     response_model=NextStep,
                     context_id=context_id
                 )
+                planner_ms = (time.perf_counter() - planner_started) * 1000
+                self.planner_latencies_ms.append(planner_ms)
+                log_info(f"[Agent Mode] Planner iteration {iteration} took {planner_ms:.0f} ms")
                 
                 log_debug(f"[Agent Mode] Orchestrator: {next_step.reasoning[:100]}... | status={next_step.goal_status}")
                 await self._emit_granular_agent_event(
@@ -2477,7 +2779,7 @@ Analyze the plan and determine the next step."""
                     }
                     await streamer._send_event("host_token_usage", event_data, context_id)
             
-            asyncio.create_task(emit_host_tokens())
+            spawn("telemetry", emit_host_tokens())
         except Exception:
             pass  # Don't let token emission failures break the flow
         
@@ -1,7 +1,14 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import asyncio
+import hashlib
 import os
+import random
+import tempfile
+import time
+from collections import OrderedDict
+from typing import List, Optional
 from tenacity import retry, wait_random_exponential, stop_after_attempt
 import shutil
 import json
@@ -11,10 +18,10 @@ import requests
 import fitz
 from PIL import Image
 from functools import lru_cache
-from log_config import log_debug, log_info, log_error
+from log_config import log_debug, log_info, log_warning, log_error
 
 # Azure OpenAI
-from openai import AzureOpenAI
+from openai import APIConnectionError, APIStatusError, AsyncAzureOpenAI, AzureOpenAI, RateLimitError
 import io
 import base64
 import pathlib
@@ -30,6 +37,18 @@ import subprocess
 RUNTIME_DIR = Path(__file__).resolve().parents[2] / ".runtime"
 PDF_OUTPUT_DIR = str(RUNTIME_DIR / "pdf")
 
+# Page pipeline: pages are rendered in memory and sent to the vision model by
+# a bounded pool of workers; per-page markdown is cached by page-image hash.
+DOC2MD_MAX_CONCURRENCY = int(os.getenv("DOC2MD_MAX_CONCURRENCY", "8"))
+DOC2MD_MAX_ATTEMPTS = int(os.getenv("DOC2MD_MAX_ATTEMPTS", "6"))
+DOC2MD_RENDER_ZOOM = float(os.getenv("DOC2MD_RENDER_ZOOM", "1.0"))
+DOC2MD_PAGE_CACHE_ENTRIES = int(os.getenv("DOC2MD_PAGE_CACHE_ENTRIES", "512"))
+DOC2MD_PAGE_CACHE_DIR = os.getenv("DOC2MD_PAGE_CACHE_DIR", str(RUNTIME_DIR / "page_markdown"))
+
+VISION_PROMPT = """Extract everything you see in this image to markdown. 
+                            Convert all charts such as line, pie and bar charts to markdown tables and include a note that the numbers are approximate.
+                        """
+
 # Azure OpenAI configuration for image processing is now sourced from environment variables
 _GPT_ENV_VARS = {
     "AZURE_OPENAI_GPT_API_BASE": "Base URL for the Azure AI Foundry project (e.g. https://<host>/api/projects/<project>)",
@@ -73,6 +92,19 @@ def _get_gpt_client() -> AzureOpenAI:
     )
 
 
+def _create_async_gpt_client() -> AsyncAzureOpenAI:
+    """New async client; callers own it (httpx pools are bound to one event loop)."""
+    config = _load_gpt_configuration()
+    base_url = config["AZURE_OPENAI_GPT_API_BASE"].rstrip("/")
+
+    return AsyncAzureOpenAI(
+        api_key=config["AZURE_OPENAI_GPT_API_KEY"],
+        api_version=config["AZURE_OPENAI_GPT_API_VERSION"],
+        base_url=f"{base_url}/openai/deployments/{config['AZURE_OPENAI_GPT_DEPLOYMENT']}",
+        max_retries=0,  # retries and 429 back-off are handled by the page pipeline
+    )
+
+
 def _get_gpt_deployment_name() -> str:
     return _load_gpt_configuration()["AZURE_OPENAI_GPT_DEPLOYMENT"]
 
@@ -100,16 +132,16 @@ def remove_directory(directory_path):
         log_error(f"An error occurred while removing the directory: {e}")  
     
 # Convert to PDF
-def convert_to_pdf(input_path):  
+def convert_to_pdf(input_path, output_dir=PDF_OUTPUT_DIR):  
     file_suffix = pathlib.Path(input_path).suffix.lower()
     
     if file_suffix in supported_conversion_types:
-        ensure_directory_exists(PDF_OUTPUT_DIR)  
+        ensure_directory_exists(output_dir)  
         
         # Extract just the filename (not path) to avoid issues with absolute paths
         base_filename = os.path.basename(input_path)
         filename_no_ext = os.path.splitext(base_filename)[0]
-        output_file = os.path.join(PDF_OUTPUT_DIR, filename_no_ext + '.pdf')
+        output_file = os.path.join(output_dir, filename_no_ext + '.pdf')
     
         log_debug(f"Converting {input_path} to {output_file}")
         if os.path.exists(output_file):
@@ -126,8 +158,11 @@ def convert_to_pdf(input_path):
                 soffice_path = 'soffice'  # Windows/Linux can use just 'soffice'
                 
             # Command to convert to pdf using LibreOffice  
+            # A private profile per conversion so concurrent conversions don't lock each other out
+            profile_dir = pathlib.Path(output_dir, f".lo-profile-{uuid.uuid4().hex}").resolve()
             command = [  
                 soffice_path,
+                f'-env:UserInstallation={profile_dir.as_uri()}',
                 '--headless',  # Run LibreOffice in headless mode (no GUI)  
                 '--convert-to', 'pdf',  # Specify conversion format  
                 '--outdir', os.path.dirname(output_file),  # Output directory  
@@ -144,6 +179,8 @@ def convert_to_pdf(input_path):
             except FileNotFoundError:
                 log_error("LibreOffice not found. Please ensure LibreOffice is installed and the path is correct.")
                 return ""
+            finally:
+                shutil.rmtree(profile_dir, ignore_errors=True)
     else:
         log_error("File type not supported.")  
         return ""
@@ -186,35 +223,239 @@ def get_all_files(directory_path):
             files.append(entry_path)  
     return files  
   
+def _vision_messages(base64_image):
+    return [
+        { "role": "system", "content": "You are a helpful assistant." },
+        { "role": "user", "content": [  
+            { "type": "text", "text": VISION_PROMPT },
+            {
+                "type": "image_url", 
+                "image_url": {"url": f"data:image/png;base64,{base64_image}"}
+            }
+        ] } 
+    ]
+
+
+class PageMarkdownCache:
+    """LRU of page markdown keyed by SHA-256 of the page image (+ deployment).
+
+    Entries are mirrored to ``disk_dir`` as ``<hash>.md`` when it is set.
+    """
+
+    def __init__(self, max_entries: int = DOC2MD_PAGE_CACHE_ENTRIES, disk_dir: Optional[str] = DOC2MD_PAGE_CACHE_DIR):
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self.metrics = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(image_bytes: bytes, deployment: str) -> str:
+        return hashlib.sha256(deployment.encode("utf-8") + b"\x00" + image_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        markdown = self._memory.get(key)
+        if markdown is None and self._disk_dir is not None:
+            try:
+                markdown = (self._disk_dir / f"{key}.md").read_text(encoding="utf-8")
+                self._remember(key, markdown)
+            except (FileNotFoundError, UnicodeDecodeError):
+                markdown = None
+        if markdown is None:
+            self.metrics["misses"] += 1
+            return None
+        self._memory.move_to_end(key)
+        self.metrics["hits"] += 1
+        return markdown
+
+    def put(self, key: str, markdown: str) -> None:
+        if not markdown:
+            return  # never cache failed extractions
+        self._remember(key, markdown)
+        if self._disk_dir is not None:
+            try:
+                self._disk_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._disk_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+                tmp_path.write_text(markdown, encoding="utf-8")
+                os.replace(tmp_path, self._disk_dir / f"{key}.md")
+            except Exception as e:
+                log_warning(f"Could not persist page markdown: {e}")
+
+    def _remember(self, key: str, markdown: str) -> None:
+        self._memory[key] = markdown
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+page_cache = PageMarkdownCache()
+
+
 @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
 def extract_markdown_from_image(image_path):
     try:
-        base64_image = encode_image(image_path)
+        with open(image_path, "rb") as image_file:
+            image_bytes = image_file.read()
+        cache_key = page_cache.key(image_bytes, _get_gpt_deployment_name())
+        cached = page_cache.get(cache_key)
+        if cached is not None:
+            return cached
         client = _get_gpt_client()
         response = client.chat.completions.create(
             model=_get_gpt_deployment_name(),
-            messages=[
-                { "role": "system", "content": "You are a helpful assistant." },
-                { "role": "user", "content": [  
-                    { 
-                        "type": "text", 
-                        "text": """Extract everything you see in this image to markdown. 
-                            Convert all charts such as line, pie and bar charts to markdown tables and include a note that the numbers are approximate.
-                        """ 
-                    },
-                    {
-                        "type": "image_url", 
-                        "image_url": {"url": f"data:image/png;base64,{base64_image}"}
-                    }
-                ] } 
-            ],
+            messages=_vision_messages(base64.b64encode(image_bytes).decode("utf-8")),
             max_tokens=2000 
         )
-        return response.choices[0].message.content
+        markdown = response.choices[0].message.content
+        page_cache.put(cache_key, markdown)
+        return markdown
     except Exception as ex:
         log_error(f"Error extracting markdown from image: {ex}")
         return ""
 
+
+class _RateLimitGate:
+    """Shared pause for all page workers after a 429, honoring Retry-After."""
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    async def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        if value:
+            try:
+                seconds = float(value)
+            except ValueError:
+                continue
+            return seconds / 1000 if name == "retry-after-ms" else seconds
+    return None
+
+
+async def extract_markdown_from_page(client: AsyncAzureOpenAI, image_bytes: bytes,
+                                     gate: Optional[_RateLimitGate] = None) -> str:
+    """Vision extraction for one rendered page, cached by image hash.
+
+    Rate limits pause every worker sharing ``gate`` for the server's
+    Retry-After; other transient errors back off exponentially. Returns ""
+    once ``DOC2MD_MAX_ATTEMPTS`` is exhausted, like ``extract_markdown_from_image``.
+    """
+    gate = gate or _RateLimitGate()
+    deployment = _get_gpt_deployment_name()
+    cache_key = page_cache.key(image_bytes, deployment)
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    messages = _vision_messages(base64.b64encode(image_bytes).decode("utf-8"))
+    error = None
+    for attempt in range(1, DOC2MD_MAX_ATTEMPTS + 1):
+        await gate.wait()
+        backoff = min(20.0, random.uniform(1, 2 ** attempt))
+        try:
+            response = await client.chat.completions.create(model=deployment, messages=messages, max_tokens=2000)
+            markdown = response.choices[0].message.content or ""
+            page_cache.put(cache_key, markdown)
+            return markdown
+        except RateLimitError as ex:
+            delay = _retry_after_seconds(ex) or backoff
+            log_warning(f"Vision extraction rate limited, pausing page workers for {delay:.1f}s")
+            gate.pause(delay)
+            error = ex
+        except (APIConnectionError, APIStatusError) as ex:
+            if isinstance(ex, APIStatusError) and ex.status_code < 500 and ex.status_code != 408:
+                log_error(f"Error extracting markdown from page: {ex}")
+                return ""
+            error = ex
+            await asyncio.sleep(backoff)
+    log_error(f"Error extracting markdown from page after {DOC2MD_MAX_ATTEMPTS} attempts: {error}")
+    return ""
+
+
+def _render_page(pdf_document, page_number: int) -> bytes:
+    matrix = fitz.Matrix(DOC2MD_RENDER_ZOOM, DOC2MD_RENDER_ZOOM)
+    return pdf_document.load_page(page_number).get_pixmap(matrix=matrix).tobytes("png")
+
+
+async def pdf_to_markdown_pages(pdf_path: str, concurrency: int = DOC2MD_MAX_CONCURRENCY,
+                                client: Optional[AsyncAzureOpenAI] = None) -> List[str]:
+    """Markdown for every page of a PDF, in page order.
+
+    One renderer turns pages into in-memory PNGs (never written to disk) and
+    feeds a bounded queue; ``concurrency`` workers run vision extraction, so
+    at most ``2 * concurrency`` rendered pages are held at once. If any of
+    them fails, the others are cancelled and the error is raised.
+    """
+    pdf_document = await asyncio.to_thread(fitz.open, pdf_path)
+    page_count = len(pdf_document)
+    results: List[str] = [""] * page_count
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency) * 2)
+    gate = _RateLimitGate()
+    owns_client = client is None
+    client = client or _create_async_gpt_client()
+    workers_count = max(1, min(concurrency, page_count))
+    rendering: Optional[asyncio.Task] = None
+
+    async def render():
+        nonlocal rendering
+        for page_number in range(page_count):
+            # Shielded so a cancelled renderer never leaves a thread using the closed document
+            rendering = asyncio.ensure_future(asyncio.to_thread(_render_page, pdf_document, page_number))
+            image_bytes = await asyncio.shield(rendering)
+            await queue.put((page_number, image_bytes))
+        for _ in range(workers_count):
+            await queue.put(None)
+
+    async def work():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            page_number, image_bytes = item
+            results[page_number] = await extract_markdown_from_page(client, image_bytes, gate)
+
+    log_debug(f"Extracting markdown from {page_count} pages with {workers_count} workers")
+    tasks = [asyncio.ensure_future(render())] + [asyncio.ensure_future(work()) for _ in range(workers_count)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # After a failure nobody reads the queue, so render() and the
+        # workers would otherwise wait on it forever
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if rendering is not None:
+            await asyncio.gather(rendering, return_exceptions=True)
+        pdf_document.close()
+        if owns_client:
+            await client.close()
+    return results
+
+
+async def document_to_markdown_pages(document_path: str,
+                                     concurrency: int = DOC2MD_MAX_CONCURRENCY) -> Optional[List[str]]:
+    """Convert a document to PDF in a private temp directory and extract every page.
+
+    Returns None if the document can't be converted.
+    """
+    ensure_directory_exists(RUNTIME_DIR)
+    with tempfile.TemporaryDirectory(prefix="doc2md-", dir=RUNTIME_DIR) as work_dir:
+        pdf_path = await asyncio.to_thread(convert_to_pdf, document_path, work_dir)
+        if not pdf_path:
+            return None
+        return await pdf_to_markdown_pages(pdf_path, concurrency)
+
+
 def process_image(file, markdown_out_dir):
     if '.png' in file:
         log_debug(f"Processing: {file}")
@@ -231,44 +472,32 @@ def process_image(file, markdown_out_dir):
 
     return file
 
-def process_document_to_markdown(document_path, output_dir=None):
+async def process_document_to_markdown_async(document_path):
     """
-    Main function to process a document and return markdown content.
-    This is a simplified version that uses the existing functions.
+    Process a document and return markdown content with one section per page.
+    Pages are extracted concurrently and assembled in page order.
     """
     try:
-        # Convert document to PDF first
-        pdf_path = convert_to_pdf(document_path)
-        if not pdf_path:
+        pages = await document_to_markdown_pages(document_path)
+        if pages is None:
             return f"# Error Processing Document\n\nCould not convert {os.path.basename(document_path)} to PDF"
-        
-        # Extract PDF pages to images
-        ensure_directory_exists('images')
-        doc_id = extract_pdf_pages_to_images(pdf_path, 'images')
-        
-        # Process images to extract markdown
-        pdf_images_dir = os.path.join('images', doc_id)
-        files = get_all_files(pdf_images_dir)
-        
-        ensure_directory_exists('markdown')
-        markdown_out_dir = os.path.join('markdown', doc_id)
-        ensure_directory_exists(markdown_out_dir)
-        
-        # Process all images
+
         markdown_content = f"# {os.path.basename(document_path)}\n\n"
-        
-        # Sort files by page number
-        files.sort(key=lambda x: int(os.path.splitext(os.path.basename(x))[0]))
-        
-        for file in files:
-            if '.png' in file:
-                page_num = os.path.splitext(os.path.basename(file))[0]
-                markdown_text = extract_markdown_from_image(file)
-                if markdown_text:
-                    markdown_content += f"## Page {page_num}\n\n{markdown_text}\n\n"
+        for page_num, markdown_text in enumerate(pages, start=1):
+            if markdown_text:
+                markdown_content += f"## Page {page_num}\n\n{markdown_text}\n\n"
         
         return markdown_content
         
     except Exception as e:
         log_error(f"Error processing document {document_path}: {e}")
         return f"# Error Processing Document\n\nFile: {os.path.basename(document_path)}\nError: {str(e)}"
+
+
+def process_document_to_markdown(document_path, output_dir=None):
+    """
+    Main function to process a document and return markdown content.
+    Synchronous wrapper for ``process_document_to_markdown_async``; ``output_dir``
+    is kept for compatibility (intermediate files go to a private temp directory).
+    """
+    return asyncio.run(process_document_to_markdown_async(document_path))
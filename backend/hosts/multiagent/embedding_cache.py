@@ -0,0 +1,189 @@
+"""
+Content-addressed embedding cache for the A2A memory service.
+
+Embeddings are keyed by SHA-256 of the whitespace-normalized text plus the
+embedding deployment name, so identical queries and re-indexed files skip the
+embeddings API. Two tiers:
+
+- Memory: LRU of float32 vectors, evicted by total byte size
+- Disk (optional): memory-mapped float32 rows under a cache directory,
+  overwritten oldest-first once the configured row capacity is reached
+"""
+
+import hashlib
+import json
+import re
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[2]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_memory_debug, log_warning
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def embedding_cache_key(text: str, deployment: str) -> bytes:
+    """SHA-256 digest of normalized text + deployment name."""
+    normalized = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256(f"{deployment}\x00{normalized}".encode("utf-8")).digest()
+
+
+class _DiskTier:
+    """Fixed-capacity, memory-mapped store of float32 vectors.
+
+    Files in ``directory``:
+    - meta.json: {"dim": int, "capacity": int}
+    - vectors.f32: (capacity, dim) float32
+    - keys.bin: (capacity, 32) uint8 SHA-256 digests
+    - seqs.u64: (capacity,) uint64 write sequence, 0 = empty row
+    """
+
+    def __init__(self, directory: Path, dim: int, capacity: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path = self.directory / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta.get("dim") != dim or meta.get("capacity") != capacity:
+                log_warning(f"[MEMORY] Embedding disk cache layout changed ({meta} -> dim={dim}, capacity={capacity}), resetting")
+                for name in ("vectors.f32", "keys.bin", "seqs.u64"):
+                    (self.directory / name).unlink(missing_ok=True)
+        meta_path.write_text(json.dumps({"dim": dim, "capacity": capacity}))
+
+        self.dim = dim
+        self.capacity = capacity
+        self.vectors = self._open("vectors.f32", np.float32, (capacity, dim))
+        self.keys = self._open("keys.bin", np.uint8, (capacity, 32))
+        self.seqs = self._open("seqs.u64", np.uint64, (capacity,))
+
+        self.rows: Dict[bytes, int] = {}
+        for row in np.nonzero(self.seqs)[0]:
+            self.rows[self.keys[row].tobytes()] = int(row)
+        self.seq = int(self.seqs.max()) if capacity else 0
+        log_memory_debug(f"Embedding disk cache opened with {len(self.rows)} entries at {self.directory}")
+
+    def _open(self, name: str, dtype, shape):
+        path = self.directory / name
+        mode = "r+" if path.exists() else "w+"
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return np.array(self.vectors[row])
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        if key in self.rows or vector.shape != (self.dim,):
+            return
+        # Reuse an empty row, otherwise overwrite the oldest write
+        row = int(np.argmin(self.seqs))
+        old_key = self.keys[row].tobytes()
+        if self.seqs[row] and self.rows.get(old_key) == row:
+            del self.rows[old_key]
+        self.seq += 1
+        self.vectors[row] = vector
+        self.keys[row] = np.frombuffer(key, dtype=np.uint8)
+        self.seqs[row] = self.seq
+        self.rows[key] = row
+
+    def flush(self) -> None:
+        for array in (self.vectors, self.keys, self.seqs):
+            array.flush()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache with hit/miss metrics.
+
+    Args:
+        deployment: Embedding deployment name (part of every key)
+        dim: Embedding dimension
+        max_memory_bytes: Byte budget for the in-memory LRU
+        disk_dir: Directory for the memory-mapped tier (None disables it)
+        disk_capacity: Maximum rows kept on disk
+    """
+
+    def __init__(
+        self,
+        deployment: str,
+        dim: int,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_capacity: int = 50000,
+    ):
+        self.deployment = deployment
+        self.dim = dim
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: Optional[_DiskTier] = None
+        if disk_dir:
+            try:
+                self._disk = _DiskTier(Path(disk_dir), dim, disk_capacity)
+            except Exception as e:
+                log_warning(f"[MEMORY] Embedding disk cache disabled: {e}")
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def key(self, text: str) -> bytes:
+        return embedding_cache_key(text, self.deployment)
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for text, or None."""
+        key = self.key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.metrics["memory_hits"] += 1
+            return vector.tolist()
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                self.metrics["disk_hits"] += 1
+                self._remember(key, vector)
+                return vector.tolist()
+        self.metrics["misses"] += 1
+        return None
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        """Store an embedding (ignored if empty or the wrong dimension)."""
+        if not embedding or len(embedding) != self.dim:
+            return
+        key = self.key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._remember(key, vector)
+        if self._disk is not None:
+            self._disk.put(key, vector)
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        existing = self._memory.pop(key, None)
+        if existing is not None:
+            self._memory_bytes -= existing.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.metrics["evictions"] += 1
+
+    def flush(self) -> None:
+        """Flush the disk tier to its backing files."""
+        if self._disk is not None:
+            self._disk.flush()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.metrics["memory_hits"] + self.metrics["disk_hits"] + self.metrics["misses"]
+        hits = self.metrics["memory_hits"] + self.metrics["disk_hits"]
+        return {
+            **self.metrics,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk.rows) if self._disk is not None else 0,
+        }
@@ -0,0 +1,142 @@
+"""
+Async, batched embedding engine for the A2A memory service.
+
+Wraps an ``AsyncAzureOpenAI`` client so that:
+- Many texts are embedded with one ``embeddings.create`` request per batch
+- Identical texts in a call are embedded once and fanned back out
+- Batches run concurrently, bounded by a semaphore
+- The event loop is never blocked by the HTTP round trip
+- An optional EmbeddingCache short-circuits texts embedded before
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+backend_dir = Path(__file__).resolve().parents[2]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_memory_debug, log_error
+
+from .embedding_cache import EmbeddingCache
+
+
+class EmbeddingEngine:
+    """Batches embedding requests to an Azure OpenAI deployment.
+
+    Args:
+        endpoint: Azure OpenAI endpoint
+        api_key: Azure OpenAI key
+        deployment: Embedding model deployment name
+        api_version: Azure OpenAI API version
+        max_batch_size: Maximum inputs sent in one embeddings request
+        max_concurrency: Maximum embeddings requests in flight at once
+        cache: Optional content-addressed cache consulted before the API
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str,
+        deployment: str,
+        api_version: str = "2024-02-01",
+        max_batch_size: int = 16,
+        max_concurrency: int = 4,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.deployment = deployment
+        self.api_version = api_version
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self._client = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self):
+        """Return the async client, recreating it if the event loop changed.
+
+        Scheduled workflows may run on a fresh loop, and httpx clients and
+        semaphores are bound to the loop they were first used on.
+        """
+        current_loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not current_loop:
+            from openai import AsyncAzureOpenAI
+            self._client = AsyncAzureOpenAI(
+                azure_endpoint=self.endpoint,
+                api_key=self.api_key,
+                api_version=self.api_version,
+            )
+            self._client_loop = current_loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text. Returns an empty list on failure."""
+        embeddings = await self.embed_many([text])
+        return embeddings[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts, preserving input order.
+
+        Duplicate texts are sent once. Failed batches yield empty lists for
+        their texts so callers can skip them individually.
+        """
+        if not texts:
+            return []
+
+        unique_texts: List[str] = list(dict.fromkeys(texts))
+        by_text: Dict[str, List[float]] = {}
+        if self.cache is not None:
+            for text in unique_texts:
+                cached = self.cache.get(text)
+                if cached is not None:
+                    by_text[text] = cached
+        pending = [text for text in unique_texts if text not in by_text]
+
+        batches = [
+            pending[i:i + self.max_batch_size]
+            for i in range(0, len(pending), self.max_batch_size)
+        ]
+        log_memory_debug(
+            f"Embedding {len(texts)} texts ({len(unique_texts)} unique, {len(by_text)} cached) in {len(batches)} batch(es)"
+        )
+
+        if batches:
+            client = self._get_client()
+            results = await asyncio.gather(*(self._embed_batch(client, batch) for batch in batches))
+            for batch, vectors in zip(batches, results):
+                for text, vector in zip(batch, vectors):
+                    by_text[text] = vector
+                    if self.cache is not None and vector:
+                        self.cache.put(text, vector)
+            if self.cache is not None:
+                self.cache.flush()
+        return [by_text.get(text, []) for text in texts]
+
+    async def _embed_batch(self, client, batch: List[str]) -> List[List[float]]:
+        async with self._semaphore:
+            try:
+                response = await client.embeddings.create(model=self.deployment, input=batch)
+            except Exception as e:
+                log_error(f"[MEMORY] Embedding batch of {len(batch)} failed: {e}")
+                return [[] for _ in batch]
+        vectors: List[List[float]] = [[] for _ in batch]
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return vectors
+
+    async def aclose(self):
+        """Close the underlying HTTP client and flush the cache."""
+        if self.cache is not None:
+            self.cache.flush()
+        if self._client is not None:
+            try:
+                await self._client.close()
+            finally:
+                self._client = None
+                self._client_loop = None
@@ -77,6 +77,8 @@ from a2a.types import (
 # Internal modules for agent coordination and data processing
 from .remote_agent_connection import RemoteAgentConnections, TaskUpdateCallback, TaskCallbackArg
 from .a2a_memory_service import a2a_memory_service
+from .capability_index import AGENT_SHORTLIST_EMBEDDINGS, CapabilityIndex
+from .memory_prefetch import MemoryPrefetcher
 from .a2a_document_processor import a2a_document_processor
 
 # Extracted models and parsers (refactored from this file)
@@ -111,6 +113,7 @@ from pydantic import BaseModel, Field
 
 # Tenant utilities for multi-tenancy support
 from utils.tenant import get_tenant_from_context
+from utils.bounded_state import BoundedStore, CONTEXT_STATE_MAX_ENTRIES, CONTEXT_STATE_TTL_SECONDS
 # File parts utilities for standardized artifact handling
 from utils.file_parts import (
     extract_uri,
@@ -123,7 +126,8 @@ from utils.file_parts import (
     convert_artifact_dict_to_file_part,
 )
 # Chat history persistence
-from service.chat_history_service import add_message as persist_message, create_conversation
+from service.chat_history_service import add_message_async as persist_message, create_conversation
+from service.task_supervisor import spawn
 import time
 
 # Load environment configuration from project root
@@ -189,6 +193,11 @@ def _build_persist_parts(final_responses) -> list:
     return parts
 
 
+def _context_store(name: str) -> BoundedStore:
+    """Per-conversation host state, evicted when idle or past the entry limit."""
+    return BoundedStore(name, max_entries=CONTEXT_STATE_MAX_ENTRIES, ttl_seconds=CONTEXT_STATE_TTL_SECONDS)
+
+
 # Note: SessionContext, AgentModeTask, AgentModePlan, NextStep
 # have been extracted to models.py
 # 
@@ -262,10 +271,20 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
         self.remote_agent_connections: Dict[str, RemoteAgentConnections] = {}
         self.cards: Dict[str, AgentCard] = {}
         self.agents: str = ''
-        self.session_contexts: Dict[str, SessionContext] = {}
+        # Precomputed index of card capabilities, used to shortlist agents for routing prompts
+        embedding_engine = getattr(a2a_memory_service, 'embedding_engine', None) if AGENT_SHORTLIST_EMBEDDINGS else None
+        self.capability_index = CapabilityIndex(embed=embedding_engine.embed_many if embedding_engine else None)
+        # Memory lookups for outbound messages: started when the tool call is parsed,
+        # shared by identical sibling calls and bounded by a latency budget
+        self.memory_prefetcher = MemoryPrefetcher(
+            search=lambda query, context_id, top_k: self._search_relevant_memory(
+                query=query, context_id=context_id, top_k=top_k
+            )
+        )
+        self.session_contexts: Dict[str, SessionContext] = _context_store("host.session_contexts")
         
         # RESPONSES API: Store response IDs for multi-turn context chaining
-        self._response_ids: Dict[str, str] = {}  # context_id -> last_response_id
+        self._response_ids: Dict[str, str] = _context_store("host.response_ids")  # context_id -> last_response_id
         
         # Model configuration (set in create_agent)
         self.model_name: Optional[str] = None
@@ -280,13 +299,22 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
         }
         self._original_openai_client = None  # Saved ref to project client's OpenAI client
         self._alt_openai_clients = {}  # endpoint -> AsyncAzureOpenAI client cache
+        # Pooled chat-completions clients for planner/selector calls: (endpoint, api_version) -> client
+        self._pooled_openai_clients: Dict[tuple, Any] = {}
+        self._shared_token_provider = None
+        self._shared_token_credential = None
+        # Wall-clock latency (ms) and prompt size (tokens) of each planner call in the current orchestration
+        self.planner_latencies_ms: List[float] = []
+        self.planner_prompt_tokens: List[int] = []
+        # Per-step timings and critical path of the last compiled workflow run
+        self.workflow_step_timings: Dict[str, Any] = {}
         
         # REMOVED: self.default_contextId = str(uuid.uuid4())
         # We NEVER want to use a UUID fallback - context_id must come from the request
         self.default_contextId = None
-        self._agent_tasks: Dict[str, Optional[Task]] = {}
-        self.agent_token_usage: Dict[str, dict] = {}  # Store token usage per agent
-        self.host_token_usage: Dict[str, int] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}  # Host agent tokens
+        self._agent_tasks: Dict[str, Optional[Task]] = _context_store("host.agent_tasks")
+        self.agent_token_usage: Dict[str, dict] = _context_store("host.agent_token_usage")  # Store token usage per agent
+        self.host_token_usage: Dict[str, int] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_prompt_tokens": 0}  # Host agent tokens
         
         self.enable_task_evaluation = enable_task_evaluation
         self._active_conversations: Dict[str, str] = {}
@@ -294,14 +322,14 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
         
         # Cancellation support: tracks which contexts have been cancelled
         # Key: context_id, Value: True if cancelled
-        self._cancellation_tokens: Dict[str, bool] = {}
+        self._cancellation_tokens: Dict[str, bool] = _context_store("host.cancellation_tokens")
         # Track active A2A tasks for cancellation (context_id -> {agent_name: task_id})
-        self._active_agent_tasks: Dict[str, Dict[str, str]] = {}
+        self._active_agent_tasks: Dict[str, Dict[str, str]] = _context_store("host.active_agent_tasks")
         # Snapshot of plan at cancel time (before current_plan is cleared)
-        self._cancelled_plan_snapshots: Dict[str, dict] = {}
+        self._cancelled_plan_snapshots: Dict[str, dict] = _context_store("host.cancelled_plan_snapshots")
         # Interrupt support: queued user instructions to redirect a running workflow
         # Key: context_id, Value: new user instruction string
-        self._interrupt_instructions: Dict[str, str] = {}
+        self._interrupt_instructions: Dict[str, str] = _context_store("host.interrupt_instructions")
         
         # Configure context-sharing between agents for improved continuity
         # When enabled, agents receive information about previous agent responses
@@ -631,6 +659,12 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
                 for tc in tool_calls_to_execute:
                     if tc.name in ("send_message", "send_message_sync"):
                         send_message_calls.append(tc)
+                        # Start the memory lookup while the calls are being dispatched
+                        try:
+                            arguments = json.loads(tc.arguments) if isinstance(tc.arguments, str) else tc.arguments
+                            self._prefetch_memory(arguments.get("message", ""), context_id)
+                        except (ValueError, AttributeError):
+                            pass  # Malformed arguments are reported when the call executes
                     else:
                         other_calls.append(tc)
 
@@ -638,7 +672,7 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
                 if len(send_message_calls) > 1:
                     log_debug(f"Executing {len(send_message_calls)} send_message calls in parallel")
                     for tc in send_message_calls:
-                        asyncio.create_task(self._emit_granular_agent_event(
+                        spawn("progress", self._emit_granular_agent_event(
                             "foundry-host-agent", f"🛠️ Calling: {tc.name}", context_id,
                             event_type="tool_call", metadata={"tool_name": tc.name}
                         ))
@@ -677,7 +711,7 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
 
                 # Sequential execution for non-send_message calls (and single send_message)
                 for tool_call in other_calls:
-                    asyncio.create_task(self._emit_granular_agent_event(
+                    spawn("progress", self._emit_granular_agent_event(
                         "foundry-host-agent", f"🛠️ Calling: {tool_call.name}", context_id,
                         event_type="tool_call", metadata={"tool_name": tool_call.name}
                     ))
@@ -886,6 +920,7 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
             tasks = []
             for tool_call in send_message_calls:
                 arguments = json.loads(tool_call["function"]["arguments"]) if isinstance(tool_call["function"]["arguments"], str) else tool_call["function"]["arguments"]
+                self._prefetch_memory(arguments.get("message", ""), context_id)
                 
                 # Create dummy tool context
                 tool_context = type('obj', (object,), {'state': session_context})()
@@ -1159,24 +1194,16 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
     def _create_alt_responses_client(self, endpoint: str):
         """Create an AsyncAzureOpenAI client for an alternate Azure endpoint (Responses API).
 
-        Uses AsyncAzureOpenAI with azure_ad_token_provider for automatic token management.
+        The client comes from the shared pool, so it reuses the host's cached
+        bearer token and keep-alive connections.
         The /responses endpoint is NOT in AsyncAzureOpenAI's _deployments_endpoints set,
         so no deployment-based URL rewriting is applied — requests go directly to
         {azure_endpoint}/openai/v1/responses as expected.
         """
-        from openai import AsyncAzureOpenAI
-        from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-        credential = DefaultAzureCredential()
-        token_provider = get_bearer_token_provider(credential, "https://cognitiveservices.azure.com/.default")
         resource_name = endpoint.split("//")[1].split(".")[0]
         azure_endpoint = f"https://{resource_name}.openai.azure.com"
         log_foundry_debug(f"Creating alt Responses API client (AsyncAzureOpenAI): {azure_endpoint}")
-        client = AsyncAzureOpenAI(
-            azure_endpoint=azure_endpoint,
-            azure_ad_token_provider=token_provider,
-            api_version="2025-03-01-preview",
-        )
-        return client
+        return self._get_pooled_openai_client(azure_endpoint, "2025-03-01-preview")
 
     def _get_base_endpoint(self) -> str:
         """Return the correct Azure base endpoint for the current model."""
@@ -1683,17 +1710,10 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
             log_foundry_debug(f"[Agent Mode] Azure endpoint: {base_endpoint}")
             log_debug(f"[Agent Mode] Model deployment: {model_name}")
 
-            # Get Azure credential token
-            from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-            from openai import AsyncAzureOpenAI
-            credential = DefaultAzureCredential()
-            token_provider = get_bearer_token_provider(credential, "https://cognitiveservices.azure.com/.default")
-
-            # Create Azure OpenAI client with token auth
-            client = AsyncAzureOpenAI(
-                azure_endpoint=base_endpoint,
-                azure_ad_token_provider=token_provider,
-                api_version="2024-08-01-preview"  # Version that supports structured outputs
+            # Pooled client per endpoint - reuses the cached token and open connections
+            client = self._get_pooled_openai_client(
+                base_endpoint,
+                "2024-08-01-preview",  # Version that supports structured outputs
             )
 
             log_debug(f"[Agent Mode] Making structured output request with OpenAI SDK...")
@@ -1718,7 +1738,10 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
                 self.host_token_usage["prompt_tokens"] += completion.usage.prompt_tokens or 0
                 self.host_token_usage["completion_tokens"] += completion.usage.completion_tokens or 0
                 self.host_token_usage["total_tokens"] += completion.usage.total_tokens or 0
-                log_debug(f"[Host Agent] Orchestration tokens: +{completion.usage.total_tokens} (total: {self.host_token_usage['total_tokens']})")
+                # Prompt tokens the service served from its prompt cache
+                cached_tokens = getattr(getattr(completion.usage, 'prompt_tokens_details', None), 'cached_tokens', None) or 0
+                self.host_token_usage["cached_prompt_tokens"] += cached_tokens
+                log_debug(f"[Host Agent] Orchestration tokens: +{completion.usage.total_tokens} ({cached_tokens} prompt tokens cached, total: {self.host_token_usage['total_tokens']})")
             
             return parsed
                     
@@ -1741,16 +1764,7 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
             model_name = self.model_name or os.environ.get("AZURE_AI_AGENT_MODEL_DEPLOYMENT_NAME", "gpt-4o")
             base_endpoint = self._get_base_endpoint()
 
-            from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-            from openai import AsyncAzureOpenAI
-            credential = DefaultAzureCredential()
-            token_provider = get_bearer_token_provider(credential, "https://cognitiveservices.azure.com/.default")
-
-            client = AsyncAzureOpenAI(
-                azure_endpoint=base_endpoint,
-                azure_ad_token_provider=token_provider,
-                api_version="2024-08-01-preview"
-            )
+            client = self._get_pooled_openai_client(base_endpoint, "2024-08-01-preview")
 
             completion = await client.chat.completions.create(
                 model=model_name,
@@ -1778,16 +1792,26 @@ class FoundryHostAgent2(EventEmitters, AgentRegistry, StreamingHandlers, MemoryO
         Use LLM to select the best agent for a task description.
         
         This is a lightweight call just for agent selection when the workflow
-        doesn't explicitly specify which agent to use.
+        doesn't explicitly specify which agent to use. Shortlisted agents are
+        described in full and the rest are named, so the LLM always makes the
+        final choice from every agent.
         """
         try:
+            names = [agent["name"] for agent in available_agents]
+            shortlisted = await self.capability_index.shortlist(task_description, names)
+            described = [agent for agent in available_agents if agent["name"] in shortlisted]
+            other_agents = [name for name in names if name not in shortlisted]
+            agents_text = json.dumps(described, indent=2)
+            if other_agents:
+                agents_text += f"\n\nAlso available (less likely matches): {', '.join(other_agents)}"
+
             system_prompt = """You are an agent selector. Given a task description and available agents, 
 select the most appropriate agent. Return ONLY the agent name, nothing else."""
             
             user_prompt = f"""Task: {task_description}
 
 Available Agents:
-{json.dumps(available_agents, indent=2)}
+{agents_text}
 
 Return the name of the best agent for this task (exact match from the list above):"""
             
@@ -2680,6 +2704,9 @@ Answer with just JSON:
                 log_info(f"[SEND_MESSAGE] Workflow cancelled, skipping call to {agent_name}")
                 return ["[Workflow cancelled by user]"]
 
+            # Start the memory lookup now so it overlaps the catalog check below
+            self._prefetch_memory(message, _current_context_id.get() or session_context.contextId)
+
             # CRITICAL: DO NOT generate new contextId - it comes from the session_context
             # The session_context already has the correct contextId from the HTTP request
             import uuid
@@ -2746,7 +2773,7 @@ Answer with just JSON:
                     if wait_s > 0:
                         # Use contextvar for async-safe context isolation
                         throttle_context_id = _current_context_id.get() or session_context.contextId
-                        asyncio.create_task(self._emit_granular_agent_event(agent_name, f"throttled; waiting {wait_s}s", throttle_context_id, event_type="info"))
+                        spawn("progress", self._emit_granular_agent_event(agent_name, f"throttled; waiting {wait_s}s", throttle_context_id, event_type="info"))
                         await asyncio.sleep(wait_s)
             except Exception:
                 pass
@@ -2869,7 +2896,7 @@ Answer with just JSON:
             # ========================================================================
             # EMIT WORKFLOW MESSAGE: Clear "Calling agent" message for workflow panel
             # ========================================================================
-            asyncio.create_task(self._emit_granular_agent_event(
+            spawn("progress", self._emit_granular_agent_event(
                 agent_name, f"Contacting {agent_name}...", contextId,
                 event_type="agent_progress"
             ))
@@ -2878,7 +2905,7 @@ Answer with just JSON:
             # EMIT INITIAL STATUS: "submitted" - task has been sent to remote agent
             # This is for the SIDEBAR to show the agent is starting work
             # ========================================================================
-            asyncio.create_task(self._emit_simple_task_status(agent_name, "submitted", contextId, taskId))
+            spawn("telemetry", self._emit_simple_task_status(agent_name, "submitted", contextId, taskId))
             
             try:
                 # CRITICAL: Store HOST's contextId for use in callbacks
@@ -2906,7 +2933,7 @@ Answer with just JSON:
                     if not _working_emitted["emitted"]:
                         _working_emitted["emitted"] = True
                         log_debug(f"[WORKING] First callback - emitting working status for {agent_name}")
-                        asyncio.create_task(self._emit_simple_task_status(agent_name, "working", contextId, taskId))
+                        spawn("telemetry", self._emit_simple_task_status(agent_name, "working", contextId, taskId))
                     
                     # Emit granular events based on the type of update
                     if hasattr(event, 'kind'):
@@ -2951,7 +2978,7 @@ Answer with just JSON:
                                                         stream_status = 'processing' if stream_file_ext in indexable_exts else 'uploaded'
                                                         
                                                         # Emit file_uploaded event - USE HOST'S contextId for routing!
-                                                        asyncio.create_task(self._emit_file_artifact_event(
+                                                        spawn("telemetry", self._emit_file_artifact_event(
                                                             filename=stream_file_name,
                                                             uri=artifact_uri,
                                                             context_id=host_context_id,
@@ -2981,7 +3008,7 @@ Answer with just JSON:
                                                             # The /api/files endpoint queries blob storage directly
                                                             
                                                             # Emit file_uploaded event - USE HOST'S contextId for routing!
-                                                            asyncio.create_task(self._emit_file_artifact_event(
+                                                            spawn("telemetry", self._emit_file_artifact_event(
                                                                 filename=file_name,
                                                                 uri=str(file_uri),
                                                                 context_id=host_context_id,
@@ -3036,7 +3063,7 @@ Answer with just JSON:
                                         stream_event_type = "agent_progress"
                                     
                                     # Stream detailed status to UI - USE HOST'S contextId for routing!
-                                    asyncio.create_task(self._emit_granular_agent_event(
+                                    spawn("progress", self._emit_granular_agent_event(
                                         agent_name, status_text, host_context_id,
                                         event_type=stream_event_type, metadata=stream_metadata
                                     ))
@@ -3045,14 +3072,14 @@ Answer with just JSON:
                             # Agent is generating artifacts - USE HOST'S contextId for routing!
                             elapsed_seconds = int(time.time() - start_time)
                             elapsed_str = f" ({elapsed_seconds}s)" if elapsed_seconds >= 5 else ""
-                            asyncio.create_task(self._emit_granular_agent_event(
+                            spawn("progress", self._emit_granular_agent_event(
                                 agent_name, f"{agent_name} is preparing results{elapsed_str}", host_context_id,
                                 event_type="agent_progress"
                             ))
                         
                         elif event_kind == 'task':
                             # Initial task creation - USE HOST'S contextId for routing!
-                            asyncio.create_task(self._emit_granular_agent_event(
+                            spawn("progress", self._emit_granular_agent_event(
                                 agent_name, f"{agent_name} has started working on: \"{query_preview}\"", host_context_id,
                                 event_type="agent_progress"
                             ))
@@ -3069,7 +3096,7 @@ Answer with just JSON:
                 if len(clean_message) > 500:
                     clean_message = clean_message[:497] + "..."
                 
-                asyncio.create_task(self._emit_outgoing_message_event(agent_name, clean_message, contextId))
+                spawn("telemetry", self._emit_outgoing_message_event(agent_name, clean_message, contextId))
                 
                 response = await client.send_message(request, streaming_task_callback)
                 log_debug(f"Agent {agent_name} responded successfully")
@@ -3127,8 +3154,8 @@ Answer with just JSON:
                     # In workflow mode (suppress_streaming=True), the orchestration layer
                     # is the single authoritative emitter of agent_complete/agent_error.
                     if not suppress_streaming:
-                        asyncio.create_task(self._emit_simple_task_status(agent_name, "completed", contextId, taskId))
-                        asyncio.create_task(self._emit_granular_agent_event(
+                        spawn("telemetry", self._emit_simple_task_status(agent_name, "completed", contextId, taskId))
+                        spawn("telemetry", self._emit_granular_agent_event(
                             agent_name, f"{agent_name} has completed the task successfully", contextId,
                             event_type="agent_complete"
                         ))
@@ -3203,7 +3230,7 @@ Answer with just JSON:
                                             is_indexable = file_ext in indexable_extensions
                                             file_status = 'processing' if is_indexable else 'uploaded'
                                             
-                                            asyncio.create_task(self._emit_file_artifact_event(
+                                            spawn("telemetry", self._emit_file_artifact_event(
                                                 filename=file_name,
                                                 uri=file_uri,
                                                 context_id=contextId,
@@ -3262,7 +3289,7 @@ Answer with just JSON:
                     # Store interaction in background (only if inter-agent memory is enabled)
                     enable_memory = getattr(session_context, 'enable_inter_agent_memory', False)
                     if enable_memory:
-                        asyncio.create_task(self._store_a2a_interaction_background(
+                        spawn("memory", self._store_a2a_interaction_background(
                             outbound_request=request,
                             inbound_response=response,
                             agent_name=agent_name,
@@ -3287,8 +3314,8 @@ Answer with just JSON:
                                 error_msg = _root.text[:500]
                                 break
                     if not suppress_streaming:
-                        asyncio.create_task(self._emit_simple_task_status(agent_name, "failed", contextId, taskId))
-                        asyncio.create_task(self._emit_granular_agent_event(
+                        spawn("telemetry", self._emit_simple_task_status(agent_name, "failed", contextId, taskId))
+                        spawn("telemetry", self._emit_granular_agent_event(
                             agent_name,
                             f"Agent {agent_name} failed: {error_msg[:200]}" if error_msg else f"Agent {agent_name} failed",
                             contextId,
@@ -3306,7 +3333,7 @@ Answer with just JSON:
                         session_context.agent_task_states[agent_name] = 'failed'
                         session_context.agent_cooldowns[agent_name] = time.time() + retry_after
                         try:
-                            asyncio.create_task(self._emit_granular_agent_event(agent_name, f"rate limited; retrying in {retry_after}s (attempt {retry_attempt}/{max_rate_limit_retries})", retry_context_id, event_type="info"))
+                            spawn("progress", self._emit_granular_agent_event(agent_name, f"rate limited; retrying in {retry_after}s (attempt {retry_attempt}/{max_rate_limit_retries})", retry_context_id, event_type="info"))
                         except Exception:
                             pass
 
@@ -3398,7 +3425,7 @@ Answer with just JSON:
                     log_info(f"[HITL] Agent {agent_name} requires input - SETTING pending_input_agent!")
 
                     # Emit event so frontend shows "Awaiting response" status
-                    asyncio.create_task(self._emit_granular_agent_event(
+                    spawn("telemetry", self._emit_granular_agent_event(
                         agent_name,
                         f"Waiting for human input...",
                         contextId,
@@ -3433,7 +3460,7 @@ Answer with just JSON:
                 # Store interaction in background (only if inter-agent memory is enabled)
                 enable_memory = getattr(session_context, 'enable_inter_agent_memory', False)
                 if enable_memory:
-                    asyncio.create_task(self._store_a2a_interaction_background(
+                    spawn("memory", self._store_a2a_interaction_background(
                         outbound_request=request,
                         inbound_response=response,
                         agent_name=agent_name,
@@ -3511,6 +3538,7 @@ Answer with just JSON:
         mode_label = "Agent Mode" if is_agent_mode else "Standard Mode"
         
         context_parts = []
+        memory_timed_out = False
         
         # Always search memory for relevant context (retrieval is always enabled)
         # The memory toggle only controls STORAGE of new interactions, not retrieval
@@ -3522,147 +3550,45 @@ Answer with just JSON:
             # Use contextvar for async-safe context isolation (fixes stale session_context issue)
             effective_context_id = _current_context_id.get() or session_context.contextId
             log_debug(f"[_add_context_to_message] Using context_id: {effective_context_id} (contextvar: {_current_context_id.get()}, session: {session_context.contextId})")
-            memory_results = await self._search_relevant_memory(
-                query=message,
-                context_id=effective_context_id,
-                agent_name=None,
-                top_k=top_k_results
-            )
-            
+            # Usually already prefetched by send_message; siblings share one lookup
+            memory_results = await self.memory_prefetcher.results(message, effective_context_id, top_k=top_k_results)
+            if memory_results is None:
+                # Over the latency budget: send without memory context, and
+                # don't add a thread lookup on top of the time already spent
+                memory_timed_out = True
+                memory_results = []
+
             if memory_results:
                 context_parts.append("Relevant context from previous interactions:")
-                
-                # Process memory results to extract key information
+
                 for i, result in enumerate(memory_results, 1):
-                        try:
-                            agent_name = result.get('agent_name', 'Unknown')
-                            timestamp = result.get('timestamp', 'Unknown')
-                                
-                            # Get the actual content - try multiple possible locations
-                            content_summary = ""
-                            
-                            # Method 1: Look for content in inbound payload
-                            if 'inbound_payload' in result and result['inbound_payload']:
-                                inbound = result['inbound_payload']
+                    try:
+                        agent_name = result.get('agent_name', 'Unknown')
+                        # Extracted once per stored interaction, not re-parsed per call
+                        content_summary = self.memory_prefetcher.result_text(result)
+                        if not content_summary:
+                            # Don't dump raw JSON, just skip if we can't extract text
+                            log_warning(f"Skipping memory result {i} from {agent_name} - no clean text extracted")
+                            continue
 
-                                log_memory_debug(f"[MEMORY] Result {i} from {agent_name}:")
-                                log_memory_debug(f"[MEMORY] Inbound type: {type(inbound)}")
-                                log_memory_debug(f"[MEMORY] Inbound keys: {inbound.keys() if isinstance(inbound, dict) else 'N/A'}")
+                        # Truncate long content for context efficiency
+                        # Use configured max_chars - applies to all agents uniformly
+                        max_chars = self.memory_summary_max_chars
+                        if len(content_summary) > max_chars:
+                            content_summary = content_summary[:max_chars] + "..."
+                        context_parts.append(f"  {i}. From {agent_name}: {content_summary}")
+
+                    except Exception as e:
+                        log_warning(f"Error processing memory result {i}: {e}")
+                        continue
 
-                                # Parse JSON string if needed
-                                if isinstance(inbound, str):
-                                    log_memory_debug(f"[MEMORY] Inbound is string, length: {len(inbound)} chars, parsing JSON...")
-                                    try:
-                                        inbound = json.loads(inbound)
-                                        log_memory_debug(f"[MEMORY] Parsed JSON keys: {inbound.keys() if isinstance(inbound, dict) else 'N/A'}")
-                                    except json.JSONDecodeError as e:
-                                        log_memory_debug(f"[MEMORY] JSON parse failed: {e}")
-                                        inbound = {}
-
-                                # Try direct content field (DocumentProcessor format)
-                                if isinstance(inbound, dict) and 'content' in inbound:
-                                    content_length = len(str(inbound['content']))
-                                    log_memory_debug(f"[MEMORY] Found 'content' field: {content_length} chars")
-                                    content_summary = str(inbound['content'])
-                                    log_memory_debug(f"[MEMORY] Content summary length: {len(content_summary)} chars")
-                                    log_memory_debug(f"[MEMORY] Content preview: {content_summary[:200]}...")
-
-                                # Try Task structure: status.message.parts (A2A Task format)
-                                if not content_summary and isinstance(inbound, dict) and 'status' in inbound:
-                                    status = inbound['status']
-                                    if isinstance(status, dict) and 'message' in status:
-                                        status_message = status['message']
-                                        if isinstance(status_message, dict) and 'parts' in status_message:
-                                            parts_content = []
-                                            for part in status_message['parts']:
-                                                if isinstance(part, dict):
-                                                    if 'text' in part:
-                                                        parts_content.append(str(part['text']))
-                                                    elif 'kind' in part and part['kind'] == 'text' and 'text' in part:
-                                                        parts_content.append(str(part['text']))
-                                            if parts_content:
-                                                content_summary = " ".join(parts_content)
-
-                                # Try parts array at root (A2A Message structure)
-                                if not content_summary and isinstance(inbound, dict) and 'parts' in inbound:
-                                    parts_content = []
-                                    for part in inbound['parts']:
-                                        if isinstance(part, dict):
-                                            if 'text' in part:
-                                                parts_content.append(str(part['text']))
-                                            elif 'root' in part and isinstance(part['root'], dict) and 'text' in part['root']:
-                                                parts_content.append(str(part['root']['text']))
-                                    if parts_content:
-                                        content_summary = " ".join(parts_content)
-                            
-                            # Method 2: Look in outbound payload if inbound didn't work
-                            if not content_summary and 'outbound_payload' in result:
-                                outbound = result['outbound_payload']
-                                
-                                if isinstance(outbound, str):
-                                    try:
-                                        outbound = json.loads(outbound)
-                                    except json.JSONDecodeError:
-                                        outbound = {}
-                                
-                                # Try message.parts structure (A2A response format)
-                                if isinstance(outbound, dict) and 'message' in outbound and 'parts' in outbound['message']:
-                                    parts_content = []
-                                    for part in outbound['message']['parts']:
-                                        if isinstance(part, dict):
-                                            # Try direct text field
-                                            if 'text' in part:
-                                                parts_content.append(str(part['text']))
-                                            # Try root.text structure
-                                            elif 'root' in part and isinstance(part['root'], dict) and 'text' in part['root']:
-                                                parts_content.append(str(part['root']['text']))
-                                            # Try kind=text structure
-                                            elif part.get('kind') == 'text' and 'text' in part:
-                                                parts_content.append(str(part['text']))
-                                    if parts_content:
-                                        content_summary = " ".join(parts_content)
-                            
-                            # Method 3: Skip - don't dump raw JSON, just skip if we can't extract text
-                            if not content_summary:
-                                # Skip this memory result - we couldn't extract meaningful text
-                                log_warning(f"Skipping memory result {i} from {agent_name} - no clean text extracted")
-                                continue
-                            
-                            # CLEANUP: Handle legacy malformed format {'result': '...'} stored in text field
-                            # This was caused by str(task.output) being stored instead of task.output.get("result")
-                            if content_summary.startswith("{'result':") or content_summary.startswith('{"result":'):
-                                try:
-                                    import ast
-                                    parsed = ast.literal_eval(content_summary) if content_summary.startswith("{'") else json.loads(content_summary)
-                                    if isinstance(parsed, dict) and 'result' in parsed:
-                                        content_summary = str(parsed['result'])
-                                        log_memory_debug(f"Cleaned malformed result format from memory entry {i}")
-                                except:
-                                    pass  # Keep original if parsing fails
-                            
-                            # Add to context if we found content
-                            if content_summary:
-                                # Truncate long content for context efficiency
-                                # Use configured max_chars - applies to all agents uniformly
-                                max_chars = self.memory_summary_max_chars
-                                    
-                                if len(content_summary) > max_chars:
-                                    content_summary = content_summary[:max_chars] + "..."
-                                context_parts.append(f"  {i}. From {agent_name}: {content_summary}")
-                            else:
-                                log_warning(f"No content found in memory result {i} from {agent_name}")
-                        
-                        except Exception as e:
-                            log_warning(f"Error processing memory result {i}: {e}")
-                            continue
-                
             else:
                 log_debug(f"No relevant memory context found")
-        
+
         except Exception as e:
             log_error(f"Error searching memory: {e}")
             context_parts.append("Note: Unable to retrieve relevant context from memory")
-        
+
         # NOTE: host_turn_history injection has been removed.
         # GPT-4 is now instructed to include all relevant context from previous agents
         # in its message parameter when calling send_message. This eliminates redundant
@@ -3670,7 +3596,7 @@ Answer with just JSON:
         # See instructions.py "CONTEXT PASSING (CRITICAL)" section.
 
         # Fallback: Add minimal recent thread context only if memory search failed
-        if not context_parts and thread_id:
+        if not context_parts and thread_id and not memory_timed_out:
             try:
                 log_debug("Fallback: Using recent thread context (memory search failed)")
                 messages = await self._http_list_messages(thread_id, limit=5)
@@ -3731,6 +3657,8 @@ Answer with just JSON:
                 span=span,
                 context_id=context_id
             )
+            # Later lookups in this context should see the new interaction
+            self.memory_prefetcher.invalidate(context_id)
         except Exception as e:
             log_error(f"Background A2A interaction storage failed for {agent_name}: {e}")
             # Don't let storage errors affect parallel execution
@@ -3782,7 +3710,7 @@ Answer with just JSON:
             return []
         
         # Emit orchestrator status - file received from agent
-        asyncio.create_task(self._emit_granular_agent_event(
+        spawn("progress", self._emit_granular_agent_event(
             "foundry-host-agent", 
             f"📥 Received {len(files_to_index)} file(s) from {agent_name} - processing for memory indexing", 
             context_id,
@@ -3800,7 +3728,7 @@ Answer with just JSON:
                 log_debug(f"Downloading {file_name} from {file_uri[:50]}...")
                 
                 # Emit per-file extraction status
-                asyncio.create_task(self._emit_granular_agent_event(
+                spawn("progress", self._emit_granular_agent_event(
                     "foundry-host-agent",
                     f"📄 Extracting content from: {file_name}",
                     context_id,
@@ -3849,7 +3777,7 @@ Answer with just JSON:
                         # Emit detailed extraction result to orchestrator
                         extraction_message = f"📄 **Extracted from {file_name} (from {agent_name}):**\n\n{content_preview}\n\n---\n📊 Stored {chunks_stored} searchable chunks in memory"
                         log_debug(f"[DOC_EXTRACTION] Emitting orchestrator extraction event: {len(content_preview)} chars")
-                        asyncio.create_task(self._emit_granular_agent_event(
+                        spawn("progress", self._emit_granular_agent_event(
                             "foundry-host-agent",
                             extraction_message,
                             context_id,
@@ -3861,7 +3789,7 @@ Answer with just JSON:
                     
                     # Emit file_processing_completed event so frontend updates status to 'analyzed'
                     # This uses the same event type that the /api/files/process endpoint uses
-                    asyncio.create_task(self._emit_file_analyzed_event(
+                    spawn("telemetry", self._emit_file_analyzed_event(
                         filename=file_name,
                         uri=file_uri,
                         context_id=context_id,
@@ -3871,7 +3799,7 @@ Answer with just JSON:
                     error = result.get('error', 'Unknown error') if result else 'No result'
                     log_error(f"Failed to index {file_name}: {error}")
                     # Emit file_processing_completed with 'error' status so UI updates
-                    asyncio.create_task(self._emit_file_analyzed_event(
+                    spawn("telemetry", self._emit_file_analyzed_event(
                         filename=file_name,
                         uri=file_uri,
                         context_id=context_id,
@@ -3882,7 +3810,7 @@ Answer with just JSON:
             except Exception as e:
                 log_error(f"Error indexing {artifact.get('name', 'unknown')}: {e}")
                 # Emit file_processing_completed with 'error' status so UI updates
-                asyncio.create_task(self._emit_file_analyzed_event(
+                spawn("telemetry", self._emit_file_analyzed_event(
                     filename=artifact.get('name', 'unknown'),
                     uri=artifact.get('uri', ''),
                     context_id=context_id,
@@ -3892,7 +3820,7 @@ Answer with just JSON:
         
         # Final status — attribute to source agent
         if indexed_count > 0:
-            asyncio.create_task(self._emit_granular_agent_event(
+            spawn("progress", self._emit_granular_agent_event(
                 agent_name, 
                 f"✅ Indexed {indexed_count} document(s) — now searchable via memory", 
                 context_id,
@@ -4255,7 +4183,7 @@ Answer with just JSON:
                         parts_data.append(p.dict())
                     else:
                         parts_data.append({"text": str(p)})
-                persist_message(context_id, {
+                await persist_message(context_id, {
                     "messageId": message_id,
                     "role": "user",
                     "parts": parts_data,
@@ -4513,7 +4441,7 @@ Answer with just JSON:
                 # IMPORTANT: Emit a "completed" status for the pending agent to clear "Waiting" in sidebar
                 # This ensures the UI updates when the human provides their response
                 try:
-                    asyncio.create_task(self._emit_simple_task_status(
+                    spawn("telemetry", self._emit_simple_task_status(
                         pending_agent, 
                         "completed", 
                         context_id, 
@@ -4888,7 +4816,7 @@ Answer with just JSON:
                                 except Exception as plan_err:
                                     log_warning(f"[ChatHistory] Warning - could not serialize plan: {plan_err}")
                             
-                            persist_message(context_id, {
+                            await persist_message(context_id, {
                                 "messageId": str(uuid.uuid4()),
                                 "role": "agent",
                                 "parts": [{"root": {"kind": "text", "text": final_responses[0]}}],
@@ -4933,7 +4861,7 @@ Answer with just JSON:
                                 plan_data["goal_status"] = "cancelled"
                                 cancel_metadata["workflow_plan"] = plan_data
 
-                            persist_message(context_id, {
+                            await persist_message(context_id, {
                                 "messageId": str(uuid.uuid4()),
                                 "role": "agent",
                                 "parts": [{"root": {"kind": "text", "text": "Workflow cancelled."}}],
@@ -5134,7 +5062,7 @@ WORKFLOW STEPS AND OUTPUTS:
                                 except Exception as plan_err:
                                     log_warning(f"[ChatHistory] Warning - could not serialize plan: {plan_err}")
 
-                            persist_message(context_id, {
+                            await persist_message(context_id, {
                                 "messageId": str(uuid.uuid4()),
                                 "role": "agent",
                                 "parts": persist_parts,
@@ -5233,7 +5161,7 @@ Workflow completed with result:
                                     except Exception as plan_err:
                                         log_warning(f"[ChatHistory] Warning - could not serialize plan: {plan_err}")
 
-                                persist_message(context_id, {
+                                await persist_message(context_id, {
                                     "messageId": str(uuid.uuid4()),
                                     "role": "agent",
                                     "parts": persist_parts,
@@ -5257,7 +5185,7 @@ Workflow completed with result:
                                 except Exception as plan_err:
                                     log_warning(f"[ChatHistory] Warning - could not serialize plan: {plan_err}")
                             
-                            persist_message(context_id, {
+                            await persist_message(context_id, {
                                 "messageId": str(uuid.uuid4()),
                                 "role": "agent",
                                 "parts": [{"root": {"kind": "text", "text": final_responses[0]}}],
@@ -5522,7 +5450,7 @@ Workflow completed with result:
                             'storage-type': result.data.get('storage-type')
                         }
                 
-                asyncio.create_task(self._store_user_host_interaction_safe(
+                spawn("persistence", self._store_user_host_interaction_safe(
                     user_message_parts=message_parts,  # Original parts - will be cleaned in memory storage
                     user_message_text=user_message,
                     host_response=final_responses,
@@ -5545,7 +5473,7 @@ Workflow completed with result:
                             except Exception as plan_err:
                                 log_warning(f"[ChatHistory] Warning - could not serialize plan: {plan_err}")
 
-                        persist_message(context_id, {
+                        await persist_message(context_id, {
                             "messageId": str(uuid.uuid4()),
                             "role": "agent",
                             "parts": persist_parts,
@@ -5634,6 +5562,8 @@ Workflow completed with result:
                 if function_name == "send_message":
                     # Collect send_message calls for parallel execution
                     send_message_tool_calls.append((tool_call, function_name, arguments))
+                    # Start the memory lookup before the status events below
+                    self._prefetch_memory(arguments.get("message", ""), context_id)
                 else:
                     # Keep other tool calls for sequential execution
                     other_tool_calls.append((tool_call, function_name, arguments))
@@ -5677,7 +5607,7 @@ Workflow completed with result:
                     })
                     
                     # Stream granular tool call to WebSocket for thinking box visibility
-                    asyncio.create_task(self._emit_tool_call_event(agent_name, "send_message", arguments, context_id))
+                    spawn("telemetry", self._emit_tool_call_event(agent_name, "send_message", arguments, context_id))
                     
                     # Log tool call event - use agent_name as actor so frontend can attribute correctly
                     if event_logger:
@@ -5720,7 +5650,7 @@ Workflow completed with result:
                                 "agent_name": agent_name,
                                 "error": str(result)
                             })
-                            asyncio.create_task(self._emit_tool_response_event(agent_name, "send_message", "failed", str(result), context_id))
+                            spawn("telemetry", self._emit_tool_response_event(agent_name, "send_message", "failed", str(result), context_id))
                         else:
                             output = result
                             self._add_status_message_to_conversation(f"✅ Agent call to {agent_name} completed", context_id)
@@ -5728,7 +5658,7 @@ Workflow completed with result:
                                 "agent_name": agent_name,
                                 "output_type": type(output).__name__
                             })
-                            asyncio.create_task(self._emit_tool_response_event(agent_name, "send_message", "success", None, context_id))
+                            spawn("telemetry", self._emit_tool_response_event(agent_name, "send_message", "success", None, context_id))
                         
                         # Log tool result event - use agent_name as actor so frontend can attribute correctly
                         if event_logger:
@@ -6461,6 +6391,7 @@ Workflow completed with result:
             if agent_name in self.cards:
                 del self.cards[agent_name]
                 log_info(f"Removed {agent_name} from cards")
+            self.capability_index.remove(agent_name)
             
             # Update the agents list used in prompts
             self.agents = json.dumps(self.list_remote_agents(), indent=2)
@@ -6614,7 +6545,7 @@ Workflow completed with result:
     def _add_status_message_to_conversation(self, status_text: str, contextId: str):
         """Add a status message directly to the conversation for immediate UI display."""
         # Use WebSocket streaming for real-time status updates
-        asyncio.create_task(self._emit_granular_agent_event("foundry-host-agent", status_text, contextId, event_type="info"))
+        spawn("progress", self._emit_granular_agent_event("foundry-host-agent", status_text, contextId, event_type="info"))
 
     # NOTE: _emit_status_event and _emit_text_chunk are now inherited from EventEmitters
 
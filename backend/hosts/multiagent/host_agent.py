@@ -201,7 +201,7 @@ Current agent: {current_agent['active_agent']}
         log_debug(f"tool_context.state before send: {json.dumps(tool_context.state, default=str)}")
         log_debug(f"MessageSendParams (as dict): {json.dumps(request.model_dump(), default=str)}")
         response = await client.send_message(request, self.task_callback)
-        log_debug(f"Raw response from remote agent: {response}")
+        log_debug("Raw response from remote agent: %s", response)
         log_debug(f"Response type: {type(response)}")
         if isinstance(response, Message):
             return await convert_parts(task.parts, tool_context)
@@ -0,0 +1,563 @@
+"""
+Search backends for the A2A memory service.
+
+``A2AMemoryService`` talks to its index through the small subset of the Azure
+AI Search ``SearchClient`` API it actually uses (``search`` and
+``upload_documents``). Anything implementing ``MemorySearchBackend`` can stand
+in for it:
+
+- ``LocalVectorIndex``: NumPy brute-force cosine search over normalized
+  float32 vectors, optionally persisted to memory-mapped files. Runs without
+  any Azure service, so the memory path can be exercised offline.
+- ``TieredSearchClient``: a ``LocalVectorIndex`` used as L1 in front of Azure
+  Search. Hot sessions are hydrated once and then searched locally; writes go
+  to Azure first and are mirrored into L1.
+
+Only the filter grammar the memory service emits is supported:
+``field eq 'value'`` clauses joined by ``and``.
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[2]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_memory_debug, log_warning, log_error
+
+VECTOR_FIELD = "interaction_vector"
+
+# A persisted index journals each write batch and only rewrites documents.json
+# once the journal holds more entries than the index has documents
+JOURNAL_COMPACT_MIN_ENTRIES = 1024
+
+_FILTER_CLAUSE = re.compile(r"^\s*(\w+)\s+eq\s+(?:'((?:[^']|'')*)'|(true|false))\s*$", re.IGNORECASE)
+
+
+class MemorySearchBackend(Protocol):
+    """The part of ``azure.search.documents.SearchClient`` the memory service uses."""
+
+    def search(self, search_text: str = "*", **kwargs) -> Iterable[Dict[str, Any]]:
+        ...
+
+    def upload_documents(self, documents: List[Dict[str, Any]], **kwargs) -> List[Any]:
+        ...
+
+
+@dataclass
+class IndexingResult:
+    """Mirrors the fields of Azure's IndexingResult that callers check."""
+    key: str
+    succeeded: bool
+    status_code: int = 200
+
+
+def parse_filter(filter_expr: Optional[str]) -> Dict[str, Any]:
+    """Parse ``a eq 'x' and b eq true`` into ``{"a": "x", "b": True}``."""
+    if not filter_expr:
+        return {}
+    clauses: Dict[str, Any] = {}
+    for part in re.split(r"\s+and\s+", filter_expr.strip(), flags=re.IGNORECASE):
+        match = _FILTER_CLAUSE.match(part)
+        if not match:
+            raise ValueError(f"Unsupported filter clause: {part!r}")
+        field, text, boolean = match.groups()
+        clauses[field] = text.replace("''", "'") if text is not None else boolean.lower() == "true"
+    return clauses
+
+
+def cosine_to_search_score(similarity: np.ndarray) -> np.ndarray:
+    """Azure AI Search reports cosine matches as 1 / (1 + (1 - cos)).
+
+    Using the same scale keeps MIN_RELEVANCE_SCORE meaningful for both backends.
+    """
+    return 1.0 / (2.0 - similarity)
+
+
+class LocalVectorIndex:
+    """In-process vector index with an Azure Search-compatible surface.
+
+    Vectors are L2-normalized on insert so a query is one matrix-vector
+    product over the candidate rows. Deleting a document moves the last row
+    into its slot, keeping the live rows contiguous.
+
+    Args:
+        dim: Embedding dimension
+        directory: If set, vectors are kept in a memory-mapped file there.
+            Document fields are snapshotted to documents.json and each write
+            is appended to a JSONL journal; both are reloaded on start
+        initial_capacity: Rows allocated up front (doubled when full)
+    """
+
+    def __init__(self, dim: int, directory: Optional[str] = None, initial_capacity: int = 1024):
+        self.dim = dim
+        self.directory = Path(directory) if directory else None
+        self._lock = threading.RLock()
+        self._capacity = max(1, initial_capacity)
+        self._count = 0
+        self._ids: List[str] = []
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._rows: Dict[str, int] = {}
+        self._session_rows: Dict[str, set] = {}
+        self._vectors = self._allocate(self._capacity)
+        self._generation = 0
+        self._journal = None
+        self._journal_entries = 0
+        if self.directory:
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.f32"
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if not self.directory:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._vectors_path()
+        required = capacity * self.dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < required:
+                f.truncate(required)
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _grow(self) -> None:
+        new_capacity = self._capacity * 2
+        if self.directory:
+            self._vectors.flush()
+            del self._vectors
+            self._vectors = self._allocate(new_capacity)
+        else:
+            grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+            grown[:self._count] = self._vectors[:self._count]
+            self._vectors = grown
+        self._capacity = new_capacity
+
+    def _journal_path(self, generation: int) -> Path:
+        return self.directory / f"documents-{generation}.jsonl"
+
+    def _load(self) -> None:
+        docs_path = self.directory / "documents.json"
+        saved = None
+        if docs_path.exists():
+            try:
+                saved = json.loads(docs_path.read_text())
+            except Exception as e:
+                log_warning(f"[MEMORY] Local index metadata unreadable, starting empty: {e}")
+        if saved is not None and saved.get("dim") != self.dim:
+            log_warning(f"[MEMORY] Local index dimension {saved.get('dim')} != {self.dim}, starting empty")
+            saved = None
+        if saved is not None:
+            documents = saved.get("documents", [])
+            while self._capacity < len(documents):
+                self._grow()
+            for row, doc in enumerate(documents):
+                self._register(row, doc)
+            self._count = len(documents)
+            self._generation = saved.get("generation", 0)
+            self._replay_journal(self._journal_path(self._generation))
+            log_memory_debug(f"Local memory index loaded {self._count} documents from {self.directory}")
+        # Fold the replayed journal into a fresh snapshot and drop stale journals
+        self.flush()
+
+    def _replay_journal(self, path: Path) -> None:
+        """Re-apply journaled writes to the row bookkeeping.
+
+        The vectors are already in the memmap, so only ``_place``/``_remove``
+        run; they assign rows exactly as the original writes did.
+        """
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    log_warning(f"[MEMORY] Local index journal {path.name} truncated at line {line_no}, ignoring the rest")
+                    break
+                if "delete" in entry:
+                    self._remove(entry["delete"])
+                else:
+                    self._place(entry["upsert"])
+
+    def _append_journal(self, entries: List[Dict[str, Any]]) -> None:
+        """Append one write batch to the journal, compacting once it outgrows the index."""
+        if not self.directory or not entries:
+            return
+        if self._journal is None:
+            self._journal = open(self._journal_path(self._generation), "a", encoding="utf-8")
+        self._journal.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._journal.flush()
+        self._journal_entries += len(entries)
+        if self._journal_entries > max(JOURNAL_COMPACT_MIN_ENTRIES, self._count):
+            self.flush()
+
+    def _close_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def flush(self) -> None:
+        """Snapshot document fields and start an empty journal.
+
+        The snapshot is written to a temp file and renamed over documents.json,
+        so a crash leaves either the old snapshot plus its journal or the new
+        one. Also flushes the vector memmap.
+        """
+        if not self.directory:
+            return
+        with self._lock:
+            self._vectors.flush()
+            self._close_journal()
+            generation = self._generation + 1
+            docs_path = self.directory / "documents.json"
+            tmp_path = docs_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({
+                "dim": self.dim,
+                "generation": generation,
+                "documents": [self._docs[doc_id] for doc_id in self._ids],
+            }))
+            tmp_path.replace(docs_path)
+            self._generation = generation
+            self._journal_entries = 0
+            for stale in self.directory.glob("documents-*.jsonl"):
+                if stale != self._journal_path(generation):
+                    stale.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Compact any journaled writes into documents.json (call on shutdown)."""
+        with self._lock:
+            if self._journal_entries:
+                self.flush()
+            self._close_journal()
+
+    # ------------------------------------------------------------------
+    # Row bookkeeping
+    # ------------------------------------------------------------------
+
+    def _register(self, row: int, doc: Dict[str, Any]) -> None:
+        doc_id = doc["id"]
+        if row == len(self._ids):
+            self._ids.append(doc_id)
+        else:
+            self._ids[row] = doc_id
+        self._docs[doc_id] = doc
+        self._rows[doc_id] = row
+        self._session_rows.setdefault(doc.get("session_id"), set()).add(row)
+
+    def _unregister(self, doc_id: str) -> int:
+        row = self._rows.pop(doc_id)
+        doc = self._docs.pop(doc_id)
+        rows = self._session_rows.get(doc.get("session_id"))
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del self._session_rows[doc.get("session_id")]
+        return row
+
+    def _place(self, fields: Dict[str, Any]) -> int:
+        """Assign a row to a document (its old one on replace) and return it."""
+        if fields["id"] in self._rows:
+            row = self._unregister(fields["id"])
+        else:
+            if self._count == self._capacity:
+                self._grow()
+            row = self._count
+            self._count += 1
+        self._register(row, fields)
+        return row
+
+    def _remove(self, doc_id: str) -> Optional[Tuple[int, int]]:
+        """Free a document's row by moving the last row into it.
+
+        Returns ``(row, last)`` so the caller can move the vector, or None if
+        the document is not indexed.
+        """
+        if doc_id not in self._rows:
+            return None
+        row = self._unregister(doc_id)
+        last = self._count - 1
+        if row != last:
+            moved_id = self._ids[last]
+            moved_doc = self._docs[moved_id]
+            self._unregister(moved_id)
+            self._register(row, moved_doc)
+        self._ids.pop()
+        self._count -= 1
+        return row, last
+
+    def _upsert(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        vector = np.asarray(document.get(VECTOR_FIELD) or [], dtype=np.float32)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"{VECTOR_FIELD} must have {self.dim} dimensions")
+        norm = float(np.linalg.norm(vector))
+        fields = {k: v for k, v in document.items() if k != VECTOR_FIELD and not k.startswith("@search.")}
+        row = self._place(fields)
+        self._vectors[row] = vector / norm if norm else vector
+        return fields
+
+    def _delete(self, doc_id: str) -> bool:
+        moved = self._remove(doc_id)
+        if moved is None:
+            return False
+        row, last = moved
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+        return True
+
+    # ------------------------------------------------------------------
+    # SearchClient surface
+    # ------------------------------------------------------------------
+
+    def upload_documents(self, documents: List[Dict[str, Any]], **kwargs) -> List[IndexingResult]:
+        """Upload (replace) or delete documents, per ``@search.action``."""
+        results: List[IndexingResult] = []
+        with self._lock:
+            journal: List[Dict[str, Any]] = []
+            for document in documents:
+                doc_id = document.get("id")
+                try:
+                    if document.get("@search.action", "upload") == "delete":
+                        if self._delete(doc_id):
+                            journal.append({"delete": doc_id})
+                    else:
+                        journal.append({"upsert": self._upsert(document)})
+                    results.append(IndexingResult(key=doc_id, succeeded=True))
+                except Exception as e:
+                    log_error(f"[MEMORY] Local index rejected document {doc_id}: {e}")
+                    results.append(IndexingResult(key=doc_id, succeeded=False, status_code=400))
+            self._append_journal(journal)
+        return results
+
+    def delete_documents(self, documents: List[Dict[str, Any]], **kwargs) -> List[IndexingResult]:
+        return self.upload_documents([{"@search.action": "delete", "id": d["id"]} for d in documents])
+
+    def search(
+        self,
+        search_text: str = "*",
+        select: Optional[List[str]] = None,
+        vector_queries: Optional[List[Dict[str, Any]]] = None,
+        filter: Optional[str] = None,
+        top: Optional[int] = None,
+        order_by: Optional[List[str]] = None,
+        **kwargs,
+    ) -> List[Dict[str, Any]]:
+        """Filter, then rank by cosine similarity (vector query) or ``order_by``.
+
+        ``search_text`` is ignored; the memory service only sends ``*``.
+        """
+        clauses = parse_filter(filter)
+        with self._lock:
+            rows = self._candidate_rows(clauses)
+            if vector_queries:
+                rows, scores = self._rank(rows, vector_queries[0], top)
+            else:
+                rows, scores = self._order(rows, order_by, top), None
+            return [self._project(row, select, None if scores is None else scores[i]) for i, row in enumerate(rows)]
+
+    def _candidate_rows(self, clauses: Dict[str, Any]) -> np.ndarray:
+        session_id = clauses.get("session_id")
+        if "session_id" in clauses:
+            rows = sorted(self._session_rows.get(session_id, ()))
+        else:
+            rows = range(self._count)
+        others = [(k, v) for k, v in clauses.items() if k != "session_id"]
+        if others:
+            rows = [r for r in rows if all(self._docs[self._ids[r]].get(k) == v for k, v in others)]
+        return np.fromiter(rows, dtype=np.int64)
+
+    def _rank(self, rows: np.ndarray, vector_query: Dict[str, Any], top: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(vector_query.get("k") or vector_query.get("k_nearest_neighbors") or 50, top or len(rows))
+        if not len(rows) or k <= 0:
+            return rows[:0], np.empty(0, dtype=np.float32)
+        query = np.asarray(vector_query["vector"], dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+        similarity = self._vectors[rows] @ query
+        if k < len(rows):
+            best = np.argpartition(-similarity, k - 1)[:k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-similarity[best], kind="stable")]
+        return rows[best], cosine_to_search_score(similarity[best])
+
+    def _order(self, rows: np.ndarray, order_by: Optional[List[str]], top: Optional[int]) -> np.ndarray:
+        if order_by:
+            field, _, direction = order_by[0].partition(" ")
+            keys = [self._docs[self._ids[r]].get(field) or "" for r in rows]
+            order = sorted(range(len(rows)), key=keys.__getitem__, reverse=direction.lower() == "desc")
+            rows = rows[order] if len(order) else rows
+        return rows[:top] if top else rows
+
+    def _project(self, row: int, select: Optional[List[str]], score: Optional[float]) -> Dict[str, Any]:
+        doc = self._docs[self._ids[row]]
+        if select:
+            result = {f: doc.get(f) for f in select if f != VECTOR_FIELD}
+            if VECTOR_FIELD in select:
+                result[VECTOR_FIELD] = self._vectors[row].tolist()
+        else:
+            # Like Azure, all retrievable fields (the vector included) when select is omitted
+            result = dict(doc)
+            result[VECTOR_FIELD] = self._vectors[row].tolist()
+        if score is not None:
+            result["@search.score"] = float(score)
+        return result
+
+    # ------------------------------------------------------------------
+    # Session helpers used by the tiered client
+    # ------------------------------------------------------------------
+
+    def drop_session(self, session_id: str) -> int:
+        """Remove every document of a session; returns how many were removed."""
+        with self._lock:
+            ids = [self._ids[r] for r in self._session_rows.get(session_id, ())]
+            for doc_id in ids:
+                self._delete(doc_id)
+            self._append_journal([{"delete": doc_id} for doc_id in ids])
+            return len(ids)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        # Callers test ``if not self.search_client``; an empty index is still usable
+        return True
+
+
+class TieredSearchClient:
+    """LocalVectorIndex L1 in front of an Azure ``SearchClient``.
+
+    The first session-scoped query for a session copies that session's
+    documents (including vectors) from Azure into L1; later queries for it
+    are served locally until ``hot_ttl`` passes, then the session is hydrated
+    again so writes from other replicas show up. At most ``max_hot_sessions``
+    sessions are kept, least recently used first out. Azure stays the source
+    of truth: writes and deletes go there first and are mirrored into L1 only
+    if they succeed. Unscoped queries (e.g. global clears) always go to Azure.
+
+    Azure indexes writes with a lag, so a hydration may not see documents
+    written just before or while it reads. Writes from the last
+    ``RECENT_WRITE_SECONDS`` and writes made during the hydration are applied
+    on top of what it read.
+    """
+
+    HYDRATE_LIMIT = 1000
+    RECENT_WRITE_SECONDS = 30.0
+    RECENT_WRITE_LIMIT = 1000
+
+    def __init__(self, local: LocalVectorIndex, remote: Any, max_hot_sessions: int = 32, hot_ttl: float = 300.0):
+        self.local = local
+        self.remote = remote
+        self.max_hot_sessions = max(1, max_hot_sessions)
+        self.hot_ttl = hot_ttl
+        self._hot: "OrderedDict[str, float]" = OrderedDict()  # session -> hydrated at (monotonic)
+        self._hydrating: Dict[str, List[Dict[str, Any]]] = {}  # session -> writes made meanwhile
+        self._recent: deque = deque(maxlen=self.RECENT_WRITE_LIMIT)  # (monotonic, document)
+        self._lock = threading.Lock()
+        self.metrics = {"l1_queries": 0, "remote_queries": 0, "hydrations": 0, "evictions": 0, "revalidations": 0}
+
+    @staticmethod
+    def _affects(document: Dict[str, Any], session_id: str) -> bool:
+        # Deletes carry only the key, so they apply to every session
+        return document.get("@search.action") == "delete" or document.get("session_id") == session_id
+
+    def _ensure_hot(self, session_id: str) -> bool:
+        with self._lock:
+            hydrated_at = self._hot.get(session_id)
+            if hydrated_at is not None and time.monotonic() - hydrated_at < self.hot_ttl:
+                self._hot.move_to_end(session_id)
+                return True
+            if session_id in self._hydrating:
+                return False  # Another caller is hydrating it; use Azure meanwhile
+            if hydrated_at is not None:
+                del self._hot[session_id]
+                self.metrics["revalidations"] += 1
+            self._hydrating[session_id] = []
+            started = time.monotonic()
+        try:
+            documents = list(self.remote.search(
+                search_text="*",
+                filter=f"session_id eq '{session_id}'",
+                top=self.HYDRATE_LIMIT,
+            ))
+        except Exception as e:
+            log_warning(f"[MEMORY] L1 hydration failed for session {session_id}: {e}")
+            with self._lock:
+                self._hydrating.pop(session_id, None)
+            self.local.drop_session(session_id)
+            return False
+        if len(documents) >= self.HYDRATE_LIMIT:
+            log_memory_debug(f"Session {session_id} exceeds {self.HYDRATE_LIMIT} documents, serving from Azure only")
+            with self._lock:
+                self._hydrating.pop(session_id, None)
+            self.local.drop_session(session_id)
+            return False
+        self.local.drop_session(session_id)
+        self.local.upload_documents([d for d in documents if d.get(VECTOR_FIELD)])
+        with self._lock:
+            # Writes Azure may not have indexed yet, then writes made while reading
+            cutoff = started - self.RECENT_WRITE_SECONDS
+            catch_up = [d for at, d in self._recent if cutoff <= at < started and self._affects(d, session_id)]
+            catch_up += self._hydrating.pop(session_id, [])
+            if catch_up:
+                self.local.upload_documents(catch_up)
+            self._hot[session_id] = time.monotonic()
+            self.metrics["hydrations"] += 1
+            evicted = []
+            while len(self._hot) > self.max_hot_sessions:
+                evicted.append(self._hot.popitem(last=False)[0])
+                self.metrics["evictions"] += 1
+        for old_session in evicted:
+            self.local.drop_session(old_session)
+        log_memory_debug(f"Hydrated L1 memory index with {len(documents)} documents for session {session_id}")
+        return True
+
+    def search(self, search_text: str = "*", **kwargs):
+        session_id = parse_filter(kwargs.get("filter")).get("session_id")
+        if isinstance(session_id, str) and self._ensure_hot(session_id):
+            self.metrics["l1_queries"] += 1
+            return self.local.search(search_text, **kwargs)
+        self.metrics["remote_queries"] += 1
+        return self.remote.search(search_text=search_text, **kwargs)
+
+    def upload_documents(self, documents: List[Dict[str, Any]], **kwargs):
+        results = list(self.remote.upload_documents(documents=documents, **kwargs))
+        succeeded = {r.key for r in results if r.succeeded}
+        written = [d for d in documents if d.get("id") in succeeded]
+        now = time.monotonic()
+        with self._lock:
+            self._recent.extend((now, d) for d in written)
+            while self._recent and now - self._recent[0][0] > self.RECENT_WRITE_SECONDS:
+                self._recent.popleft()
+            for session_id, pending in self._hydrating.items():
+                pending.extend(d for d in written if self._affects(d, session_id))
+            mirrored = [
+                d for d in written
+                if d.get("@search.action") == "delete" or d.get("session_id") in self._hot
+            ]
+            # Mirrored under the lock so a concurrent hydration applies its
+            # catch-up writes strictly before or after these
+            if mirrored:
+                self.local.upload_documents(mirrored)
+        return results
+
+    def close(self) -> None:
+        self.local.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.metrics, "hot_sessions": len(self._hot), "l1_documents": len(self.local)}
@@ -0,0 +1,206 @@
+"""
+Memory lookups for outbound agent messages, started early and shared.
+
+Every ``send_message`` enriches its message with the most relevant past
+interactions. The lookup (an embedding call plus a vector search) used to
+run inline in ``_add_context_to_message``, after the catalog check and
+message cleanup, and parallel sibling calls in the same context each ran
+their own search for the same text. Every result's payloads were then
+parsed with ``json.loads`` again on each call.
+
+``MemoryPrefetcher`` fixes all three:
+
+- ``prefetch`` starts the lookup as soon as the tool call is parsed and
+  returns immediately
+- Identical lookups (same context, normalized query and ``top_k``) share
+  one in-flight search (single-flight); the results stay around for
+  ``MEMORY_PREFETCH_TTL_SECONDS`` or until a new interaction is stored
+- ``results`` waits at most ``MEMORY_LOOKUP_BUDGET_MS`` for the lookup. A
+  slow lookup returns ``None`` so the message goes out without memory
+  context; the search keeps running and warms the cache for the next call
+- ``result_text`` extracts a result's text once per stored interaction id
+"""
+
+import ast
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+backend_dir = Path(__file__).resolve().parents[2]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_memory_debug, log_warning
+
+MEMORY_LOOKUP_BUDGET_MS = int(os.getenv("MEMORY_LOOKUP_BUDGET_MS", "2000"))
+MEMORY_PREFETCH_TTL_SECONDS = float(os.getenv("MEMORY_PREFETCH_TTL_SECONDS", "10"))
+MEMORY_RESULT_CACHE_SIZE = int(os.getenv("MEMORY_RESULT_CACHE_SIZE", "1024"))
+
+# Upper bound on remembered lookups, in case contexts are never invalidated
+_MAX_LOOKUPS = 256
+
+SearchFn = Callable[[str, str, int], Awaitable[List[Dict[str, Any]]]]
+_LookupKey = Tuple[str, str, int]
+
+
+def _text_parts(parts: Any) -> List[str]:
+    texts = []
+    for part in parts or []:
+        if not isinstance(part, dict):
+            continue
+        if 'text' in part:
+            texts.append(str(part['text']))
+        elif isinstance(part.get('root'), dict) and 'text' in part['root']:
+            texts.append(str(part['root']['text']))
+    return texts
+
+
+def _load_payload(payload: Any) -> Any:
+    if isinstance(payload, str):
+        try:
+            return json.loads(payload)
+        except json.JSONDecodeError as e:
+            log_memory_debug(f"[MEMORY] Payload JSON parse failed: {e}")
+            return {}
+    return payload
+
+
+def memory_result_text(result: Dict[str, Any]) -> str:
+    """The readable text of a stored interaction, or "" if there is none.
+
+    Tried in order: the inbound payload's ``content`` (DocumentProcessor
+    format), its ``status.message.parts`` (A2A Task), its root ``parts``
+    (A2A Message), then the outbound payload's ``message.parts``.
+    """
+    content = ""
+    inbound = _load_payload(result.get('inbound_payload'))
+    if isinstance(inbound, dict):
+        if 'content' in inbound:
+            content = str(inbound['content'])
+        status = inbound.get('status')
+        if not content and isinstance(status, dict) and isinstance(status.get('message'), dict):
+            content = " ".join(_text_parts(status['message'].get('parts')))
+        if not content and 'parts' in inbound:
+            content = " ".join(_text_parts(inbound['parts']))
+
+    if not content and 'outbound_payload' in result:
+        outbound = _load_payload(result['outbound_payload'])
+        if isinstance(outbound, dict) and isinstance(outbound.get('message'), dict):
+            content = " ".join(_text_parts(outbound['message'].get('parts')))
+
+    # Legacy entries stored str(task.output), i.e. {'result': '...'}
+    if content.startswith("{'result':") or content.startswith('{"result":'):
+        try:
+            parsed = ast.literal_eval(content) if content.startswith("{'") else json.loads(content)
+            if isinstance(parsed, dict) and 'result' in parsed:
+                content = str(parsed['result'])
+        except (ValueError, SyntaxError):
+            pass
+    return content
+
+
+class MemoryPrefetcher:
+    """Single-flight, budgeted memory lookups with a cache of extracted result text.
+
+    Args:
+        search: Async ``(query, context_id, top_k)`` returning memory results
+        budget_ms: Default time ``results`` waits for a lookup
+        ttl_seconds: How long finished lookups are reused
+        cache_size: Number of extracted result texts kept
+    """
+
+    def __init__(
+        self,
+        search: SearchFn,
+        budget_ms: int = MEMORY_LOOKUP_BUDGET_MS,
+        ttl_seconds: float = MEMORY_PREFETCH_TTL_SECONDS,
+        cache_size: int = MEMORY_RESULT_CACHE_SIZE,
+    ):
+        self.search = search
+        self.budget_ms = budget_ms
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self._lookups: "OrderedDict[_LookupKey, Tuple[asyncio.Task, float]]" = OrderedDict()
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self.searches = 0
+        self.over_budget = 0
+
+    @staticmethod
+    def _key(query: str, context_id: str, top_k: int) -> _LookupKey:
+        return (context_id or "", " ".join((query or "").split()).lower(), top_k)
+
+    async def _search(self, query: str, context_id: str, top_k: int) -> List[Dict[str, Any]]:
+        self.searches += 1
+        try:
+            return await self.search(query, context_id, top_k) or []
+        except Exception as e:
+            log_warning(f"[MemoryPrefetch] Memory lookup failed: {e}")
+            return []
+
+    def prefetch(self, query: str, context_id: str, top_k: int = 10) -> asyncio.Task:
+        """Start the lookup, or join the one already in flight or fresh."""
+        key = self._key(query, context_id, top_k)
+        now = time.monotonic()
+        entry = self._lookups.get(key)
+        if entry is not None:
+            task, finished_at = entry
+            if not task.done() or now - finished_at <= self.ttl_seconds:
+                return task
+
+        task = asyncio.create_task(self._search(query, context_id, top_k))
+        self._lookups[key] = (task, float("inf"))
+        self._lookups.move_to_end(key)
+        task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        while len(self._lookups) > _MAX_LOOKUPS:
+            self._lookups.popitem(last=False)
+        return task
+
+    def _finished(self, key: _LookupKey, task: asyncio.Task) -> None:
+        entry = self._lookups.get(key)
+        if entry is not None and entry[0] is task:
+            self._lookups[key] = (task, time.monotonic())
+
+    async def results(
+        self,
+        query: str,
+        context_id: str,
+        top_k: int = 10,
+        budget_ms: Optional[int] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Results of the (pre)fetched lookup, or None if it exceeds the budget."""
+        task = self.prefetch(query, context_id, top_k)
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        try:
+            # shield: a timed-out caller must not cancel the lookup its siblings share
+            return await asyncio.wait_for(asyncio.shield(task), timeout=budget_ms / 1000)
+        except asyncio.TimeoutError:
+            self.over_budget += 1
+            log_warning(f"[MemoryPrefetch] Memory lookup exceeded {budget_ms} ms; sending without memory context")
+            return None
+
+    def invalidate(self, context_id: Optional[str]) -> None:
+        """Forget finished lookups for a context (a new interaction was stored)."""
+        if not context_id:
+            return
+        for key in [key for key, (task, _) in self._lookups.items() if key[0] == context_id and task.done()]:
+            del self._lookups[key]
+
+    def result_text(self, result: Dict[str, Any]) -> str:
+        """``memory_result_text`` of a result, extracted once per interaction id."""
+        result_id = result.get('id')
+        if not result_id:
+            return memory_result_text(result)
+        text = self._texts.get(result_id)
+        if text is None:
+            text = memory_result_text(result)
+            self._texts[result_id] = text
+            while len(self._texts) > self.cache_size:
+                self._texts.popitem(last=False)
+        else:
+            self._texts.move_to_end(result_id)
+        return text
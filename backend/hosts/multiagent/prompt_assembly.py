@@ -0,0 +1,250 @@
+"""
+Token-budgeted assembly of the agent-mode planner prompt.
+
+The planner prompt used to be ``plan.model_dump()`` pretty-printed between
+the goal and the agent catalog. The plan changes every iteration and sat
+before the catalog, so consecutive calls shared almost no prefix, and the
+prompt grew with every task output. ``PlannerPromptBuilder`` orders the user
+prompt from most to least stable:
+
+1. Goal and agent catalog: identical for every iteration of a run
+2. Tasks, one compact JSON line each, oldest first: a finished task's line
+   never changes, so each iteration only appends
+3. Plan status and workflow progress: the per-iteration delta
+
+Behind the static system prompt, everything up to the newest unfinished
+task is then a prefix the model service can serve from its prompt cache.
+Each section has a token budget. Agents past the catalog budget are listed
+by name only, and task outputs are cut to a per-task budget. When the tasks
+still don't fit, the oldest outputs are omitted.
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated
+at four characters per token. The encoding is loaded in a background thread
+(``warm_encoding``, called at startup), since the first load may download its
+BPE file; counts are estimated until it is ready, so the planner loop never
+waits on it.
+"""
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to an estimate
+    tiktoken = None
+
+PLANNER_TOKEN_ENCODING = os.getenv("PLANNER_TOKEN_ENCODING", "o200k_base")
+PLANNER_GOAL_TOKENS = int(os.getenv("PLANNER_GOAL_TOKENS", "1500"))
+PLANNER_AGENTS_TOKENS = int(os.getenv("PLANNER_AGENTS_TOKENS", "4000"))
+PLANNER_PLAN_TOKENS = int(os.getenv("PLANNER_PLAN_TOKENS", "6000"))
+PLANNER_TASK_OUTPUT_TOKENS = int(os.getenv("PLANNER_TASK_OUTPUT_TOKENS", "125"))
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "... [truncated]"
+OMITTED_OUTPUT = "[omitted to fit the prompt budget]"
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+# Output fields the planner doesn't need
+_DROPPED_OUTPUT_KEYS = ("artifacts", "task_id")
+
+
+_encodings: Dict[str, Any] = {}
+_encoding_loads: Dict[str, threading.Thread] = {}
+_encoding_loads_lock = threading.Lock()
+
+
+def _load_encoding(name: str) -> None:
+    try:
+        _encodings[name] = tiktoken.get_encoding(name)
+    except Exception:  # Unknown encoding, or its BPE file can't be fetched
+        pass
+
+
+def warm_encoding(name: str = PLANNER_TOKEN_ENCODING) -> Optional[threading.Thread]:
+    """Start loading ``name`` in a daemon thread (once); returns that thread."""
+    if tiktoken is None:
+        return None
+    with _encoding_loads_lock:
+        thread = _encoding_loads.get(name)
+        if thread is None:
+            thread = threading.Thread(target=_load_encoding, args=(name,), name=f"tiktoken-{name}", daemon=True)
+            _encoding_loads[name] = thread
+            thread.start()
+    return thread
+
+
+def _encoding(name: str):
+    """The loaded encoding, or None while it loads or when it is unavailable."""
+    enc = _encodings.get(name)
+    if enc is None:
+        warm_encoding(name)
+    return enc
+
+
+def count_tokens(text: str, encoding: str = PLANNER_TOKEN_ENCODING) -> int:
+    """Tokens in ``text`` under ``encoding`` (estimated without tiktoken)."""
+    if not text:
+        return 0
+    enc = _encoding(encoding)
+    if enc is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, encoding: str = PLANNER_TOKEN_ENCODING) -> str:
+    """``text`` cut to at most ``max_tokens`` tokens, marked when cut."""
+    if count_tokens(text, encoding) <= max_tokens:
+        return text
+    enc = _encoding(encoding)
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN] + TRUNCATION_MARKER
+    return enc.decode(enc.encode(text, disallowed_special=())[:max_tokens]) + TRUNCATION_MARKER
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+@dataclass
+class AssembledPrompt:
+    """A built planner prompt with its token accounting."""
+    text: str
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    total_tokens: int = 0
+    # Tokens that are unchanged from the previous iteration if no task was updated
+    stable_prefix_tokens: int = 0
+    omitted_agents: List[str] = field(default_factory=list)
+
+
+class PlannerPromptBuilder:
+    """Builds the planner's user prompt within per-section token budgets."""
+
+    def __init__(
+        self,
+        goal_tokens: int = PLANNER_GOAL_TOKENS,
+        agents_tokens: int = PLANNER_AGENTS_TOKENS,
+        plan_tokens: int = PLANNER_PLAN_TOKENS,
+        task_output_tokens: int = PLANNER_TASK_OUTPUT_TOKENS,
+        encoding: str = PLANNER_TOKEN_ENCODING,
+    ):
+        self.goal_tokens = goal_tokens
+        self.agents_tokens = agents_tokens
+        self.plan_tokens = plan_tokens
+        self.task_output_tokens = task_output_tokens
+        self.encoding = encoding
+
+    def _tokens(self, text: str) -> int:
+        return count_tokens(text, self.encoding)
+
+    def _task_entry(self, task, include_output: bool = True) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "task_description": task.task_description,
+            "recommended_agent": task.recommended_agent,
+            "state": task.state,
+        }
+        if task.output and isinstance(task.output, dict):
+            if include_output:
+                entry["output"] = {
+                    key: truncate_to_tokens(value, self.task_output_tokens, self.encoding) if isinstance(value, str) else value
+                    for key, value in task.output.items() if key not in _DROPPED_OUTPUT_KEYS
+                }
+            else:
+                entry["output"] = {"result": OMITTED_OUTPUT}
+        if task.error_message:
+            entry["error_message"] = truncate_to_tokens(task.error_message, self.task_output_tokens, self.encoding)
+        return entry
+
+    def _task_lines(self, tasks: List[Any]) -> List[str]:
+        lines = [compact_json(self._task_entry(task)) for task in tasks]
+        total = sum(self._tokens(line) for line in lines)
+        # Over budget: drop outputs oldest-first, so recent results stay visible
+        for i, task in enumerate(tasks):
+            if total <= self.plan_tokens:
+                break
+            if task.state in FINISHED_STATES and task.output:
+                slim = compact_json(self._task_entry(task, include_output=False))
+                total -= self._tokens(lines[i]) - self._tokens(slim)
+                lines[i] = slim
+        return lines
+
+    def build(
+        self,
+        goal: str,
+        agents: List[Dict[str, Any]],
+        tasks: Iterable[Any],
+        goal_status: str = "incomplete",
+        other_agents: Iterable[str] = (),
+        progress: str = "",
+    ) -> AssembledPrompt:
+        """Assemble the prompt.
+
+        Args:
+            goal: The plan goal
+            agents: Agent cards (name, description, skills) to describe in full
+            tasks: The plan's tasks, oldest first
+            goal_status: The plan's current goal status
+            other_agents: Names of agents available but not described
+            progress: Workflow progress text appended after the plan status
+        """
+        tasks = list(tasks)
+        goal_text = truncate_to_tokens(goal, self.goal_tokens, self.encoding)
+
+        agent_lines: List[str] = []
+        omitted = list(other_agents)
+        used = 0
+        for agent in agents:
+            line = compact_json(agent)
+            cost = self._tokens(line)
+            if used + cost > self.agents_tokens and agent_lines:
+                omitted.append(agent.get("name", ""))
+                continue
+            agent_lines.append(line)
+            used += cost
+        catalog = "\n".join(agent_lines)
+        if omitted:
+            catalog += f"\nOther Agents (also available, cards omitted): {', '.join(omitted)}"
+
+        task_lines = self._task_lines(tasks)
+
+        static = f"""Goal:
+{goal_text}
+
+Available Agents (one JSON object per line):
+{catalog}
+
+Tasks So Far (one JSON object per line, oldest first):
+"""
+        # Tasks up to the first unfinished one read the same next iteration
+        stable_count = 0
+        for task in tasks:
+            if task.state not in FINISHED_STATES:
+                break
+            stable_count += 1
+        stable_tasks = "".join(f"{line}\n" for line in task_lines[:stable_count])
+        changing_tasks = "".join(f"{line}\n" for line in task_lines[stable_count:])
+        if not task_lines:
+            changing_tasks = "(none yet)\n"
+
+        delta = f"""
+Plan Status: goal_status={goal_status}, {len(tasks)} task(s){progress}
+
+Analyze the plan and determine the next step."""
+
+        text = static + stable_tasks + changing_tasks + delta
+        section_tokens = {
+            "goal": self._tokens(goal_text),
+            "agents": self._tokens(catalog),
+            "tasks": self._tokens(stable_tasks + changing_tasks),
+            "status": self._tokens(delta),
+        }
+        return AssembledPrompt(
+            text=text,
+            section_tokens=section_tokens,
+            total_tokens=self._tokens(text),
+            stable_prefix_tokens=self._tokens(static + stable_tasks),
+            omitted_agents=omitted,
+        )
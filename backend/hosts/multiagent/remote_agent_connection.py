@@ -1,10 +1,15 @@
-from typing import Callable
+from typing import Callable, Dict, Optional
 import sys
+import os
+import time
 import asyncio
+import importlib.util
+from collections import deque
+from contextlib import asynccontextmanager
 from pathlib import Path
 import httpx
 from a2a.client import A2AClient
-from a2a.client.errors import A2AClientHTTPError
+from a2a.client.errors import A2AClientHTTPError, A2AClientTimeoutError
 from a2a.types import (
     AgentCard,
     Task,
@@ -14,6 +19,8 @@ from a2a.types import (
     TaskArtifactUpdateEvent,
     SendMessageRequest,
     SendStreamingMessageRequest,
+    CancelTaskRequest,
+    TaskIdParams,
     JSONRPCErrorResponse,
 )
 from uuid import uuid4
@@ -30,13 +37,296 @@ TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 
 # Timeout for agent message calls (3 minutes - generous for slow agents)
 AGENT_MESSAGE_TIMEOUT = 180.0
+# Optional upper bound for a whole streaming exchange, in seconds. Unset or 0
+# leaves streams unbounded once the first event arrives (individual reads
+# still time out after AGENT_MESSAGE_TIMEOUT)
+AGENT_STREAM_TIMEOUT = float(os.getenv("AGENT_STREAM_TIMEOUT", "0")) or None
+
+# Per-agent connection pool
+AGENT_MAX_CONNECTIONS = int(os.getenv("AGENT_MAX_CONNECTIONS", "20"))
+AGENT_MAX_KEEPALIVE = int(os.getenv("AGENT_MAX_KEEPALIVE", "10"))
+AGENT_KEEPALIVE_EXPIRY = float(os.getenv("AGENT_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Adaptive timeouts: once an agent has enough samples, a streaming call must
+# produce its first event within AGENT_TIMEOUT_MULTIPLIER x its p99
+# time-to-first-event (never below AGENT_MIN_TIMEOUT). Whole calls keep the
+# configured ceilings above, since a fast agent can still take minutes on a
+# long task.
+AGENT_MIN_TIMEOUT = float(os.getenv("AGENT_MIN_TIMEOUT", "30"))
+AGENT_TIMEOUT_MULTIPLIER = float(os.getenv("AGENT_TIMEOUT_MULTIPLIER", "3"))
+AGENT_TIMEOUT_MIN_SAMPLES = 20
+
+# Circuit breaker: open after this many consecutive failures, retry after cooldown
+AGENT_BREAKER_FAILURES = int(os.getenv("AGENT_BREAKER_FAILURES", "5"))
+AGENT_BREAKER_COOLDOWN = float(os.getenv("AGENT_BREAKER_COOLDOWN", "30"))
+
+# Hedged idempotent calls: send a second copy if the first hasn't answered
+# within the agent's p95 latency (or this floor)
+AGENT_HEDGE_MIN_DELAY = float(os.getenv("AGENT_HEDGE_MIN_DELAY", "0.5"))
+
+
+class AgentUnavailableError(ConnectionError):
+    """Raised without contacting the agent while its circuit breaker is open."""
+
+
+def _is_agent_failure(exc: BaseException) -> bool:
+    """Errors that say the agent is unhealthy (as opposed to rejecting the request).
+
+    Our own deadlines (``TimeoutError`` from ``asyncio.timeout``/``wait_for``)
+    are not: they cut a call the agent may still be working on.
+    """
+    if isinstance(exc, (A2AClientTimeoutError, httpx.TransportError)):
+        return True
+    return isinstance(exc, A2AClientHTTPError) and exc.status_code >= 500
+
+
+class LatencyWindow:
+    """Sliding window of recent call latencies (seconds)."""
+
+    def __init__(self, size: int = 200):
+        self.samples: deque = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)."""
+
+    def __init__(self, failure_threshold: int = AGENT_BREAKER_FAILURES, cooldown: float = AGENT_BREAKER_COOLDOWN):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go out; in half_open only a single trial call is let through."""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Call ended without telling us anything about agent health (e.g. cancelled)."""
+        self._trial_in_flight = False
+
+    def retry_in(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+
+class AgentTransport:
+    """Per-agent HTTP client with bounded pool, adaptive timeouts, breaker and metrics.
+
+    Transports are shared by every ``RemoteAgentConnections`` for the same agent
+    URL (see ``get_agent_transport``), so health and latency history survive
+    re-registration of the agent card.
+    """
+
+    def __init__(self, name: str, base_client: Optional[httpx.AsyncClient] = None):
+        self.name = name
+        self._base_timeout = base_client.timeout if base_client is not None else httpx.Timeout(
+            connect=60.0, read=AGENT_MESSAGE_TIMEOUT, write=120.0, pool=30.0
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker()
+        self.latency = {
+            "send": LatencyWindow(),
+            "stream": LatencyWindow(),
+            "call": LatencyWindow(),
+            "first_event": LatencyWindow(),
+        }
+        # Set once the agent rejects SSE, so later calls skip the streaming attempt
+        self.streaming_supported: Optional[bool] = None
+        self.in_flight = 0
+        self.metrics = {"requests": 0, "failures": 0, "timeouts": 0, "rejected": 0, "hedged": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self._base_timeout,
+                limits=httpx.Limits(
+                    max_connections=AGENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=AGENT_MAX_KEEPALIVE,
+                    keepalive_expiry=AGENT_KEEPALIVE_EXPIRY,
+                ),
+                http2=HTTP2_AVAILABLE,
+            )
+        return self._client
+
+    def timeout(self, mode: str = "send") -> Optional[float]:
+        """Deadline for a whole call in ``mode`` (the configured ceiling, None if unbounded)."""
+        return AGENT_STREAM_TIMEOUT if mode == "stream" else AGENT_MESSAGE_TIMEOUT
+
+    def first_event_timeout(self) -> float:
+        """Deadline for a stream's first event, based on this agent's observed p99."""
+        window = self.latency["first_event"]
+        if len(window) < AGENT_TIMEOUT_MIN_SAMPLES:
+            return AGENT_MESSAGE_TIMEOUT
+        return min(AGENT_MESSAGE_TIMEOUT, max(AGENT_MIN_TIMEOUT, window.percentile(99) * AGENT_TIMEOUT_MULTIPLIER))
+
+    @asynccontextmanager
+    async def request(self, mode: str = "send"):
+        """Guard one call: fail fast while the breaker is open, record latency and outcome."""
+        if not self.breaker.allow():
+            self.metrics["rejected"] += 1
+            raise AgentUnavailableError(
+                f"Agent {self.name} is unavailable after repeated failures; "
+                f"retrying in {self.breaker.retry_in():.0f}s"
+            )
+        self.in_flight += 1
+        self.metrics["requests"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except TimeoutError:
+            # Our own deadline expired; says nothing certain about agent health
+            self.metrics["timeouts"] += 1
+            self.breaker.release()
+            raise
+        except Exception as e:
+            if _is_agent_failure(e):
+                self.metrics["failures"] += 1
+                if isinstance(e, A2AClientTimeoutError):
+                    self.metrics["timeouts"] += 1
+                was_open = self.breaker.state == "open"
+                self.breaker.record_failure()
+                if self.breaker.state == "open" and not was_open:
+                    log_warning(f"[TRANSPORT] Circuit opened for {self.name} after {self.breaker.failures} failures: {e}")
+            else:
+                self.breaker.record_success()
+            raise
+        else:
+            self.latency[mode].record(time.monotonic() - started)
+            if self.breaker.state != "closed":
+                log_info(f"[TRANSPORT] Circuit closed for {self.name}")
+            self.breaker.record_success()
+        finally:
+            self.in_flight -= 1
+
+    async def hedged(self, call: Callable, attempts: int = 2):
+        """Run an idempotent call, firing a backup copy if the first one is slow.
+
+        ``call`` is a zero-argument coroutine factory. The first copy to succeed
+        wins and the others are cancelled.
+        """
+        async with self.request("call"):
+            delay = max(AGENT_HEDGE_MIN_DELAY, self.latency["call"].percentile(95) or 0.0)
+            pending = {asyncio.ensure_future(call())}
+            launched = 1
+            error: Optional[BaseException] = None
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=delay if launched < attempts else None,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for finished in done:
+                        if finished.exception() is None:
+                            return finished.result()
+                        error = finished.exception()
+                    if launched < attempts and (not done or not pending):
+                        # Still waiting on a slow copy, or the only copy failed
+                        self.metrics["hedged"] += 1
+                        pending.add(asyncio.ensure_future(call()))
+                        launched += 1
+                raise error
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    def stats(self) -> Dict[str, object]:
+        def ms(window: LatencyWindow, pct: float) -> Optional[float]:
+            value = window.percentile(pct)
+            return round(value * 1000, 1) if value is not None else None
+
+        calls = self.latency["send"] if len(self.latency["send"]) >= len(self.latency["stream"]) else self.latency["stream"]
+        return {
+            **self.metrics,
+            "circuit": self.breaker.state,
+            "in_flight": self.in_flight,
+            "error_rate": round(self.metrics["failures"] / self.metrics["requests"], 3) if self.metrics["requests"] else 0.0,
+            "p50_ms": ms(calls, 50),
+            "p95_ms": ms(calls, 95),
+            "p99_ms": ms(calls, 99),
+            "timeout_s": round(self.timeout("send"), 1),
+            "stream_timeout_s": round(AGENT_STREAM_TIMEOUT, 1) if AGENT_STREAM_TIMEOUT else None,
+            "first_event_timeout_s": round(self.first_event_timeout(), 1),
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_transports: Dict[str, AgentTransport] = {}
+
+
+def get_agent_transport(agent_card: AgentCard, base_client: Optional[httpx.AsyncClient] = None) -> AgentTransport:
+    """Return the shared transport for an agent, creating it on first use."""
+    key = getattr(agent_card, "url", None) or agent_card.name
+    transport = _transports.get(key)
+    if transport is None:
+        transport = _transports[key] = AgentTransport(agent_card.name, base_client)
+    transport.name = agent_card.name
+    return transport
+
+
+async def close_agent_transports() -> None:
+    """Close every per-agent connection pool (called on shutdown)."""
+    for transport in list(_transports.values()):
+        try:
+            await transport.aclose()
+        except Exception as e:
+            log_debug(f"[TRANSPORT] Error closing transport for {transport.name}: {e}")
+    _transports.clear()
 
 
 class RemoteAgentConnections:
     """A class to hold the connections to the remote agents."""
 
     def __init__(self, client: httpx.AsyncClient, agent_card: AgentCard, task_callback: TaskUpdateCallback | None = None):
-        self.agent_client = A2AClient(client, agent_card)
+        # Each agent gets its own bounded connection pool instead of the shared client
+        self.transport = get_agent_transport(agent_card, client)
+        self.agent_client = A2AClient(self.transport.client, agent_card)
         self.card = agent_card
         self.pending_tasks = set()
         self.task_callback = task_callback
@@ -44,6 +334,10 @@ class RemoteAgentConnections:
     def get_agent(self) -> AgentCard:
         return self.card
 
+    def get_stats(self) -> Dict[str, object]:
+        """Latency, error and circuit-breaker metrics for this agent."""
+        return self.transport.stats()
+
     async def send_message(
         self,
         request: MessageSendParams,
@@ -55,8 +349,7 @@ class RemoteAgentConnections:
         
         # Debug: Log capabilities to understand the structure
         log_debug(f"[STREAMING] Agent: {self.card.name}")
-        log_debug(f"[STREAMING] Capabilities type: {type(capabilities)}")
-        log_debug(f"[STREAMING] Capabilities value: {capabilities}")
+        log_debug("[STREAMING] Capabilities: %r", capabilities)
         
         # Check for streaming support - handle both dict and object cases
         streaming_supported = False
@@ -68,33 +361,57 @@ class RemoteAgentConnections:
                 streaming_supported = bool(getattr(capabilities, 'streaming', False))
                 log_debug(f"[STREAMING] Attr access: streaming={streaming_supported}")
 
+        # An earlier call already found this agent can't stream: don't try again
+        if self.transport.streaming_supported is False:
+            streaming_supported = False
         log_debug(f"[STREAMING] Final streaming_supported: {streaming_supported}")
 
         if streaming_supported:
+            stream_timeout = self.transport.timeout("stream")
+            first_event_timeout = self.transport.first_event_timeout()
+            if stream_timeout is not None:
+                first_event_timeout = min(stream_timeout, first_event_timeout)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            awaiting_first_event = True
             try:
                 log_debug(f"[STREAMING] Starting streaming for {self.card.name}")
                 task = None
-                async for response in self.agent_client.send_message_streaming(
-                    SendStreamingMessageRequest(id=str(uuid4()), params=request)
-                ):
-                    if not response.root.result:
-                        log_debug(f"RemoteAgentConnections.send_message (streaming): response.root.result is None or error:: {response.root}")
-                        return response.root.error
-                    # In the case a message is returned, that is the end of the interaction.
-                    event = response.root.result
-                    log_debug(f"[STREAMING] Event from {self.card.name}: {type(event).__name__}")
-                    log_debug(f"RemoteAgentConnections.send_message (streaming): event:: {event}")
-                    if isinstance(event, Message):
-                        return event
-
-                    # Otherwise we are in the Task + TaskUpdate cycle.
-                    if callback and event:
-                        log_debug(f"[STREAMING] Invoking callback for {self.card.name}")
-                        task = callback(event, self.card)
-                    if hasattr(event, 'final') and event.final:
-                        break
-                log_debug(f"RemoteAgentConnections.send_message (streaming): final task:: {task}")
+                async with self.transport.request("stream"), asyncio.timeout(first_event_timeout) as deadline:
+                    async for response in self.agent_client.send_message_streaming(
+                        SendStreamingMessageRequest(id=str(uuid4()), params=request)
+                    ):
+                        if awaiting_first_event:
+                            # The agent is responsive: allow the rest of the task its full ceiling, if any
+                            awaiting_first_event = False
+                            self.transport.latency["first_event"].record(loop.time() - started)
+                            deadline.reschedule(started + stream_timeout if stream_timeout is not None else None)
+                        if not response.root.result:
+                            log_debug("RemoteAgentConnections.send_message (streaming): response.root.result is None or error:: %s", response.root)
+                            return response.root.error
+                        # In the case a message is returned, that is the end of the interaction.
+                        event = response.root.result
+                        log_debug(f"[STREAMING] Event from {self.card.name}: {type(event).__name__}")
+                        log_debug("RemoteAgentConnections.send_message (streaming): event:: %s", event)
+                        if isinstance(event, Message):
+                            return event
+
+                        # Otherwise we are in the Task + TaskUpdate cycle.
+                        if callback and event:
+                            log_debug(f"[STREAMING] Invoking callback for {self.card.name}")
+                            task = callback(event, self.card)
+                        if hasattr(event, 'final') and event.final:
+                            break
+                log_debug("RemoteAgentConnections.send_message (streaming): final task:: %s", task)
                 return task
+            except TimeoutError:
+                if awaiting_first_event:
+                    log_warning(f"[STREAMING] TIMEOUT waiting for first event from {self.card.name} after {first_event_timeout:.0f}s")
+                    raise TimeoutError(f"Agent {self.card.name} did not start responding within {first_event_timeout:.0f} seconds")
+                if stream_timeout is None:
+                    raise  # Not our deadline: the stream itself is unbounded
+                log_warning(f"[STREAMING] TIMEOUT streaming from {self.card.name} after {stream_timeout:.0f}s")
+                raise TimeoutError(f"Agent {self.card.name} did not finish streaming within {stream_timeout:.0f} seconds")
             except A2AClientHTTPError as exc:
                 error_text = str(exc)
                 if exc.status_code == 400 and 'Invalid SSE response' in error_text:
@@ -104,25 +421,28 @@ class RemoteAgentConnections:
                             capabilities.streaming = False
                         except Exception:
                             pass
+                    self.transport.streaming_supported = False
                     streaming_supported = False
                 else:
                     raise
 
         # Non-streaming fallback path (either not supported or streaming failed)
+        send_timeout = self.transport.timeout("send")
         try:
-            log_debug(f"[SEND_MESSAGE] Calling {self.card.name} (non-streaming, timeout={AGENT_MESSAGE_TIMEOUT}s)...")
-            response = await asyncio.wait_for(
-                self.agent_client.send_message(
-                    SendMessageRequest(id=str(uuid4()), params=request)
-                ),
-                timeout=AGENT_MESSAGE_TIMEOUT
-            )
+            log_debug(f"[SEND_MESSAGE] Calling {self.card.name} (non-streaming, timeout={send_timeout:.0f}s)...")
+            async with self.transport.request("send"):
+                response = await asyncio.wait_for(
+                    self.agent_client.send_message(
+                        SendMessageRequest(id=str(uuid4()), params=request)
+                    ),
+                    timeout=send_timeout
+                )
             log_debug(f"[SEND_MESSAGE] Got response from {self.card.name}")
         except asyncio.TimeoutError:
-            log_warning(f"[SEND_MESSAGE] TIMEOUT calling {self.card.name} after {AGENT_MESSAGE_TIMEOUT}s")
-            raise TimeoutError(f"Agent {self.card.name} did not respond within {AGENT_MESSAGE_TIMEOUT} seconds")
+            log_warning(f"[SEND_MESSAGE] TIMEOUT calling {self.card.name} after {send_timeout:.0f}s")
+            raise TimeoutError(f"Agent {self.card.name} did not respond within {send_timeout:.0f} seconds")
         
-        log_debug(f"RemoteAgentConnections.send_message (non-streaming): response.root:: {response.root}")
+        log_debug("RemoteAgentConnections.send_message (non-streaming): response.root:: %s", response.root)
         if isinstance(response.root, JSONRPCErrorResponse):
             return response.root.error
         if isinstance(response.root.result, Message):
@@ -149,7 +469,12 @@ class RemoteAgentConnections:
             
             # Check if the A2A client has a cancel method
             if hasattr(self.agent_client, 'cancel_task'):
-                await self.agent_client.cancel_task(task_id)
+                # Cancelling is idempotent, so a slow attempt can be hedged with a second one
+                await self.transport.hedged(
+                    lambda: self.agent_client.cancel_task(
+                        CancelTaskRequest(id=str(uuid4()), params=TaskIdParams(id=task_id))
+                    )
+                )
                 log_debug(f"[CANCEL] Task {task_id} cancelled on {self.card.name}")
                 return True
             else:
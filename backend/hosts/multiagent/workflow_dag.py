@@ -0,0 +1,201 @@
+"""
+Compile workflow text into a dependency graph for deterministic execution.
+
+Designer and scheduled workflows reach the host agent as the text produced by
+``generate_workflow_text`` (or the designer's equivalent), e.g.::
+
+    1. [Research Agent] Gather the numbers
+    2a. [Legal Agent] Review the contract
+    2b. [Tech Agent] Assess feasibility
+    3. [EVALUATE] Is the deal viable?
+       IF-TRUE → 4. [Email Agent] Send the offer
+       IF-FALSE → 5. [Email Agent] Send a decline
+    6. [Report Agent] Summarize the outcome
+
+``compile_workflow`` turns that into a ``WorkflowDAG`` once (results are
+cached per text): every step group depends on the group before it, parallel
+siblings (``2a``/``2b``) share their dependencies, and branch targets depend
+on their EVALUATE step with a required result. The executor can then run
+every ready step as soon as its dependencies finish, without asking the
+planner LLM what to do next.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Steps executed by the host itself rather than a remote agent
+HOST_STEP_AGENTS = ("EVALUATE", "QUERY", "WEB_SEARCH")
+
+# A step is ready once all its dependencies reached one of these states
+# ("skipped" is a branch not taken). A failed dependency never satisfies a
+# step: it and everything downstream of it fail without being dispatched.
+SATISFIED_STATES = ("completed", "skipped")
+
+_STEP_PATTERN = re.compile(r'^(\d+)([a-z]?)\.\s*\[(.+?)\]\s*(.*)$')
+_BRANCH_PATTERN = re.compile(
+    r'^IF-(TRUE|FALSE)\s*(?:→|->)?\s*(\d+)([a-z]?)\.\s*\[(.+?)\]\s*(.*)$', re.IGNORECASE
+)
+
+
+@dataclass
+class WorkflowNode:
+    """A single executable workflow step."""
+    label: str  # e.g. "1", "2a", "4"
+    agent: str
+    description: str
+    deps: List[str] = field(default_factory=list)
+    # (label of the EVALUATE step, result required for this step to run)
+    condition: Optional[Tuple[str, bool]] = None
+
+    @property
+    def is_host_step(self) -> bool:
+        return self.agent.upper() in HOST_STEP_AGENTS
+
+    @property
+    def is_evaluation(self) -> bool:
+        return self.agent.upper() == "EVALUATE"
+
+
+@dataclass
+class WorkflowDAG:
+    """Compiled workflow: nodes in text order plus their dependencies."""
+    nodes: Dict[str, WorkflowNode]
+
+    def ready(self, states: Dict[str, str]) -> List[str]:
+        """Labels not yet started whose dependencies all completed or were skipped."""
+        return [
+            label for label, node in self.nodes.items()
+            if label not in states and all(states.get(dep) in SATISFIED_STATES for dep in node.deps)
+        ]
+
+    def blocked(self, states: Dict[str, str]) -> Dict[str, str]:
+        """Labels not yet started that depend, directly or not, on a failed step.
+
+        Maps each to the failed step it is waiting on. Dependencies always come
+        earlier in text order, so one pass covers the whole downstream chain.
+        """
+        failed = {label: label for label, state in states.items() if state == "failed"}
+        blocked: Dict[str, str] = {}
+        for label, node in self.nodes.items():
+            if label in states:
+                continue
+            upstream = next((failed[dep] for dep in node.deps if dep in failed), None)
+            if upstream is not None:
+                blocked[label] = failed[label] = upstream
+        return blocked
+
+    def ancestors(self, label: str) -> List[str]:
+        """Transitive dependencies of a step, in text order."""
+        seen = set()
+        stack = list(self.nodes[label].deps)
+        while stack:
+            dep = stack.pop()
+            if dep not in seen:
+                seen.add(dep)
+                stack.extend(self.nodes[dep].deps)
+        return [other for other in self.nodes if other in seen]
+
+    def critical_path(self, timings: Dict[str, Tuple[float, float]]) -> List[str]:
+        """Chain of steps that determined the total run time.
+
+        ``timings`` maps label -> (start, end). Starting from the step that
+        finished last, repeatedly follow the dependency that finished last.
+        """
+        if not timings:
+            return []
+        label = max(timings, key=lambda name: timings[name][1])
+        path = [label]
+        while True:
+            deps = [dep for dep in self.nodes[label].deps if dep in timings]
+            if not deps:
+                break
+            label = max(deps, key=lambda name: timings[name][1])
+            path.append(label)
+        return list(reversed(path))
+
+
+def _parse_lines(workflow: str) -> Optional[List[dict]]:
+    """Parse step and branch lines; continuation lines extend the previous step."""
+    entries: List[dict] = []
+    for raw_line in workflow.strip().split('\n'):
+        line = raw_line.strip()
+        if not line:
+            continue
+        branch = _BRANCH_PATTERN.match(line)
+        if branch:
+            entries.append({
+                "kind": "branch",
+                "result": branch.group(1).upper() == "TRUE",
+                "number": int(branch.group(2)),
+                "label": branch.group(2) + branch.group(3),
+                "agent": branch.group(4).strip(),
+                "description": branch.group(5).strip(),
+            })
+            continue
+        step = _STEP_PATTERN.match(line)
+        if step:
+            entries.append({
+                "kind": "step",
+                "number": int(step.group(1)),
+                "label": step.group(1) + step.group(2),
+                "agent": step.group(3).strip(),
+                "description": step.group(4).strip(),
+            })
+            continue
+        if not entries or line.upper().startswith("IF-"):
+            return None  # Text outside the format we know how to compile
+        entries[-1]["description"] = f"{entries[-1]['description']} {line}".strip()
+    return entries
+
+
+@lru_cache(maxsize=128)
+def compile_workflow(workflow: str) -> Optional[WorkflowDAG]:
+    """Compile workflow text into a DAG, or None if the text can't be compiled.
+
+    Callers should fall back to LLM planning when this returns None.
+    """
+    if not workflow or not workflow.strip():
+        return None
+    entries = _parse_lines(workflow)
+    if not entries:
+        return None
+
+    nodes: Dict[str, WorkflowNode] = {}
+    frontier: List[str] = []  # labels the next step group waits for
+    group: List[str] = []     # labels of the current step group
+    group_frontier: List[str] = []
+    group_number = None
+    last_step: Optional[WorkflowNode] = None
+
+    for entry in entries:
+        label = entry["label"]
+        if label in nodes:
+            return None
+        description = entry["description"] or f"Use the {entry['agent']} agent"
+
+        if entry["kind"] == "branch":
+            if last_step is None or not last_step.is_evaluation:
+                return None
+            nodes[label] = WorkflowNode(
+                label=label,
+                agent=entry["agent"],
+                description=description,
+                deps=[last_step.label],
+                condition=(last_step.label, entry["result"]),
+            )
+            group_frontier.append(label)
+            continue
+
+        if entry["number"] != group_number:
+            # A new step group starts: it waits for everything in the previous one
+            frontier = group + group_frontier if group_number is not None else []
+            group, group_frontier = [], []
+            group_number = entry["number"]
+        node = WorkflowNode(label=label, agent=entry["agent"], description=description, deps=list(frontier))
+        nodes[label] = node
+        group.append(label)
+        last_step = node
+
+    return WorkflowDAG(nodes=nodes)
@@ -2,19 +2,62 @@
 Centralized logging configuration for the A2A backend.
 
 Controls log verbosity across all backend services.
-Set VERBOSE_LOGGING=true in environment to see detailed debug logs.
+Set VERBOSE_LOGGING=true in environment to see detailed debug logs, or
+LOG_DEBUG_CATEGORIES=WS,MEMORY to enable only some debug categories.
+
+The ``log_*`` helpers are safe to call on hot paths:
+
+- Formatting is deferred: pass ``%``-style arguments
+  (``log_debug("event %s: %s", event_type, payload)``) or a callable
+  returning the message, and nothing is formatted when the level or
+  category is disabled. Guard larger blocks with ``debug_enabled()``.
+- Lines are handed to a bounded queue and written to stdout by a background
+  thread, so callers never block on the console. When the queue is full,
+  lines are dropped and counted, except errors, which overflow into an
+  unbounded side list instead.
+- Each category (the explicit WS/MEMORY/FOUNDRY category or the leading
+  ``[TAG]`` of the message) is rate limited; suppressed lines are counted
+  and reported on the next line that gets through. Warnings get a budget
+  ``LOG_WARNING_RATE_MULTIPLIER`` times larger, and errors are never
+  suppressed.
+- Messages longer than ``LOG_MAX_MESSAGE_CHARS`` keep their start and,
+  mostly, their end (where a traceback names the exception); the middle is
+  cut.
 """
+import atexit
 import os
 import logging
+import queue
 import sys
+import threading
+import time
 import warnings
-from typing import Any
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 # Suppress noisy third-party warnings (e.g. google-cloud-storage FutureWarning)
 warnings.filterwarnings("ignore", category=FutureWarning, module="google")
 
 # Read verbose flag from environment (defaults to False for clean logs)
 VERBOSE_LOGGING = os.environ.get("VERBOSE_LOGGING", "false").lower() in ("true", "1", "yes")
+# Debug categories enabled without VERBOSE_LOGGING (e.g. "WS,MEMORY,FOUNDRY")
+LOG_DEBUG_CATEGORIES = frozenset(
+    c.strip().upper() for c in os.environ.get("LOG_DEBUG_CATEGORIES", "").split(",") if c.strip()
+)
+# Sustained lines per second and burst allowed per category
+LOG_RATE_LIMIT_PER_SECOND = float(os.environ.get("LOG_RATE_LIMIT_PER_SECOND", "50"))
+LOG_RATE_LIMIT_BURST = int(os.environ.get("LOG_RATE_LIMIT_BURST", "200"))
+LOG_WARNING_RATE_MULTIPLIER = 10
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get("LOG_MAX_MESSAGE_CHARS", "4000"))
+LOG_QUEUE_SIZE = 10000
+
+# Enablement is resolved once; the helpers below only test these booleans
+_DEBUG_ENABLED = VERBOSE_LOGGING
+_WS_DEBUG_ENABLED = VERBOSE_LOGGING or "WS" in LOG_DEBUG_CATEGORIES
+_MEMORY_DEBUG_ENABLED = VERBOSE_LOGGING or "MEMORY" in LOG_DEBUG_CATEGORIES
+_FOUNDRY_DEBUG_ENABLED = VERBOSE_LOGGING or "FOUNDRY" in LOG_DEBUG_CATEGORIES
+
+Message = Union[str, Callable[[], Any]]
 
 
 def suppress_noisy_libraries() -> None:
@@ -67,50 +110,211 @@ logging.basicConfig(
 )
 
 
-def log_info(message: str, *args: Any) -> None:
+class _LogWriter:
+    """Bounded line queue drained to stdout by a daemon thread.
+
+    ``write`` never blocks: when the queue is full the line is dropped and
+    counted, and the count is reported once the writer catches up. Lines
+    written with ``keep=True`` (errors) go to an unbounded overflow list
+    instead, written with the next batch.
+    """
+
+    def __init__(self, max_queued: int = LOG_QUEUE_SIZE):
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queued)
+        self._overflow: Deque[str] = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def write(self, line: str, keep: bool = False) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            if not keep:
+                self.dropped += 1
+                return
+            self._overflow.append(line)
+            try:
+                self._queue.put_nowait(None)  # wake the writer if it drained meanwhile
+            except queue.Full:
+                pass  # still busy: it drains the overflow after this batch
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [item for item in batch if isinstance(item, str)]
+            while self._overflow:
+                lines.append(self._overflow.popleft())
+            if self.dropped:
+                lines.append(f"[WARNING] [LOG] Log queue full, dropped {self.dropped} lines")
+                self.dropped = 0
+            if lines:
+                try:
+                    sys.stdout.write("\n".join(lines) + "\n")
+                    sys.stdout.flush()
+                except Exception:
+                    pass  # stdout closed or replaced during shutdown
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait until everything queued so far has been written."""
+        if self._thread is None:
+            return
+        marker = threading.Event()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return
+        marker.wait(timeout)
+
+
+class _RateLimiter:
+    """Token bucket per category; counts what it suppresses."""
+
+    def __init__(self, rate: float = LOG_RATE_LIMIT_PER_SECOND, burst: int = LOG_RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        # category -> (tokens, last refill, suppressed since last allowed line)
+        self._buckets: Dict[str, Tuple[float, float, int]] = {}
+
+    def allow(self, category: str) -> Tuple[bool, int]:
+        """Returns (allowed, lines suppressed since the category's last allowed line)."""
+        if self.rate <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(category, (float(self.burst), now, 0))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self._buckets[category] = (tokens, now, suppressed + 1)
+                return False, 0
+            self._buckets[category] = (tokens - 1.0, now, 0)
+            return True, suppressed
+
+
+_writer = _LogWriter()
+_limiter = _RateLimiter()
+_warning_limiter = _RateLimiter(
+    LOG_RATE_LIMIT_PER_SECOND * LOG_WARNING_RATE_MULTIPLIER,
+    LOG_RATE_LIMIT_BURST * LOG_WARNING_RATE_MULTIPLIER,
+)
+atexit.register(_writer.flush)
+
+
+def _category_of(message: Message, level: str) -> str:
+    """Leading ``[TAG]`` of a message, or the level when there isn't one."""
+    if isinstance(message, str) and message.startswith("["):
+        end = message.find("]", 1, 40)
+        if end > 0:
+            return f"{level}:{message[1:end]}"
+    return level
+
+
+def _format(message: Message, args: Tuple[Any, ...]) -> str:
+    if callable(message):
+        message = message()
+    text = str(message)
+    if args:
+        try:
+            text = text % args
+        except (TypeError, ValueError):
+            text = " ".join([text, *(str(arg) for arg in args)])
+    if len(text) > LOG_MAX_MESSAGE_CHARS:
+        # Keep the end too: a traceback's last line is the exception itself
+        head = LOG_MAX_MESSAGE_CHARS // 4
+        tail = LOG_MAX_MESSAGE_CHARS - head
+        text = f"{text[:head]} ... ({len(text) - head - tail} chars omitted) ... {text[-tail:]}"
+    return text
+
+
+def _emit(prefix: str, level: str, message: Message, args: Tuple[Any, ...], category: Optional[str] = None,
+          limiter: Optional[_RateLimiter] = None) -> None:
+    suppressed = 0
+    if limiter is not None:
+        allowed, suppressed = limiter.allow(category or _category_of(message, level))
+        if not allowed:
+            return
+    try:
+        text = _format(message, args)
+    except Exception as e:
+        text = f"<log formatting failed: {e!r}>"
+    if suppressed:
+        text = f"{text} ({suppressed} similar lines suppressed)"
+    _writer.write(f"{prefix} {text}", keep=level == "ERROR")
+
+
+def debug_enabled(category: Optional[str] = None) -> bool:
+    """Whether debug output is on (for ``category`` when given, e.g. "WS")."""
+    if category is None:
+        return _DEBUG_ENABLED
+    return VERBOSE_LOGGING or category.upper() in LOG_DEBUG_CATEGORIES
+
+
+def flush_logs(timeout: float = 2.0) -> None:
+    """Block until queued log lines are written (shutdown, tests)."""
+    _writer.flush(timeout)
+
+
+def log_info(message: Message, *args: Any) -> None:
     """Log informational messages (always shown)."""
-    print(f"[INFO] {message}", *args, flush=True)
+    _emit("[INFO]", "INFO", message, args, limiter=_limiter)
 
 
-def log_success(message: str, *args: Any) -> None:
+def log_success(message: Message, *args: Any) -> None:
     """Log success messages (always shown)."""
-    print(f"[INFO] {message}", *args, flush=True)
+    _emit("[INFO]", "INFO", message, args, limiter=_limiter)
 
 
-def log_warning(message: str, *args: Any) -> None:
+def log_warning(message: Message, *args: Any) -> None:
     """Log warning messages (always shown)."""
-    print(f"[WARNING] {message}", *args, flush=True)
+    _emit("[WARNING]", "WARNING", message, args, limiter=_warning_limiter)
 
 
-def log_error(message: str, *args: Any) -> None:
-    """Log error messages (always shown)."""
-    print(f"[ERROR] {message}", *args, flush=True)
+def log_error(message: Message, *args: Any) -> None:
+    """Log error messages (always shown, never rate limited)."""
+    _emit("[ERROR]", "ERROR", message, args)
 
 
-def log_debug(message: str, *args: Any) -> None:
+def log_debug(message: Message, *args: Any) -> None:
     """Log debug messages (only shown when VERBOSE_LOGGING=true)."""
-    if VERBOSE_LOGGING:
-        print(f"[DEBUG] {message}", *args, flush=True)
+    if _DEBUG_ENABLED:
+        _emit("[DEBUG]", "DEBUG", message, args, limiter=_limiter)
 
 
-def log_websocket_debug(message: str, *args: Any) -> None:
+def log_websocket_debug(message: Message, *args: Any) -> None:
     """Log WebSocket debug messages (only shown when VERBOSE_LOGGING=true)."""
-    if VERBOSE_LOGGING:
-        print(f"[DEBUG] [WS] {message}", *args, flush=True)
+    if _WS_DEBUG_ENABLED:
+        _emit("[DEBUG] [WS]", "DEBUG", message, args, category="WS", limiter=_limiter)
 
 
-def log_memory_debug(message: str, *args: Any) -> None:
+def log_memory_debug(message: Message, *args: Any) -> None:
     """Log memory service debug messages (only shown when VERBOSE_LOGGING=true)."""
-    if VERBOSE_LOGGING:
-        print(f"[DEBUG] [MEMORY] {message}", *args, flush=True)
+    if _MEMORY_DEBUG_ENABLED:
+        _emit("[DEBUG] [MEMORY]", "DEBUG", message, args, category="MEMORY", limiter=_limiter)
 
 
-def log_foundry_debug(message: str, *args: Any) -> None:
+def log_foundry_debug(message: Message, *args: Any) -> None:
     """Log Foundry agent debug messages (only shown when VERBOSE_LOGGING=true)."""
-    if VERBOSE_LOGGING:
-        print(f"[DEBUG] [FOUNDRY] {message}", *args, flush=True)
+    if _FOUNDRY_DEBUG_ENABLED:
+        _emit("[DEBUG] [FOUNDRY]", "DEBUG", message, args, category="FOUNDRY", limiter=_limiter)
 
 
-def log_auth(message: str, *args: Any) -> None:
+def log_auth(message: Message, *args: Any) -> None:
     """Log auth messages (always shown for security visibility)."""
-    print(f"[INFO] [AUTH] {message}", *args, flush=True)
+    _emit("[INFO] [AUTH]", "AUTH", message, args, limiter=_limiter)
@@ -0,0 +1,300 @@
+"""Agent Health Monitor
+
+One place that knows whether remote agents are reachable. Workflow
+pre-flight, the agent catalog, the registry sync and the health endpoint all
+read from the same TTL-cached health table instead of each opening their own
+``httpx.AsyncClient`` and probing ``/health``.
+
+- Probes share one pooled client, and concurrent checks of the same agent
+  share a single in-flight request
+- A background loop keeps recently used agents fresh and pre-warms agents
+  that an upcoming scheduled workflow needs (scale-to-zero containers take
+  30-90s to cold start)
+- Listeners are notified when an agent turns warm (online) or cold (offline)
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+
+import httpx
+
+from log_config import log_debug, log_info, log_warning
+
+# Cached results younger than this are served without a probe
+HEALTH_TTL_SECONDS = float(os.getenv("AGENT_HEALTH_TTL", "30"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("AGENT_HEALTH_PROBE_TIMEOUT", "5"))
+# Background refresh cadence, and how long an agent counts as "in use" after a check
+HEALTH_REFRESH_SECONDS = float(os.getenv("AGENT_HEALTH_REFRESH", "30"))
+HEALTH_ACTIVE_WINDOW_SECONDS = float(os.getenv("AGENT_HEALTH_ACTIVE_WINDOW", "600"))
+# Poll interval while waiting for a cold agent to come up
+HEALTH_COLD_POLL_SECONDS = float(os.getenv("AGENT_HEALTH_COLD_POLL", "3"))
+# Start warming agents this long before a scheduled workflow needs them
+WARMUP_LEAD_SECONDS = float(os.getenv("AGENT_WARMUP_LEAD", "180"))
+
+
+@dataclass
+class AgentHealth:
+    """Last known health of one agent URL."""
+    url: str
+    online: bool
+    checked_at: float
+    latency_ms: Optional[float] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    # When ``online`` last changed
+    since: float = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.checked_at
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "age_seconds": round(self.age, 1)}
+
+
+HealthListener = Callable[[str, AgentHealth], Optional[Awaitable[None]]]
+WarmupSource = Callable[[], Union[Iterable[str], Awaitable[Iterable[str]]]]
+
+
+def normalize_agent_url(agent_url: str) -> str:
+    return (agent_url or "").strip().rstrip('/')
+
+
+class AgentHealthMonitor:
+    """TTL-cached agent health table fed by on-demand and background probes."""
+
+    def __init__(
+        self,
+        ttl: float = HEALTH_TTL_SECONDS,
+        probe_timeout: float = HEALTH_PROBE_TIMEOUT,
+        refresh_interval: float = HEALTH_REFRESH_SECONDS,
+    ):
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self.refresh_interval = refresh_interval
+        self._table: Dict[str, AgentHealth] = {}
+        self._last_used: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._listeners: List[HealthListener] = []
+        self._warmup_source: Optional[WarmupSource] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"probes": 0, "cache_hits": 0, "shared_probes": 0, "transitions": 0, "warmups": 0}
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def add_listener(self, listener: HealthListener) -> None:
+        """Call ``listener(url, health)`` whenever an agent turns warm or cold."""
+        self._listeners.append(listener)
+
+    def set_warmup_source(self, source: WarmupSource) -> None:
+        """Register a (sync or async) callable returning URLs that should be warm soon."""
+        self._warmup_source = source
+
+    def watch(self, urls: Iterable[str]) -> None:
+        """Keep these agents fresh in the background for the next active window."""
+        now = time.time()
+        for url in urls:
+            if normalize_agent_url(url):
+                self._last_used[normalize_agent_url(url)] = now
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, agent_url: str) -> Optional[AgentHealth]:
+        """Last known health (possibly stale), without probing."""
+        return self._table.get(normalize_agent_url(agent_url))
+
+    async def check(self, agent_url: str, max_age: Optional[float] = None, allow_stale: bool = False) -> bool:
+        """Whether the agent is online.
+
+        Fresh cached results (younger than ``max_age``, default the TTL) are
+        returned immediately. With ``allow_stale`` a stale entry is returned
+        too while a refresh runs in the background, so UI reads never wait.
+        """
+        url = normalize_agent_url(agent_url)
+        if not url:
+            return False
+        self._last_used[url] = time.time()
+        cached = self._table.get(url)
+        if cached and cached.age < (self.ttl if max_age is None else max_age):
+            self.metrics["cache_hits"] += 1
+            return cached.online
+        if cached and allow_stale:
+            self.metrics["cache_hits"] += 1
+            self._probe_in_background(url)
+            return cached.online
+        return (await self.probe(url)).online
+
+    async def check_many(self, agent_urls: Iterable[str], max_age: Optional[float] = None,
+                         allow_stale: bool = False) -> Dict[str, bool]:
+        """Concurrent ``check`` for several agents, keyed by the URLs passed in."""
+        urls = list(dict.fromkeys(agent_urls))
+        results = await asyncio.gather(*(self.check(u, max_age, allow_stale) for u in urls), return_exceptions=True)
+        return {u: (r is True) for u, r in zip(urls, results)}
+
+    async def wait_until_online(self, agent_urls: Iterable[str], timeout: float,
+                                poll_interval: float = HEALTH_COLD_POLL_SECONDS) -> Set[str]:
+        """Poll agents until all respond or ``timeout`` passes; returns those still offline."""
+        pending = {u for u in agent_urls if normalize_agent_url(u)}
+        deadline = time.monotonic() + timeout
+        while pending:
+            results = await self.check_many(pending, max_age=0)
+            pending = {u for u, online in results.items() if not online}
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            await asyncio.sleep(min(poll_interval, remaining))
+        return pending
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {url: health.to_dict() for url, health in self._table.items()}
+
+    def stats(self) -> Dict:
+        online = sum(1 for h in self._table.values() if h.online)
+        return {**self.metrics, "agents": len(self._table), "online": online, "running": self.is_running}
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.probe_timeout),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+            )
+        return self._client
+
+    async def probe(self, agent_url: str) -> AgentHealth:
+        """Probe ``/health`` now; concurrent callers for the same agent share one request."""
+        url = normalize_agent_url(agent_url)
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            self.metrics["shared_probes"] += 1
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            health = await self._probe(url)
+            self._record(health)
+            future.set_result(health)
+            return health
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(url, None)
+
+    async def _probe(self, url: str) -> AgentHealth:
+        self.metrics["probes"] += 1
+        started = time.monotonic()
+        try:
+            response = await self.client.get(f"{url}/health")
+            online = response.status_code == 200
+            if not online:
+                log_debug(f"[AgentHealth] {url}: HTTP {response.status_code}")
+            return AgentHealth(url=url, online=online, checked_at=time.time(),
+                               latency_ms=round((time.monotonic() - started) * 1000, 1),
+                               status_code=response.status_code)
+        except Exception as e:
+            log_debug(f"[AgentHealth] {url}: {type(e).__name__}: {e}")
+            return AgentHealth(url=url, online=False, checked_at=time.time(), error=f"{type(e).__name__}: {e}")
+
+    def _probe_in_background(self, url: str) -> None:
+        if url not in self._inflight:
+            asyncio.get_running_loop().create_task(self.probe(url))
+
+    def _record(self, health: AgentHealth) -> None:
+        previous = self._table.get(health.url)
+        health.since = previous.since if previous and previous.online == health.online else health.checked_at
+        self._table[health.url] = health
+        if previous is not None and previous.online != health.online:
+            self.metrics["transitions"] += 1
+            log_info(f"[AgentHealth] {health.url} is now {'warm' if health.online else 'cold'}")
+            for listener in self._listeners:
+                try:
+                    result = listener(health.url, health)
+                    if asyncio.iscoroutine(result):
+                        asyncio.get_running_loop().create_task(result)
+                except Exception as e:
+                    log_warning(f"[AgentHealth] Listener error: {e}")
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.is_running:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="agent-health-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_warning(f"[AgentHealth] Refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self) -> None:
+        """Re-probe agents in use and pre-warm agents needed by upcoming runs."""
+        now = time.time()
+        for url, used_at in list(self._last_used.items()):
+            if now - used_at > HEALTH_ACTIVE_WINDOW_SECONDS:
+                del self._last_used[url]
+        targets = {url for url in self._last_used if not self._is_fresh(url, self.refresh_interval)}
+
+        if self._warmup_source is not None:
+            try:
+                urls = self._warmup_source()
+                if asyncio.iscoroutine(urls):
+                    urls = await urls
+                warmup = {normalize_agent_url(u) for u in urls if normalize_agent_url(u)}
+            except Exception as e:
+                log_warning(f"[AgentHealth] Warm-up source failed: {e}")
+                warmup = set()
+            for url in warmup - targets:
+                if not self._is_fresh(url, self.refresh_interval):
+                    self.metrics["warmups"] += 1
+                    log_debug(f"[AgentHealth] Pre-warming {url} for an upcoming scheduled run")
+                    targets.add(url)
+
+        if targets:
+            await asyncio.gather(*(self.probe(url) for url in targets), return_exceptions=True)
+
+    def _is_fresh(self, url: str, max_age: float) -> bool:
+        health = self._table.get(url)
+        return health is not None and health.age < max_age
+
+
+_monitor: Optional[AgentHealthMonitor] = None
+
+
+def get_health_monitor() -> AgentHealthMonitor:
+    """Get the global agent health monitor instance."""
+    global _monitor
+    if _monitor is None:
+        _monitor = AgentHealthMonitor()
+    return _monitor
@@ -8,7 +8,10 @@ Falls back to JSON file storage if database is not available.
 """
 
 import json
+import math
 import os
+import re
+from collections import Counter
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import psycopg2
@@ -16,6 +19,55 @@ from psycopg2.extras import RealDictCursor
 from service.agent_colors import assign_color_for_agent
 from log_config import log_debug, log_info, log_warning, log_error
 
+_TERM = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have i in into is it its me my of on or our please "
+    "that the their them then this to use using we what when with you your agent agents ai foundry".split()
+)
+# Where a term appears on the card says how much it tells us about the agent
+_FIELD_WEIGHTS = {"name": 3.0, "skill_name": 2.0, "tags": 2.0, "description": 1.0, "examples": 0.5}
+
+
+def keyword_terms(text: str) -> List[str]:
+    """Lowercase word terms of ``text`` without stopwords or 1-letter tokens."""
+    return [t for t in _TERM.findall((text or "").lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def agent_terms(agent: Dict[str, Any]) -> Dict[str, float]:
+    """Weighted term counts for an agent card dict (name, description, skills)."""
+    fields = {"name": [agent.get('name', '')], "description": [agent.get('description', '')],
+              "skill_name": [], "tags": [], "examples": []}
+    for skill in agent.get('skills') or []:
+        fields["skill_name"].append(skill.get('name', ''))
+        fields["description"].append(skill.get('description', ''))
+        fields["tags"].extend(skill.get('tags') or [])
+        fields["examples"].extend(skill.get('examples') or [])
+    terms: Counter = Counter()
+    for field, texts in fields.items():
+        for text in texts:
+            for term in keyword_terms(str(text)):
+                terms[term] += _FIELD_WEIGHTS[field]
+    return dict(terms)
+
+
+def inverse_document_frequencies(term_sets: List[Dict[str, float]]) -> Dict[str, float]:
+    """IDF per term, so words every agent mentions don't decide the ranking."""
+    document_counts: Counter = Counter()
+    for terms in term_sets:
+        document_counts.update(terms.keys())
+    total = len(term_sets)
+    return {term: math.log(1 + total / count) for term, count in document_counts.items()}
+
+
+def keyword_score(query_terms: List[str], terms: Dict[str, float], idf: Dict[str, float]) -> float:
+    """Sum of saturated term weights times IDF for the query terms found on the card."""
+    score = 0.0
+    for term in set(query_terms):
+        weight = terms.get(term)
+        if weight:
+            score += idf.get(term, 1.0) * weight / (weight + 1.0)
+    return score
+
 
 class AgentRegistry:
     """Database-backed registry for managing agent configurations."""
@@ -576,12 +628,14 @@ class AgentRegistry:
         
         return True
     
-    def search_agents(self, query: str = None, tags: List[str] = None) -> List[Dict[str, Any]]:
+    def search_agents(self, query: str = None, tags: List[str] = None, limit: int = None) -> List[Dict[str, Any]]:
         """Search agents by query or tags.
         
         Args:
             query: Text to search in name, description, or skills
             tags: List of tags to match in skills
+            limit: If set, rank agents by keyword relevance to the query (any
+                term may match) and return at most this many
             
         Returns:
             List of matching agent configurations
@@ -589,7 +643,10 @@ class AgentRegistry:
         agents = self._load_registry()
         
         if not query and not tags:
-            return agents
+            return agents[:limit] if limit is not None else agents
+        
+        if query and limit is not None:
+            return self._rank_agents(agents, query, tags, limit)
         
         filtered_agents = []
         
@@ -633,6 +690,23 @@ class AgentRegistry:
         
         return filtered_agents
 
+    def _rank_agents(self, agents: List[Dict[str, Any]], query: str, tags: Optional[List[str]], limit: int) -> List[Dict[str, Any]]:
+        """Agents matching the tags, ordered by keyword score against the query."""
+        if tags:
+            agents = [
+                agent for agent in agents
+                if any(tag in (skill.get('tags') or []) for skill in agent.get('skills', []) for tag in tags)
+            ]
+        term_sets = [agent_terms(agent) for agent in agents]
+        idf = inverse_document_frequencies(term_sets)
+        query_terms = keyword_terms(query)
+        scored = [
+            (keyword_score(query_terms, terms, idf), position)
+            for position, terms in enumerate(term_sets)
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [agents[position] for score, position in scored[:limit] if score > 0]
+
 
 # Global registry instance
 _registry = None
@@ -3,15 +3,24 @@
 This module provides user authentication and JWT token management.
 It uses PostgreSQL for persistent storage with automatic fallback to JSON files
 when DATABASE_URL is not configured.
+
+Users are cached in-process with a TTL and decoded tokens are kept in a small
+LRU keyed by token hash, so verify_token does not hit storage on every request.
+With AUTH_USER_CHANGE_FEED=true, replicas share user changes via Postgres
+LISTEN/NOTIFY and drop their caches when another replica writes a user.
 """
 
 import os
 import json
 import hashlib
+import select
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, UTC
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 import jwt
 
@@ -22,6 +31,20 @@ ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
 # Default data directory
 DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
+# User / token cache tuning
+USER_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "1024"))
+# A lookup that misses after a reload is remembered this long (unknown emails,
+# tokens of deleted users), and misses force at most one reload per interval
+USER_MISS_TTL_SECONDS = float(os.environ.get("AUTH_USER_MISS_TTL_SECONDS", "10"))
+USER_MISS_RELOAD_INTERVAL_SECONDS = float(os.environ.get("AUTH_USER_MISS_RELOAD_INTERVAL_SECONDS", "2"))
+USER_MISS_CACHE_SIZE = 4096
+
+# Postgres channel used to broadcast user changes between backend replicas
+USER_CHANGE_CHANNEL = "auth_users_changed"
+USER_COLUMNS = "user_id, email, password_hash, name, role, description, skills, color, created_at, last_login"
+USER_CHANGE_FEED_ENABLED = os.environ.get("AUTH_USER_CHANGE_FEED", "false").lower() in ("true", "1", "yes")
+
 
 @dataclass
 class User:
@@ -43,14 +66,38 @@ class AuthService:
     Uses PostgreSQL when DATABASE_URL is available, falls back to JSON storage otherwise.
     """
     
-    def __init__(self, users_file: Path | str = None):
+    def __init__(
+        self,
+        users_file: Path | str = None,
+        user_cache_ttl: float = USER_CACHE_TTL_SECONDS,
+        token_cache_size: int = TOKEN_CACHE_SIZE,
+        user_miss_ttl: float = USER_MISS_TTL_SECONDS,
+        miss_reload_interval: float = USER_MISS_RELOAD_INTERVAL_SECONDS,
+    ):
         if users_file is None:
             users_file = DEFAULT_DATA_DIR / "users.json"
         self.users_file = Path(users_file)
+        # Copy-on-write: writers swap in a new dict under _cache_lock and never
+        # mutate the current one, so readers can iterate it from any thread.
         self.users: Dict[str, User] = {}
         
         # Track active WebSocket connections for logging
         self.active_users: Dict[str, Dict[str, Any]] = {}
+
+        # User cache (TTL) and decoded-token LRU (sha256(token) -> verified payload)
+        self.user_cache_ttl = user_cache_ttl
+        self.token_cache_size = token_cache_size
+        self._users_loaded_at = 0.0
+        self._users_stale = False
+        self._token_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Negative cache: ("email" | "user_id", value) -> monotonic expiry
+        self.user_miss_ttl = user_miss_ttl
+        self.miss_reload_interval = miss_reload_interval
+        self._user_misses: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {"token_hits": 0, "token_misses": 0, "user_reloads": 0, "user_negative_hits": 0}
+        self._change_feed_thread: Optional[threading.Thread] = None
+        self._change_feed_stop = threading.Event()
         
         # Check if PostgreSQL is available
         self.database_url = os.getenv("DATABASE_URL")
@@ -77,6 +124,8 @@ class AuthService:
         else:
             # Load users from database into memory cache
             self._load_users_from_database()
+            if USER_CHANGE_FEED_ENABLED:
+                self.start_change_feed()
     
     def _ensure_db_connection(self):
         """Reconnect to PostgreSQL if the connection was dropped."""
@@ -101,40 +150,44 @@ class AuthService:
         try:
             self._ensure_db_connection()
             cursor = self.db_conn.cursor()
-            cursor.execute("""
-                SELECT user_id, email, password_hash, name, role, description,
-                       skills, color, created_at, last_login
-                FROM users
-                ORDER BY created_at
-            """)
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY created_at")
             
             rows = cursor.fetchall()
+            users = {}
             for row in rows:
-                user = User(
-                    user_id=row[0],
-                    email=row[1],
-                    password_hash=row[2],
-                    name=row[3],
-                    role=row[4] or "",
-                    description=row[5] or "",
-                    skills=row[6] if isinstance(row[6], list) else [],
-                    color=row[7] or "#6B7280",
-                    created_at=row[8],
-                    last_login=row[9]
-                )
-                self.users[user.email] = user
+                user = self._user_from_row(row)
+                users[user.email] = user
             
             cursor.close()
+            self._replace_users(users)
+            self._mark_users_loaded()
             print(f"[AuthService] Loaded {len(self.users)} users from PostgreSQL database")
         except Exception as e:
             print(f"[AuthService] Error loading users from database: {e}")
             raise
     
+    @staticmethod
+    def _user_from_row(row) -> User:
+        """Build a User from a users-table row (column order of USER_COLUMNS)."""
+        return User(
+            user_id=row[0],
+            email=row[1],
+            password_hash=row[2],
+            name=row[3],
+            role=row[4] or "",
+            description=row[5] or "",
+            skills=row[6] if isinstance(row[6], list) else [],
+            color=row[7] or "#6B7280",
+            created_at=row[8],
+            last_login=row[9]
+        )
+
     def _load_users_from_file(self):
         """Load users from JSON file."""
         try:
             with open(self.users_file, 'r') as f:
                 data = json.load(f)
+                users = {}
                 for user_data in data.get('users', []):
                     user = User(
                         user_id=user_data['user_id'],
@@ -148,7 +201,9 @@ class AuthService:
                         created_at=datetime.fromisoformat(user_data['created_at'].replace('Z', '+00:00')),
                         last_login=datetime.fromisoformat(user_data['last_login'].replace('Z', '+00:00')) if user_data.get('last_login') else None
                     )
-                    self.users[user.email] = user
+                    users[user.email] = user
+            self._replace_users(users)
+            self._mark_users_loaded()
             print(f"[AuthService] Loaded {len(self.users)} users from {self.users_file}")
         except FileNotFoundError:
             print(f"[AuthService] Users file {self.users_file} not found, creating with default users")
@@ -160,6 +215,208 @@ class AuthService:
             print(f"[AuthService] Error loading users: {e}")
             self._create_default_users_file()
     
+    def _replace_users(self, users: Dict[str, User]):
+        """Swap in a freshly loaded user dict."""
+        with self._cache_lock:
+            self.users = users
+
+    def _put_user(self, user: User):
+        """Add or replace one user without mutating the dict readers may be iterating."""
+        with self._cache_lock:
+            users = dict(self.users)
+            users[user.email] = user
+            self.users = users
+            self._user_misses.pop(("email", user.email), None)
+            self._user_misses.pop(("user_id", user.user_id), None)
+
+    def _drop_user(self, email: str):
+        with self._cache_lock:
+            if email in self.users:
+                users = dict(self.users)
+                del users[email]
+                self.users = users
+
+    def _mark_users_loaded(self):
+        """Record that the in-memory user cache was just refreshed from storage."""
+        with self._cache_lock:
+            self._users_loaded_at = time.monotonic()
+            self._users_stale = False
+            self.cache_stats["user_reloads"] += 1
+
+    def _reload_users(self):
+        """Reload users from the active storage backend."""
+        if self.use_database:
+            self._load_users_from_database()
+        else:
+            self._load_users_from_file()
+
+    def _refresh_users_if_stale(self, force: bool = False):
+        """Reload users only when the cache TTL expired or it was invalidated."""
+        with self._cache_lock:
+            expired = time.monotonic() - self._users_loaded_at >= self.user_cache_ttl
+            needs_reload = force or self._users_stale or expired
+        if needs_reload:
+            self._reload_users()
+
+    def _reload_for_miss(self, key: Tuple[str, str]) -> bool:
+        """Reload users after a cache miss, unless that is pointless or too frequent.
+
+        The reload picks up users registered on another replica before the
+        TTL expires. A key that missed recently is answered from the negative
+        cache, and misses reload at most once per ``miss_reload_interval``, so
+        unknown emails or tokens of deleted users can't scan storage per request.
+
+        Returns:
+            False if the miss was answered from the negative cache
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            expires = self._user_misses.get(key)
+            if expires is not None and expires > now:
+                self.cache_stats["user_negative_hits"] += 1
+                return False
+            recently_loaded = now - self._users_loaded_at < self.miss_reload_interval
+        if not recently_loaded:
+            self._reload_users()
+        return True
+
+    def _remember_miss(self, key: Tuple[str, str]):
+        with self._cache_lock:
+            self._user_misses[key] = time.monotonic() + self.user_miss_ttl
+            self._user_misses.move_to_end(key)
+            while len(self._user_misses) > USER_MISS_CACHE_SIZE:
+                self._user_misses.popitem(last=False)
+
+    def _get_cached_user(self, email: str) -> Optional[User]:
+        """Look up a user from the cache, reloading (rate limited) on a miss."""
+        self._refresh_users_if_stale()
+        user = self.users.get(email)
+        if user is None and self._reload_for_miss(("email", email)):
+            user = self.users.get(email)
+            if user is None:
+                self._remember_miss(("email", email))
+        return user
+
+    def invalidate_user_cache(self, email: Optional[str] = None, mark_stale: bool = True):
+        """Drop cached tokens (all, or for one email) and optionally mark users stale.
+
+        Local writes already update ``self.users`` and pass ``mark_stale=False``;
+        changes made elsewhere mark the cache stale so the next read reloads.
+        """
+        with self._cache_lock:
+            if mark_stale:
+                self._users_stale = True
+                self._user_misses.clear()
+            if email is None:
+                self._token_cache.clear()
+            else:
+                for key in [k for k, v in self._token_cache.items() if v.get("email") == email]:
+                    del self._token_cache[key]
+
+    @staticmethod
+    def _token_cache_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _get_cached_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return a previously verified payload if the token has not expired.
+
+        Entries without a numeric ``exp`` are never served; ``_store_cached_token``
+        does not cache them in the first place.
+        """
+        if self.token_cache_size <= 0:
+            return None
+        key = self._token_cache_key(token)
+        with self._cache_lock:
+            entry = self._token_cache.get(key)
+            if entry is None:
+                self.cache_stats["token_misses"] += 1
+                return None
+            exp = entry.get("exp")
+            if not isinstance(exp, (int, float)) or exp <= time.time():
+                del self._token_cache[key]
+                self.cache_stats["token_misses"] += 1
+                return None
+            self._token_cache.move_to_end(key)
+            self.cache_stats["token_hits"] += 1
+            return dict(entry)
+
+    def _store_cached_token(self, token: str, payload: Dict[str, Any]):
+        if self.token_cache_size <= 0 or not isinstance(payload.get("exp"), (int, float)):
+            return
+        with self._cache_lock:
+            self._token_cache[self._token_cache_key(token)] = dict(payload)
+            while len(self._token_cache) > self.token_cache_size:
+                self._token_cache.popitem(last=False)
+
+    def _notify_user_changed(self, cursor, email: str):
+        """Publish a user change to other replicas (committed with the write)."""
+        if USER_CHANGE_FEED_ENABLED:
+            cursor.execute("SELECT pg_notify(%s, %s)", (USER_CHANGE_CHANNEL, email))
+
+    def start_change_feed(self):
+        """Start a background LISTEN loop that invalidates caches on remote user changes."""
+        if not self.use_database or self._change_feed_thread is not None:
+            return
+        self._change_feed_stop.clear()
+        self._change_feed_thread = threading.Thread(
+            target=self._run_change_feed, name="auth-user-change-feed", daemon=True
+        )
+        self._change_feed_thread.start()
+        print(f"[AuthService] Listening for user changes on '{USER_CHANGE_CHANNEL}'")
+
+    def stop_change_feed(self):
+        """Stop the LISTEN loop started by start_change_feed."""
+        self._change_feed_stop.set()
+        if self._change_feed_thread is not None:
+            self._change_feed_thread.join(timeout=5)
+            self._change_feed_thread = None
+
+    def _apply_remote_user_change(self, conn, email: str):
+        """Refresh a single user after a change notification (own writes included)."""
+        if not email:
+            self.invalidate_user_cache()
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users WHERE email = %s", (email,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        if row is None:
+            self._drop_user(email)
+        else:
+            self._put_user(self._user_from_row(row))
+        self.invalidate_user_cache(email, mark_stale=False)
+
+    def _run_change_feed(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        while not self._change_feed_stop.is_set():
+            listen_conn = None
+            try:
+                listen_conn = psycopg2.connect(self.database_url)
+                listen_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                listen_conn.cursor().execute(f"LISTEN {USER_CHANGE_CHANNEL}")
+                # A fresh listener may have missed notifications while disconnected
+                self.invalidate_user_cache()
+                while not self._change_feed_stop.is_set():
+                    if select.select([listen_conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    listen_conn.poll()
+                    while listen_conn.notifies:
+                        notify = listen_conn.notifies.pop(0)
+                        self._apply_remote_user_change(listen_conn, notify.payload)
+            except Exception as e:
+                print(f"[AuthService] User change feed error: {e}, retrying in 5s")
+                self._change_feed_stop.wait(5)
+            finally:
+                if listen_conn is not None:
+                    try:
+                        listen_conn.close()
+                    except Exception:
+                        pass
+
     def _create_default_users_file(self):
         """Create default users file with test users."""
         default_users = [
@@ -169,6 +426,7 @@ class AuthService:
         ]
         
         users_data = {"users": []}
+        users = {}
         for i, user_data in enumerate(default_users, 1):
             password_hash = self._hash_password(user_data["password"])
             user_record = {
@@ -197,7 +455,8 @@ class AuthService:
                 color=user_record["color"],
                 created_at=datetime.now(UTC)
             )
-            self.users[user.email] = user
+            users[user.email] = user
+        self._replace_users(users)
         
         # Save to file
         with open(self.users_file, 'w') as f:
@@ -207,7 +466,7 @@ class AuthService:
     def _save_users_to_file(self):
         """Save current users to JSON file."""
         users_data = {"users": []}
-        for user in self.users.values():
+        for user in list(self.users.values()):
             user_record = {
                 "user_id": user.user_id,
                 "email": user.email,
@@ -260,13 +519,14 @@ class AuthService:
             created_at=datetime.now(UTC)
         )
         
-        self.users[email] = user
+        self._put_user(user)
         
         # Save to database or file
         if self.use_database:
             self._save_user_to_database(user)
         else:
             self._save_users_to_file()
+            self.invalidate_user_cache(email, mark_stale=False)
         
         return user
     
@@ -304,8 +564,10 @@ class AuthService:
                 user.created_at,
                 user.last_login
             ))
+            self._notify_user_changed(cursor, user.email)
             self.db_conn.commit()
             cursor.close()
+            self.invalidate_user_cache(user.email, mark_stale=False)
         except Exception as e:
             print(f"[AuthService] Error saving user to database: {e}")
             self.db_conn.rollback()
@@ -313,13 +575,7 @@ class AuthService:
     
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate a user with email and password."""
-        # Reload users from database/file to get latest data
-        if self.use_database:
-            self._load_users_from_database()
-        else:
-            self._load_users_from_file()
-        
-        user = self.users.get(email)
+        user = self._get_cached_user(email)
         if not user:
             return None
             
@@ -357,9 +613,14 @@ class AuthService:
         return encoded_jwt
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify and decode a JWT token - reloads from database/file."""
+        """Verify and decode a JWT token using the token LRU and user cache."""
+        cached = self._get_cached_token(token)
+        if cached is not None and cached.get("email") in self.users and not self._users_stale:
+            # Never serve a cached payload past the token's own expiry
+            if cached["exp"] > time.time():
+                return cached
+
         try:
-            print(f"[AuthService] Verifying token...")
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             email: str = payload.get("sub")
             user_id: str = payload.get("user_id")
@@ -369,25 +630,21 @@ class AuthService:
                 print(f"[AuthService] Token verification failed: no email in payload")
                 return None
                 
-            # Reload users from database/file to get latest data
-            if self.use_database:
-                self._load_users_from_database()
-            else:
-                self._load_users_from_file()
-            
-            # Check if user still exists
-            user = self.users.get(email)
+            # Check if user still exists (cached, reloaded on TTL expiry or miss)
+            user = self._get_cached_user(email)
             if user is None:
                 print(f"[AuthService] Token verification failed: user {email} not found in users database")
                 return None
             
             print(f"[AuthService] Token verified successfully for user: {email}")
-            return {
+            result = {
                 "user_id": payload.get("user_id"),
                 "email": email,
                 "name": payload.get("name"),
                 "exp": payload.get("exp")
             }
+            self._store_cached_token(token, result)
+            return result
         except jwt.ExpiredSignatureError:
             print(f"[AuthService] Token verification failed: TOKEN EXPIRED")
             return None
@@ -396,30 +653,26 @@ class AuthService:
             return None
     
     def get_user_by_email(self, email: str) -> Optional[User]:
-        """Get user by email - reloads from database/file first."""
-        if self.use_database:
-            self._load_users_from_database()
-        else:
-            self._load_users_from_file()
-        return self.users.get(email)
+        """Get user by email from the user cache."""
+        return self._get_cached_user(email)
     
     def get_user_by_id(self, user_id: str) -> Optional[User]:
-        """Get user by user_id - reloads from database/file first."""
-        if self.use_database:
-            self._load_users_from_database()
-        else:
-            self._load_users_from_file()
-        for user in self.users.values():
+        """Get user by user_id from the user cache."""
+        self._refresh_users_if_stale()
+        for user in list(self.users.values()):
+            if user.user_id == user_id:
+                return user
+        if not self._reload_for_miss(("user_id", user_id)):
+            return None
+        for user in list(self.users.values()):
             if user.user_id == user_id:
                 return user
+        self._remember_miss(("user_id", user_id))
         return None
     
     def get_all_users(self) -> List[Dict[str, Any]]:
-        """Get all users (without password hashes) - reloads from database/file first."""
-        if self.use_database:
-            self._load_users_from_database()
-        else:
-            self._load_users_from_file()
+        """Get all users (without password hashes) from the user cache."""
+        self._refresh_users_if_stale()
         return [
             {
                 "user_id": user.user_id,
@@ -432,7 +685,7 @@ class AuthService:
                 "created_at": user.created_at.isoformat(),
                 "last_login": user.last_login.isoformat() if user.last_login else None
             }
-            for user in self.users.values()
+            for user in list(self.users.values())
         ]
     
     def add_active_user(self, user_data: Dict[str, Any]):
@@ -0,0 +1,335 @@
+"""Streaming uploads to local disk and Azure Blob Storage.
+
+``/upload`` used to read the whole file into memory, write it with a blocking
+``open().write()`` and then upload it through a synchronous
+``BlobServiceClient`` built (with a new ``DefaultAzureCredential``) per call,
+all on the event loop. ``stream_upload`` instead:
+
+- Reads the upload in ``UPLOAD_CHUNK_BYTES`` chunks and hashes it on the fly
+- Writes the local copy from a worker thread
+- Stages each chunk as a block on the blob while the rest is still arriving
+  (at most ``BLOB_STAGE_CONCURRENCY`` blocks in flight), then commits the
+  block list once
+- Skips the commit for content the same session uploaded recently
+  (``UploadDeduper``)
+
+``BlobStore`` owns the process-wide async ``BlobServiceClient`` and signs
+read URLs with the account key, or with a user-delegation key that is
+cached until shortly before it expires.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from log_config import log_debug, log_error, log_warning
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(4 * 1024 * 1024)))
+BLOB_STAGE_CONCURRENCY = int(os.getenv("BLOB_STAGE_CONCURRENCY", "4"))
+BLOB_SAS_HOURS = 24
+# Re-request the user-delegation key when less than this is left on it
+DELEGATION_KEY_REFRESH_MARGIN = timedelta(hours=1)
+# After a failed delegation-key request, return unsigned URLs for this long before retrying
+DELEGATION_RETRY_SECONDS = float(os.getenv("DELEGATION_RETRY_SECONDS", "300"))
+# Identical content uploaded by the same session within this window is deduplicated
+UPLOAD_DEDUPE_SECONDS = float(os.getenv("UPLOAD_DEDUPE_SECONDS", str(12 * 3600)))
+UPLOAD_DEDUPE_ENTRIES = 1024
+
+
+class BlobStore:
+    """Process-wide async Blob Storage client plus cached SAS signing material."""
+
+    def __init__(self):
+        self._service = None
+        self._credential = None
+        self._account_key: Optional[str] = None
+        self._delegation_key = None
+        self._delegation_key_expiry: Optional[datetime] = None
+        self._delegation_retry_at = 0.0
+
+    @property
+    def container_name(self) -> str:
+        return os.getenv('AZURE_BLOB_CONTAINER', 'a2a-files')
+
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv('AZURE_STORAGE_CONNECTION_STRING') or os.getenv('AZURE_STORAGE_ACCOUNT_NAME'))
+
+    def service(self):
+        """Async ``BlobServiceClient`` (created on first use), or None if storage isn't configured."""
+        if self._service is not None:
+            return self._service
+        connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+        storage_account_name = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
+        if connection_string:
+            from azure.storage.blob.aio import BlobServiceClient
+            self._service = BlobServiceClient.from_connection_string(connection_string)
+            for part in connection_string.split(';'):
+                if part.startswith('AccountKey='):
+                    self._account_key = part.split('=', 1)[1]
+                    break
+            log_debug("Using connection string for blob storage")
+        elif storage_account_name:
+            from azure.identity.aio import DefaultAzureCredential
+            from azure.storage.blob.aio import BlobServiceClient
+            account_url = f"https://{storage_account_name}.blob.core.windows.net"
+            self._credential = DefaultAzureCredential()
+            self._service = BlobServiceClient(account_url, credential=self._credential)
+            log_debug(f"Using managed identity for blob storage: {account_url}")
+        return self._service
+
+    def blob_client(self, blob_name: str):
+        """Async ``BlobClient`` for ``blob_name``, or None if storage is unavailable."""
+        try:
+            service = self.service()
+        except Exception as e:
+            log_error(f"[BLOB_UPLOAD] Could not create blob client: {e}")
+            return None
+        if service is None:
+            return None
+        return service.get_blob_client(container=self.container_name, blob=blob_name)
+
+    async def sas_url(self, blob_client, hours: float = BLOB_SAS_HOURS) -> str:
+        """Read URL for a blob, signed when signing material is available."""
+        url, _ = await self.signed_url(blob_client, hours)
+        return url
+
+    async def signed_url(self, blob_client, hours: float = BLOB_SAS_HOURS) -> Tuple[str, Optional[datetime]]:
+        """Read URL for a blob plus its SAS expiry (None when the URL is unsigned).
+
+        Under managed identity the expiry is capped at the user-delegation
+        key's, so it can be well short of ``hours``.
+        """
+        from azure.storage.blob import BlobSasPermissions, generate_blob_sas
+
+        expiry = datetime.now(timezone.utc) + timedelta(hours=hours)
+        signing: Dict[str, Any] = {}
+        if self._account_key:
+            signing["account_key"] = self._account_key
+        else:
+            delegation_key = await self._user_delegation_key()
+            if delegation_key is None:
+                # Container must be public (previous managed-identity behavior)
+                return blob_client.url, None
+            signing["user_delegation_key"] = delegation_key
+            expiry = min(expiry, self._delegation_key_expiry)
+
+        sas_token = generate_blob_sas(
+            account_name=blob_client.account_name,
+            container_name=blob_client.container_name,
+            blob_name=blob_client.blob_name,
+            permission=BlobSasPermissions(read=True),
+            expiry=expiry,
+            version="2023-11-03",
+            **signing,
+        )
+        return f"{blob_client.url}?{sas_token}", expiry
+
+    async def _user_delegation_key(self):
+        now = datetime.now(timezone.utc)
+        if self._delegation_key is not None and self._delegation_key_expiry - now > DELEGATION_KEY_REFRESH_MARGIN:
+            return self._delegation_key
+        if time.monotonic() < self._delegation_retry_at:
+            return None
+        expiry = now + timedelta(hours=BLOB_SAS_HOURS)
+        try:
+            self._delegation_key = await self.service().get_user_delegation_key(
+                key_start_time=now - timedelta(minutes=5),
+                key_expiry_time=expiry,
+            )
+            self._delegation_key_expiry = expiry
+            log_debug("Cached user delegation key for blob SAS")
+            return self._delegation_key
+        except Exception as e:
+            # Don't retry on every upload when the identity lacks the delegator role,
+            # but do retry later in case the failure was transient
+            self._delegation_retry_at = time.monotonic() + DELEGATION_RETRY_SECONDS
+            log_warning(f"[BLOB_UPLOAD] User delegation SAS unavailable for {DELEGATION_RETRY_SECONDS:.0f}s, returning unsigned URLs: {e}")
+            return None
+
+    async def aclose(self) -> None:
+        if self._service is not None:
+            await self._service.close()
+            self._service = None
+        if self._credential is not None:
+            await self._credential.close()
+            self._credential = None
+
+
+class BlobBlockWriter:
+    """Stages one blob's blocks concurrently while the upload is still streaming.
+
+    ``write`` waits only when ``concurrency`` blocks are already in flight, so
+    a slow blob connection applies back-pressure to the reader instead of
+    buffering the whole file.
+    """
+
+    def __init__(self, blob_client, concurrency: int = BLOB_STAGE_CONCURRENCY):
+        self.blob_client = blob_client
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._tasks: List[asyncio.Task] = []
+        self._block_ids: List[str] = []
+
+    async def write(self, chunk: bytes) -> None:
+        for task in self._tasks:
+            if task.done() and task.exception() is not None:
+                raise task.exception()
+        await self._slots.acquire()
+        block_id = base64.b64encode(f"{len(self._block_ids):08d}".encode()).decode()
+        self._block_ids.append(block_id)
+        self._tasks.append(asyncio.create_task(self._stage(block_id, chunk)))
+
+    async def _stage(self, block_id: str, chunk: bytes) -> None:
+        try:
+            await self.blob_client.stage_block(block_id, chunk, length=len(chunk))
+        finally:
+            self._slots.release()
+
+    async def commit(self, **kwargs) -> None:
+        """Wait for every staged block, then commit them in order."""
+        await asyncio.gather(*self._tasks)
+        await self.blob_client.commit_block_list(self._block_ids, **kwargs)
+
+    async def abort(self) -> None:
+        """Stop staging; uncommitted blocks are garbage-collected by the service."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class UploadDeduper:
+    """Recent uploads keyed by (scope, content hash), with a TTL and LRU bound.
+
+    The scope is the session and file name (``UploadDeduper.scope``); the
+    stored info is the upload response, whose ``file_id`` ``forget`` matches.
+    """
+
+    def __init__(self, ttl: float = UPLOAD_DEDUPE_SECONDS, max_entries: int = UPLOAD_DEDUPE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+
+    @staticmethod
+    def scope(session_id: Optional[str], file_name: str) -> str:
+        return f"{session_id or ''}:{file_name}"
+
+    def lookup(self, scope: str, sha256: str) -> Optional[Dict]:
+        entry = self._entries.get((scope, sha256))
+        if entry is None:
+            return None
+        stored_at, info = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[(scope, sha256)]
+            return None
+        self._entries.move_to_end((scope, sha256))
+        return info
+
+    def remember(self, scope: str, sha256: str, info: Dict) -> None:
+        self._entries[(scope, sha256)] = (time.monotonic(), info)
+        self._entries.move_to_end((scope, sha256))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def forget(self, session_id: Optional[str], file_name: Optional[str] = None, file_id: Optional[str] = None) -> int:
+        """Drop a deleted file's entries (by name and/or id) so re-uploading it stores it again."""
+        prefix = self.scope(session_id, "")
+        stale = [
+            key for key, (_, info) in self._entries.items()
+            if key[0].startswith(prefix)
+            and ((file_name is not None and key[0] == self.scope(session_id, file_name))
+                 or (file_id is not None and info.get("file_id") == file_id))
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+
+@dataclass
+class UploadResult:
+    size: int
+    sha256: str
+    path: Optional[Path]
+    # Set when the blob was committed
+    blob_client: Any = None
+    # Earlier upload with identical content (nothing was committed or kept)
+    duplicate: Optional[Dict] = None
+
+
+async def stream_upload(
+    upload,
+    file_path: Path,
+    blob_client=None,
+    commit_kwargs: Optional[Dict[str, Any]] = None,
+    dedupe_scope: Optional[str] = None,
+    deduper: Optional[UploadDeduper] = None,
+    chunk_size: int = UPLOAD_CHUNK_BYTES,
+) -> UploadResult:
+    """Stream an ``UploadFile`` to ``file_path`` and, optionally, to a blob.
+
+    Blob errors never fail the upload: the local copy is still written and
+    ``blob_client`` is None in the result, so callers fall back to the local
+    path as before.
+    """
+    writer = BlobBlockWriter(blob_client) if blob_client is not None else None
+    digest = hashlib.sha256()
+    size = 0
+    local_file = await asyncio.to_thread(open, file_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+            await asyncio.to_thread(local_file.write, chunk)
+            if writer is not None:
+                try:
+                    await writer.write(chunk)
+                except Exception as e:
+                    log_error(f"[BLOB_UPLOAD] Staging failed, keeping local copy only: {e}")
+                    await writer.abort()
+                    writer = None
+    except BaseException:
+        if writer is not None:
+            await writer.abort()
+        raise
+    finally:
+        await asyncio.to_thread(local_file.close)
+
+    sha256 = digest.hexdigest()
+    existing = deduper.lookup(dedupe_scope, sha256) if deduper is not None and dedupe_scope else None
+    if existing is not None:
+        if writer is not None:
+            await writer.abort()
+        await asyncio.to_thread(Path(file_path).unlink, True)
+        log_debug(f"Upload {sha256[:12]} duplicates {existing.get('file_id')}, reusing it")
+        return UploadResult(size=size, sha256=sha256, path=None, duplicate=existing)
+
+    if writer is not None:
+        try:
+            await writer.commit(**(commit_kwargs or {}))
+        except Exception as e:
+            log_error(f"[BLOB_UPLOAD] Commit failed, keeping local copy only: {e}")
+            await writer.abort()
+            writer = None
+    return UploadResult(size=size, sha256=sha256, path=Path(file_path),
+                        blob_client=writer.blob_client if writer is not None else None)
+
+
+_blob_store: Optional[BlobStore] = None
+upload_deduper = UploadDeduper()
+
+
+def get_blob_store() -> BlobStore:
+    """Get the global blob store instance."""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
@@ -3,6 +3,8 @@ Chat History Service - Persists conversations and messages to PostgreSQL.
 
 Provides database persistence for chat history with in-memory caching.
 Pattern: Memory is primary for reads, database is synced on writes.
+Messages are written behind: they land in the cache immediately and are
+persisted in multi-row batches by a background writer.
 
 This enables:
 - Chat history sidebar to show previous conversations
@@ -12,47 +14,76 @@ This enables:
 
 import os
 import json
-from typing import Dict, List, Any, Optional
+import atexit
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
 from dataclasses import dataclass, field
 from log_config import log_debug, log_info, log_warning, log_error
 
-# Database connection
+# Database connection pool
 DATABASE_URL = os.getenv('DATABASE_URL')
-_db_conn = None
+POOL_MIN_SIZE = int(os.getenv('CHAT_HISTORY_POOL_MIN', '2'))
+POOL_MAX_SIZE = int(os.getenv('CHAT_HISTORY_POOL_MAX', '10'))
+POOL_PING_AFTER_SECONDS = float(os.getenv('CHAT_HISTORY_POOL_PING_AFTER', '30'))
+_db_pool = None
 _use_database = False
 
-# In-memory cache
+# Write-behind message persistence
+WRITE_BEHIND = os.getenv('CHAT_HISTORY_WRITE_BEHIND', 'true').lower() == 'true'
+WRITE_BATCH_SIZE = int(os.getenv('CHAT_HISTORY_WRITE_BATCH_SIZE', '100'))
+WRITE_FLUSH_SECONDS = float(os.getenv('CHAT_HISTORY_WRITE_FLUSH_MS', '200')) / 1000
+WRITE_MAX_PENDING = int(os.getenv('CHAT_HISTORY_WRITE_MAX_PENDING', '10000'))
+
+# In-memory cache. Sync functions run both on the event loop and on the pool
+# executor (the *_async variants), so every read-modify or iteration of these
+# dicts holds _cache_lock; database I/O never does.
+_cache_lock = threading.RLock()
 _conversations_cache: Dict[str, Dict[str, Any]] = {}  # conversation_id -> conversation data
 _messages_cache: Dict[str, List[Dict[str, Any]]] = {}  # conversation_id -> [messages]
+_message_ids: Dict[str, set] = {}  # conversation_id -> message ids in _messages_cache (O(1) dedupe)
+
+# Hot queries, prepared once per pooled connection ($n placeholders)
+_PREPARED_QUERIES = {
+    "chs_select_messages": """
+        SELECT message_id, role, parts, context_id, task_id, metadata, created_at
+        FROM messages WHERE conversation_id = $1 ORDER BY created_at
+    """,
+    "chs_select_session_conversations": """
+        SELECT conversation_id, session_id, name, is_active, created_at, updated_at
+        FROM conversations WHERE session_id = $1 ORDER BY updated_at DESC
+    """,
+    "chs_select_conversation_tasks": """
+        SELECT conversation_id, task_id FROM conversation_tasks
+        WHERE conversation_id = ANY($1)
+    """,
+}
+
+
+def _get_pool():
+    """Get or create the PostgreSQL connection pool (None when no database)."""
+    global _db_pool, _use_database
+
+    if _db_pool is not None:
+        return _db_pool
 
-
-def _get_connection():
-    """Get or create database connection."""
-    global _db_conn, _use_database
-    
-    if _db_conn is not None:
-        try:
-            # Test connection is still alive
-            cur = _db_conn.cursor()
-            cur.execute("SELECT 1")
-            cur.close()
-            return _db_conn
-        except Exception as e:
-            log_warning(f"[ChatHistoryService] Connection test failed: {e}, reconnecting...")
-            try:
-                _db_conn.close()
-            except:
-                pass
-            _db_conn = None
-    
     if DATABASE_URL:
         try:
-            import psycopg2
-            _db_conn = psycopg2.connect(DATABASE_URL)
+            from service.db_pool import PostgresPool
+            db_pool = PostgresPool(
+                DATABASE_URL,
+                name="ChatHistoryService",
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                ping_after=POOL_PING_AFTER_SECONDS,
+            )
+            db_pool.open()
+            _db_pool = db_pool
             _use_database = True
-            log_info("[ChatHistoryService] Connected to PostgreSQL")
-            return _db_conn
+            log_info(f"[ChatHistoryService] Connected to PostgreSQL (pool of up to {POOL_MAX_SIZE} connections)")
+            return _db_pool
         except Exception as e:
             log_error(f"[ChatHistoryService] Failed to connect: {e}")
             _use_database = False
@@ -62,10 +93,272 @@ def _get_connection():
         return None
 
 
+@contextmanager
+def _connection():
+    """Borrow a pooled connection, or yield None when running in-memory only.
+
+    The pool validates idle connections and discards broken ones, and rolls
+    back on error, so callers only commit on success.
+    """
+    db_pool = _get_pool()
+    if db_pool is None:
+        yield None
+        return
+    with db_pool.connection() as conn:
+        yield conn
+
+
+def db_connection():
+    """Borrow a connection from this process's PostgreSQL pool (yields None without a database).
+
+    Other database-backed services use it for reads that must see writes made
+    by other replicas, instead of opening connections of their own.
+    """
+    return _connection()
+
+
+def _execute(cur, name: str, params: tuple = ()):
+    """Execute one of the prepared hot queries."""
+    _db_pool.execute_prepared(cur, name, _PREPARED_QUERIES[name], params)
+
+
+async def run_in_db_executor(func: Callable[..., Any], *args) -> Any:
+    """Run a blocking chat-history call off the event loop.
+
+    Uses the pool's dedicated executor; without a database the call only
+    touches the in-memory cache and runs inline.
+    """
+    db_pool = _get_pool()
+    if db_pool is None:
+        return func(*args)
+    return await db_pool.run(func, *args)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool statistics (empty when running in-memory only)."""
+    return _db_pool.stats() if _db_pool is not None else {}
+
+
+def close_pool():
+    """Flush queued messages and close all pooled database connections (called on shutdown)."""
+    global _db_pool
+    _message_writer.close()
+    if _db_pool is not None:
+        _db_pool.close()
+        _db_pool = None
+        log_info("[ChatHistoryService] Closed PostgreSQL pool")
+
+
+_INSERT_MESSAGES_SQL = """
+    INSERT INTO messages (message_id, conversation_id, role, parts, context_id, task_id, metadata, created_at)
+    VALUES %s
+    ON CONFLICT (conversation_id, message_id) DO UPDATE SET
+        parts = EXCLUDED.parts,
+        metadata = EXCLUDED.metadata
+"""
+_INSERT_MESSAGES_TEMPLATE = "(%s, %s, %s, %s::jsonb, %s, %s, %s::jsonb, %s)"
+
+_TOUCH_CONVERSATIONS_SQL = """
+    UPDATE conversations AS c SET updated_at = v.updated_at
+    FROM (VALUES %s) AS v(conversation_id, updated_at)
+    WHERE c.conversation_id = v.conversation_id
+"""
+
+
+class _MessageWriter:
+    """Write-behind queue that persists messages in multi-row batches.
+
+    Rows are keyed by (conversation_id, message_id), so re-adding a message
+    before it is written only keeps the latest version, and conversation
+    ``updated_at`` bumps collapse to one per conversation per batch. A
+    background thread flushes when ``batch_size`` rows are queued or
+    ``flush_interval`` seconds after the first queued row; ``close`` drains
+    the queue on shutdown.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self._cond = threading.Condition()
+        self._rows: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._touched: Dict[str, datetime] = {}
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._retry_delay = 0.0
+        self.metrics = {"queued": 0, "coalesced": 0, "flushes": 0, "rows_written": 0, "requeued": 0, "dropped": 0, "failed": 0}
+
+    @property
+    def depth(self) -> int:
+        return len(self._rows)
+
+    def enqueue(self, row: tuple, touched_at: datetime) -> None:
+        """Queue a message row (message_id, conversation_id, ..., created_at)."""
+        message_id, conversation_id = row[0], row[1]
+        key = (conversation_id, message_id)
+        with self._cond:
+            if key in self._rows:
+                self.metrics["coalesced"] += 1
+            elif len(self._rows) >= self.max_pending:
+                self._rows.popitem(last=False)
+                self.metrics["dropped"] += 1
+                log_warning(f"[ChatHistoryService] Write queue full ({self.max_pending}), dropped oldest pending message")
+            self._rows[key] = row
+            self._touched[conversation_id] = touched_at
+            self.metrics["queued"] += 1
+            if len(self._rows) == 1 or len(self._rows) >= self.batch_size:
+                self._cond.notify()
+        self._ensure_thread()
+
+    def discard(self, matches: Callable[[str], bool]) -> None:
+        """Forget queued writes for conversations being deleted."""
+        with self._cond:
+            for key in [k for k in self._rows if matches(k[0])]:
+                del self._rows[key]
+            for conversation_id in [c for c in self._touched if matches(c)]:
+                del self._touched[conversation_id]
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                rows = list(self._rows.values())
+                touched = self._touched
+                self._rows = OrderedDict()
+                self._touched = {}
+            if not rows and not touched:
+                return 0
+            return self._write(rows, touched)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the background thread after draining the queue."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.flush()
+        self._stopping = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.metrics, "pending": len(self._rows)}
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="chat-history-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._rows and not self._touched and not self._stopping:
+                    self._cond.wait()
+                if self._retry_delay and not self._stopping:
+                    # Database was unavailable: back off instead of hammering it
+                    self._cond.wait(timeout=self._retry_delay)
+                elif not self._stopping and len(self._rows) < self.batch_size:
+                    # Let the batch fill up (enqueue notifies once it is full)
+                    self._cond.wait(timeout=self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception as e:
+                log_error(f"[ChatHistoryService] Message writer error: {e}")
+            if stopping:
+                return
+
+    def _write(self, rows: List[tuple], touched: Dict[str, datetime]) -> int:
+        try:
+            self._write_batch(rows, touched)
+            self._retry_delay = 0.0
+            self.metrics["flushes"] += 1
+            self.metrics["rows_written"] += len(rows)
+            log_debug(f"[ChatHistoryService] Flushed {len(rows)} messages across {len(touched)} conversations")
+            return len(rows)
+        except Exception as e:
+            from psycopg2.pool import PoolError
+            from service.db_pool import CONNECTION_ERRORS
+            if isinstance(e, CONNECTION_ERRORS + (PoolError,)):
+                log_warning(f"[ChatHistoryService] Database unavailable, re-queueing {len(rows)} messages: {e}")
+                self._requeue(rows, touched)
+                self._retry_delay = min(max(self._retry_delay * 2, 1.0), 30.0)
+                return 0
+            self._retry_delay = 0.0
+            log_error(f"[ChatHistoryService] Batch write failed, retrying per conversation: {e}")
+        # One bad conversation (e.g. deleted concurrently) must not sink the whole batch
+        written = 0
+        by_conversation: Dict[str, List[tuple]] = {}
+        for row in rows:
+            by_conversation.setdefault(row[1], []).append(row)
+        for conversation_id in set(by_conversation) | set(touched):
+            conversation_rows = by_conversation.get(conversation_id, [])
+            conversation_touch = {conversation_id: touched[conversation_id]} if conversation_id in touched else {}
+            try:
+                self._write_batch(conversation_rows, conversation_touch)
+                written += len(conversation_rows)
+            except Exception as e:
+                self.metrics["failed"] += len(conversation_rows)
+                log_error(f"[ChatHistoryService] Error adding {len(conversation_rows)} messages to {conversation_id[:16]}...: {e}")
+        self.metrics["flushes"] += 1
+        self.metrics["rows_written"] += written
+        return written
+
+    def _write_batch(self, rows: List[tuple], touched: Dict[str, datetime]) -> None:
+        from psycopg2.extras import execute_values
+
+        with _connection() as conn:
+            if not conn:
+                self.metrics["dropped"] += len(rows)
+                log_error(f"[ChatHistoryService] No database connection - {len(rows)} messages NOT persisted")
+                return
+            cur = conn.cursor()
+            if rows:
+                execute_values(cur, _INSERT_MESSAGES_SQL, [
+                    (message_id, conversation_id, role, json.dumps(parts), context_id, task_id,
+                     json.dumps(metadata) if metadata else None, created_at)
+                    for message_id, conversation_id, role, parts, context_id, task_id, metadata, created_at in rows
+                ], template=_INSERT_MESSAGES_TEMPLATE, page_size=self.batch_size)
+            if touched:
+                execute_values(cur, _TOUCH_CONVERSATIONS_SQL, list(touched.items()), page_size=self.batch_size)
+            conn.commit()
+            cur.close()
+
+    def _requeue(self, rows: List[tuple], touched: Dict[str, datetime]) -> None:
+        with self._cond:
+            # Newer versions queued meanwhile win over the failed ones
+            restored = OrderedDict(((row[1], row[0]), row) for row in rows if (row[1], row[0]) not in self._rows)
+            restored.update(self._rows)
+            while len(restored) > self.max_pending:
+                restored.popitem(last=False)
+                self.metrics["dropped"] += 1
+            self._rows = restored
+            for conversation_id, touched_at in touched.items():
+                if conversation_id not in self._touched:
+                    self._touched[conversation_id] = touched_at
+            self.metrics["requeued"] += len(rows)
+
+
+_message_writer = _MessageWriter(WRITE_BATCH_SIZE, WRITE_FLUSH_SECONDS, WRITE_MAX_PENDING)
+atexit.register(_message_writer.close)
+
+
+def flush_pending_messages() -> int:
+    """Persist all queued messages now; returns the number of rows written."""
+    return _message_writer.flush()
+
+
+def get_write_queue_stats() -> Dict[str, Any]:
+    """Write-behind queue statistics."""
+    return _message_writer.stats()
+
+
 def _init_database():
     """Initialize database connection and load data."""
-    conn = _get_connection()
-    if conn:
+    if _get_pool():
         _load_conversations_from_database()
 
 
@@ -73,49 +366,44 @@ def _load_conversations_from_database(session_id: str = None):
     """Load conversations from database into memory cache."""
     global _conversations_cache, _messages_cache
     
-    conn = _get_connection()
-    if not conn:
-        return
-    
     try:
-        cur = conn.cursor()
-        
-        if session_id:
-            cur.execute("""
-                SELECT conversation_id, session_id, name, is_active, created_at, updated_at
-                FROM conversations WHERE session_id = %s ORDER BY updated_at DESC
-            """, (session_id,))
-        else:
-            cur.execute("""
-                SELECT conversation_id, session_id, name, is_active, created_at, updated_at
-                FROM conversations ORDER BY updated_at DESC LIMIT 1000
-            """)
-        
-        for row in cur.fetchall():
-            conv_id = row[0]
-            _conversations_cache[conv_id] = {
-                "conversation_id": conv_id,
-                "session_id": row[1],
-                "name": row[2] or "",
-                "is_active": row[3],
-                "created_at": row[4].isoformat() if row[4] else None,
-                "updated_at": row[5].isoformat() if row[5] else None,
-                "task_ids": [],
-                "messages": []
-            }
-        
-        # Load task_ids for each conversation
-        if _conversations_cache:
-            conv_ids = list(_conversations_cache.keys())
-            cur.execute("""
-                SELECT conversation_id, task_id FROM conversation_tasks
-                WHERE conversation_id = ANY(%s)
-            """, (conv_ids,))
+        with _connection() as conn:
+            if not conn:
+                return
+            cur = conn.cursor()
+            
+            if session_id:
+                _execute(cur, "chs_select_session_conversations", (session_id,))
+            else:
+                cur.execute("""
+                    SELECT conversation_id, session_id, name, is_active, created_at, updated_at
+                    FROM conversations ORDER BY updated_at DESC LIMIT 1000
+                """)
+            
+            loaded = {}
             for row in cur.fetchall():
-                if row[0] in _conversations_cache:
-                    _conversations_cache[row[0]]["task_ids"].append(row[1])
-        
-        cur.close()
+                conv_id = row[0]
+                loaded[conv_id] = {
+                    "conversation_id": conv_id,
+                    "session_id": row[1],
+                    "name": row[2] or "",
+                    "is_active": row[3],
+                    "created_at": row[4].isoformat() if row[4] else None,
+                    "updated_at": row[5].isoformat() if row[5] else None,
+                    "task_ids": [],
+                    "messages": []
+                }
+            
+            # Load task_ids for each loaded conversation
+            if loaded:
+                _execute(cur, "chs_select_conversation_tasks", (list(loaded),))
+                for row in cur.fetchall():
+                    if row[0] in loaded:
+                        loaded[row[0]]["task_ids"].append(row[1])
+            
+            cur.close()
+        with _cache_lock:
+            _conversations_cache.update(loaded)
         log_debug(f"[ChatHistoryService] Loaded {len(_conversations_cache)} conversations from database")
         
     except Exception as e:
@@ -127,37 +415,38 @@ def _load_messages_for_conversation(conversation_id: str) -> List[Dict[str, Any]
     global _messages_cache
     
     # Check cache first
-    if conversation_id in _messages_cache:
-        return _messages_cache[conversation_id]
-    
-    conn = _get_connection()
-    if not conn:
-        return []
+    with _cache_lock:
+        if conversation_id in _messages_cache:
+            return _messages_cache[conversation_id]
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT message_id, role, parts, context_id, task_id, metadata, created_at
-            FROM messages WHERE conversation_id = %s ORDER BY created_at
-        """, (conversation_id,))
-        
-        messages = []
-        for row in cur.fetchall():
-            msg = {
-                "messageId": row[0],
-                "role": row[1],
-                "parts": row[2] if isinstance(row[2], list) else json.loads(row[2]) if row[2] else [],
-                "contextId": row[3],
-                "taskId": row[4],
-                "metadata": row[5] if isinstance(row[5], dict) else json.loads(row[5]) if row[5] else {},
-                "created_at": row[6].isoformat() if row[6] else None
-            }
-            messages.append(msg)
-        
-        cur.close()
+        with _connection() as conn:
+            if not conn:
+                return []
+            cur = conn.cursor()
+            _execute(cur, "chs_select_messages", (conversation_id,))
+            
+            messages = []
+            for row in cur.fetchall():
+                msg = {
+                    "messageId": row[0],
+                    "role": row[1],
+                    "parts": row[2] if isinstance(row[2], list) else json.loads(row[2]) if row[2] else [],
+                    "contextId": row[3],
+                    "taskId": row[4],
+                    "metadata": row[5] if isinstance(row[5], dict) else json.loads(row[5]) if row[5] else {},
+                    "created_at": row[6].isoformat() if row[6] else None
+                }
+                messages.append(msg)
+            
+            cur.close()
         
-        # Cache the messages
-        _messages_cache[conversation_id] = messages
+        # Cache the messages (unless a concurrent add_message already started the list)
+        with _cache_lock:
+            if conversation_id not in _messages_cache:
+                _messages_cache[conversation_id] = messages
+                _message_ids[conversation_id] = {m["messageId"] for m in messages}
+            messages = _messages_cache[conversation_id]
         log_debug(f"[ChatHistoryService] Loaded {len(messages)} messages for conversation {conversation_id[:8]}...")
         
         return messages
@@ -185,28 +474,29 @@ def create_conversation(conversation_id: str, session_id: str, name: str = "") -
     }
     
     # Update cache
-    _conversations_cache[conversation_id] = conversation
-    _messages_cache[conversation_id] = []
+    with _cache_lock:
+        _conversations_cache[conversation_id] = conversation
+        _messages_cache[conversation_id] = []
+        _message_ids[conversation_id] = set()
     
     # Persist to database
-    conn = _get_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO conversations (conversation_id, session_id, name, is_active, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (conversation_id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    is_active = EXCLUDED.is_active,
-                    updated_at = EXCLUDED.updated_at
-            """, (conversation_id, session_id, name, True, now, now))
-            conn.commit()
-            cur.close()
-            log_debug(f"[ChatHistoryService] Created conversation {conversation_id[:8]}...")
-        except Exception as e:
-            log_error(f"[ChatHistoryService] Error creating conversation: {e}")
-            conn.rollback()
+    try:
+        with _connection() as conn:
+            if conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    INSERT INTO conversations (conversation_id, session_id, name, is_active, created_at, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (conversation_id) DO UPDATE SET
+                        name = EXCLUDED.name,
+                        is_active = EXCLUDED.is_active,
+                        updated_at = EXCLUDED.updated_at
+                """, (conversation_id, session_id, name, True, now, now))
+                conn.commit()
+                cur.close()
+                log_debug(f"[ChatHistoryService] Created conversation {conversation_id[:8]}...")
+    except Exception as e:
+        log_error(f"[ChatHistoryService] Error creating conversation: {e}")
     
     return conversation
 
@@ -214,15 +504,18 @@ def create_conversation(conversation_id: str, session_id: str, name: str = "") -
 def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     """Get a conversation by ID, with messages loaded."""
     # Check cache first
-    if conversation_id in _conversations_cache:
-        conv = _conversations_cache[conversation_id].copy()
+    with _cache_lock:
+        cached = _conversations_cache.get(conversation_id)
+        conv = cached.copy() if cached is not None else None
+    if conv is not None:
         conv["messages"] = _load_messages_for_conversation(conversation_id)
         return conv
     
     # Try loading from database
-    conn = _get_connection()
-    if conn:
-        try:
+    try:
+        with _connection() as conn:
+            if not conn:
+                return None
             cur = conn.cursor()
             cur.execute("""
                 SELECT conversation_id, session_id, name, is_active, created_at, updated_at
@@ -230,22 +523,23 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
             """, (conversation_id,))
             row = cur.fetchone()
             cur.close()
-            
-            if row:
-                conv = {
-                    "conversation_id": row[0],
-                    "session_id": row[1],
-                    "name": row[2] or "",
-                    "is_active": row[3],
-                    "created_at": row[4].isoformat() if row[4] else None,
-                    "updated_at": row[5].isoformat() if row[5] else None,
-                    "task_ids": [],
-                    "messages": _load_messages_for_conversation(conversation_id)
-                }
+        
+        if row:
+            conv = {
+                "conversation_id": row[0],
+                "session_id": row[1],
+                "name": row[2] or "",
+                "is_active": row[3],
+                "created_at": row[4].isoformat() if row[4] else None,
+                "updated_at": row[5].isoformat() if row[5] else None,
+                "task_ids": [],
+                "messages": _load_messages_for_conversation(conversation_id)
+            }
+            with _cache_lock:
                 _conversations_cache[conversation_id] = conv
-                return conv
-        except Exception as e:
-            log_error(f"[ChatHistoryService] Error getting conversation: {e}")
+            return conv
+    except Exception as e:
+        log_error(f"[ChatHistoryService] Error getting conversation: {e}")
     
     return None
 
@@ -256,10 +550,11 @@ def list_conversations(session_id: str) -> List[Dict[str, Any]]:
     _load_conversations_from_database(session_id)
     
     # Filter and return
-    conversations = [
-        conv for conv in _conversations_cache.values()
-        if conv.get("session_id") == session_id
-    ]
+    with _cache_lock:
+        conversations = [
+            conv for conv in _conversations_cache.values()
+            if conv.get("session_id") == session_id
+        ]
     
     # Sort by updated_at descending
     conversations.sort(key=lambda c: c.get("updated_at", ""), reverse=True)
@@ -267,27 +562,32 @@ def list_conversations(session_id: str) -> List[Dict[str, Any]]:
     return conversations
 
 
+async def list_conversations_async(session_id: str) -> List[Dict[str, Any]]:
+    """Async variant of list_conversations; the database load runs on the pool executor."""
+    return await run_in_db_executor(list_conversations, session_id)
+
+
 def delete_conversation(conversation_id: str) -> bool:
     """Delete a conversation and its messages."""
     # Remove from cache
-    if conversation_id in _conversations_cache:
-        del _conversations_cache[conversation_id]
-    if conversation_id in _messages_cache:
-        del _messages_cache[conversation_id]
+    with _cache_lock:
+        _conversations_cache.pop(conversation_id, None)
+        _messages_cache.pop(conversation_id, None)
+        _message_ids.pop(conversation_id, None)
+    _message_writer.discard(lambda conv_id: conv_id == conversation_id)
     
     # Delete from database
-    conn = _get_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM conversations WHERE conversation_id = %s", (conversation_id,))
-            conn.commit()
-            cur.close()
-            log_debug(f"[ChatHistoryService] Deleted conversation {conversation_id[:8]}...")
-            return True
-        except Exception as e:
-            log_error(f"[ChatHistoryService] Error deleting conversation: {e}")
-            conn.rollback()
+    try:
+        with _connection() as conn:
+            if conn:
+                cur = conn.cursor()
+                cur.execute("DELETE FROM conversations WHERE conversation_id = %s", (conversation_id,))
+                conn.commit()
+                cur.close()
+                log_debug(f"[ChatHistoryService] Deleted conversation {conversation_id[:8]}...")
+                return True
+    except Exception as e:
+        log_error(f"[ChatHistoryService] Error deleting conversation: {e}")
     
     return True  # Return true even if only cache was cleared
 
@@ -304,37 +604,38 @@ def delete_all_conversations(session_id: str) -> bool:
     global _conversations_cache, _messages_cache
     
     # Find and remove all conversations for this session from cache
-    conv_ids_to_delete = [
-        conv_id for conv_id, conv in _conversations_cache.items()
-        if conv.get("session_id") == session_id or conv_id.startswith(f"{session_id}::")
-    ]
-    
-    for conv_id in conv_ids_to_delete:
-        if conv_id in _conversations_cache:
-            del _conversations_cache[conv_id]
-        if conv_id in _messages_cache:
-            del _messages_cache[conv_id]
+    with _cache_lock:
+        conv_ids_to_delete = [
+            conv_id for conv_id, conv in _conversations_cache.items()
+            if conv.get("session_id") == session_id or conv_id.startswith(f"{session_id}::")
+        ]
+        
+        for conv_id in conv_ids_to_delete:
+            _conversations_cache.pop(conv_id, None)
+            _messages_cache.pop(conv_id, None)
+            _message_ids.pop(conv_id, None)
+    deleted_ids = set(conv_ids_to_delete)
+    _message_writer.discard(lambda conv_id: conv_id in deleted_ids or conv_id.startswith(f"{session_id}::"))
     
     log_debug(f"[ChatHistoryService] Cleared {len(conv_ids_to_delete)} conversations from cache for session {session_id[:8]}...")
     
     # Delete from database
-    conn = _get_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            # Delete by session_id column OR by conversation_id prefix (for legacy format)
-            cur.execute("""
-                DELETE FROM conversations 
-                WHERE session_id = %s OR conversation_id LIKE %s
-            """, (session_id, f"{session_id}::%"))
-            deleted_count = cur.rowcount
-            conn.commit()
-            cur.close()
-            log_debug(f"[ChatHistoryService] Deleted {deleted_count} conversations from database for session {session_id[:8]}...")
-            return True
-        except Exception as e:
-            log_error(f"[ChatHistoryService] Error deleting all conversations: {e}")
-            conn.rollback()
+    try:
+        with _connection() as conn:
+            if conn:
+                cur = conn.cursor()
+                # Delete by session_id column OR by conversation_id prefix (for legacy format)
+                cur.execute("""
+                    DELETE FROM conversations 
+                    WHERE session_id = %s OR conversation_id LIKE %s
+                """, (session_id, f"{session_id}::%"))
+                deleted_count = cur.rowcount
+                conn.commit()
+                cur.close()
+                log_debug(f"[ChatHistoryService] Deleted {deleted_count} conversations from database for session {session_id[:8]}...")
+                return True
+    except Exception as e:
+        log_error(f"[ChatHistoryService] Error deleting all conversations: {e}")
     
     return True  # Return true even if only cache was cleared
 
@@ -345,34 +646,29 @@ def update_conversation_name(conversation_id: str, name: str) -> bool:
     Handles both short IDs (abc123) and full IDs (session::abc123).
     Will try to match on either the exact ID or IDs ending with ::conversation_id.
     """
-    # Update cache if present
-    if conversation_id in _conversations_cache:
-        _conversations_cache[conversation_id]["name"] = name
-        _conversations_cache[conversation_id]["updated_at"] = datetime.utcnow().isoformat()
-    
-    # Also check for full ID format in cache
-    for cached_id in list(_conversations_cache.keys()):
-        if cached_id.endswith(f"::{conversation_id}"):
-            _conversations_cache[cached_id]["name"] = name
-            _conversations_cache[cached_id]["updated_at"] = datetime.utcnow().isoformat()
-    
-    conn = _get_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            # Try updating by exact match OR by suffix match (for session::convId format)
-            cur.execute("""
-                UPDATE conversations SET name = %s, updated_at = %s 
-                WHERE conversation_id = %s OR conversation_id LIKE %s
-            """, (name, datetime.utcnow(), conversation_id, f"%::{conversation_id}"))
-            rows_updated = cur.rowcount
-            conn.commit()
-            cur.close()
-            log_debug(f"[ChatHistoryService] Updated name for {rows_updated} conversation(s) matching {conversation_id}")
-            return rows_updated > 0
-        except Exception as e:
-            log_error(f"[ChatHistoryService] Error updating conversation name: {e}")
-            conn.rollback()
+    # Update cache if present, also matching the full ID format
+    with _cache_lock:
+        for cached_id, conv in _conversations_cache.items():
+            if cached_id == conversation_id or cached_id.endswith(f"::{conversation_id}"):
+                conv["name"] = name
+                conv["updated_at"] = datetime.utcnow().isoformat()
+    
+    try:
+        with _connection() as conn:
+            if conn:
+                cur = conn.cursor()
+                # Try updating by exact match OR by suffix match (for session::convId format)
+                cur.execute("""
+                    UPDATE conversations SET name = %s, updated_at = %s 
+                    WHERE conversation_id = %s OR conversation_id LIKE %s
+                """, (name, datetime.utcnow(), conversation_id, f"%::{conversation_id}"))
+                rows_updated = cur.rowcount
+                conn.commit()
+                cur.close()
+                log_debug(f"[ChatHistoryService] Updated name for {rows_updated} conversation(s) matching {conversation_id}")
+                return rows_updated > 0
+    except Exception as e:
+        log_error(f"[ChatHistoryService] Error updating conversation name: {e}")
     
     return False
 
@@ -403,21 +699,23 @@ def add_message(conversation_id: str, message: Dict[str, Any]) -> bool:
                     name = first_part.get('text', '')[:50]
         create_conversation(conversation_id, session_id, name or f"Chat {conversation_id[-8:]}")
     
-    # Serialize parts if needed
-    if isinstance(parts, list):
+    # Serialize parts if needed (callers normally pass plain dicts already)
+    if isinstance(parts, list) and not all(isinstance(part, dict) for part in parts):
         # Convert Pydantic models to dicts if needed
         serialized_parts = []
         for part in parts:
-            if hasattr(part, 'model_dump'):
+            if isinstance(part, dict):
+                serialized_parts.append(part)
+            elif hasattr(part, 'model_dump'):
                 serialized_parts.append(part.model_dump())
             elif hasattr(part, 'dict'):
                 serialized_parts.append(part.dict())
-            elif isinstance(part, dict):
-                serialized_parts.append(part)
             else:
                 serialized_parts.append(str(part))
         parts = serialized_parts
     
+    now = datetime.utcnow()
+    now_iso = now.isoformat()
     msg_data = {
         "messageId": message_id,
         "role": role,
@@ -425,57 +723,38 @@ def add_message(conversation_id: str, message: Dict[str, Any]) -> bool:
         "contextId": context_id,
         "taskId": task_id,
         "metadata": metadata,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": now_iso
     }
     
     # Update cache
-    if conversation_id not in _messages_cache:
-        _messages_cache[conversation_id] = []
-    
-    # Avoid duplicates
-    existing_ids = {m.get("messageId") for m in _messages_cache[conversation_id]}
-    if message_id not in existing_ids:
-        _messages_cache[conversation_id].append(msg_data)
-    
-    # Update conversation timestamp
-    if conversation_id in _conversations_cache:
-        _conversations_cache[conversation_id]["updated_at"] = datetime.utcnow().isoformat()
-    
-    # Persist to database
-    conn = _get_connection()
-    if not conn:
-        log_error(f"[ChatHistoryService] No database connection - message NOT persisted: {message_id[:16]}...")
-        return False
-    
-    try:
-        cur = conn.cursor()
+    with _cache_lock:
+        if conversation_id not in _messages_cache:
+            _messages_cache[conversation_id] = []
         
-        # Insert message
-        cur.execute("""
-            INSERT INTO messages (message_id, conversation_id, role, parts, context_id, task_id, metadata, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (conversation_id, message_id) DO UPDATE SET
-                parts = EXCLUDED.parts,
-                metadata = EXCLUDED.metadata
-        """, (message_id, conversation_id, role, json.dumps(parts), context_id, task_id, 
-              json.dumps(metadata) if metadata else None, datetime.utcnow()))
+        # Avoid duplicates
+        seen_ids = _message_ids.get(conversation_id)
+        if seen_ids is None:
+            seen_ids = _message_ids[conversation_id] = {m.get("messageId") for m in _messages_cache[conversation_id]}
+        if message_id not in seen_ids:
+            seen_ids.add(message_id)
+            _messages_cache[conversation_id].append(msg_data)
         
         # Update conversation timestamp
-        cur.execute("""
-            UPDATE conversations SET updated_at = %s WHERE conversation_id = %s
-        """, (datetime.utcnow(), conversation_id))
-        
-        conn.commit()
-        cur.close()
-        return True
-        
-    except Exception as e:
-        log_error(f"[ChatHistoryService] Error adding message: {e}")
-        try:
-            conn.rollback()
-        except:
-            pass
+        if conversation_id in _conversations_cache:
+            _conversations_cache[conversation_id]["updated_at"] = now_iso
+    
+    # Persist to database (write-behind: queued and flushed in batches)
+    if _get_pool() is None:
+        log_error(f"[ChatHistoryService] No database connection - message NOT persisted: {message_id[:16]}...")
         return False
+    
+    _message_writer.enqueue(
+        (message_id, conversation_id, role, parts, context_id, task_id, metadata, now),
+        touched_at=now,
+    )
+    if not WRITE_BEHIND:
+        return _message_writer.flush() > 0
+    return True
 
 
 def get_messages(conversation_id: str) -> List[Dict[str, Any]]:
@@ -483,6 +762,26 @@ def get_messages(conversation_id: str) -> List[Dict[str, Any]]:
     return _load_messages_for_conversation(conversation_id)
 
 
+async def add_message_async(conversation_id: str, message: Dict[str, Any]) -> bool:
+    """Async variant of add_message.
+
+    Messages for known conversations are only queued, so they are added inline;
+    creating a new conversation writes to the database on the pool executor.
+    """
+    if WRITE_BEHIND and conversation_id in _conversations_cache:
+        return add_message(conversation_id, message)
+    return await run_in_db_executor(add_message, conversation_id, message)
+
+
+async def get_messages_async(conversation_id: str) -> List[Dict[str, Any]]:
+    """Async variant of get_messages; cached conversations return without a thread hop."""
+    with _cache_lock:
+        cached = _messages_cache.get(conversation_id)
+    if cached is not None:
+        return cached
+    return await run_in_db_executor(_load_messages_for_conversation, conversation_id)
+
+
 def get_messages_by_short_id(short_id: str) -> List[Dict[str, Any]]:
     """Get messages when only the short UUID is known (without session prefix).
 
@@ -490,19 +789,19 @@ def get_messages_by_short_id(short_id: str) -> List[Dict[str, Any]]:
     sends just 'uuid'. This resolves the full ID via a DB lookup, then loads
     messages normally.
     """
-    conn = _get_connection()
-    if not conn:
-        return []
-
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT conversation_id FROM conversations
-            WHERE conversation_id LIKE %s
-            LIMIT 1
-        """, (f"%::{short_id}",))
-        row = cur.fetchone()
-        cur.close()
+        with _connection() as conn:
+            if not conn:
+                return []
+
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT conversation_id FROM conversations
+                WHERE conversation_id LIKE %s
+                LIMIT 1
+            """, (f"%::{short_id}",))
+            row = cur.fetchone()
+            cur.close()
 
         if row:
             full_conv_id = row[0]
@@ -524,35 +823,35 @@ def get_first_user_message_texts(conversation_ids: List[str]) -> Dict[str, str]:
     if not conversation_ids:
         return {}
 
-    conn = _get_connection()
-    if not conn:
-        return {}
-
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT DISTINCT ON (conversation_id)
-                conversation_id, parts
-            FROM messages
-            WHERE conversation_id = ANY(%s) AND role = 'user'
-            ORDER BY conversation_id, created_at
-        """, (conversation_ids,))
-
-        result = {}
-        for row in cur.fetchall():
-            conv_id = row[0]
-            parts = row[1] if isinstance(row[1], list) else json.loads(row[1]) if row[1] else []
-            # Extract text from the first text part
-            for part in parts:
-                if isinstance(part, dict):
-                    kind = part.get("kind") or part.get("root", {}).get("kind")
-                    if kind == "text":
-                        text = (part.get("text") or part.get("root", {}).get("text", "")).strip()
-                        if text:
-                            result[conv_id] = text
-                            break
-        cur.close()
-        return result
+        with _connection() as conn:
+            if not conn:
+                return {}
+
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT DISTINCT ON (conversation_id)
+                    conversation_id, parts
+                FROM messages
+                WHERE conversation_id = ANY(%s) AND role = 'user'
+                ORDER BY conversation_id, created_at
+            """, (conversation_ids,))
+
+            result = {}
+            for row in cur.fetchall():
+                conv_id = row[0]
+                parts = row[1] if isinstance(row[1], list) else json.loads(row[1]) if row[1] else []
+                # Extract text from the first text part
+                for part in parts:
+                    if isinstance(part, dict):
+                        kind = part.get("kind") or part.get("root", {}).get("kind")
+                        if kind == "text":
+                            text = (part.get("text") or part.get("root", {}).get("text", "")).strip()
+                            if text:
+                                result[conv_id] = text
+                                break
+            cur.close()
+            return result
     except Exception as e:
         log_error(f"[ChatHistoryService] Error getting first user message texts: {e}")
         return {}
@@ -561,25 +860,25 @@ def get_first_user_message_texts(conversation_ids: List[str]) -> Dict[str, str]:
 def add_task_to_conversation(conversation_id: str, task_id: str) -> bool:
     """Associate a task with a conversation."""
     # Update cache
-    if conversation_id in _conversations_cache:
-        if task_id not in _conversations_cache[conversation_id].get("task_ids", []):
-            _conversations_cache[conversation_id].setdefault("task_ids", []).append(task_id)
+    with _cache_lock:
+        conv = _conversations_cache.get(conversation_id)
+        if conv is not None and task_id not in conv.get("task_ids", []):
+            conv.setdefault("task_ids", []).append(task_id)
     
     # Persist to database
-    conn = _get_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO conversation_tasks (conversation_id, task_id) VALUES (%s, %s)
-                ON CONFLICT DO NOTHING
-            """, (conversation_id, task_id))
-            conn.commit()
-            cur.close()
-            return True
-        except Exception as e:
-            log_error(f"[ChatHistoryService] Error adding task: {e}")
-            conn.rollback()
+    try:
+        with _connection() as conn:
+            if conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    INSERT INTO conversation_tasks (conversation_id, task_id) VALUES (%s, %s)
+                    ON CONFLICT DO NOTHING
+                """, (conversation_id, task_id))
+                conn.commit()
+                cur.close()
+                return True
+    except Exception as e:
+        log_error(f"[ChatHistoryService] Error adding task: {e}")
     
     return False
 
@@ -609,9 +908,13 @@ def sync_conversation_from_memory(conversation_id: str, messages: List[Any], ses
 
 def clear_cache():
     """Clear in-memory caches. Useful for testing or forced refresh."""
-    global _conversations_cache, _messages_cache
-    _conversations_cache = {}
-    _messages_cache = {}
+    global _conversations_cache, _messages_cache, _message_ids
+    # Queued messages must reach the database before a refresh reloads from it
+    _message_writer.flush()
+    with _cache_lock:
+        _conversations_cache = {}
+        _messages_cache = {}
+        _message_ids = {}
 
 
 # Initialize on module load
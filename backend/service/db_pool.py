@@ -0,0 +1,218 @@
+"""Pooled PostgreSQL access shared by the database-backed services.
+
+Services used to hold one global ``psycopg2`` connection each and run
+``SELECT 1`` before every statement to find out whether it was still alive.
+``PostgresPool`` replaces that with:
+
+- A thread-safe connection pool (``psycopg2.pool.ThreadedConnectionPool``)
+  whose connections use TCP keepalives
+- Health checks done by the pool at checkout, and only for connections that
+  sat idle longer than ``ping_after`` seconds; connections that fail a
+  statement with a connection-level error are discarded instead of reused
+- Per-connection server-side prepared statements for hot queries
+  (``execute_prepared``)
+- A dedicated thread pool so async callers can run blocking statements
+  without stalling the event loop (``run``)
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PooledConnection(extensions.connection):
+    """psycopg2 connection that remembers its prepared statements and idle time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: set = set()
+        self.returned_at = time.monotonic()
+
+
+class _HealthCheckedPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that validates long-idle connections on checkout."""
+
+    def __init__(self, minconn: int, maxconn: int, ping_after: float, *args, **kwargs):
+        self.ping_after = ping_after
+        self.discarded = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        for _ in range(self.maxconn + 1):
+            conn = super().getconn(key)
+            if self._is_healthy(conn):
+                return conn
+            self.discarded += 1
+            super().putconn(conn, key, close=True)
+        raise psycopg2.OperationalError("No healthy PostgreSQL connection available")
+
+    def putconn(self, conn, key=None, close=False):
+        conn.returned_at = time.monotonic()
+        super().putconn(conn, key, close=close)
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.returned_at < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+
+class PostgresPool:
+    """Lazily created connection pool plus executor for one database URL.
+
+    Args:
+        dsn: PostgreSQL connection string
+        name: Label used in log lines and thread names
+        min_size: Connections kept open while idle
+        max_size: Upper bound on concurrent connections (and executor threads)
+        ping_after: Idle seconds after which a connection is pinged on checkout
+        connect_timeout: Seconds to wait when opening a new connection
+        checkout_timeout: Seconds to wait for a free connection when all are in use
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        name: str = "db",
+        min_size: int = 1,
+        max_size: int = 10,
+        ping_after: float = 30.0,
+        connect_timeout: int = 10,
+        checkout_timeout: float = 30.0,
+    ):
+        self.dsn = dsn
+        self.name = name
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.ping_after = ping_after
+        self.connect_timeout = connect_timeout
+        self.checkout_timeout = checkout_timeout
+
+        self._pool: Optional[_HealthCheckedPool] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # ThreadedConnectionPool raises instead of waiting when exhausted
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self.metrics = {"checkouts": 0, "checkout_waits": 0, "connection_errors": 0, "prepared": 0}
+
+    def _get_pool(self) -> _HealthCheckedPool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = _HealthCheckedPool(
+                        self.min_size,
+                        self.max_size,
+                        self.ping_after,
+                        self.dsn,
+                        connection_factory=PooledConnection,
+                        connect_timeout=self.connect_timeout,
+                        keepalives=1,
+                        keepalives_idle=30,
+                        keepalives_interval=10,
+                        keepalives_count=3,
+                    )
+                    logger.info(f"[{self.name}] PostgreSQL pool ready ({self.min_size}-{self.max_size} connections)")
+        return self._pool
+
+    def open(self) -> None:
+        """Create the pool now, raising if the database is unreachable."""
+        self._get_pool()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Borrow a connection; it is rolled back on error and returned to the pool.
+
+        Connections that fail with a connection-level error are closed instead of
+        being handed out again.
+        """
+        db_pool = self._get_pool()
+        if not self._slots.acquire(blocking=False):
+            self.metrics["checkout_waits"] += 1
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                raise pool.PoolError(f"[{self.name}] timed out waiting for a database connection")
+        try:
+            conn = db_pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        self.metrics["checkouts"] += 1
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = isinstance(e, CONNECTION_ERRORS) or bool(conn.closed)
+            if broken:
+                self.metrics["connection_errors"] += 1
+            else:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            raise
+        finally:
+            db_pool.putconn(conn, close=broken or bool(conn.closed))
+            self._slots.release()
+
+    def execute_prepared(self, cur, name: str, sql: str, params: Sequence[Any] = ()) -> None:
+        """Execute ``sql`` (written with ``$1..$n`` placeholders) as a prepared statement.
+
+        The statement is prepared once per connection under ``name``.
+        """
+        conn = cur.connection
+        if name not in conn.prepared:
+            cur.execute(f"PREPARE {name} AS {sql}")
+            conn.prepared.add(name)
+            self.metrics["prepared"] += 1
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", tuple(params))
+        else:
+            cur.execute(f"EXECUTE {name}")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking function on the pool's dedicated executor."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_size, thread_name_prefix=f"{self.name}-db")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        db_pool = self._pool
+        return {
+            **self.metrics,
+            "open": db_pool is not None,
+            "in_use": len(db_pool._used) if db_pool else 0,
+            "idle": len(db_pool._pool) if db_pool else 0,
+            "discarded": db_pool.discarded if db_pool else 0,
+            "max_size": self.max_size,
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections and stop the executor."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
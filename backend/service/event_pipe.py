@@ -0,0 +1,213 @@
+"""Batched event pipe from the backend to the WebSocket server.
+
+Events used to be delivered with one HTTP POST each, which for a streaming
+response means hundreds of requests per second per conversation. The pipe
+instead:
+
+- Buffers events in a bounded, thread-safe queue (``submit`` never blocks and
+  can be called from any event loop or thread)
+- Merges consecutive ``message_chunk`` events of the same contextId while
+  they wait, so text deltas collapse into larger chunks
+- Flushes every ``flush_interval`` seconds as one ``{"events": [...]}``
+  envelope over a single keep-alive connection, from a dedicated thread so
+  it is not tied to whichever event loop produced the events
+
+Events are sent in submission order, so ordering per contextId is preserved.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MERGEABLE_EVENT_TYPES = {"message_chunk"}
+
+
+class EventPipe:
+    """Bounded, coalescing event queue drained by a background sender thread.
+
+    Args:
+        events_endpoint: URL of the WebSocket server's POST /events receiver
+        max_pending: Maximum queued events before ``submit`` refuses new ones
+        max_batch: Maximum events per envelope
+        flush_interval: Seconds to wait for more events before sending
+        timeout: HTTP timeout per envelope
+        max_retries: Attempts per envelope on connection errors
+    """
+
+    def __init__(
+        self,
+        events_endpoint: str,
+        max_pending: int = 5000,
+        max_batch: int = 200,
+        flush_interval: float = 0.02,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+    ):
+        self.events_endpoint = events_endpoint
+        self.max_pending = max(1, max_pending)
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._pending: Deque[Dict[str, Any]] = deque()
+        # contextId -> last queued payload for it, used to merge text chunks
+        self._last_by_context: Dict[str, Dict[str, Any]] = {}
+        self._in_flight = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping = False
+
+        self.metrics = {
+            "submitted": 0,
+            "merged": 0,
+            "rejected": 0,
+            "batches_sent": 0,
+            "events_sent": 0,
+            "events_failed": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the sender thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="event-pipe", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        """Queue an event. Returns False if the queue is full (caller should back off)."""
+        context_id = payload.get("contextId")
+        with self._lock:
+            last = self._last_by_context.get(context_id) if context_id else None
+            if (
+                last is not None
+                and payload.get("eventType") in MERGEABLE_EVENT_TYPES
+                and last.get("eventType") == payload.get("eventType")
+            ):
+                last["chunk"] = (last.get("chunk") or "") + (payload.get("chunk") or "")
+                self.metrics["merged"] += 1
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.metrics["rejected"] += 1
+                return False
+            self._pending.append(payload)
+            if context_id:
+                self._last_by_context[context_id] = payload
+            self.metrics["submitted"] += 1
+        self._signal()
+        return True
+
+    def _signal(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # Sender loop already closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.metrics, "pending": len(self._pending), "in_flight": self._in_flight}
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush what is queued (up to ``timeout``) and stop the sender thread."""
+        if not self._thread:
+            return
+        self._stopping = True
+        self._signal()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Sender thread
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._ready.set()
+        try:
+            loop.run_until_complete(self._drain_forever())
+        except Exception as e:
+            logger.error(f"Event pipe stopped unexpectedly: {e}")
+        finally:
+            self._loop = None
+            loop.close()
+
+    def _take_batch(self) -> list:
+        with self._lock:
+            count = min(self.max_batch, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+            # Merging into an event that is already being sent would lose text
+            for payload in batch:
+                context_id = payload.get("contextId")
+                if context_id and self._last_by_context.get(context_id) is payload:
+                    del self._last_by_context[context_id]
+            self._in_flight = len(batch)
+        return batch
+
+    async def _drain_forever(self) -> None:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            while True:
+                if not self._pending:
+                    if self._stopping:
+                        return
+                    await self._wake.wait()
+                    self._wake.clear()
+                    if not self._stopping:
+                        # Give producers a moment so events coalesce into one envelope
+                        await asyncio.sleep(self.flush_interval)
+                batch = self._take_batch()
+                if batch:
+                    await self._send_batch(client, batch)
+                    self._in_flight = 0
+
+    async def _send_batch(self, client: httpx.AsyncClient, batch: list) -> None:
+        retry_delay = 0.5
+        for attempt in range(self.max_retries):
+            try:
+                started = time.perf_counter()
+                response = await client.post(self.events_endpoint, json={"events": batch})
+                if response.status_code == 200:
+                    self.metrics["batches_sent"] += 1
+                    self.metrics["events_sent"] += len(batch)
+                    logger.debug(
+                        f"Sent {len(batch)} events in one envelope "
+                        f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+                    )
+                    return
+                logger.error(f"Event envelope rejected: HTTP {response.status_code}, {response.text[:500]}")
+                break
+            except (httpx.ReadError, httpx.ConnectError, httpx.WriteError) as e:
+                if attempt < self.max_retries - 1:
+                    logger.warning(f"⚠️ Connection error sending event envelope (attempt {attempt + 1}/{self.max_retries}): {e}")
+                    await asyncio.sleep(retry_delay)
+                    retry_delay *= 2
+                    continue
+                logger.error(f"Failed to send event envelope after {self.max_retries} attempts: {e}")
+            except Exception as e:
+                logger.error(f"Error sending event envelope: {e}")
+                break
+        self.metrics["events_failed"] += len(batch)
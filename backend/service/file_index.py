@@ -0,0 +1,411 @@
+"""Per-session file index behind ``GET /api/files``.
+
+The file panel polls ``/api/files``. Each call used to build a new
+``BlobServiceClient``, enumerate every blob under ``uploads/{session_id}/``
+synchronously and query Azure Search for processed filenames. The index
+instead:
+
+- Loads a session once (blob listing, or the local uploads directory as a
+  fallback) and then keeps it current from upload, delete, agent-file and
+  processing events
+- Bumps a per-session version on every change, which becomes the ETag, so
+  unchanged polls are answered with 304 Not Modified
+- Serves paginated slices of the sorted listing from memory
+- Reconciles recently viewed sessions against storage in the background,
+  which also picks up files written by other replicas or remote agents
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from log_config import log_debug, log_warning
+
+FILE_INDEX_RECONCILE_SECONDS = float(os.getenv("FILE_INDEX_RECONCILE_SECONDS", "300"))
+# Sessions not listed for this long are dropped from the index (and no longer reconciled)
+FILE_INDEX_IDLE_SECONDS = float(os.getenv("FILE_INDEX_IDLE_SECONDS", "3600"))
+FILE_SAS_HOURS = 7 * 24
+# Re-sign listed URLs during reconciliation once they have less than this left
+# (or half their remaining lifetime, for shorter-lived SAS)
+FILE_SAS_REFRESH_SECONDS = 24 * 3600
+
+# Same location backend_production.py saves uploads to
+UPLOADS_DIR = Path(__file__).resolve().parents[1] / ".runtime" / "uploads"
+
+# Changes on every process start, so ETags from a previous process never match
+_BOOT_ID = uuid.uuid4().hex
+
+
+@dataclass
+class IndexedFile:
+    """One file as shown in the file panel."""
+    id: str
+    filename: str
+    size: int
+    content_type: str
+    uploaded_at: Optional[str]
+    uri: str
+    status: str = "uploaded"
+    # time.time() after which ``uri`` should be re-signed (None = unknown
+    # expiry: reconciliation always takes the freshly scanned URL)
+    uri_refresh_at: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.id}/{self.filename}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "originalName": self.filename,
+            "size": self.size,
+            "contentType": self.content_type,
+            "uploadedAt": self.uploaded_at,
+            "uri": self.uri,
+            "status": self.status,
+        }
+
+
+# Returns the session's files (without status), or None if storage can't be read
+SessionScanner = Callable[[str], Awaitable[Optional[List[IndexedFile]]]]
+ProcessedLookup = Callable[[str], Awaitable[Set[str]]]
+
+
+class _SessionFiles:
+    def __init__(self):
+        self.files: Dict[str, IndexedFile] = {}
+        self.processed: Set[str] = set()
+        self.version = 0
+        self.last_access = time.time()
+        self.sorted: Optional[List[IndexedFile]] = None
+
+    def changed(self) -> None:
+        self.version += 1
+        self.sorted = None
+
+    def listing(self) -> List[IndexedFile]:
+        if self.sorted is None:
+            self.sorted = sorted(self.files.values(), key=lambda f: f.uploaded_at or "", reverse=True)
+        return self.sorted
+
+
+class FileIndex:
+    """In-memory, event-maintained file listing per session."""
+
+    def __init__(
+        self,
+        scanner: Optional[SessionScanner] = None,
+        processed_lookup: Optional[ProcessedLookup] = None,
+        reconcile_interval: float = FILE_INDEX_RECONCILE_SECONDS,
+    ):
+        self._scanner = scanner or scan_session_files
+        self._processed_lookup = processed_lookup or lookup_processed_filenames
+        self.reconcile_interval = reconcile_interval
+        self._sessions: Dict[str, _SessionFiles] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Events seen while a scan of the session is in flight, one log per scan;
+        # replayed after the scan is merged so they aren't lost or undone
+        self._scan_logs: Dict[str, List[list]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"scans": 0, "not_modified": 0, "events": 0}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def list_files(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict:
+        """A page of the session's files (most recent first) plus its ETag."""
+        entry = await self._session(session_id)
+        listing = entry.listing()
+        offset = max(0, offset)
+        end = len(listing) if limit is None else offset + max(0, limit)
+        page = listing[offset:end]
+        return {
+            "files": [f.to_dict() for f in page],
+            "total": len(listing),
+            "offset": offset,
+            "next_offset": end if end < len(listing) else None,
+            "etag": self.etag(session_id, offset, limit),
+        }
+
+    def etag(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> Optional[str]:
+        """Current ETag for a listing page, or None if the session isn't loaded."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        raw = f"{_BOOT_ID}:{session_id}:{entry.version}:{offset}:{limit}"
+        return f'"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+    def not_modified(self, session_id: str, if_none_match: Optional[str], offset: int = 0,
+                     limit: Optional[int] = None) -> bool:
+        """Whether the client's ``If-None-Match`` still matches (no listing work needed)."""
+        if not if_none_match:
+            return False
+        etag = self.etag(session_id, offset, limit)
+        if etag is None:
+            return False
+        self._sessions[session_id].last_access = time.time()
+        matched = etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if matched:
+            self.metrics["not_modified"] += 1
+        return matched
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def file_added(self, session_id: str, file: IndexedFile) -> None:
+        """Record a new (or replaced) file; ignored until the session is loaded."""
+        self._apply(session_id, self._add_file, file)
+
+    def file_removed(self, session_id: str, file_id: str, filename: Optional[str] = None) -> None:
+        """Drop a file; ``filename`` also clears its analyzed status (its memory was deleted)."""
+        self._apply(session_id, self._remove_file, file_id, filename)
+
+    def file_processed(self, session_id: str, filename: str) -> None:
+        """Mark every file with this name as analyzed (status comes from the memory index)."""
+        self._apply(session_id, self._mark_processed, filename)
+
+    def _apply(self, session_id: str, change: Callable[..., None], *args) -> None:
+        for log in self._scan_logs.get(session_id, ()):
+            log.append((change, args))
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return
+        self.metrics["events"] += 1
+        change(entry, *args)
+
+    @staticmethod
+    def _add_file(entry: _SessionFiles, file: IndexedFile) -> None:
+        if file.filename in entry.processed:
+            file = replace(file, status="analyzed")
+        entry.files[file.key] = file
+        entry.changed()
+
+    @staticmethod
+    def _remove_file(entry: _SessionFiles, file_id: str, filename: Optional[str]) -> None:
+        if filename:
+            entry.processed.discard(filename)
+        keys = [key for key, f in entry.files.items() if f.id == file_id]
+        if keys:
+            for key in keys:
+                del entry.files[key]
+            entry.changed()
+
+    @staticmethod
+    def _mark_processed(entry: _SessionFiles, filename: str) -> None:
+        entry.processed.add(filename)
+        updated = False
+        for key, f in entry.files.items():
+            if f.filename == filename and f.status != "analyzed":
+                entry.files[key] = replace(f, status="analyzed")
+                updated = True
+        if updated:
+            entry.changed()
+
+    # ------------------------------------------------------------------
+    # Loading and reconciliation
+    # ------------------------------------------------------------------
+
+    async def _session(self, session_id: str) -> _SessionFiles:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            pending = self._loading.get(session_id)
+            if pending is None:
+                # The scan log opens now, so events before the task first runs are kept too
+                pending = asyncio.ensure_future(self._reconcile(session_id, self._open_scan_log(session_id)))
+                self._loading[session_id] = pending
+                pending.add_done_callback(lambda _: self._loading.pop(session_id, None))
+            await asyncio.shield(pending)
+            entry = self._sessions[session_id]
+        entry.last_access = time.time()
+        return entry
+
+    async def reconcile(self, session_id: str) -> None:
+        """Rescan storage for a session and apply the differences.
+
+        Events that arrive while the scan runs (including a session's first
+        load) are replayed on top of the result; they are idempotent and newer
+        than what the scan saw.
+        """
+        await self._reconcile(session_id, self._open_scan_log(session_id))
+
+    def _open_scan_log(self, session_id: str) -> list:
+        log: list = []
+        self._scan_logs.setdefault(session_id, []).append(log)
+        return log
+
+    async def _reconcile(self, session_id: str, log: list) -> None:
+        self.metrics["scans"] += 1
+        try:
+            scanned, processed = await asyncio.gather(self._scanner(session_id), self._processed_lookup(session_id))
+        finally:
+            logs = self._scan_logs[session_id]
+            logs.remove(log)
+            if not logs:
+                del self._scan_logs[session_id]
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = _SessionFiles()
+            entry.changed()
+        if scanned is not None:  # None: storage unreadable, keep what we have
+            self._merge_scan(entry, scanned, processed)
+        for change, args in log:
+            change(entry, *args)
+
+    @staticmethod
+    def _merge_scan(entry: _SessionFiles, scanned: List[IndexedFile], processed: Set[str]) -> None:
+        entry.processed = set(processed) | entry.processed
+        now = time.time()
+        files: Dict[str, IndexedFile] = {}
+        for f in scanned:
+            f = replace(f, status="analyzed" if f.filename in entry.processed else "uploaded")
+            existing = entry.files.get(f.key)
+            # Keep a still-valid signed URL so an unchanged file doesn't change the listing
+            if existing is not None and existing.uri_refresh_at is not None and existing.uri_refresh_at > now:
+                f = replace(f, uri=existing.uri, uri_refresh_at=existing.uri_refresh_at)
+            files[f.key] = f
+        if files != entry.files:
+            entry.files = files
+            entry.changed()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - FILE_INDEX_IDLE_SECONDS
+        for session_id in [s for s, e in self._sessions.items() if e.last_access < cutoff]:
+            del self._sessions[session_id]
+
+    async def reconcile_active(self) -> None:
+        """Reconcile every session viewed within the idle window."""
+        self._prune()
+        for session_id in list(self._sessions):
+            try:
+                await self.reconcile(session_id)
+            except Exception as e:
+                log_warning(f"[FileIndex] Reconcile failed for session {session_id[:8]}: {e}")
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.is_running:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="file-index-reconciler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            await self.reconcile_active()
+
+    def stats(self) -> Dict:
+        return {**self.metrics, "sessions": len(self._sessions),
+                "files": sum(len(e.files) for e in self._sessions.values())}
+
+
+def uri_refresh_time(expiry: Optional[datetime]) -> Optional[float]:
+    """When a URL signed until ``expiry`` should be re-signed (None for unsigned URLs)."""
+    if expiry is None:
+        return None
+    expires_at = expiry.timestamp()
+    remaining = max(0.0, expires_at - time.time())
+    return expires_at - min(FILE_SAS_REFRESH_SECONDS, remaining / 2)
+
+
+def parse_upload_blob_name(blob_name: str) -> Optional[Tuple[str, str, str]]:
+    """(session_id, file_id, filename) for ``uploads/{session_id}/{file_id}/{filename}``."""
+    parts = blob_name.split('/')
+    if len(parts) >= 4 and parts[0] == "uploads":
+        return parts[1], parts[2], parts[3]
+    return None
+
+
+async def scan_session_files(session_id: str) -> Optional[List[IndexedFile]]:
+    """List a session's files from blob storage, falling back to the local uploads dir."""
+    from service.blob_uploads import get_blob_store
+
+    store = get_blob_store()
+    if store.configured:
+        try:
+            service = store.service()
+            container_client = service.get_container_client(store.container_name)
+            files = []
+            async for blob in container_client.list_blobs(name_starts_with=f"uploads/{session_id}/"):
+                # Skip if 0 bytes (empty/failed uploads)
+                if blob.size == 0:
+                    continue
+                parsed = parse_upload_blob_name(blob.name)
+                if parsed is None:
+                    continue
+                _, file_id, filename = parsed
+                blob_client = service.get_blob_client(container=store.container_name, blob=blob.name)
+                uri, expiry = await store.signed_url(blob_client, hours=FILE_SAS_HOURS)
+                files.append(IndexedFile(
+                    id=file_id,
+                    filename=filename,
+                    size=blob.size,
+                    content_type=blob.content_settings.content_type if blob.content_settings else "application/octet-stream",
+                    uploaded_at=blob.last_modified.isoformat() if blob.last_modified else None,
+                    uri=uri,
+                    uri_refresh_at=uri_refresh_time(expiry),
+                ))
+            log_debug(f"[FileIndex] Scanned {len(files)} blobs for session {session_id[:8]}")
+            return files
+        except Exception as e:
+            log_warning(f"Blob storage unavailable, falling back to local filesystem: {e}")
+    return await asyncio.to_thread(_scan_local_files, session_id)
+
+
+def _scan_local_files(session_id: str) -> List[IndexedFile]:
+    files = []
+    local_dir = UPLOADS_DIR / session_id
+    if not local_dir.exists():
+        return files
+    for file_path in local_dir.rglob("*"):
+        if not file_path.is_file():
+            continue
+        rel_path = file_path.relative_to(local_dir)
+        # Direct uploads are saved as {file_id}{ext}; agent files as {file_id}/{filename}
+        file_id = str(rel_path.parent) if rel_path.parent != Path('.') else file_path.stem
+        stat = file_path.stat()
+        files.append(IndexedFile(
+            id=file_id,
+            filename=file_path.name,
+            size=stat.st_size,
+            content_type="application/octet-stream",
+            uploaded_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            uri=f"/uploads/{session_id}/{file_id}",
+        ))
+    return files
+
+
+async def lookup_processed_filenames(session_id: str) -> Set[str]:
+    """Filenames stored in the memory index for a session (processed = "analyzed")."""
+    try:
+        from hosts.multiagent.a2a_memory_service import a2a_memory_service
+        return await asyncio.to_thread(a2a_memory_service.get_processed_filenames, session_id)
+    except Exception as e:
+        log_warning(f"[FileIndex] Could not read processed filenames: {e}")
+        return set()
+
+
+_file_index: Optional[FileIndex] = None
+
+
+def get_file_index() -> FileIndex:
+    """Get the global file index instance."""
+    global _file_index
+    if _file_index is None:
+        _file_index = FileIndex()
+    return _file_index
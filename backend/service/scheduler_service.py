@@ -3,14 +3,23 @@ Workflow Scheduler Service
 
 Provides scheduling capabilities for automated workflow execution.
 Supports one-time, interval, cron-style, and recurring schedules.
+
+APScheduler only decides *when* a schedule is due; due runs are handed to a
+``ScheduleRunQueue`` that caps concurrent runs globally and per session.
+Recurring triggers are jittered so schedules set for the top of the hour
+don't all start in the same second. With PostgreSQL, a session-level
+advisory lock (``SchedulerLeaderLock``) elects the one replica that fires
+schedules; every replica keeps its schedule list in sync with the database.
 """
 import asyncio
 import json
 import os
+import time
 import uuid
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Deque, Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 from pathlib import Path
@@ -31,6 +40,17 @@ except ImportError:
     APSCHEDULER_AVAILABLE = False
     logger.warning("APScheduler not installed. Run: pip install apscheduler")
 
+# Scheduled runs executing at once, across all sessions and within one session
+SCHEDULER_MAX_CONCURRENT_RUNS = int(os.environ.get("SCHEDULER_MAX_CONCURRENT_RUNS", "4"))
+SCHEDULER_MAX_RUNS_PER_SESSION = int(os.environ.get("SCHEDULER_MAX_RUNS_PER_SESSION", "2"))
+SCHEDULER_MAX_QUEUED_RUNS = int(os.environ.get("SCHEDULER_MAX_QUEUED_RUNS", "100"))
+# Recurring schedules start up to this many seconds after their nominal time
+SCHEDULER_START_JITTER_SECONDS = int(os.environ.get("SCHEDULER_START_JITTER_SECONDS", "30"))
+# Advisory lock held by the replica that fires schedules (shared by all replicas)
+SCHEDULER_LEADER_LOCK_ID = int(os.environ.get("SCHEDULER_LEADER_LOCK_ID", "727001"))
+# How often replicas retry leadership and re-read schedules from the database
+SCHEDULER_SYNC_SECONDS = float(os.environ.get("SCHEDULER_SYNC_SECONDS", "15"))
+
 
 class ScheduleType(str, Enum):
     """Types of schedules supported."""
@@ -105,6 +125,197 @@ class ScheduledWorkflow:
         return cls(**data)
 
 
+@dataclass
+class QueuedRun:
+    """A due schedule run waiting for a worker slot."""
+    schedule_id: str
+    session_id: str
+    due_at: float       # Nominal fire time (epoch seconds)
+    enqueued_at: float  # Epoch seconds
+
+
+class ScheduleRunQueue:
+    """Bounded queue of due schedule runs with global and per-session caps.
+
+    Runs start as soon as a global slot is free and their session is below
+    its cap; later runs of a busy session wait without blocking other
+    sessions. A schedule that is already queued or running is not queued
+    again, so a slow workflow can't pile up behind itself.
+
+    Args:
+        runner: Coroutine function executing one run, given the schedule ID
+        max_concurrent: Runs executing at once across all sessions
+        max_per_session: Runs executing at once for one session
+        max_queued: Waiting runs before new ones are rejected
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str], Awaitable[Any]],
+        max_concurrent: int = SCHEDULER_MAX_CONCURRENT_RUNS,
+        max_per_session: int = SCHEDULER_MAX_RUNS_PER_SESSION,
+        max_queued: int = SCHEDULER_MAX_QUEUED_RUNS,
+    ):
+        self._runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_session = max(1, max_per_session)
+        self.max_queued = max(1, max_queued)
+        self._queue: Deque[QueuedRun] = deque()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._session_running: Dict[str, int] = {}
+        self._lag_total = 0.0
+        self._last_lag: Optional[float] = None
+        self._max_lag = 0.0
+        self.metrics = {"enqueued": 0, "started": 0, "completed": 0, "failed": 0, "rejected": 0, "deduplicated": 0}
+
+    def __contains__(self, schedule_id: str) -> bool:
+        return schedule_id in self._running or any(run.schedule_id == schedule_id for run in self._queue)
+
+    def submit(self, schedule_id: str, session_id: str, due_at: Optional[float] = None) -> bool:
+        """Queue a due run. Returns False if it was deduplicated or the queue is full."""
+        if schedule_id in self:
+            self.metrics["deduplicated"] += 1
+            logger.info(f"[Scheduler] Schedule {schedule_id} is still queued or running, skipping this run")
+            return False
+        if len(self._queue) >= self.max_queued:
+            self.metrics["rejected"] += 1
+            logger.warning(f"[Scheduler] Run queue full ({self.max_queued}), dropping run of {schedule_id}")
+            return False
+        now = time.time()
+        self._queue.append(QueuedRun(schedule_id, session_id, due_at or now, now))
+        self.metrics["enqueued"] += 1
+        self._dispatch()
+        return True
+
+    def _dispatch(self) -> None:
+        """Start queued runs, oldest first, while slots are free."""
+        for run in list(self._queue):
+            if len(self._running) >= self.max_concurrent:
+                return
+            if self._session_running.get(run.session_id, 0) >= self.max_per_session:
+                continue
+            self._queue.remove(run)
+            lag = max(0.0, time.time() - run.due_at)
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            self._lag_total += lag
+            self.metrics["started"] += 1
+            self._session_running[run.session_id] = self._session_running.get(run.session_id, 0) + 1
+            self._running[run.schedule_id] = asyncio.create_task(self._run(run))
+
+    async def _run(self, run: QueuedRun) -> None:
+        try:
+            await self._runner(run.schedule_id)
+            self.metrics["completed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logger.error(f"[Scheduler] Run of {run.schedule_id} failed: {e}")
+        finally:
+            self._running.pop(run.schedule_id, None)
+            remaining = self._session_running.get(run.session_id, 1) - 1
+            if remaining > 0:
+                self._session_running[run.session_id] = remaining
+            else:
+                self._session_running.pop(run.session_id, None)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        started = self.metrics["started"]
+        return {
+            **self.metrics,
+            "queue_depth": len(self._queue),
+            "running": len(self._running),
+            "max_concurrent": self.max_concurrent,
+            "max_per_session": self.max_per_session,
+            "oldest_queued_seconds": round(now - self._queue[0].enqueued_at, 3) if self._queue else 0.0,
+            "last_start_lag_seconds": round(self._last_lag, 3) if self._last_lag is not None else None,
+            "avg_start_lag_seconds": round(self._lag_total / started, 3) if started else None,
+            "max_start_lag_seconds": round(self._max_lag, 3),
+        }
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drop queued runs, give running ones ``timeout`` seconds, then cancel them."""
+        self._queue.clear()
+        tasks = list(self._running.values())
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class SchedulerLeaderLock:
+    """PostgreSQL session-level advisory lock electing the replica that fires schedules.
+
+    The lock lives as long as its dedicated autocommit connection, so a
+    replica that crashes or loses the connection gives up leadership
+    automatically. ``check`` is blocking; call it from a worker thread. The
+    same connection serves the periodic schedule re-reads, keeping them off
+    the scheduler's transactional connection.
+    """
+
+    def __init__(self, database_url: str, lock_id: int = SCHEDULER_LEADER_LOCK_ID):
+        self.database_url = database_url
+        self.lock_id = lock_id
+        self.is_leader = False
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(
+                self.database_url,
+                connect_timeout=10,
+                keepalives=1,
+                keepalives_idle=30,
+                keepalives_interval=10,
+                keepalives_count=3,
+            )
+            self._conn.autocommit = True
+        return self._conn
+
+    def check(self) -> bool:
+        """Confirm the lock is still held, or try to take it. Returns ``is_leader``."""
+        try:
+            with self._connection().cursor() as cur:
+                if self.is_leader:
+                    cur.execute("SELECT 1")
+                else:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_id,))
+                    self.is_leader = bool(cur.fetchone()[0])
+        except Exception as e:
+            if self.is_leader:
+                logger.warning(f"[Scheduler] Lost leader lock connection: {e}")
+            self.is_leader = False
+            self.close()
+        return self.is_leader
+
+    def fetch_schedules(self) -> Optional[List[Dict[str, Any]]]:
+        """All schedule rows, or None if the database can't be reached."""
+        try:
+            with self._connection().cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("SELECT * FROM scheduled_workflows ORDER BY created_at DESC")
+                return [dict(row) for row in cur.fetchall()]
+        except Exception as e:
+            logger.warning(f"[Scheduler] Could not re-read schedules: {e}")
+            self.is_leader = False
+            self.close()
+            return None
+
+    def close(self) -> None:
+        """Close the connection, releasing the lock if held."""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+        self.is_leader = False
+
+
 class WorkflowScheduler:
     """
     Manages scheduled workflow executions.
@@ -121,7 +332,9 @@ class WorkflowScheduler:
         self.scheduler: Optional[Any] = None
         self._workflow_executor: Optional[Callable] = None
         self._is_running = False
-        self._main_event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.run_queue = ScheduleRunQueue(self._execute_scheduled_workflow)
+        self._leader_lock: Optional[SchedulerLeaderLock] = None
+        self._sync_task: Optional[asyncio.Task] = None
         
         # Try to connect to database
         self.database_url = os.environ.get('DATABASE_URL')
@@ -133,6 +346,7 @@ class WorkflowScheduler:
                 self.db_conn = psycopg2.connect(self.database_url)
                 self.db_conn.autocommit = False
                 self.use_database = True
+                self._leader_lock = SchedulerLeaderLock(self.database_url)
                 logger.info("[WorkflowScheduler] Using PostgreSQL database")
             except Exception as e:
                 logger.warning(f"[WorkflowScheduler] Database connection failed: {e}")
@@ -191,13 +405,7 @@ class WorkflowScheduler:
             """)
             
             for row in cur.fetchall():
-                schedule_data = dict(row)
-                # Convert datetime objects to ISO strings
-                for key in ['created_at', 'updated_at', 'last_run', 'next_run', 'run_at']:
-                    if schedule_data.get(key):
-                        schedule_data[key] = schedule_data[key].isoformat()
-                
-                schedule = ScheduledWorkflow.from_dict(schedule_data)
+                schedule = self._schedule_from_row(row)
                 self.schedules[schedule.id] = schedule
             
             cur.close()
@@ -205,6 +413,16 @@ class WorkflowScheduler:
         except Exception as e:
             logger.error(f"[WorkflowScheduler] Error loading from database: {e}")
     
+    @staticmethod
+    def _schedule_from_row(row) -> ScheduledWorkflow:
+        """Build a schedule from a ``scheduled_workflows`` row."""
+        schedule_data = dict(row)
+        # Convert datetime objects to ISO strings
+        for key in ['created_at', 'updated_at', 'last_run', 'next_run', 'run_at']:
+            if schedule_data.get(key) and not isinstance(schedule_data[key], str):
+                schedule_data[key] = schedule_data[key].isoformat()
+        return ScheduledWorkflow.from_dict(schedule_data)
+
     def _load_schedules_from_file(self):
         """Load schedules from JSON file."""
         if self.schedules_file.exists():
@@ -460,9 +678,7 @@ class WorkflowScheduler:
             return True
         
         try:
-            # Get the current event loop and store reference for thread-safe calls
             loop = asyncio.get_event_loop()
-            self._main_event_loop = loop
             logger.debug(f"[Scheduler] Starting scheduler with event loop: {loop}")
             
             self.scheduler = AsyncIOScheduler(
@@ -481,6 +697,10 @@ class WorkflowScheduler:
             for schedule in self.schedules.values():
                 if schedule.enabled:
                     self._add_job_to_scheduler(schedule)
+
+            if self._leader_lock is not None:
+                await self._check_leadership()
+                self._sync_task = asyncio.create_task(self._sync_loop())
             
             logger.info(f"Workflow scheduler started with {len(self.schedules)} total schedules")
             return True
@@ -491,10 +711,73 @@ class WorkflowScheduler:
     
     async def stop(self):
         """Stop the scheduler."""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
         if self.scheduler and self._is_running:
             self.scheduler.shutdown(wait=False)
             self._is_running = False
             logger.info("Workflow scheduler stopped")
+        await self.run_queue.stop()
+        if self._leader_lock is not None:
+            await asyncio.to_thread(self._leader_lock.close)
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this replica fires schedules (always true without PostgreSQL)."""
+        return self._leader_lock is None or self._leader_lock.is_leader
+
+    async def _check_leadership(self) -> bool:
+        was_leader = self._leader_lock.is_leader
+        is_leader = await asyncio.to_thread(self._leader_lock.check)
+        if is_leader != was_leader:
+            logger.info(f"[Scheduler] This replica {'is now' if is_leader else 'is no longer'} the schedule leader")
+        return is_leader
+
+    async def _sync_loop(self):
+        """Keep leadership and the schedule list current (PostgreSQL only)."""
+        while True:
+            await asyncio.sleep(SCHEDULER_SYNC_SECONDS)
+            try:
+                await self._check_leadership()
+                rows = await asyncio.to_thread(self._leader_lock.fetch_schedules)
+                if rows is not None:
+                    self._apply_schedule_rows(rows)
+            except Exception as e:
+                logger.error(f"[Scheduler] Schedule sync failed: {e}")
+
+    def _apply_schedule_rows(self, rows: List[Dict[str, Any]]):
+        """Adopt schedules created, changed or deleted by other replicas."""
+        fresh = {}
+        for row in rows:
+            try:
+                schedule = self._schedule_from_row(row)
+            except Exception as e:
+                logger.warning(f"[Scheduler] Skipping unreadable schedule row: {e}")
+                continue
+            fresh[schedule.id] = schedule
+
+        for schedule_id in list(self.schedules):
+            if schedule_id not in fresh and schedule_id not in self.run_queue:
+                del self.schedules[schedule_id]
+                self._remove_job(schedule_id)
+
+        for schedule_id, schedule in fresh.items():
+            current = self.schedules.get(schedule_id)
+            if schedule_id in self.run_queue:
+                continue  # This replica's copy is authoritative while it runs
+            self.schedules[schedule_id] = schedule
+            if current is not None and current.updated_at == schedule.updated_at and current.enabled == schedule.enabled:
+                continue
+            if schedule.enabled:
+                self._add_job_to_scheduler(schedule)
+            else:
+                self._remove_job(schedule_id)
+
+    def _remove_job(self, schedule_id: str):
+        if self.scheduler and self._is_running and self.scheduler.get_job(schedule_id):
+            self.scheduler.remove_job(schedule_id)
     
     def _add_job_to_scheduler(self, schedule: ScheduledWorkflow):
         """Add a job to the APScheduler."""
@@ -510,12 +793,14 @@ class WorkflowScheduler:
             if trigger:
                 logger.debug(f"[Scheduler] Trigger created: {trigger}, adding job to scheduler...")
                 self.scheduler.add_job(
-                    self._execute_scheduled_workflow_sync,
+                    self._enqueue_scheduled_workflow,
                     trigger=trigger,
                     id=schedule.id,
                     args=[schedule.id],
                     replace_existing=True,
-                    misfire_grace_time=60
+                    misfire_grace_time=60,
+                    coalesce=True,
+                    max_instances=1
                 )
 
                 # Update next run time
@@ -536,7 +821,11 @@ class WorkflowScheduler:
             logger.error(f"[Scheduler] Error adding job to scheduler: {e}")
     
     def _create_trigger(self, schedule: ScheduledWorkflow):
-        """Create an APScheduler trigger based on schedule type."""
+        """Create an APScheduler trigger based on schedule type.
+
+        Recurring triggers are jittered by up to SCHEDULER_START_JITTER_SECONDS.
+        """
+        jitter = SCHEDULER_START_JITTER_SECONDS or None
         try:
             if schedule.schedule_type == ScheduleType.ONCE:
                 if schedule.run_at:
@@ -545,12 +834,12 @@ class WorkflowScheduler:
                     
             elif schedule.schedule_type == ScheduleType.INTERVAL:
                 if schedule.interval_minutes:
-                    return IntervalTrigger(minutes=schedule.interval_minutes)
+                    return IntervalTrigger(minutes=schedule.interval_minutes, jitter=jitter)
                     
             elif schedule.schedule_type == ScheduleType.DAILY:
                 if schedule.time_of_day:
                     hour, minute = map(int, schedule.time_of_day.split(':'))
-                    return CronTrigger(hour=hour, minute=minute)
+                    return CronTrigger(hour=hour, minute=minute, jitter=jitter)
                     
             elif schedule.schedule_type == ScheduleType.WEEKLY:
                 if schedule.time_of_day and schedule.days_of_week:
@@ -558,12 +847,12 @@ class WorkflowScheduler:
                     # Convert to cron day_of_week format (0=Mon in our UI, but cron uses 0=Sun)
                     # APScheduler uses 0=Mon like us, so we're good
                     days = ','.join(str(d) for d in schedule.days_of_week)
-                    return CronTrigger(hour=hour, minute=minute, day_of_week=days)
+                    return CronTrigger(hour=hour, minute=minute, day_of_week=days, jitter=jitter)
                     
             elif schedule.schedule_type == ScheduleType.MONTHLY:
                 if schedule.time_of_day and schedule.day_of_month:
                     hour, minute = map(int, schedule.time_of_day.split(':'))
-                    return CronTrigger(hour=hour, minute=minute, day=schedule.day_of_month)
+                    return CronTrigger(hour=hour, minute=minute, day=schedule.day_of_month, jitter=jitter)
                     
             elif schedule.schedule_type == ScheduleType.CRON:
                 if schedule.cron_expression:
@@ -575,7 +864,8 @@ class WorkflowScheduler:
                             hour=parts[1],
                             day=parts[2],
                             month=parts[3],
-                            day_of_week=parts[4]
+                            day_of_week=parts[4],
+                            jitter=jitter
                         )
                         
         except Exception as e:
@@ -583,33 +873,33 @@ class WorkflowScheduler:
         
         return None
     
-    def _execute_scheduled_workflow_sync(self, schedule_id: str):
-        """Synchronous wrapper to execute a scheduled workflow."""
+    async def _enqueue_scheduled_workflow(self, schedule_id: str):
+        """APScheduler job: hand a due run to the run queue (on the leader replica only)."""
+        schedule = self.schedules.get(schedule_id)
+        if not schedule:
+            logger.warning(f"Schedule {schedule_id} not found")
+            return
+
+        # Re-confirm the lock right before firing so a replica that just lost
+        # its database connection can't fire alongside the new leader
+        if self._leader_lock is not None and not await self._check_leadership():
+            logger.debug(f"[Scheduler] Not the leader replica, leaving {schedule_id} to the leader")
+            return
+
+        due_at = time.time()
+        if schedule.next_run:
+            try:
+                next_run = datetime.fromisoformat(schedule.next_run.replace('Z', '+00:00'))
+                if next_run.tzinfo is None:
+                    next_run = next_run.replace(tzinfo=timezone.utc)
+                due_at = min(due_at, next_run.timestamp())
+            except ValueError:
+                pass
         logger.info(f"Scheduler triggered for workflow ID: {schedule_id}")
+        self.run_queue.submit(schedule_id, schedule.session_id, due_at=due_at)
 
-        # Run the async execution in the main event loop (thread-safe)
-        try:
-            if self._main_event_loop and self._main_event_loop.is_running():
-                # Use run_coroutine_threadsafe to schedule on the main event loop
-                logger.debug("[Scheduler] Scheduling workflow execution on main event loop...")
-                future = asyncio.run_coroutine_threadsafe(
-                    self._execute_scheduled_workflow(schedule_id),
-                    self._main_event_loop
-                )
-                logger.debug("[Scheduler] Workflow execution scheduled on main event loop")
-                # Don't wait for result - let it run asynchronously
-            else:
-                # Fallback: create a new event loop
-                logger.debug("[Scheduler] No main event loop, using asyncio.run()...")
-                asyncio.run(self._execute_scheduled_workflow(schedule_id))
-                logger.debug("[Scheduler] Workflow execution complete")
-        except Exception as e:
-            logger.error(f"Error in scheduler wrapper: {e}")
-    
     async def _execute_scheduled_workflow(self, schedule_id: str):
         """Execute a scheduled workflow."""
-        import time
-        
         logger.debug(f"[Scheduler] _execute_scheduled_workflow started for {schedule_id}")
 
         schedule = self.schedules.get(schedule_id)
@@ -844,6 +1134,10 @@ class WorkflowScheduler:
         # Sort by next run time
         upcoming.sort(key=lambda x: x['next_run'])
         return upcoming[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        """Run-queue depth, start lag and leadership for this replica."""
+        return {**self.run_queue.stats(), "leader": self.is_leader, "scheduler_running": self._is_running}
     
     def get_run_history(self, schedule_id: Optional[str] = None, session_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """Get run history for schedules with full results, optionally filtered by session."""
@@ -263,7 +263,7 @@ class ADKHostManager(ApplicationManager):
 
                             success = await streamer._send_event("conversation_created", event_data, context_id)
                             if success:
-                                log_debug(f"Conversation creation streamed: {event_data}")
+                                log_debug("Conversation creation streamed: %s", event_data)
                             else:
                                 log_debug("Failed to stream conversation creation")
                         else:
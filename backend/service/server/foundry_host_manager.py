@@ -22,7 +22,9 @@ from utils.agent_card import get_agent_card
 from utils.file_parts import extract_uri, convert_artifact_dict_to_file_part, create_file_part
 import re
 from service.agent_registry import get_session_registry, get_registry
+from service.agent_health import get_health_monitor
 from service import chat_history_service
+from service.task_supervisor import spawn
 
 # Tenant separator used in contextId format: sessionId::conversationId
 TENANT_SEPARATOR = '::'
@@ -134,6 +136,11 @@ class FoundryHostManager(ApplicationManager):
             log_debug(f"Failed to initialize Foundry agent: {e}")
             self._host_agent_initialized = False
 
+    async def shutdown_async(self):
+        """Release host agent resources (pooled OpenAI clients) on backend shutdown."""
+        if self._host_agent:
+            await self._host_agent.close_openai_clients()
+
     def get_host_model(self) -> str:
         """Return the current host agent model deployment name."""
         if self._host_agent:
@@ -472,30 +479,17 @@ class FoundryHostManager(ApplicationManager):
                     await self._emit_final_response(context_id, error_msg)
                     return
 
-                # Concurrent health checks with two rounds:
-                #  Round 1: fast 5s timeout — catches all warm agents quickly
-                #  Round 2: polling loop for failures — handles cold starts
-                #    (minReplicas=0 agents can take 30-90s to cold start)
-                #    Polls every 10s up to 90s total, exits early once all respond.
-                FAST_TIMEOUT = 5.0
-                POLL_INTERVAL = 10.0
+                # Health comes from the shared monitor:
+                #  Round 1: cached results (fresh within the TTL) are instant;
+                #    unknown or stale agents get one shared probe
+                #  Round 2: agents still offline are cold-starting
+                #    (minReplicas=0 agents can take 30-90s to cold start);
+                #    poll until they respond or POLL_MAX_SECONDS pass.
                 POLL_MAX_SECONDS = 90.0
+                health_monitor = get_health_monitor()
 
-                async def check_agent_health(name: str, config: dict, timeout: float) -> tuple:
-                    """Returns (agent_name, config, is_healthy)"""
-                    agent_url = config.get('production_url') or config.get('local_url') or config.get('url', '')
-                    if not agent_url:
-                        return (name, config, True)
-                    health_url = f"{agent_url.rstrip('/')}/health"
-                    try:
-                        async with httpx.AsyncClient(timeout=timeout) as client:
-                            resp = await client.get(health_url)
-                            if resp.status_code == 200:
-                                return (name, config, True)
-                            log_debug(f"[Workflow Pre-flight] {name}: HTTP {resp.status_code}")
-                    except Exception as e:
-                        log_debug(f"[Workflow Pre-flight] {name}: {type(e).__name__}: {e}")
-                    return (name, config, False)
+                def agent_url_for(config: dict) -> str:
+                    return config.get('production_url') or config.get('local_url') or config.get('url', '')
 
                 # Emit status so UI shows the orchestrator is working
                 await self._host_agent._emit_granular_agent_event(
@@ -505,22 +499,18 @@ class FoundryHostManager(ApplicationManager):
                     event_type="phase", metadata={"phase": "preflight_check"}
                 )
 
-                # Round 1: fast check (5s) — most warm agents respond in <1s
-                results = await asyncio.gather(
-                    *(check_agent_health(name, config, FAST_TIMEOUT) for name, config in agent_configs.items())
+                health = await health_monitor.check_many(
+                    agent_url_for(config) for config in agent_configs.values() if agent_url_for(config)
                 )
-
-                failed_agents = {}  # name -> config for agents that failed round 1
-                for name, config, is_healthy in results:
-                    if is_healthy:
+                failed_agents = {}  # name -> config for agents that are not online yet
+                for name, config in agent_configs.items():
+                    url = agent_url_for(config)
+                    if not url or health.get(url):
                         session_registry.enable_agent(session_id, config)
                         log_info(f"[Workflow Pre-flight] Auto-enabled '{name}' for session {session_id[:8]}...")
                     else:
                         failed_agents[name] = config
 
-                # Round 2: polling loop for cold-starting agents
-                # Round 1 already woke the containers. Now poll every 10s until
-                # they respond or we hit 90s.
                 if failed_agents:
                     log_info(f"[Workflow Pre-flight] Waiting for {len(failed_agents)} agents to cold-start...")
                     await self._host_agent._emit_granular_agent_event(
@@ -529,26 +519,17 @@ class FoundryHostManager(ApplicationManager):
                         context_id,
                         event_type="phase", metadata={"phase": "preflight_check"}
                     )
-                    elapsed = 0.0
-                    still_pending = dict(failed_agents)
-                    while still_pending and elapsed < POLL_MAX_SECONDS:
-                        await asyncio.sleep(POLL_INTERVAL)
-                        elapsed += POLL_INTERVAL
-                        poll_results = await asyncio.gather(
-                            *(check_agent_health(name, config, FAST_TIMEOUT) for name, config in still_pending.items())
-                        )
-                        newly_online = []
-                        for name, config, is_healthy in poll_results:
-                            if is_healthy:
-                                session_registry.enable_agent(session_id, config)
-                                log_info(f"[Workflow Pre-flight] Auto-enabled '{name}' after {elapsed:.0f}s for session {session_id[:8]}...")
-                                newly_online.append(name)
-                        for name in newly_online:
-                            del still_pending[name]
-                        if still_pending:
-                            log_debug(f"[Workflow Pre-flight] Still waiting ({elapsed:.0f}s/{POLL_MAX_SECONDS:.0f}s): {', '.join(still_pending.keys())}")
-
-                    offline_agents = list(still_pending.keys())
+                    wait_started = time.monotonic()
+                    still_offline = await health_monitor.wait_until_online(
+                        [agent_url_for(config) for config in failed_agents.values()], timeout=POLL_MAX_SECONDS
+                    )
+                    offline_agents = []
+                    for name, config in failed_agents.items():
+                        if agent_url_for(config) in still_offline:
+                            offline_agents.append(name)
+                        else:
+                            session_registry.enable_agent(session_id, config)
+                            log_info(f"[Workflow Pre-flight] Auto-enabled '{name}' after {time.monotonic() - wait_started:.0f}s for session {session_id[:8]}...")
                 else:
                     offline_agents = []
 
@@ -644,7 +625,7 @@ class FoundryHostManager(ApplicationManager):
                     
                     success = await streamer._send_event("conversation_created", event_data, context_id)
                     if success:
-                        log_debug(f"Conversation creation streamed: {event_data}")
+                        log_debug("Conversation creation streamed: %s", event_data)
                     else:
                         log_debug("Failed to stream conversation creation")
                 else:
@@ -696,7 +677,7 @@ class FoundryHostManager(ApplicationManager):
                 
                 success = await streamer._send_event("task_created", event_data, context_id)
                 if success:
-                    log_debug(f"Task creation streamed to WebSocket: {event_data}")
+                    log_debug("Task creation streamed to WebSocket: %s", event_data)
                 else:
                     log_debug("Failed to stream task creation to WebSocket")
             else:
@@ -767,7 +748,7 @@ class FoundryHostManager(ApplicationManager):
                                 
                                 success = await streamer._send_event("tool_call", event_data, context_id)
                                 if success:
-                                    log_debug(f"Tool call event streamed: {event_data}")
+                                    log_debug("Tool call event streamed: %s", event_data)
                                 else:
                                     log_debug("Failed to stream tool call event")
                             else:
@@ -778,7 +759,7 @@ class FoundryHostManager(ApplicationManager):
                             pass
                     
                     # Use background task for event_logger callback (can't make this function async)
-                    asyncio.create_task(stream_tool_call())
+                    spawn("telemetry", stream_tool_call())
                     
                 except ImportError:
                     # WebSocket module not available, continue without streaming
@@ -826,7 +807,7 @@ class FoundryHostManager(ApplicationManager):
                                 
                                 success = await streamer._send_event("tool_response", event_data, context_id)
                                 if success:
-                                    log_debug(f"Tool response event streamed: {event_data}")
+                                    log_debug("Tool response event streamed: %s", event_data)
                                 else:
                                     log_debug("Failed to stream tool response event")
                             else:
@@ -837,7 +818,7 @@ class FoundryHostManager(ApplicationManager):
                             pass
                     
                     # Use background task for event_logger callback (can't make this function async)
-                    asyncio.create_task(stream_tool_response())
+                    spawn("telemetry", stream_tool_response())
                     
                 except ImportError:
                     # WebSocket module not available, continue without streaming
@@ -931,7 +912,7 @@ class FoundryHostManager(ApplicationManager):
 
                 success = await streamer._send_event("task_updated", event_data, context_id)
                 if success:
-                    log_debug(f"Task status update streamed: {event_data}")
+                    log_debug("Task status update streamed: %s", event_data)
                 else:
                     log_debug("Failed to stream task status update")
             except Exception as e:
@@ -1173,7 +1154,7 @@ class FoundryHostManager(ApplicationManager):
                             # File availability is already communicated via file_uploaded event
                             # No need to send additional remote_agent_activity events
                     if success:
-                        log_debug(f"Message streamed to WebSocket: {event_data}")
+                        log_debug("Message streamed to WebSocket: %s", event_data)
                     else:
                         log_debug("Failed to stream message to WebSocket")
                 else:
@@ -1217,7 +1198,7 @@ class FoundryHostManager(ApplicationManager):
             if is_last_response:
                 log_debug(f"Streaming task status update to WebSocket: {state}")
                 try:
-                    asyncio.create_task(stream_task_status_update(status_agent_name, state))
+                    spawn("telemetry", stream_task_status_update(status_agent_name, state))
                     completed_agents.add(status_agent_name)
                 except Exception as e:
                     log_debug(f"Error scheduling task status update: {e}")
@@ -17,6 +17,7 @@ from fastapi import APIRouter, FastAPI, Request, Response
 from service.websocket_streamer import get_websocket_streamer
 from service.websocket_server import get_websocket_server
 from service.agent_registry import get_registry, get_session_registry
+from service.agent_health import get_health_monitor
 from service import chat_history_service
 
 # Add backend directory to path for log_config import
@@ -25,6 +26,14 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from log_config import log_debug, log_info, log_warning, log_error
+from utils.bounded_state import BoundedStore, CONTEXT_STATE_TTL_SECONDS, bounded_store_stats
+
+# Files received with embedded bytes, served from memory at /message/file/{id}
+FILE_CACHE_MAX_BYTES = int(os.getenv("FILE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+FILE_CACHE_MAX_ENTRIES = int(os.getenv("FILE_CACHE_MAX_ENTRIES", "10000"))
+# Optional: keep files evicted from memory on disk instead of dropping them
+FILE_CACHE_SPILL_DIR = os.getenv("FILE_CACHE_SPILL_DIR", "")
+FILE_CACHE_SPILL_MAX_BYTES = int(os.getenv("FILE_CACHE_SPILL_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
 
 from service.types import (
     Conversation,
@@ -148,6 +157,21 @@ asyncio.set_event_loop(main_loop)
 main_loop_thread = threading.Thread(target=main_loop.run_forever, daemon=True)
 main_loop_thread.start()
 
+def file_cache_store() -> BoundedStore:
+    """Cache of received FileParts, sized by their embedded bytes, optionally spilling to disk."""
+    return BoundedStore(
+        "server.file_cache",
+        max_entries=FILE_CACHE_MAX_ENTRIES,
+        ttl_seconds=CONTEXT_STATE_TTL_SECONDS,
+        max_bytes=FILE_CACHE_MAX_BYTES,
+        sizeof=lambda part: len(getattr(part.file, 'bytes', None) or ""),
+        spill_dir=Path(FILE_CACHE_SPILL_DIR) if FILE_CACHE_SPILL_DIR else None,
+        dump=lambda part: part.model_dump_json().encode("utf-8"),
+        load=FilePart.model_validate_json,
+        max_spill_bytes=FILE_CACHE_SPILL_MAX_BYTES,
+    )
+
+
 class ConversationServer:
     """ConversationServer is the backend to serve the agent interactions in the UI
 
@@ -180,9 +204,12 @@ class ConversationServer:
             self.manager = FoundryHostManager(http_client)
         else:
             self.manager = InMemoryFakeAgentManager()
-        self._file_cache = {}  # dict[str, FilePart] maps file id to message data
-        self._message_to_cache = {}  # dict[str, str] maps message id to cache id
-        self._health_cache: Dict[str, tuple] = {}  # agent_url -> (status, timestamp)
+        self._file_cache: Dict[str, FilePart] = file_cache_store()  # maps file id to message data
+        self._message_to_cache: Dict[str, str] = BoundedStore(  # maps message part id to cache id
+            "server.message_to_cache",
+            max_entries=FILE_CACHE_MAX_ENTRIES,
+            ttl_seconds=CONTEXT_STATE_TTL_SECONDS,
+        )
 
         app.add_api_route(
             '/conversation/create', self._create_conversation, methods=['POST']
@@ -228,6 +255,7 @@ class ConversationServer:
         app.add_api_route(
             '/api_key/update', self._update_api_key, methods=['POST']
         )
+        app.add_api_route('/state/stats', self._state_stats, methods=['GET'])
         
         # Add root instruction management endpoints
         app.add_api_route(
@@ -452,9 +480,11 @@ class ConversationServer:
         # Fall back to database for persisted conversations
         # Try exact match first, then suffix match (frontend sends short UUID,
         # but DB stores as session_id::uuid)
-        db_messages = chat_history_service.get_messages(conversation_id)
+        db_messages = await chat_history_service.get_messages_async(conversation_id)
         if not db_messages:
-            db_messages = chat_history_service.get_messages_by_short_id(conversation_id)
+            db_messages = await chat_history_service.run_in_db_executor(
+                chat_history_service.get_messages_by_short_id, conversation_id
+            )
 
         if db_messages:
             log_info(f"[_list_messages] Found {len(db_messages)} messages from DB")
@@ -589,7 +619,7 @@ class ConversationServer:
             session_id = message_data.get('params', {}).get('sessionId') if isinstance(message_data.get('params'), dict) else None
 
             if session_id:
-                db_conversations = chat_history_service.list_conversations(session_id)
+                db_conversations = await chat_history_service.list_conversations_async(session_id)
                 log_debug(f"[_list_conversation] Loaded {len(db_conversations)} conversations from database for session {session_id}")
 
                 filtered_conversations = []
@@ -620,7 +650,9 @@ class ConversationServer:
 
                 # Batch-fetch first user message text for unnamed conversations
                 if unnamed_conv_map:
-                    first_texts = chat_history_service.get_first_user_message_texts(list(unnamed_conv_map.keys()))
+                    first_texts = await chat_history_service.run_in_db_executor(
+                        chat_history_service.get_first_user_message_texts, list(unnamed_conv_map.keys())
+                    )
                     for full_conv_id, text in first_texts.items():
                         idx = unnamed_conv_map[full_conv_id]
                         if text:
@@ -628,7 +660,9 @@ class ConversationServer:
                             filtered_conversations[idx].name = title
                             # Persist the generated title (fire and forget)
                             try:
-                                chat_history_service.update_conversation_name(full_conv_id, title)
+                                await chat_history_service.run_in_db_executor(
+                                    chat_history_service.update_conversation_name, full_conv_id, title
+                                )
                             except Exception:
                                 pass
 
@@ -1072,46 +1106,15 @@ class ConversationServer:
         return ListAgentResponse(result=self.manager.agents)
 
     async def _check_agent_health(self, agent_url: str) -> bool:
-        """Simple health check for remote agents with caching."""
-        if not agent_url:
-            return False
-        
-        current_time = time.time()
-        
-        # Check cache first (cache for 30 seconds to reduce load and prevent flapping)
-        if agent_url in self._health_cache:
-            status, timestamp = self._health_cache[agent_url]
-            if current_time - timestamp < 30.0:  # Increased from 10 to 30 seconds to reduce flapping
-                log_debug(f"Using cached health status for {agent_url}: {'ONLINE' if status else 'OFFLINE'}")
-                return status
-        
-        try:
-            # Parse the URL to construct health endpoint
-            parsed = urlparse(agent_url)
-            if not parsed.hostname:
-                self._health_cache[agent_url] = (False, current_time)
-                return False
-            
-            # Construct health check URL - preserve the path and add /health
-            base_url = agent_url.rstrip('/')  # Remove trailing slash
-            health_url = f"{base_url}/health"
-            
-            # Health check with shorter timeout for faster UI responsiveness
-            timeout_value = 3.0  # Reduced from 8.0 to 3.0 for faster catalog loading
-            log_debug(f"Health check timeout set to: {timeout_value}s for {health_url}")
-            async with httpx.AsyncClient(timeout=timeout_value) as client:  # More generous timeout for network latency
-                response = await client.get(health_url)
-                is_healthy = response.status_code == 200
-                log_debug(f"Health check {health_url}: {'ONLINE' if is_healthy else 'OFFLINE'} (status: {response.status_code})")
-                self._health_cache[agent_url] = (is_healthy, current_time)
-                return is_healthy
-        except Exception as e:
-            error_msg = str(e)
-            log_debug(f"Health check failed for {agent_url}: {error_msg}")
-            log_debug(f"Exception type: {type(e).__name__}")
-            # Cache failure result
-            self._health_cache[agent_url] = (False, current_time)
+        """Health of a remote agent from the shared monitor.
+
+        Cached results are returned immediately (stale ones are refreshed in the
+        background), so catalog and registry sync never wait on a probe for an
+        agent the monitor has already seen.
+        """
+        if not agent_url or not urlparse(agent_url).hostname:
             return False
+        return await get_health_monitor().check(agent_url, allow_stale=True)
 
     async def _get_agents(self):
         """Get current agent registry in a simple format for WebSocket sync.
@@ -1206,6 +1209,10 @@ class ConversationServer:
             )
         return Response(content=part.file.bytes, media_type=part.file.mimeType)
 
+    async def _state_stats(self):
+        """Size and eviction metrics of the bounded per-conversation state stores."""
+        return {"success": True, "stores": bounded_store_stats()}
+
     async def _update_api_key(self, request: Request):
         """Update the API key"""
         try:
@@ -0,0 +1,359 @@
+"""Supervised background tasks in named, bounded pools.
+
+The host used to fire ``asyncio.create_task`` for every status event, memory
+write and stream callback. Nothing kept a reference to those tasks, bounded
+how many ran at once, logged their exceptions or waited for them on
+shutdown. ``TaskSupervisor`` runs them in named pools instead:
+
+- ``progress``: UI progress events (tool calls, "working on..." text). When
+  the queue is full the oldest queued event is dropped; a newer one
+  supersedes it anyway
+- ``telemetry``: UI status, terminal ("completed"/"failed"), file and
+  message events, which the UI needs to settle its state
+- ``memory``: indexing agent interactions into the memory service
+- ``persistence``: storing conversation turns and agent instructions
+
+Each pool runs at most ``concurrency`` tasks and queues up to ``max_queue``
+more. Only ``progress`` drops work. The other pools admit past the bound on
+``submit``, counted as ``overflowed``, and ``put`` waits for queue room
+(backpressure) for callers that can afford to wait. Exceptions are logged per pool. ``drain`` waits for queued
+and running work at shutdown, then cancels what is left.
+
+Host coroutines run on the conversation server's own event loop thread
+while the FastAPI lifespan runs on uvicorn's, so pools are thread-safe and
+start every task on the loop it was submitted from.
+
+Usage:
+    from service.task_supervisor import spawn
+
+    spawn("progress", self._emit_granular_agent_event(..., event_type="agent_progress"))
+    spawn("telemetry", self._emit_simple_task_status(agent_name, "completed", ...))
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Coroutine, Deque, Dict, Optional, Set
+
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_debug, log_error, log_info, log_warning
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+
+TASK_DRAIN_TIMEOUT_SECONDS = float(os.getenv("TASK_DRAIN_TIMEOUT_SECONDS", "10"))
+
+# Samples kept per pool for the latency percentiles
+_LATENCY_SAMPLES = 512
+
+
+def _pool_setting(pool: str, setting: str, default: int) -> int:
+    return int(os.getenv(f"TASK_POOL_{pool.upper()}_{setting}", str(default)))
+
+
+@dataclass
+class _Queued:
+    coro: Coroutine
+    loop: asyncio.AbstractEventLoop
+    enqueued: float
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class TaskPool:
+    """A bounded pool of background coroutines.
+
+    Args:
+        name: Pool name, used in logs and stats
+        concurrency: Maximum coroutines running at once
+        max_queue: Maximum coroutines waiting to run
+        drop_policy: What ``submit`` does when the queue is full:
+            ``drop_oldest``, ``drop_newest`` or ``block`` (never drop)
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, drop_policy: str = DROP_NEWEST):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.drop_policy = drop_policy
+
+        self._lock = threading.Lock()
+        self._queue: Deque[_Queued] = deque()
+        self._tasks: Set[asyncio.Task] = set()
+        self._active = 0  # started or about to start on their loop
+        self._closed = False
+        # put() callers waiting for queue room: (their loop, event set on room)
+        self._room_waiters: Deque[tuple] = deque()
+        self._wait_ms: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._run_ms: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "dropped": 0,
+            "overflowed": 0,
+            "cancelled": 0,
+            "peak_backlog": 0,
+        }
+
+    # -- Submission ----------------------------------------------------------
+
+    def submit(self, coro: Coroutine) -> bool:
+        """Run ``coro`` in the pool. Returns False if it was dropped. Never blocks."""
+        loop = _running_loop()
+        if loop is None:
+            coro.close()
+            log_debug(f"[TaskPool:{self.name}] No running event loop; task dropped")
+            return False
+        dropped: Optional[Coroutine] = None
+        with self._lock:
+            if self._closed:
+                self.metrics["dropped"] += 1
+                dropped = coro
+                item = None
+            else:
+                self.metrics["submitted"] += 1
+                item = _Queued(coro, loop, time.monotonic())
+                if self._active < self.concurrency:
+                    self._active += 1
+                else:
+                    if len(self._queue) >= self.max_queue:
+                        if self.drop_policy == DROP_OLDEST and self._queue:
+                            dropped = self._queue.popleft().coro
+                            self.metrics["dropped"] += 1
+                        elif self.drop_policy == BLOCK:
+                            self.metrics["overflowed"] += 1
+                        else:
+                            dropped, item = coro, None
+                            self.metrics["dropped"] += 1
+                    if item is not None:
+                        self._queue.append(item)
+                        self.metrics["peak_backlog"] = max(self.metrics["peak_backlog"], len(self._queue))
+                    item = None  # queued, not started
+        if dropped is not None:
+            dropped.close()
+            log_debug(f"[TaskPool:{self.name}] Queue full, dropped a task ({self.drop_policy})")
+        if item is not None:
+            self._launch(item)
+        return dropped is not coro
+
+    async def put(self, coro: Coroutine) -> bool:
+        """Like ``submit``, but first wait while the queue is full (backpressure)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._closed or self._active < self.concurrency or len(self._queue) < self.max_queue:
+                    break
+                room = asyncio.Event()
+                self._room_waiters.append((loop, room))
+            await room.wait()
+        return self.submit(coro)
+
+    def _wake_room_waiters(self) -> None:
+        """Wake every ``put`` waiting for room; each re-checks under the lock.
+
+        Waiters may be on another event loop than the task that freed room,
+        so their events are set from their own loop.
+        """
+        with self._lock:
+            waiters = list(self._room_waiters)
+            self._room_waiters.clear()
+        for loop, room in waiters:
+            try:
+                loop.call_soon_threadsafe(room.set)
+            except RuntimeError:  # The waiter's loop has been closed
+                pass
+
+    # -- Execution -----------------------------------------------------------
+
+    def _launch(self, item: _Queued) -> None:
+        if _running_loop() is item.loop:
+            self._create(item)
+            return
+        try:
+            item.loop.call_soon_threadsafe(self._create, item)
+        except RuntimeError:  # The submitting loop has been closed
+            item.coro.close()
+            self._finished()
+
+    def _create(self, item: _Queued) -> None:
+        task = item.loop.create_task(self._run(item))
+        with self._lock:
+            self._tasks.add(task)
+        task.add_done_callback(lambda done, coro=item.coro: self._done(done, coro))
+
+    async def _run(self, item: _Queued) -> None:
+        started = time.monotonic()
+        self._wait_ms.append((started - item.enqueued) * 1000)
+        try:
+            await item.coro
+            self.metrics["completed"] += 1
+        except asyncio.CancelledError:
+            self.metrics["cancelled"] += 1
+            raise
+        except Exception as e:
+            self.metrics["failed"] += 1
+            log_error(f"[TaskPool:{self.name}] Background task failed: {type(e).__name__}: {e}")
+        finally:
+            self._run_ms.append((time.monotonic() - started) * 1000)
+
+    def _done(self, task: asyncio.Task, coro: Coroutine) -> None:
+        if task.cancelled():
+            coro.close()  # Cancelled before it started; no-op otherwise
+        with self._lock:
+            self._tasks.discard(task)
+        self._finished()
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._active -= 1
+            item = None
+            if self._queue:
+                item = self._queue.popleft()
+                self._active += 1
+        self._wake_room_waiters()
+        if item is not None:
+            self._launch(item)
+
+    # -- Shutdown and stats --------------------------------------------------
+
+    @property
+    def idle(self) -> bool:
+        with self._lock:
+            return self._active == 0 and not self._queue
+
+    async def drain(self, timeout: float) -> int:
+        """Stop accepting work, wait up to ``timeout`` for the rest, cancel leftovers.
+
+        Returns the number of queued or running tasks that had to be dropped.
+        """
+        with self._lock:
+            self._closed = True
+        self._wake_room_waiters()
+        deadline = time.monotonic() + timeout
+        while not self.idle and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        with self._lock:
+            leftovers = list(self._queue)
+            self._queue.clear()
+            self.metrics["dropped"] += len(leftovers)
+        for item in leftovers:
+            item.coro.close()
+        with self._lock:
+            running = list(self._tasks)
+        for task in running:
+            task.get_loop().call_soon_threadsafe(task.cancel)
+        if leftovers or running:
+            log_warning(f"[TaskPool:{self.name}] Drain timed out: dropped {len(leftovers)} queued, cancelled {len(running)} running")
+        return len(leftovers) + len(running)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active, backlog = self._active, len(self._queue)
+        return {
+            **self.metrics,
+            "active": active,
+            "backlog": backlog,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "drop_policy": self.drop_policy,
+            "queue_wait_ms": _percentiles(self._wait_ms),
+            "run_ms": _percentiles(self._run_ms),
+        }
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {"p50": round(statistics.median(ordered), 2), "p95": round(p95, 2), "max": round(ordered[-1], 2)}
+
+
+class TaskSupervisor:
+    """Named background task pools with shared shutdown and stats."""
+
+    def __init__(self, pools: Optional[Dict[str, TaskPool]] = None):
+        self.pools: Dict[str, TaskPool] = pools if pools is not None else {
+            "progress": TaskPool(
+                "progress",
+                concurrency=_pool_setting("progress", "CONCURRENCY", 16),
+                max_queue=_pool_setting("progress", "QUEUE", 500),
+                drop_policy=DROP_OLDEST,
+            ),
+            "telemetry": TaskPool(
+                "telemetry",
+                concurrency=_pool_setting("telemetry", "CONCURRENCY", 32),
+                max_queue=_pool_setting("telemetry", "QUEUE", 1000),
+                drop_policy=BLOCK,
+            ),
+            "memory": TaskPool(
+                "memory",
+                concurrency=_pool_setting("memory", "CONCURRENCY", 4),
+                max_queue=_pool_setting("memory", "QUEUE", 500),
+                drop_policy=BLOCK,
+            ),
+            "persistence": TaskPool(
+                "persistence",
+                concurrency=_pool_setting("persistence", "CONCURRENCY", 8),
+                max_queue=_pool_setting("persistence", "QUEUE", 1000),
+                drop_policy=BLOCK,
+            ),
+        }
+
+    def submit(self, pool: str, coro: Coroutine) -> bool:
+        return self.pools[pool].submit(coro)
+
+    async def put(self, pool: str, coro: Coroutine) -> bool:
+        return await self.pools[pool].put(coro)
+
+    async def drain(self, timeout: float = TASK_DRAIN_TIMEOUT_SECONDS) -> Dict[str, int]:
+        """Drain every pool concurrently within ``timeout``; returns tasks dropped per pool."""
+        names = list(self.pools)
+        dropped = await asyncio.gather(*(self.pools[name].drain(timeout) for name in names))
+        log_info(f"[TaskSupervisor] Drained background tasks (dropped: {dict(zip(names, dropped))})")
+        return dict(zip(names, dropped))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+_supervisor: Optional[TaskSupervisor] = None
+_supervisor_lock = threading.Lock()
+
+
+def get_task_supervisor() -> TaskSupervisor:
+    """Process-wide task supervisor."""
+    global _supervisor
+    if _supervisor is None:
+        with _supervisor_lock:
+            if _supervisor is None:
+                _supervisor = TaskSupervisor()
+    return _supervisor
+
+
+def spawn(pool: str, coro: Coroutine) -> bool:
+    """Run ``coro`` in the named pool of the process-wide supervisor."""
+    return get_task_supervisor().submit(pool, coro)
+
+
+async def enqueue(pool: str, coro: Coroutine) -> bool:
+    """Like ``spawn``, but wait while the pool's queue is full (backpressure)."""
+    return await get_task_supervisor().put(pool, coro)
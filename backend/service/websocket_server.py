@@ -5,6 +5,7 @@ to stream events to the UI in real-time.
 """
 
 import asyncio
+import itertools
 import json
 import logging
 import os
@@ -14,6 +15,7 @@ import httpx
 import requests
 import sys
 import urllib3
+from collections import OrderedDict, deque
 from pathlib import Path
 
 # Disable SSL warnings for Azure Container Apps internal communication
@@ -35,6 +37,21 @@ from service.collaborative_sessions import get_session_manager, CollaborativeSes
 
 logger = logging.getLogger(__name__)
 
+# Per-connection outbound queue: a client that falls this far behind, or takes
+# longer than the send timeout for one message, is disconnected so it cannot
+# stall delivery to the rest of its tenant.
+SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "1000"))
+SEND_TIMEOUT_SECONDS = float(os.getenv("WEBSOCKET_SEND_TIMEOUT", "10"))
+
+# Per-tenant replay history (see TenantEventLog)
+HISTORY_MAX_EVENTS = int(os.getenv("WEBSOCKET_HISTORY_EVENTS", "100"))
+HISTORY_MAX_BYTES = int(os.getenv("WEBSOCKET_HISTORY_MAX_BYTES", str(1024 * 1024)))
+HISTORY_IDLE_SECONDS = float(os.getenv("WEBSOCKET_HISTORY_IDLE_SECONDS", "600"))
+HISTORY_MAX_TENANTS = int(os.getenv("WEBSOCKET_HISTORY_MAX_TENANTS", "10000"))
+# Message events are loaded via the conversation API; sending them again on
+# connect or replay shows duplicates
+HISTORY_SKIP_EVENT_TYPES = frozenset({'message', 'shared_message', 'shared_inference_ended', 'shared_file_uploaded'})
+
 # Import the real AuthService
 auth_service = None
 
@@ -64,6 +81,135 @@ class AuthenticatedConnection:
         return self.user_data.get("email", "")
 
 
+class TenantEventLog:
+    """Per-tenant ring buffers of serialized events, for replay on reconnect.
+
+    Each tenant keeps at most ``max_events`` events and ``max_bytes`` of
+    serialized JSON, oldest dropped first. Tenants are kept in least recently
+    active order; a tenant with no activity for ``idle_seconds`` (or beyond
+    ``max_tenants``) is evicted, so memory stays flat with many tenants.
+    """
+    def __init__(self, max_events: int = HISTORY_MAX_EVENTS, max_bytes: int = HISTORY_MAX_BYTES,
+                 idle_seconds: float = HISTORY_IDLE_SECONDS, max_tenants: int = HISTORY_MAX_TENANTS):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.max_tenants = max_tenants
+        # tenant_id -> {"events": deque[(seq, message)], "bytes": int, "last_active": float}
+        self._tenants: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self._tenants
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def _buffer(self, tenant_id: str) -> Dict[str, Any]:
+        buffer = self._tenants.get(tenant_id)
+        if buffer is None:
+            buffer = {"events": deque(maxlen=self.max_events), "bytes": 0, "last_active": 0.0}
+            self._tenants[tenant_id] = buffer
+        buffer["last_active"] = time.monotonic()
+        self._tenants.move_to_end(tenant_id)
+        return buffer
+
+    def append(self, tenant_id: str, seq: int, message: str):
+        """Record an already-serialized event for a tenant."""
+        buffer = self._buffer(tenant_id)
+        events = buffer["events"]
+        if len(events) == events.maxlen:
+            buffer["bytes"] -= len(events[0][1])  # deque drops this one on append
+        events.append((seq, message))
+        buffer["bytes"] += len(message)
+        while buffer["bytes"] > self.max_bytes and len(events) > 1:
+            buffer["bytes"] -= len(events.popleft()[1])
+        self.evict_idle()
+
+    def touch(self, tenant_id: str):
+        """Mark a tenant active (e.g. on connect/disconnect) without adding events."""
+        if tenant_id in self._tenants:
+            self._buffer(tenant_id)
+
+    def since(self, tenant_id: str, last_seq: int) -> List[str]:
+        """Serialized events of a tenant with seq > last_seq, oldest first."""
+        buffer = self._tenants.get(tenant_id)
+        if not buffer:
+            return []
+        return [message for seq, message in buffer["events"] if seq > last_seq]
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._tenants:
+            tenant_id, buffer = next(iter(self._tenants.items()))
+            if buffer["last_active"] >= cutoff and len(self._tenants) <= self.max_tenants:
+                break
+            del self._tenants[tenant_id]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tenants": len(self._tenants),
+            "events": sum(len(b["events"]) for b in self._tenants.values()),
+            "bytes": sum(b["bytes"] for b in self._tenants.values()),
+            "evictions": self.evictions,
+        }
+
+
+class ConnectionSender:
+    """Bounded outbound queue with a dedicated writer task for one WebSocket.
+
+    Broadcasts enqueue pre-serialized messages and return immediately; the
+    writer sends them in order. ``on_failed`` is awaited once if a send
+    errors or exceeds the send timeout.
+    """
+    def __init__(self, websocket: WebSocket, on_failed, latencies: deque,
+                 max_queue: int = SEND_QUEUE_SIZE, send_timeout: float = SEND_TIMEOUT_SECONDS):
+        self.websocket = websocket
+        self.on_failed = on_failed
+        self.latencies = latencies
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.sent = 0
+        self.closing = False
+        self.task = asyncio.create_task(self._writer())
+
+    def enqueue(self, message: str) -> bool:
+        """Queue a message; returns False if the queue is full."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _writer(self):
+        while True:
+            message = await self.queue.get()
+            started = time.perf_counter()
+            # asyncio.wait rather than wait_for: wait_for can swallow a
+            # cancellation that races with the send completing (Python < 3.12)
+            send = asyncio.ensure_future(self.websocket.send_text(message))
+            try:
+                done, _ = await asyncio.wait({send}, timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                send.cancel()
+                raise
+            if not done:
+                send.cancel()
+                await self.on_failed(self.websocket, "send timed out")
+                return
+            if send.exception() is not None:
+                await self.on_failed(self.websocket, f"send failed: {send.exception()}")
+                return
+            self.sent += 1
+            self.latencies.append((time.perf_counter() - started) * 1000)
+
+    def close(self):
+        # May be called from the writer itself (via on_failed)
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+
+
 class WebSocketManager:
     """Manages WebSocket connections and event broadcasting with tenant isolation."""
     
@@ -76,10 +222,16 @@ class WebSocketManager:
         self.connection_tenants: Dict[WebSocket, str] = {}
         # Map user_id -> set of WebSockets for sending direct messages (user may have multiple tabs)
         self.user_connections: Dict[str, Set[WebSocket]] = {}
-        self.event_history: List[Dict[str, Any]] = []
-        # Tenant-scoped event history
-        self.tenant_event_history: Dict[str, List[Dict[str, Any]]] = {}
-        self.max_history = 100
+        self.max_history = HISTORY_MAX_EVENTS
+        self.event_history: deque = deque(maxlen=self.max_history)
+        # Tenant-scoped replay history; every broadcast event gets a sequence number
+        self.tenant_history = TenantEventLog()
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+        # Outbound queue + writer task per connection, and delivery metrics
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self.send_latencies_ms: deque = deque(maxlen=1000)
+        self.send_metrics = {"slow_consumer_disconnects": 0, "send_failures": 0}
         # Backend URL for fetching agent registry
         # BACKEND_API_URL is set in production (Azure Container Apps)
         # Falls back to localhost for local development
@@ -181,20 +333,26 @@ class WebSocketManager:
             # Clean up empty tenant sets
             if not self.tenant_connections[tenant_id]:
                 del self.tenant_connections[tenant_id]
-                # Also clean up tenant event history
-                self.tenant_event_history.pop(tenant_id, None)
+                # Keep the tenant's history for replay on reconnect; it is
+                # evicted once idle for HISTORY_IDLE_SECONDS
+                self.tenant_history.touch(tenant_id)
             logger.debug(f"Unregistered connection for tenant: {tenant_id[:20]}...")
     
-    async def connect(self, websocket: WebSocket, token: Optional[str] = None, tenant_id: Optional[str] = None):
+    async def connect(self, websocket: WebSocket, token: Optional[str] = None, tenant_id: Optional[str] = None,
+                      last_seq: Optional[int] = None, epoch: Optional[str] = None):
         """Accept a new WebSocket connection with optional authentication and tenant.
         
         Args:
             websocket: The WebSocket connection
             token: Optional authentication token
             tenant_id: Optional tenant identifier for multi-tenancy isolation
+            last_seq: Sequence number of the last event the client saw; missed
+                tenant events after it are replayed
+            epoch: Server epoch (``session_id``) ``last_seq`` belongs to
         """
         await websocket.accept()
         self.active_connections.add(websocket)
+        self.senders[websocket] = ConnectionSender(websocket, self._on_send_failed, self.send_latencies_ms)
         
         # Handle authentication first to get user_id
         user_data = None
@@ -251,6 +409,10 @@ class WebSocketManager:
             # Anonymous user with tenant - register normally
             self.register_tenant_connection(websocket, tenant_id)
         
+        # Replay tenant events the client missed while disconnected
+        if last_seq is not None and actual_tenant_id:
+            self.replay_events(websocket, self.connection_tenants.get(websocket, actual_tenant_id), last_seq, epoch)
+        
         # Now complete authentication setup
         if user_data:
             auth_conn = AuthenticatedConnection(websocket, user_data)
@@ -290,16 +452,13 @@ class WebSocketManager:
         if not user_data:
             logger.debug("[WebSocket Auth] Established anonymous WebSocket connection")
         
-        # Send recent history to new client (excluding message-related events)
-        # Message events are loaded via conversation API, replaying them causes duplicates
-        skip_event_types = {'message', 'shared_message', 'shared_inference_ended', 'shared_file_uploaded'}
-        for event in self.event_history[-10:]:  # Send last 10 events
-            if event.get('eventType') in skip_event_types:
+        # Send recent history to new client (excluding message-related events).
+        # Everything below goes through the connection's send queue so it stays
+        # ordered after the replay queued above.
+        for event in list(self.event_history)[-10:]:  # Send last 10 events
+            if event.get('eventType') in HISTORY_SKIP_EVENT_TYPES:
                 continue
-            try:
-                await websocket.send_text(json.dumps(event))
-            except:
-                pass  # Client might have disconnected immediately
+            self.send_to(websocket, json.dumps(event))
         
         # Send current agent registry as initial state
         try:
@@ -312,7 +471,7 @@ class WebSocketManager:
                     },
                     'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
                 }
-                await websocket.send_text(json.dumps(registry_event))
+                self.send_to(websocket, json.dumps(registry_event))
                 logger.debug(f"Sent agent registry with {len(agents)} agents to new client")
         except Exception as e:
             logger.error(f"Failed to send agent registry to new client: {e}")
@@ -326,24 +485,22 @@ class WebSocketManager:
             },
             'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
         }
-        try:
-            await websocket.send_text(json.dumps(auth_status))
-        except:
-            pass
+        self.send_to(websocket, json.dumps(auth_status))
         
-        # Send session ID - frontend uses this to detect backend restarts and clear file history
+        # Send session ID - frontend uses this to detect backend restarts and clear file history.
+        # It is also the epoch of the seq numbers: a client whose last_seq is from another
+        # epoch resyncs fully instead of replaying
         session_event = {
             'eventType': 'session_started',
             'data': {
-                'sessionId': self.session_id
+                'sessionId': self.session_id,
+                'epoch': self.session_id,
+                'lastSeq': self.last_seq,
             },
             'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
         }
-        try:
-            await websocket.send_text(json.dumps(session_event))
+        if self.send_to(websocket, json.dumps(session_event)):
             logger.debug(f"Sent session ID to new client: {self.session_id[:8]}...")
-        except:
-            pass
         
         total_connections = len(self.active_connections)
         authenticated_connections = len(self.authenticated_connections)
@@ -352,6 +509,9 @@ class WebSocketManager:
     async def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection."""
         self.active_connections.discard(websocket)
+        sender = self.senders.pop(websocket, None)
+        if sender:
+            sender.close()
         
         # Get tenant/session before unregistering
         tenant_id = self.connection_tenants.get(websocket)
@@ -405,6 +565,92 @@ class WebSocketManager:
         tenant_count = len(self.tenant_connections)
         logger.info(f"WebSocket client disconnected. Total: {total_connections}, Authenticated: {authenticated_connections}")
     
+    def send_to(self, websocket: WebSocket, message: str) -> bool:
+        """Queue a serialized message for one connection without waiting on it.
+        
+        A connection whose queue is full is treated as a slow consumer and
+        disconnected (it can reconnect and catch up).
+        
+        Returns:
+            True if the message was queued
+        """
+        sender = self.senders.get(websocket)
+        if sender is None or sender.closing:
+            return False
+        if sender.enqueue(message):
+            return True
+        sender.closing = True
+        self.send_metrics["slow_consumer_disconnects"] += 1
+        logger.warning(f"Slow WebSocket consumer {websocket.client}: {sender.queue.qsize()} messages queued, disconnecting")
+        asyncio.create_task(self._close_connection(websocket, code=1013, reason="Client too slow"))
+        return False
+
+    def next_seq(self) -> int:
+        self.last_seq = next(self._seq)
+        return self.last_seq
+
+    def _stamp(self, event_data: Dict[str, Any]):
+        """Add timestamp and sequence number to an event (once)."""
+        if 'timestamp' not in event_data:
+            event_data['timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        if 'seq' not in event_data:
+            event_data['seq'] = self.next_seq()
+
+    def replay_events(self, websocket: WebSocket, tenant_id: str, last_seq: int, epoch: Optional[str] = None) -> int:
+        """Queue a tenant's events newer than last_seq to one connection.
+        
+        A last_seq from another server epoch, or ahead of the server (e.g. after
+        a server restart), replays nothing: the client resyncs fully when it
+        sees the new epoch in ``session_started``.
+        
+        Returns:
+            Number of events replayed
+        """
+        if epoch is not None and epoch != self.session_id:
+            logger.debug(f"Client last_seq is from server epoch {epoch[:8]}, not {self.session_id[:8]}; skipping replay")
+            return 0
+        if last_seq > self.last_seq:
+            logger.debug(f"Client last_seq {last_seq} is ahead of server ({self.last_seq}), skipping replay")
+            return 0
+        missed = self.tenant_history.since(tenant_id, last_seq)
+        replayed = sum(1 for message in missed if self.send_to(websocket, message))
+        if replayed:
+            logger.info(f"Replayed {replayed} missed events to tenant {tenant_id[:20]}... (after seq {last_seq})")
+        return replayed
+
+    async def _on_send_failed(self, websocket: WebSocket, reason: str):
+        """Writer task callback when a send to this connection fails or times out."""
+        self.send_metrics["send_failures"] += 1
+        logger.warning(f"Failed to send to WebSocket client ({reason}), disconnecting")
+        await self._close_connection(websocket, code=1011, reason="Send failed")
+
+    async def _close_connection(self, websocket: WebSocket, code: int, reason: str):
+        if websocket not in self.senders:
+            return  # Already disconnected
+        try:
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), timeout=1)
+        except Exception:
+            pass  # Socket may already be gone
+        await self.disconnect(websocket)
+
+    def get_send_stats(self) -> Dict[str, Any]:
+        """Outbound queue depth and send latency across connections."""
+        depths = [sender.queue.qsize() for sender in self.senders.values()]
+        latencies = sorted(self.send_latencies_ms)
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else 0.0
+        return {
+            "connections": len(self.senders),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "queue_capacity": SEND_QUEUE_SIZE,
+            "messages_sent": sum(sender.sent for sender in self.senders.values()),
+            "send_latency_ms_p50": percentile(0.5),
+            "send_latency_ms_p95": percentile(0.95),
+            "send_latency_ms_max": round(latencies[-1], 2) if latencies else 0.0,
+            **self.send_metrics,
+        }
+
     def get_connection_info(self, websocket: WebSocket) -> Optional[AuthenticatedConnection]:
         """Get connection info for a websocket."""
         return self.authenticated_connections.get(websocket)
@@ -678,26 +924,25 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Failed to emit agent status update: {e}")
     
-    async def broadcast_to_tenant(self, event_data: Dict[str, Any], tenant_id: str) -> int:
+    async def broadcast_to_tenant(self, event_data: Dict[str, Any], tenant_id: str, message: Optional[str] = None) -> int:
         """Broadcast an event only to connections belonging to a specific tenant.
         
         Args:
             event_data: Event data to broadcast
             tenant_id: The tenant to broadcast to
+            message: event_data already serialized (avoids re-encoding per tenant)
             
         Returns:
-            Number of clients that received the event
+            Number of clients the event was queued for
         """
-        # Add timestamp if not present
-        if 'timestamp' not in event_data:
-            event_data['timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        # Add timestamp and sequence number if not present
+        self._stamp(event_data)
+        if message is None:
+            message = json.dumps(event_data)
         
-        # Store in tenant-specific history
-        if tenant_id not in self.tenant_event_history:
-            self.tenant_event_history[tenant_id] = []
-        self.tenant_event_history[tenant_id].append(event_data)
-        if len(self.tenant_event_history[tenant_id]) > self.max_history:
-            self.tenant_event_history[tenant_id].pop(0)
+        # Store in tenant-specific replay history
+        if event_data.get('eventType') not in HISTORY_SKIP_EVENT_TYPES:
+            self.tenant_history.append(tenant_id, event_data['seq'], message)
         
         # Get connections for this tenant
         tenant_websockets = self.tenant_connections.get(tenant_id, set())
@@ -709,22 +954,9 @@ class WebSocketManager:
             logger.debug(f"No connections for tenant {tenant_id[:20]}..., skipping broadcast (no fallback)")
             return 0
         
-        # Broadcast only to tenant's connections
-        message = json.dumps(event_data)
-        disconnected_clients = set()
-        sent_count = 0
-        
-        for websocket in tenant_websockets.copy():
-            try:
-                await websocket.send_text(message)
-                sent_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to send to WebSocket client: {e}")
-                disconnected_clients.add(websocket)
-        
-        # Remove disconnected clients
-        for websocket in disconnected_clients:
-            await self.disconnect(websocket)
+        # Broadcast only to tenant's connections (queued per connection, so a
+        # slow client does not delay the others)
+        sent_count = sum(1 for websocket in tenant_websockets.copy() if self.send_to(websocket, message))
         
         event_type = event_data.get('eventType', 'unknown')
         logger.debug(f"Broadcasted {event_type} event to {sent_count} clients for tenant {tenant_id[:20]}...")
@@ -739,31 +971,15 @@ class WebSocketManager:
         Returns:
             Number of clients that received the event
         """
-        # Add timestamp if not present
-        if 'timestamp' not in event_data:
-            event_data['timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        # Add timestamp and sequence number if not present
+        self._stamp(event_data)
         
-        # Store in history
+        # Store in history (bounded deque)
         self.event_history.append(event_data)
-        if len(self.event_history) > self.max_history:
-            self.event_history.pop(0)
         
         # Broadcast to all clients
         message = json.dumps(event_data)
-        disconnected_clients = set()
-        sent_count = 0
-        
-        for websocket in self.active_connections.copy():
-            try:
-                await websocket.send_text(message)
-                sent_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to send to WebSocket client: {e}")
-                disconnected_clients.add(websocket)
-        
-        # Remove disconnected clients
-        for websocket in disconnected_clients:
-            await self.disconnect(websocket)
+        sent_count = sum(1 for websocket in self.active_connections.copy() if self.send_to(websocket, message))
         
         event_type = event_data.get('eventType', 'unknown')
         logger.debug(f"Broadcasted {event_type} event to {sent_count} clients (global)")
@@ -800,6 +1016,10 @@ class WebSocketManager:
             sent_count = 0
             session_id = None
             
+            # Stamp and serialize once for every tenant and collaborative member
+            self._stamp(event_data)
+            message = json.dumps(event_data)
+            
             # DEBUG: Log tenant isolation details
             event_type = event_data.get('eventType', 'unknown')
             log_websocket_debug(f"[TENANT DEBUG] smart_broadcast: event={event_type}, context_id={context_id[:40]}...")
@@ -812,16 +1032,20 @@ class WebSocketManager:
             
             # Broadcast to the full context_id if it's registered as a tenant
             # (e.g., voice hook connects with user_3::conversation-uuid)
-            if context_id in self.tenant_connections and context_id != base_tenant_id:
+            # Tenants that are briefly disconnected still record the event
+            # (tenant_history) so it can be replayed when they reconnect
+            if context_id != base_tenant_id and (context_id in self.tenant_connections or context_id in self.tenant_history):
                 log_websocket_debug(f"[TENANT DEBUG] Direct match: broadcasting to full contextId tenant={context_id[:40]}...")
-                sent_count += await self.broadcast_to_tenant(event_data, context_id)
+                sent_count += await self.broadcast_to_tenant(event_data, context_id, message)
             
             # ALSO broadcast to the base session tenant (e.g., user_3)
             # This ensures the main EventHub receives events too
             if base_tenant_id in self.tenant_connections:
                 session_id = base_tenant_id
                 log_websocket_debug(f"[TENANT DEBUG] Base tenant match: broadcasting to tenant={base_tenant_id}")
-                sent_count += await self.broadcast_to_tenant(event_data, base_tenant_id)
+                sent_count += await self.broadcast_to_tenant(event_data, base_tenant_id, message)
+            elif base_tenant_id in self.tenant_history:
+                await self.broadcast_to_tenant(event_data, base_tenant_id, message)
             elif context_id not in self.tenant_connections:
                 # Neither full contextId nor base tenant found
                 log_websocket_debug(f"[TENANT DEBUG] No tenant match found! Event will NOT be broadcast.")
@@ -837,12 +1061,9 @@ class WebSocketManager:
                             continue
                         # Send to member's connections
                         if member_id in self.user_connections:
-                            for ws in self.user_connections[member_id]:
-                                try:
-                                    await ws.send_text(json.dumps(event_data))
+                            for ws in self.user_connections[member_id].copy():
+                                if self.send_to(ws, message):
                                     sent_count += 1
-                                except Exception as e:
-                                    logger.error(f"Failed to send to collaborative member {member_id}: {e}")
                     if session.member_user_ids:
                         logger.debug(f"Broadcasted to {len(session.member_user_ids)} collaborative session members")
             
@@ -863,7 +1084,10 @@ class WebSocketManager:
             "authenticated_connections": len(self.authenticated_connections),
             "tenant_count": len(self.tenant_connections),
             "event_history_count": len(self.event_history),
-            "max_history": self.max_history
+            "max_history": self.max_history,
+            "last_seq": self.last_seq,
+            "tenant_history": self.tenant_history.stats(),
+            "send": self.get_send_stats()
         }
 
     async def sync_agent_registry(self):
@@ -931,17 +1155,22 @@ def create_websocket_app() -> FastAPI:
     async def websocket_endpoint(
         websocket: WebSocket, 
         token: Optional[str] = Query(None),
-        tenant_id: Optional[str] = Query(None, alias="tenantId")
+        tenant_id: Optional[str] = Query(None, alias="tenantId"),
+        last_seq: Optional[int] = Query(None),
+        epoch: Optional[str] = Query(None)
     ):
         """WebSocket endpoint for real-time event streaming with optional authentication and tenant isolation.
         
         Query Parameters:
             token: Optional JWT authentication token
             tenantId: Optional tenant identifier for multi-tenancy isolation
+            last_seq: Optional sequence number of the last event received; on
+                reconnect, the tenant's events after it are replayed
+            epoch: Server epoch (session_started ``epoch``) that last_seq is from
         """
         logger.debug(f"[WebSocket] New connection attempt from {websocket.client}, tenant: {tenant_id[:20] if tenant_id else 'none'}...")
         
-        await websocket_manager.connect(websocket, token, tenant_id)
+        await websocket_manager.connect(websocket, token, tenant_id, last_seq, epoch)
         logger.debug(f"[WebSocket] Client connected successfully: {websocket.client}")
         
         try:
@@ -1889,9 +2118,22 @@ def create_websocket_app() -> FastAPI:
     async def post_event(event_data: Dict[str, Any]):
         """HTTP endpoint for posting events to WebSocket clients.
         
+        Accepts a single event, or a batched envelope ``{"events": [...]}``
+        from the backend's event pipe. Batched events are broadcast in order.
         Uses smart_broadcast to auto-detect tenant from contextId in event data.
         """
         try:
+            if "eventType" not in event_data and isinstance(event_data.get("events"), list):
+                events = [e for e in event_data["events"] if isinstance(e, dict)]
+                client_count = 0
+                for event in events:
+                    client_count += await websocket_manager.smart_broadcast(event)
+                return JSONResponse({
+                    "success": True,
+                    "clientCount": client_count,
+                    "eventCount": len(events)
+                })
+
             client_count = await websocket_manager.smart_broadcast(event_data)
             return JSONResponse({
                 "success": True,
@@ -1934,6 +2176,16 @@ def create_websocket_app() -> FastAPI:
             logger.error(f"Error getting connection stats: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.get("/api/stats")
+    async def get_stats():
+        """Delivery metrics: per-connection queue depth, send latency, slow consumers."""
+        return JSONResponse({
+            "success": True,
+            "total_connections": len(websocket_manager.active_connections),
+            "tenant_count": len(websocket_manager.tenant_connections),
+            "send": websocket_manager.get_send_stats()
+        })
+
     @app.get("/agents")
     async def get_agents():
         """Get current agent registry."""
@@ -1983,8 +2235,9 @@ def create_websocket_app() -> FastAPI:
             "version": "1.0.0",
             "endpoints": {
                 "websocket": "/events (WebSocket)",
-                "post_event": "/events (POST)",
+                "post_event": "/events (POST, single event or {\"events\": [...]})",
                 "health": "/health (GET)",
+                "stats": "/api/stats (GET)",
                 "debug": "/debug/connections (GET)"
             },
             **websocket_manager.get_status()
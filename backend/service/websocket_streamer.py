@@ -25,9 +25,17 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from log_config import log_debug
+from service.event_pipe import EventPipe
 
 logger = logging.getLogger(__name__)
 
+# Batch events into envelopes over one connection (set to "false" for one POST per event)
+EVENT_PIPE_ENABLED = os.environ.get("WEBSOCKET_EVENT_PIPE", "true").lower() != "false"
+EVENT_PIPE_FLUSH_MS = int(os.environ.get("WEBSOCKET_EVENT_FLUSH_MS", "20"))
+EVENT_PIPE_MAX_PENDING = int(os.environ.get("WEBSOCKET_EVENT_MAX_PENDING", "5000"))
+# How long a producer waits for queue space before the event is dropped
+EVENT_PIPE_BACKPRESSURE_SECONDS = 5.0
+
 
 def get_context_id(obj: Any, default: str = None) -> str:
     """
@@ -105,6 +113,13 @@ class WebSocketStreamer:
         self.http_client = None
         self._client_loop = None  # Track which event loop the httpx client was created on
         self.is_initialized = False
+        self.event_pipe: Optional[EventPipe] = None
+        if EVENT_PIPE_ENABLED:
+            self.event_pipe = EventPipe(
+                self.events_endpoint,
+                max_pending=EVENT_PIPE_MAX_PENDING,
+                flush_interval=EVENT_PIPE_FLUSH_MS / 1000,
+            )
         # Track emitted files per conversation to prevent duplicates within same conversation only
         self._emitted_file_uris: Dict[str, Set[str]] = {}  # {conversation_id: {file_uri, ...}}
         
@@ -132,6 +147,8 @@ class WebSocketStreamer:
                     
                     if response.status_code == 200:
                         self.is_initialized = True
+                        if self.event_pipe:
+                            self.event_pipe.start()
                         logger.info("WebSocket streamer initialized successfully")
                         log_debug(f"WebSocket streamer connected to {self.websocket_url}")
                         return True
@@ -153,6 +170,8 @@ class WebSocketStreamer:
             logger.error(f"Failed to connect to WebSocket server at {self.websocket_url}")
             # Still mark as initialized but warn it might not work
             self.is_initialized = True  # Allow it to try sending events anyway
+            if self.event_pipe:
+                self.event_pipe.start()
             log_debug("WebSocket streamer initialized but connection uncertain")
             return True
                 
@@ -163,6 +182,9 @@ class WebSocketStreamer:
     async def cleanup(self):
         """Cleanup WebSocket streamer resources."""
         try:
+            if self.event_pipe:
+                # Flush queued events before shutting down
+                await asyncio.to_thread(self.event_pipe.close)
             if self.http_client:
                 await self.http_client.aclose()
                 self.http_client = None
@@ -171,8 +193,37 @@ class WebSocketStreamer:
         except Exception as e:
             logger.error(f"Error during WebSocket streamer cleanup: {e}")
     
+    def _build_payload(self, event_type: str, data: Dict[str, Any], partition_key: Optional[str]) -> Dict[str, Any]:
+        """Build the event payload (same format as Event Hub)."""
+        # Handle nested eventType collision: if data contains eventType (for agent activity),
+        # preserve it as 'activityType' before setting the WebSocket routing eventType
+        activity_type = data.get("eventType")
+        
+        # Build payload without the nested eventType to avoid collision
+        filtered_data = {k: v for k, v in data.items() if k != "eventType"}
+        
+        event_payload = {
+            "eventType": event_type,  # WebSocket routing type
+            "timestamp": datetime.now().isoformat(),
+            **filtered_data,
+        }
+        
+        # Restore the nested activity type under a non-colliding key
+        if activity_type:
+            event_payload["activityType"] = activity_type
+        
+        # Add contextId for tenant routing if partition_key provided
+        if partition_key and 'contextId' not in event_payload:
+            event_payload['contextId'] = partition_key
+        return event_payload
+
     async def _send_event(self, event_type: str, data: Dict[str, Any], partition_key: Optional[str] = None) -> bool:
-        """Send an event via WebSocket with retry logic.
+        """Send an event to the WebSocket server.
+        
+        With the event pipe enabled the event is queued and delivered in a
+        batched envelope; the return value then means "accepted for delivery".
+        If the queue stays full for EVENT_PIPE_BACKPRESSURE_SECONDS the event
+        is dropped.
         
         Args:
             event_type: Type of event (e.g., 'message', 'conversation', 'task', 'event')
@@ -180,13 +231,31 @@ class WebSocketStreamer:
             partition_key: Optional partition key (ignored for WebSocket, kept for compatibility)
             
         Returns:
-            bool: True if event sent successfully, False otherwise
+            bool: True if event sent (or queued) successfully, False otherwise
         """
         if not self.is_initialized:
             logger.error(f"WebSocket streamer not initialized, cannot send {event_type} event")
             log_debug(f"WebSocket streamer not available for {event_type}")
             return False
 
+        event_payload = self._build_payload(event_type, data, partition_key)
+
+        if self.event_pipe is None:
+            return await self._post_event(event_type, event_payload)
+
+        delay = 0.005
+        deadline = time.monotonic() + EVENT_PIPE_BACKPRESSURE_SECONDS
+        while not self.event_pipe.submit(event_payload):
+            if time.monotonic() >= deadline:
+                logger.error(f"Event queue full, dropping {event_type} event")
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        log_debug("Queued WebSocket event %s: %s", event_type, event_payload)
+        return True
+
+    async def _post_event(self, event_type: str, event_payload: Dict[str, Any]) -> bool:
+        """Send a single event with its own HTTP POST, with retry logic."""
         # Ensure httpx client is bound to the current event loop.
         # The streamer is a global singleton, but process_message may run on
         # a different loop (main_loop) than the one that first initialized it
@@ -216,30 +285,8 @@ class WebSocketStreamer:
         
         for attempt in range(max_retries):
             try:
-                # Prepare event payload (same format as Event Hub)
-                # Handle nested eventType collision: if data contains eventType (for agent activity),
-                # preserve it as 'activityType' before setting the WebSocket routing eventType
-                activity_type = data.get("eventType")
-                
-                # Build payload without the nested eventType to avoid collision
-                filtered_data = {k: v for k, v in data.items() if k != "eventType"}
-                
-                event_payload = {
-                    "eventType": event_type,  # WebSocket routing type
-                    "timestamp": datetime.now().isoformat(),
-                    **filtered_data,
-                }
-                
-                # Restore the nested activity type under a non-colliding key
-                if activity_type:
-                    event_payload["activityType"] = activity_type
-                
-                # Add contextId for tenant routing if partition_key provided
-                if partition_key and 'contextId' not in event_payload:
-                    event_payload['contextId'] = partition_key
-                
                 if attempt == 0:
-                    log_debug(f"Sending WebSocket event {event_type}: {event_payload}")
+                    log_debug("Sending WebSocket event %s: %s", event_type, event_payload)
                 else:
                     log_debug(f"Retry {attempt}/{max_retries} for WebSocket event {event_type}")
                 
@@ -253,8 +300,7 @@ class WebSocketStreamer:
                 if response.status_code == 200:
                     result = response.json()
                     client_count = result.get('clientCount', 0)
-                    log_debug(f"Event {event_type} sent successfully to {client_count} WebSocket clients")
-                    logger.debug(f"Event {event_type} sent successfully to {client_count} WebSocket clients")
+                    log_debug("Event %s sent successfully to %s WebSocket clients", event_type, client_count)
                     return True
                 else:
                     response_text = response.text[:500] if hasattr(response, 'text') else 'No response text'
@@ -117,19 +117,7 @@ class WorkflowService:
             """)
             
             for row in cur.fetchall():
-                workflow = Workflow(
-                    id=row['id'],
-                    name=row['name'],
-                    description=row['description'] or '',
-                    category=row['category'] or 'Custom',
-                    user_id=row['user_id'],
-                    steps=row['steps'] or [],
-                    connections=row['connections'] or [],
-                    goal=row['goal'] or '',
-                    is_custom=row['is_custom'],
-                    created_at=row['created_at'].isoformat() if row['created_at'] else '',
-                    updated_at=row['updated_at'].isoformat() if row['updated_at'] else ''
-                )
+                workflow = _workflow_from_row(row)
                 self.workflows[workflow.id] = workflow
             
             cur.close()
@@ -371,6 +359,43 @@ class WorkflowService:
                 return workflow
         return None
     
+    def fetch_workflow_by_name(self, workflow_name: str) -> Optional[Workflow]:
+        """Get a workflow by name as currently stored, bypassing this replica's cache.
+
+        With PostgreSQL the definition is read through the shared connection
+        pool, so edits saved on another replica are picked up; the cache entry
+        is refreshed with it. Blocking: call from a worker thread.
+        """
+        if not self.use_database:
+            return self.get_workflow_by_name(workflow_name)
+
+        from service.chat_history_service import db_connection
+
+        with db_connection() as conn:
+            if conn is None:
+                return self.get_workflow_by_name(workflow_name)
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT id, name, description, category, user_id,
+                           steps, connections, goal, is_custom,
+                           created_at, updated_at
+                    FROM workflows
+                    WHERE LOWER(name) = LOWER(%s)
+                    ORDER BY updated_at DESC
+                    LIMIT 1
+                """, (workflow_name,))
+                row = cur.fetchone()
+            conn.rollback()
+
+        # Drop cached copies under this name (deleted or renamed elsewhere)
+        for workflow_id in [w.id for w in self.workflows.values() if w.name.lower() == workflow_name.lower()]:
+            self.workflows.pop(workflow_id, None)
+        if row is None:
+            return None
+        workflow = _workflow_from_row(row)
+        self.workflows[workflow.id] = workflow
+        return workflow
+
     def get_user_workflows(self, user_id: str) -> List[Workflow]:
         """Get all workflows for a specific user."""
         return [w for w in self.workflows.values() if w.user_id == user_id]
@@ -396,6 +421,22 @@ class WorkflowService:
         }
 
 
+def _workflow_from_row(row: Dict[str, Any]) -> Workflow:
+    return Workflow(
+        id=row['id'],
+        name=row['name'],
+        description=row['description'] or '',
+        category=row['category'] or 'Custom',
+        user_id=row['user_id'],
+        steps=row['steps'] or [],
+        connections=row['connections'] or [],
+        goal=row['goal'] or '',
+        is_custom=row['is_custom'],
+        created_at=row['created_at'].isoformat() if row['created_at'] else '',
+        updated_at=row['updated_at'].isoformat() if row['updated_at'] else ''
+    )
+
+
 # Singleton instance
 _workflow_service: Optional[WorkflowService] = None
 
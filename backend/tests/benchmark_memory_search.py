@@ -0,0 +1,57 @@
+"""
+Microbenchmark: LocalVectorIndex session-scoped vector search latency.
+
+Runs fully offline with random unit vectors, so it can be used in CI to
+track the memory search path without Azure AI Search.
+
+Run:  python backend/tests/benchmark_memory_search.py [docs] [sessions] [queries]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from hosts.multiagent.memory_backends import LocalVectorIndex
+
+DIM = 1536
+
+
+def main():
+    docs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    rng = np.random.default_rng(0)
+    index = LocalVectorIndex(DIM, initial_capacity=docs)
+    vectors = rng.standard_normal((docs, DIM), dtype=np.float32)
+
+    started = time.perf_counter()
+    batch = 500
+    for start in range(0, docs, batch):
+        index.upload_documents([
+            {"id": str(i), "session_id": f"s{i % sessions}", "agent_name": "bench",
+             "interaction_vector": vectors[i].tolist()}
+            for i in range(start, min(start + batch, docs))
+        ])
+    load_s = time.perf_counter() - started
+
+    latencies = []
+    for q in range(queries):
+        query = rng.standard_normal(DIM, dtype=np.float32).tolist()
+        t0 = time.perf_counter()
+        index.search(vector_queries=[{"vector": query, "k": 5}], filter=f"session_id eq 's{q % sessions}'", top=5)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    print(f"LocalVectorIndex: {docs} docs x {DIM} dims across {sessions} sessions (loaded in {load_s:.2f}s)")
+    print(f"search top-5: p50 {latencies[len(latencies) // 2]:.3f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.3f} ms over {queries} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: per-iteration planner latency with a fresh Azure OpenAI client per call
+versus the pooled client from AzureClients._get_pooled_openai_client.
+
+The "fresh" mode reproduces the old behaviour of _call_azure_openai_structured
+(new DefaultAzureCredential + token provider + AsyncAzureOpenAI on every call).
+Both modes send the same small structured-output request N times and report
+per-iteration latency plus mean / p50 / p95.
+
+Requires AZURE_AI_FOUNDRY_PROJECT_ENDPOINT and AZURE_AI_AGENT_MODEL_DEPLOYMENT_NAME.
+
+Run:  python backend/tests/benchmark_planner_client.py [iterations]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+project_root = Path(__file__).resolve().parents[2]
+load_dotenv(project_root / ".env")
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from pydantic import BaseModel, Field
+
+from hosts.multiagent.core.azure_clients import AzureClients
+
+
+class PlannerProbe(BaseModel):
+    goal_status: str = Field(...)
+    reasoning: str = Field(...)
+
+
+SYSTEM_PROMPT = "You are a planner. Reply with goal_status='incomplete' and a one-sentence reasoning."
+USER_PROMPT = "Goal: summarize the latest invoice.\nCurrent Plan (JSON): {\"tasks\": []}"
+API_VERSION = "2024-08-01-preview"
+
+
+class _PooledClients(AzureClients):
+    """Minimal host stand-in carrying only the attributes the pool needs."""
+
+    def __init__(self):
+        self._pooled_openai_clients = {}
+        self._alt_openai_clients = {}
+        self._shared_token_provider = None
+        self._shared_token_credential = None
+
+
+def _base_endpoint() -> str:
+    endpoint = os.environ["AZURE_AI_FOUNDRY_PROJECT_ENDPOINT"]
+    return endpoint.split('/api/projects')[0] if '/api/projects' in endpoint else endpoint
+
+
+async def _planner_call(client, model: str):
+    await client.beta.chat.completions.parse(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT},
+        ],
+        response_format=PlannerProbe,
+        temperature=0.0,
+        **{"max_completion_tokens" if model.startswith("gpt-5") else "max_tokens": 100}
+    )
+
+
+async def run_fresh(iterations: int, model: str) -> list:
+    from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+    from openai import AsyncAzureOpenAI
+
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        credential = DefaultAzureCredential()
+        token_provider = get_bearer_token_provider(credential, "https://cognitiveservices.azure.com/.default")
+        client = AsyncAzureOpenAI(
+            azure_endpoint=_base_endpoint(),
+            azure_ad_token_provider=token_provider,
+            api_version=API_VERSION,
+        )
+        await _planner_call(client, model)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await client.close()
+        credential.close()
+    return latencies
+
+
+async def run_pooled(iterations: int, model: str) -> list:
+    host = _PooledClients()
+    latencies = []
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            client = host._get_pooled_openai_client(_base_endpoint(), API_VERSION)
+            await _planner_call(client, model)
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        await host.close_openai_clients()
+    return latencies
+
+
+def report(label: str, latencies: list):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"\n{label}")
+    for i, ms in enumerate(latencies, 1):
+        print(f"  iteration {i:2d}: {ms:8.1f} ms")
+    print(f"  mean={statistics.mean(latencies):.1f} ms  p50={statistics.median(latencies):.1f} ms  p95={p95:.1f} ms")
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    model = os.environ.get("AZURE_AI_AGENT_MODEL_DEPLOYMENT_NAME", "gpt-4o")
+    print(f"Planner client benchmark: {iterations} iterations against {_base_endpoint()} ({model})")
+
+    report("Before: fresh credential + client per call", await run_fresh(iterations, model))
+    report("After: pooled client with shared token", await run_pooled(iterations, model))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
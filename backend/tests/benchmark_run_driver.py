@@ -0,0 +1,72 @@
+"""
+Microbenchmark: time from a run finishing (or asking for tool outputs) to the
+agent noticing, for the old fixed 2-second status polling versus the shared
+run driver's adaptive polling and event streaming.
+
+Runs offline against the scripted Agents service stand-in from
+test_run_driver; each turn does some work, asks for one tool output, then
+completes.
+
+Run:  python backend/tests/benchmark_run_driver.py [turns]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+tests_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(tests_dir))
+
+from test_run_driver import FakeAgentsClient, _answer, _tool_call
+from shared.run_driver import drive_run
+
+# Seconds into the run when it asks for tool outputs; completes right after submission
+PHASES = [(0.05, "in_progress"), (0.7, "requires_action")]
+
+
+async def legacy_turn(client):
+    """The loop agents used before: sleep 2s, list steps, get the run."""
+    run = await client.runs.create(thread_id="t", agent_id="a")
+    while run.status in ("queued", "in_progress", "requires_action"):
+        await asyncio.sleep(2)
+        async for _ in client.run_steps.list(thread_id="t", run_id=run.id):
+            pass
+        run = await client.runs.get(thread_id="t", run_id=run.id)
+        if run.status == "requires_action":
+            await client.runs.submit_tool_outputs(thread_id="t", run_id=run.id, **(await _answer(run)))
+
+
+async def driver_turn(client):
+    async for _ in drive_run(client, "t", "a", _answer):
+        pass
+
+
+async def measure(turn, streaming: bool, turns: int) -> list:
+    latencies = []
+    for _ in range(turns):
+        client = FakeAgentsClient(PHASES, [_tool_call("call_1")], streaming=streaming)
+        await turn(client)
+        # Overhead beyond the time the service needed for the run itself
+        latencies.append((time.monotonic() - client.run.started - PHASES[-1][0]) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"  {label:32s} mean={statistics.mean(latencies):7.1f} ms  "
+          f"p50={statistics.median(latencies):7.1f} ms  p95={p95:7.1f} ms")
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Run driver benchmark: {turns} turns, added latency per turn")
+    report("Before: fixed 2s polling", await measure(legacy_turn, False, turns))
+    report("After: adaptive polling", await measure(driver_turn, False, turns))
+    report("After: event streaming", await measure(driver_turn, True, turns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""
+Microbenchmark: AuthService.verify_token throughput with and without the
+user cache / decoded-token LRU.
+
+Uses JSON file storage in a temporary directory (DATABASE_URL is ignored), so
+the uncached run measures the per-request reload + JWT decode that used to
+happen on every authenticated call.
+
+Run:  python backend/tests/benchmark_verify_token.py [calls]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+os.environ.pop("DATABASE_URL", None)
+
+from service.auth_service import AuthService
+
+
+def run(label: str, service: AuthService, tokens: list, calls: int) -> float:
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        started = time.perf_counter()
+        for i in range(calls):
+            assert service.verify_token(tokens[i % len(tokens)]) is not None
+        elapsed = time.perf_counter() - started
+    rate = calls / elapsed
+    print(f"{label:<32} {calls} calls in {elapsed:.3f}s -> {rate:,.0f} verify/s")
+    return rate
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        users_file = Path(tmp) / "users.json"
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed = AuthService(users_file=users_file)
+            for i in range(200):
+                seed.create_user(f"bench{i}@example.com", "secret", f"Bench {i}")
+        tokens = [seed.create_access_token(u) for u in list(seed.users.values())[:50]]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            uncached = AuthService(users_file=users_file, user_cache_ttl=0, token_cache_size=0)
+            cached = AuthService(users_file=users_file)
+
+        print(f"verify_token benchmark (json file, {len(seed.users)} users)")
+        before = run("Before: reload every call", uncached, tokens, calls)
+        after = run("After: user cache + token LRU", cached, tokens, calls)
+        print(f"Speedup: {after / before:.1f}x  (cache stats: {cached.cache_stats})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Test: agent health comes from one shared monitor — results are cached for the
+TTL, concurrent checks share a single probe, warm/cold transitions notify
+listeners, cold agents are polled until they come up, and agents needed by
+upcoming schedules are pre-warmed.
+
+Uses an httpx MockTransport; no agent is contacted.
+
+Run:  python backend/tests/test_agent_health.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import httpx
+
+from service.agent_health import AgentHealthMonitor
+
+
+class FakeAgents:
+    def __init__(self, online=(), delay=0.0):
+        self.online = set(online)
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(str(request.url))
+        await asyncio.sleep(self.delay)
+        host = f"{request.url.scheme}://{request.url.host}"
+        return httpx.Response(200 if host in self.online else 503)
+
+
+def _monitor(agents, **kwargs):
+    monitor = AgentHealthMonitor(**kwargs)
+    monitor._client = httpx.AsyncClient(transport=httpx.MockTransport(agents))
+    return monitor
+
+
+def test_cached_and_single_flight():
+    async def run():
+        agents = FakeAgents(online={"https://a.test"}, delay=0.05)
+        monitor = _monitor(agents, ttl=60)
+        results = await asyncio.gather(*(monitor.check("https://a.test/") for _ in range(5)))
+        assert results == [True] * 5
+        assert agents.requests == ["https://a.test/health"]  # one shared probe
+        assert await monitor.check("https://a.test") is True
+        assert len(agents.requests) == 1  # served from the cache
+        assert monitor.stats()["shared_probes"] == 4
+        await monitor.stop()
+    asyncio.run(run())
+
+
+def test_transitions_notify_listeners_and_stale_reads_do_not_wait():
+    async def run():
+        agents = FakeAgents(delay=0.05)
+        monitor = _monitor(agents, ttl=0)
+        events = []
+
+        async def listener(url, health):
+            events.append((url, health.online))
+
+        monitor.add_listener(listener)
+        assert await monitor.check("https://b.test") is False
+        agents.online.add("https://b.test")
+
+        started = asyncio.get_running_loop().time()
+        assert await monitor.check("https://b.test", allow_stale=True) is False  # stale value, no wait
+        assert asyncio.get_running_loop().time() - started < 0.03
+        await asyncio.sleep(0.1)  # background refresh finished
+        assert monitor.get("https://b.test").online
+        assert events == [("https://b.test", True)]
+        await monitor.stop()
+    asyncio.run(run())
+
+
+def test_wait_until_online_polls_cold_agents():
+    async def run():
+        agents = FakeAgents(online={"https://warm.test"})
+        monitor = _monitor(agents)
+
+        async def cold_start():
+            await asyncio.sleep(0.05)
+            agents.online.add("https://cold.test")
+
+        asyncio.create_task(cold_start())
+        offline = await monitor.wait_until_online(
+            ["https://warm.test", "https://cold.test", "https://dead.test"], timeout=0.2, poll_interval=0.02
+        )
+        assert offline == {"https://dead.test"}
+        await monitor.stop()
+    asyncio.run(run())
+
+
+def test_refresh_prewarms_scheduled_agents():
+    async def run():
+        agents = FakeAgents(online={"https://used.test", "https://scheduled.test"})
+        monitor = _monitor(agents)
+
+        async def upcoming():
+            return ["https://scheduled.test/"]
+
+        monitor.set_warmup_source(upcoming)
+        monitor.watch(["https://used.test"])
+        await monitor.refresh()
+        assert sorted(agents.requests) == ["https://scheduled.test/health", "https://used.test/health"]
+        assert monitor.stats()["warmups"] == 1
+
+        await monitor.refresh()  # both still fresh: no new probes
+        assert len(agents.requests) == 2
+        await monitor.stop()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_cached_and_single_flight()
+    test_transitions_notify_listeners_and_stale_reads_do_not_wait()
+    test_wait_until_online_polls_cold_agents()
+    test_refresh_prewarms_scheduled_agents()
+    print("✅ Agent health tests passed")
@@ -0,0 +1,235 @@
+"""
+Test: each remote agent gets its own transport — the circuit breaker fails
+fast after repeated failures and recovers after a trial call, the deadline
+for a stream's first event adapts to observed latency while long tasks keep
+the configured ceiling, our own deadlines don't trip the breaker, idempotent
+calls are hedged, and per-agent metrics show up in list_remote_agents.
+
+Uses a fake A2A client; no remote agent is contacted.
+
+Run:  python backend/tests/test_agent_transport.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import hosts.multiagent.foundry_agent_a2a  # noqa: F401  (loads the core package first)
+from a2a.client.errors import A2AClientHTTPError
+from a2a.types import AgentCapabilities, AgentCard, Message, MessageSendParams, Part, TextPart
+from hosts.multiagent import remote_agent_connection as rac
+from hosts.multiagent.core.agent_registry import AgentRegistry
+
+
+def _card(name, streaming=False):
+    return AgentCard(
+        name=name, description=f"{name} agent", url=f"http://{name}.test/", version="1.0",
+        capabilities=AgentCapabilities(streaming=streaming), defaultInputModes=["text"],
+        defaultOutputModes=["text"], skills=[],
+    )
+
+
+def _request():
+    return MessageSendParams(message=Message(role="user", parts=[Part(root=TextPart(text="hi"))], messageId="m1"))
+
+
+class FakeA2AClient:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def send_message(self, request):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        raise AssertionError("tests only exercise failures here")
+
+    async def send_message_streaming(self, request):
+        self.calls += 1
+        raise A2AClientHTTPError(400, "Invalid SSE response")
+        yield  # pragma: no cover
+
+
+def test_circuit_breaker_fails_fast_and_recovers():
+    async def run():
+        rac._transports.clear()
+        connection = rac.RemoteAgentConnections(None, _card("flaky"))
+        fake = FakeA2AClient(error=A2AClientHTTPError(503, "Network communication error"))
+        connection.agent_client = fake
+        connection.transport.breaker.cooldown = 0.05
+
+        for _ in range(rac.AGENT_BREAKER_FAILURES):
+            try:
+                await connection.send_message(_request())
+            except A2AClientHTTPError:
+                pass
+        assert connection.get_stats()["circuit"] == "open"
+
+        try:
+            await connection.send_message(_request())
+            raise AssertionError("expected fail-fast")
+        except rac.AgentUnavailableError:
+            pass
+        assert fake.calls == rac.AGENT_BREAKER_FAILURES  # rejected without a network call
+
+        await asyncio.sleep(0.06)  # cooldown over: one trial call is allowed
+        fake.error = A2AClientHTTPError(422, "bad request")  # agent answered: healthy again
+        try:
+            await connection.send_message(_request())
+        except A2AClientHTTPError:
+            pass
+        stats = connection.get_stats()
+        assert stats["circuit"] == "closed" and stats["rejected"] == 1
+        assert stats["failures"] == rac.AGENT_BREAKER_FAILURES
+    asyncio.run(run())
+
+
+def test_timeouts_adapt_to_latency():
+    rac._transports.clear()
+    transport = rac.get_agent_transport(_card("steady"))
+    assert transport.first_event_timeout() == rac.AGENT_MESSAGE_TIMEOUT  # not enough samples yet
+    for _ in range(rac.AGENT_TIMEOUT_MIN_SAMPLES):
+        transport.latency["first_event"].record(2.0)
+        transport.latency["send"].record(2.0)
+    assert transport.first_event_timeout() == rac.AGENT_MIN_TIMEOUT
+    for _ in range(rac.AGENT_TIMEOUT_MIN_SAMPLES):
+        transport.latency["first_event"].record(20.0)
+    assert transport.first_event_timeout() == 20.0 * rac.AGENT_TIMEOUT_MULTIPLIER
+    # Fast history never shortens the deadline for a whole (possibly long) task
+    assert transport.timeout("send") == rac.AGENT_MESSAGE_TIMEOUT
+    assert transport.timeout("stream") == rac.AGENT_STREAM_TIMEOUT
+    assert rac.AGENT_STREAM_TIMEOUT is None  # streams are unbounded unless opted in
+    assert rac.get_agent_transport(_card("steady")) is transport  # shared across re-registration
+
+
+class FakeStreamingClient:
+    """Streams ``events`` non-final task updates ``gap`` seconds apart, then a message."""
+
+    def __init__(self, first_delay, gap, events):
+        self.first_delay, self.gap, self.events = first_delay, gap, events
+
+    async def send_message_streaming(self, request):
+        await asyncio.sleep(self.first_delay)
+        for i in range(self.events):
+            if i:
+                await asyncio.sleep(self.gap)
+            yield SimpleNamespace(root=SimpleNamespace(result=SimpleNamespace(final=False)))
+        yield SimpleNamespace(root=SimpleNamespace(result=Message(
+            role="agent", parts=[Part(root=TextPart(text="done"))], messageId="m2")))
+
+
+def test_long_streams_outlive_first_event_deadline():
+    async def run():
+        rac._transports.clear()
+        connection = rac.RemoteAgentConnections(None, _card("worker", streaming=True))
+        transport = connection.transport
+        for _ in range(rac.AGENT_TIMEOUT_MIN_SAMPLES):
+            transport.latency["first_event"].record(0.01)
+        rac.AGENT_MIN_TIMEOUT, original = 0.05, rac.AGENT_MIN_TIMEOUT
+        try:
+            # Responsive agent on a long task: runs well past the first-event deadline
+            connection.agent_client = FakeStreamingClient(first_delay=0.0, gap=0.05, events=4)
+            result = await connection.send_message(_request())
+            assert isinstance(result, Message)
+
+            # Silent agent: cut at the adaptive deadline, but never opens the breaker
+            connection.agent_client = FakeStreamingClient(first_delay=1.0, gap=0.0, events=1)
+            for _ in range(rac.AGENT_BREAKER_FAILURES):
+                try:
+                    await connection.send_message(_request())
+                    raise AssertionError("expected a first-event timeout")
+                except TimeoutError as e:
+                    assert "start responding" in str(e)
+
+            # Opt-in ceiling for the whole stream
+            rac.AGENT_STREAM_TIMEOUT = 0.1
+            connection.agent_client = FakeStreamingClient(first_delay=0.0, gap=0.05, events=4)
+            try:
+                await connection.send_message(_request())
+                raise AssertionError("expected a stream timeout")
+            except TimeoutError as e:
+                assert "finish streaming" in str(e)
+        finally:
+            rac.AGENT_MIN_TIMEOUT = original
+            rac.AGENT_STREAM_TIMEOUT = None
+        stats = connection.get_stats()
+        assert stats["circuit"] == "closed" and stats["failures"] == 0
+        assert stats["timeouts"] == rac.AGENT_BREAKER_FAILURES + 1
+    asyncio.run(run())
+
+
+def test_streaming_rejection_is_remembered():
+    async def run():
+        rac._transports.clear()
+        connection = rac.RemoteAgentConnections(None, _card("nosse", streaming=True))
+        fake = FakeA2AClient(error=A2AClientHTTPError(422, "bad request"))
+        connection.agent_client = fake
+        for _ in range(2):
+            try:
+                await connection.send_message(_request())
+            except A2AClientHTTPError:
+                pass
+        assert fake.calls == 3  # stream attempt + send, then send only
+        assert rac.RemoteAgentConnections(None, _card("nosse", streaming=True)).transport.streaming_supported is False
+    asyncio.run(run())
+
+
+def test_hedged_call_uses_fastest_copy():
+    async def run():
+        rac._transports.clear()
+        transport = rac.get_agent_transport(_card("slowpoke"))
+        delays = iter([1.0, 0.01])
+        cancelled = []
+
+        async def call():
+            delay = next(delays)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        rac.AGENT_HEDGE_MIN_DELAY, original = 0.05, rac.AGENT_HEDGE_MIN_DELAY
+        try:
+            started = asyncio.get_running_loop().time()
+            assert await transport.hedged(call) == 0.01
+            assert asyncio.get_running_loop().time() - started < 0.5
+        finally:
+            rac.AGENT_HEDGE_MIN_DELAY = original
+        await asyncio.sleep(0)
+        assert cancelled == [1.0]
+        assert transport.stats()["hedged"] == 1
+    asyncio.run(run())
+
+
+def test_list_remote_agents_includes_metrics():
+    class Registry(AgentRegistry):
+        def __init__(self):
+            self.cards = {}
+            self.remote_agent_connections = {}
+
+    rac._transports.clear()
+    registry = Registry()
+    card = _card("reporter")
+    registry.cards[card.name] = card
+    registry.remote_agent_connections[card.name] = rac.RemoteAgentConnections(None, card)
+    [info] = registry.list_remote_agents()
+    assert info["metrics"]["circuit"] == "closed"
+    assert {"p95_ms", "error_rate", "timeout_s", "in_flight"} <= set(info["metrics"])
+
+
+if __name__ == "__main__":
+    test_circuit_breaker_fails_fast_and_recovers()
+    test_timeouts_adapt_to_latency()
+    test_long_streams_outlive_first_event_deadline()
+    test_streaming_rejection_is_remembered()
+    test_hedged_call_uses_fastest_copy()
+    test_list_remote_agents_includes_metrics()
+    print("✅ Agent transport tests passed")
@@ -0,0 +1,122 @@
+"""
+Test: the AuthService user cache can be read while another thread applies
+user changes (writers swap in a new dict instead of mutating it), the
+decoded-token cache never serves a token past its ``exp``, and repeated
+lookups of unknown users don't reload storage on every request.
+
+Uses JSON file storage in a temporary directory; no database is contacted.
+
+Run:  python backend/tests/test_auth_cache.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+os.environ.pop("DATABASE_URL", None)
+
+from service.auth_service import AuthService, User
+
+
+def make_service(tmp: str) -> AuthService:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return AuthService(users_file=Path(tmp) / "users.json")
+
+
+def test_readers_survive_concurrent_user_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        template = service.get_user_by_email("admin@example.com")
+        stop = threading.Event()
+
+        def churn():
+            n = 0
+            while not stop.is_set():
+                email = f"remote{n % 50}@example.com"
+                if n % 2:
+                    service._drop_user(email)
+                else:
+                    service._put_user(User(**{**template.__dict__, "email": email, "user_id": f"r{n}"}))
+                n += 1
+
+        writer = threading.Thread(target=churn, daemon=True)
+        writer.start()
+        try:
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                assert service.get_user_by_id("does-not-exist") is None
+                assert len(service.get_all_users()) >= 3
+        finally:
+            stop.set()
+            writer.join(timeout=2)
+
+
+def test_cached_token_expires():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        user = service.get_user_by_email("test@example.com")
+        token = service.create_access_token(user, expires_delta=timedelta(seconds=60))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert service.verify_token(token) is not None
+            assert service.verify_token(token) is not None
+        assert service.cache_stats["token_hits"] == 1
+
+        # Pretend the token's exp has passed while it sits in the cache
+        for entry in service._token_cache.values():
+            entry["exp"] = time.time() - 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            service.verify_token(token)
+        assert service.cache_stats["token_hits"] == 1
+
+        # Payloads without a usable exp are never cached
+        service._token_cache.clear()
+        service._store_cached_token("no-exp", {"email": user.email, "exp": None})
+        assert service._get_cached_token("no-exp") is None and not service._token_cache
+
+
+def test_unknown_users_do_not_reload_per_request():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        service.miss_reload_interval = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            template = service.get_user_by_email("admin@example.com")
+        reloads = service.cache_stats["user_reloads"]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(20):
+                assert service.get_user_by_email("nobody@example.com") is None
+                assert service.get_user_by_id("deleted-user") is None
+        # One reload per unknown key, the rest answered by the negative cache
+        assert service.cache_stats["user_reloads"] == reloads + 2
+        assert service.cache_stats["user_negative_hits"] == 38
+
+        # A user added locally is found at once despite the remembered miss
+        service._put_user(User(**{**template.__dict__, "email": "nobody@example.com", "user_id": "deleted-user"}))
+        assert service.get_user_by_email("nobody@example.com") is not None
+        assert service.get_user_by_id("deleted-user") is not None
+
+        # Misses expire, and distinct unknown keys share the reload interval
+        service.user_miss_ttl = 0
+        service.miss_reload_interval = 60
+        reloads = service.cache_stats["user_reloads"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for n in range(20):
+                assert service.get_user_by_email(f"stranger{n}@example.com") is None
+        assert service.cache_stats["user_reloads"] == reloads
+
+
+if __name__ == "__main__":
+    test_readers_survive_concurrent_user_changes()
+    test_cached_token_expires()
+    test_unknown_users_do_not_reload_per_request()
+    print("✅ Auth cache tests passed")
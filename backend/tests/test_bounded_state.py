@@ -0,0 +1,156 @@
+"""
+Test: per-conversation state stays bounded — BoundedStore evicts least
+recently used entries past its entry and byte limits and idle entries past
+their TTL, spills evicted file parts to disk and reads them back, reports
+eviction metrics, and backs the host agent's and conversation server's
+context-keyed state and the remote executors' thread map.
+
+Uses a fake clock; no service is contacted.
+
+Run:  python backend/tests/test_bounded_state.py
+"""
+
+import base64
+import sys
+import tempfile
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent / "remote_agents"))
+
+from a2a.types import FilePart, FileWithBytes
+
+from utils.bounded_state import BoundedStore, approx_size, bounded_store_stats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_and_ttl_eviction():
+    clock = FakeClock()
+    store = BoundedStore("test.lru", max_entries=3, ttl_seconds=60, clock=clock)
+    for i in range(3):
+        store[f"ctx{i}"] = i
+    assert store["ctx0"] == 0  # ctx0 is now the most recently used
+    store["ctx3"] = 3
+    assert "ctx1" not in store and list(store) == ["ctx2", "ctx0", "ctx3"]
+
+    clock.now += 30
+    store["ctx2"] = "refreshed"
+    clock.now += 45  # ctx0 and ctx3 idle for 75s, ctx2 for 45s
+    assert list(store) == ["ctx2"] and len(store) == 1
+    assert store.get("ctx0") is None and store.pop("ctx3", None) is None
+
+    stats = store.stats()
+    assert stats["evicted_lru"] == 1 and stats["evicted_ttl"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert bounded_store_stats()["test.lru"]["entries"] == 1
+
+    # Reading values while iterating doesn't trip over the reordering
+    for key in store:
+        store[key]
+    assert dict(store.items()) == {"ctx2": "refreshed"}
+
+
+def test_byte_budget_keeps_newest():
+    store = BoundedStore("test.bytes", max_bytes=1000)
+    store["a"] = "x" * 400
+    store["b"] = "y" * 400
+    store["c"] = "z" * 400
+    assert list(store) == ["b", "c"] and store.bytes == 800
+    store["huge"] = "h" * 5000  # a single oversized value is still kept
+    assert list(store) == ["huge"] and store.stats()["evicted_bytes"] == 3
+    assert approx_size({"k": ["v" * 100, b"\0" * 50]}) > 150
+
+
+def _file_part(n, size=1000):
+    data = base64.b64encode(bytes([n]) * size).decode()
+    return FilePart(file=FileWithBytes(bytes=data, mimeType="image/png", name=f"f{n}.png"))
+
+
+def test_file_parts_spill_to_disk():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BoundedStore(
+            "test.files",
+            max_bytes=3000,
+            sizeof=lambda part: len(part.file.bytes),
+            spill_dir=Path(tmp),
+            dump=lambda part: part.model_dump_json().encode("utf-8"),
+            load=FilePart.model_validate_json,
+            max_spill_bytes=10_000,
+        )
+        for n in range(4):
+            store[f"file{n}"] = _file_part(n)
+        stats = store.stats()
+        assert stats["entries"] == 2 and stats["spilled_entries"] == 2 and len(list(Path(tmp).iterdir())) == 2
+        assert store.bytes <= 3000 and "file0" in store and len(store) == 4
+
+        # Reading a spilled part brings it back intact (and spills another)
+        assert store["file0"] == _file_part(0)
+        assert store.stats()["reloaded"] == 1 and store.stats()["spilled_entries"] == 2
+
+        del store["file1"]
+        store.clear()
+        assert list(Path(tmp).iterdir()) == [] and len(store) == 0
+
+    try:
+        BoundedStore("test.bad", spill_dir=Path(tmp))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("spill_dir without dump/load should be rejected")
+
+
+def test_server_file_cache_is_bounded():
+    from service.server import server
+
+    limits = server.FILE_CACHE_MAX_BYTES, server.FILE_CACHE_SPILL_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        server.FILE_CACHE_MAX_BYTES, server.FILE_CACHE_SPILL_DIR = 3000, tmp
+        try:
+            cache = server.file_cache_store()
+        finally:
+            server.FILE_CACHE_MAX_BYTES, server.FILE_CACHE_SPILL_DIR = limits
+        for n in range(5):
+            cache[f"file{n}"] = _file_part(n)
+        # Sized by the embedded (base64) bytes; older files wait on disk
+        assert cache.bytes == 2 * len(_file_part(0).file.bytes)
+        assert cache.stats()["spilled_entries"] == 3
+        assert cache["file0"].file.bytes == _file_part(0).file.bytes
+        assert "server.file_cache" in bounded_store_stats()
+
+
+def test_host_state_is_bounded():
+    import hosts.multiagent.foundry_agent_a2a as host_module
+
+    store = host_module._context_store("host.test")
+    assert store.max_entries == host_module.CONTEXT_STATE_MAX_ENTRIES
+    assert store.ttl_seconds == host_module.CONTEXT_STATE_TTL_SECONDS
+
+
+def test_executor_thread_map_is_bounded():
+    from shared.bounded_state import BoundedStore as ExecutorStore
+
+    clock = FakeClock()
+    threads = ExecutorStore("active_threads", max_entries=2, ttl_seconds=60, clock=clock)
+    threads["ctx1"], threads["ctx2"], threads["ctx3"] = "t1", "t2", "t3"
+    assert "ctx1" not in threads and threads["ctx2"] == "t2"
+    clock.now += 61
+    assert len(threads) == 0
+    assert threads.stats() == {"hits": 1, "misses": 0, "evicted_lru": 1, "evicted_ttl": 2, "entries": 0}
+
+
+if __name__ == "__main__":
+    test_lru_and_ttl_eviction()
+    test_byte_budget_keeps_newest()
+    test_file_parts_spill_to_disk()
+    test_server_file_cache_is_bounded()
+    test_host_state_is_bounded()
+    test_executor_thread_map_is_bounded()
+    print("✅ Bounded state tests passed")
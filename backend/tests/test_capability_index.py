@@ -0,0 +1,175 @@
+"""
+Test: agent routing prompts only describe agents relevant to the goal — the
+capability index re-indexes a card only when it changes, keyword (and
+optional embedding) scoring shortlists the right agents from a large
+catalog, named and already-assigned agents are always kept, the task-level
+agent selector still lets the LLM choose among every agent, and
+AgentRegistry.search_agents ranks by the same scoring.
+
+Uses synthetic agent cards and a fake embedding function; no LLM, database
+or remote agent is contacted.
+
+Run:  python backend/tests/test_capability_index.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+os.environ.pop("DATABASE_URL", None)
+
+from hosts.multiagent.foundry_agent_a2a import FoundryHostAgent2
+from hosts.multiagent.capability_index import CapabilityIndex, card_to_dict
+from hosts.multiagent.core.workflow_orchestration import WorkflowOrchestration
+from service.agent_registry import AgentRegistry
+
+SPECIALISTS = {
+    "AI Foundry QuickBooks Agent": ("Manages QuickBooks accounting data", "Invoices", ["invoice", "billing", "customers"]),
+    "AI Foundry Email Agent": ("Composes and sends email via Microsoft Graph", "Send Email", ["email", "outlook"]),
+    "AI Foundry Image Generator Agent": ("Creates images from text prompts", "Generate Image", ["image", "picture"]),
+    "AI Foundry Stock Market Agent": ("Looks up stock quotes and market news", "Stock Quotes", ["stocks", "finance"]),
+}
+
+
+def _card(name, description, skill_name, tags):
+    skill = SimpleNamespace(id=skill_name.lower(), name=skill_name, description=description, tags=tags, examples=[])
+    return SimpleNamespace(name=name, description=description, skills=[skill])
+
+
+def _catalog(filler=30):
+    cards = [_card(f"Filler Agent {i}", f"Handles internal process number {i}", f"Process {i}", [f"process{i}"])
+             for i in range(filler)]
+    cards += [_card(name, *spec) for name, spec in SPECIALISTS.items()]
+    return cards
+
+
+def _index(cards, **kwargs):
+    index = CapabilityIndex(**kwargs)
+    for card in cards:
+        index.index_card(card)
+    return index
+
+
+def test_reindexes_only_changed_cards():
+    cards = _catalog(filler=2)
+    index = _index(cards)
+    assert index.reindexed == len(cards) and len(index) == len(cards)
+    assert not any(index.index_card(card) for card in cards)  # session re-registration
+    cards[0].description = "Now handles payroll"
+    assert index.index_card(cards[0]) and index.reindexed == len(cards) + 1
+    index.remove(cards[0].name)
+    assert cards[0].name not in index
+
+
+def test_shortlist_from_large_catalog():
+    async def run():
+        cards = _catalog()
+        names = [card.name for card in cards]
+        index = _index(cards, shortlist_size=3)
+
+        shortlist = await index.shortlist("Create an invoice for ACME and email it to the customer", names)
+        assert "AI Foundry QuickBooks Agent" in shortlist and "AI Foundry Email Agent" in shortlist
+        assert len(shortlist) <= 3
+        assert shortlist == [name for name in names if name in shortlist]  # catalog order kept
+
+        # Named and already-assigned agents are kept even without keyword hits
+        shortlist = await index.shortlist("Ask Filler Agent 7 for a stock quote", names,
+                                          always_include=["AI Foundry Image Generator Agent"])
+        assert {"Filler Agent 7", "AI Foundry Image Generator Agent", "AI Foundry Stock Market Agent"} <= set(shortlist)
+
+        # Nothing to go on: everything is offered, as before
+        assert await index.shortlist("hello there", names) == names
+        assert await index.shortlist("invoice", names[:3]) == names[:3]
+    asyncio.run(run())
+
+
+def test_embeddings_are_cached_per_card():
+    async def run():
+        calls = []
+
+        async def embed(texts):
+            calls.append(len(texts))
+            return [[1.0, 0.0] if "image" in text.lower() or "picture" in text.lower() else [0.0, 1.0]
+                    for text in texts]
+
+        cards = _catalog(filler=5)
+        index = _index(cards, embed=embed, shortlist_size=2)
+        names = [card.name for card in cards]
+        # "drawing" has no keyword hit; the embedding similarity finds the image agent
+        shortlist = await index.shortlist("a picture drawing of a cat", names)
+        assert "AI Foundry Image Generator Agent" in shortlist
+        await index.shortlist("another picture", names)
+        assert calls == [len(cards) + 1, 1]  # card vectors computed once, then only the query
+    asyncio.run(run())
+
+
+class FakeHost(WorkflowOrchestration):
+    def __init__(self, cards):
+        self.cards = {card.name: card for card in cards}
+        self.capability_index = _index(cards, shortlist_size=4)
+
+
+def test_planner_prompt_lists_only_shortlisted_cards():
+    async def run():
+        host = FakeHost(_catalog())
+        shortlisted, others = await host._shortlist_agents("Send the quarterly invoice by email")
+        assert {"AI Foundry QuickBooks Agent", "AI Foundry Email Agent"} <= set(shortlisted)
+        assert len(shortlisted) <= 4 and len(shortlisted) + len(others) == len(host.cards)
+        full = json.dumps([card_to_dict(card) for card in host.cards.values()], indent=2)
+        short = json.dumps([card_to_dict(host.cards[name]) for name in shortlisted], indent=2)
+        assert len(short) + len(", ".join(others)) < len(full) / 2
+    asyncio.run(run())
+
+
+def test_task_selector_always_asks_the_llm():
+    async def run():
+        cards = _catalog(filler=5)
+        prompts = []
+
+        async def call_llm(system_prompt, user_prompt, context_id):
+            prompts.append(user_prompt)
+            return "AI Foundry Stock Market Agent"
+
+        host = SimpleNamespace(capability_index=_index(cards, shortlist_size=1), _call_azure_openai_raw=call_llm)
+        agents = [{"name": card.name, "description": card.description} for card in cards]
+        # The keyword shortlist holds only the Email agent, but the LLM decides
+        chosen = await FoundryHostAgent2._select_agent_for_task(host, "email the report", agents, "ctx")
+        assert chosen == "AI Foundry Stock Market Agent"
+        assert len(prompts) == 1
+        described, _, others = prompts[0].partition("Also available (less likely matches): ")
+        assert "Composes and sends email" in described and "Looks up stock quotes" not in described
+        assert "AI Foundry Stock Market Agent" in others and "Filler Agent 0" in others
+    asyncio.run(run())
+
+
+def test_registry_search_ranks_by_keywords():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry_file = Path(tmp) / "registry.json"
+        agents = [
+            {**card_to_dict(card), "url": f"http://localhost:{9000 + i}", "version": "1.0.0"}
+            for i, card in enumerate(_catalog(filler=3))
+        ]
+        registry_file.write_text(json.dumps(agents))
+        registry = AgentRegistry(registry_file=registry_file)
+        ranked = registry.search_agents("email the invoice to billing", limit=2)
+        assert [agent["name"] for agent in ranked] == ["AI Foundry QuickBooks Agent", "AI Foundry Email Agent"]
+        assert registry.search_agents("invoice", tags=["email"], limit=5) == []
+        # Without a limit the substring search is unchanged
+        assert [a["name"] for a in registry.search_agents("Send Email")] == ["AI Foundry Email Agent"]
+
+
+if __name__ == "__main__":
+    test_reindexes_only_changed_cards()
+    test_shortlist_from_large_catalog()
+    test_embeddings_are_cached_per_card()
+    test_planner_prompt_lists_only_shortlisted_cards()
+    test_task_selector_always_asks_the_llm()
+    test_registry_search_ranks_by_keywords()
+    print("✅ Capability index tests passed")
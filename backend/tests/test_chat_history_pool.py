@@ -0,0 +1,212 @@
+"""
+Test: chat history uses the pooled connection layer — hot queries are
+prepared once per connection, no per-call ``SELECT 1`` is issued, broken
+connections are discarded, the async variants run off the event loop, and
+the in-memory caches can be listed while other threads change them.
+
+Uses a fake psycopg2 pool; no database is required.
+
+Run:  python backend/tests/test_chat_history_pool.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+os.environ.pop("DATABASE_URL", None)
+
+import psycopg2
+
+from service import chat_history_service
+from service.db_pool import PostgresPool, _HealthCheckedPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        if self.connection.fail_with:
+            raise self.connection.fail_with
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        self.connection.statements.append(" ".join(sql.split()))
+        self.connection.threads.add(threading.current_thread().name)
+
+    def mogrify(self, template, args):
+        self.connection.rows.append(args)
+        return repr(args).encode()
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.prepared = set()
+        self.encoding = "UTF8"
+        self.statements = []
+        self.rows = []
+        self.threads = set()
+        self.closed = 0
+        self.fail_with = None
+        self.returned_at = time.monotonic()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.discarded = []
+        self._used, self._pool = {}, []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+            self.conn = FakeConnection()
+
+    def closeall(self):
+        pass
+
+
+def _fake_db_pool():
+    db_pool = PostgresPool("postgresql://unused", name="test", max_size=2)
+    db_pool._pool = FakePool()
+    return db_pool
+
+
+def test_hot_queries_are_prepared_once_per_connection():
+    db_pool = _fake_db_pool()
+    chat_history_service._db_pool = db_pool
+    chat_history_service.clear_cache()
+    try:
+        for i in range(3):
+            chat_history_service.get_messages(f"user_1::c{i}")
+        statements = db_pool._pool.conn.statements
+        assert not any(s == "SELECT 1" for s in statements)
+        assert sum(s.startswith("PREPARE chs_select_messages") for s in statements) == 1
+        assert sum(s.startswith("EXECUTE chs_select_messages") for s in statements) == 3
+        assert db_pool.stats()["checkouts"] == 3
+    finally:
+        chat_history_service.clear_cache()
+        chat_history_service._db_pool = None
+
+
+def test_broken_connection_is_discarded():
+    db_pool = _fake_db_pool()
+    first = db_pool._pool.conn
+    first.fail_with = psycopg2.OperationalError("server closed the connection")
+    try:
+        with db_pool.connection() as conn:
+            conn.cursor().execute("SELECT now()")
+    except psycopg2.OperationalError:
+        pass
+    assert db_pool._pool.discarded == [first]
+    assert db_pool.stats()["connection_errors"] == 1
+    with db_pool.connection() as conn:
+        assert conn is not first
+
+
+def test_idle_connections_are_pinged_on_checkout():
+    pool = _HealthCheckedPool.__new__(_HealthCheckedPool)
+    pool.ping_after = 30
+    conn = FakeConnection()
+    assert pool._is_healthy(conn) and conn.statements == []  # recently used: no round trip
+    conn.returned_at -= 60
+    assert pool._is_healthy(conn) and conn.statements == ["SELECT 1"]
+    conn.fail_with = psycopg2.OperationalError("gone")
+    assert not pool._is_healthy(conn)
+
+
+def test_async_variants_run_on_db_executor():
+    async def run():
+        db_pool = _fake_db_pool()
+        chat_history_service._db_pool = db_pool
+        chat_history_service.clear_cache()
+        try:
+            assert await chat_history_service.add_message_async("user_2::c2", {"messageId": "m1", "parts": []})
+            assert any(t.startswith("test-db") for t in db_pool._pool.conn.threads)
+            messages = await chat_history_service.get_messages_async("user_2::c2")
+            assert [m["messageId"] for m in messages] == ["m1"]
+            conversations = await chat_history_service.list_conversations_async("user_2")
+            assert [c["conversation_id"] for c in conversations] == ["user_2::c2"]
+        finally:
+            chat_history_service.clear_cache()
+            db_pool.close()
+            chat_history_service._db_pool = None
+    asyncio.run(run())
+
+
+def test_cache_is_safe_across_threads():
+    chat_history_service.clear_cache()
+    for n in range(5000):  # long enough iterations for writers to land mid-scan
+        chat_history_service.create_conversation(f"user_3::seed-{n}", "user_3")
+    stop = threading.Event()
+    errors = []
+
+    def churn(worker):
+        n = 0
+        while not stop.is_set():
+            conv_id = f"user_3::w{worker}-{n % 200}"
+            chat_history_service.create_conversation(conv_id, "user_3")
+            chat_history_service.add_task_to_conversation(conv_id, f"t{n}")
+            chat_history_service.update_conversation_name(f"w{worker}-{n % 200}", "renamed")
+            if n % 3 == 0:
+                chat_history_service.delete_conversation(conv_id)
+            n += 1
+
+    def read():
+        try:
+            while not stop.is_set():
+                chat_history_service.list_conversations("user_3")
+                chat_history_service.delete_all_conversations("user_4")
+        except RuntimeError as e:  # "dictionary changed size during iteration"
+            errors.append(e)
+
+    threads = [threading.Thread(target=churn, args=(i,)) for i in range(2)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    chat_history_service.clear_cache()
+    assert errors == []
+
+
+if __name__ == "__main__":
+    test_hot_queries_are_prepared_once_per_connection()
+    test_broken_connection_is_discarded()
+    test_idle_connections_are_pinged_on_checkout()
+    test_async_variants_run_on_db_executor()
+    test_cache_is_safe_across_threads()
+    print("✅ Chat history pool tests passed")
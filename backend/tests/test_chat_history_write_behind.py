@@ -0,0 +1,119 @@
+"""
+Test: chat messages are persisted write-behind — queued writes become one
+multi-row INSERT plus one collapsed ``updated_at`` UPDATE, duplicates are
+coalesced, deleted conversations are dropped from the queue, and a database
+outage re-queues instead of losing messages.
+
+Uses the fake psycopg2 pool from test_chat_history_pool; no database is required.
+
+Run:  python backend/tests/test_chat_history_write_behind.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import psycopg2
+
+from service import chat_history_service
+from test_chat_history_pool import _fake_db_pool
+
+
+def _message(message_id, text="hi"):
+    return {"messageId": message_id, "role": "user", "parts": [{"kind": "text", "text": text}]}
+
+
+def _with_fake_db(test):
+    def run():
+        db_pool = _fake_db_pool()
+        chat_history_service._db_pool = db_pool
+        chat_history_service.clear_cache()
+        try:
+            test(db_pool)
+        finally:
+            chat_history_service.clear_cache()
+            chat_history_service._message_writer.close()
+            chat_history_service._db_pool = None
+    run.__name__ = test.__name__
+    return run
+
+
+@_with_fake_db
+def test_batches_messages_across_conversations(db_pool):
+    for conv in ("user_1::a", "user_1::b"):
+        chat_history_service.create_conversation(conv, "user_1")
+    conn = db_pool._pool.conn
+    conn.statements.clear()
+
+    for i in range(20):
+        assert chat_history_service.add_message("user_1::a" if i % 2 else "user_1::b", _message(f"m{i}"))
+    assert conn.statements == []  # nothing written on the request path
+
+    assert chat_history_service.flush_pending_messages() == 20
+    inserts = [s for s in conn.statements if s.startswith("INSERT INTO messages")]
+    touches = [s for s in conn.statements if s.startswith("UPDATE conversations AS c")]
+    assert len(inserts) == 1 and len(touches) == 1
+    touched_conversations = [row[0] for row in conn.rows if len(row) == 2]
+    assert sorted(touched_conversations) == ["user_1::a", "user_1::b"]
+
+
+@_with_fake_db
+def test_dedupes_in_cache_and_queue(db_pool):
+    chat_history_service.create_conversation("user_1::a", "user_1")
+    chat_history_service.add_message("user_1::a", _message("m1", "first"))
+    chat_history_service.add_message("user_1::a", _message("m1", "edited"))
+    assert [m["messageId"] for m in chat_history_service.get_messages("user_1::a")] == ["m1"]
+    assert chat_history_service.get_write_queue_stats()["pending"] == 1
+
+    conn = db_pool._pool.conn
+    conn.rows.clear()
+    assert chat_history_service.flush_pending_messages() == 1
+    assert '"edited"' in conn.rows[0][3]  # latest version wins
+
+
+@_with_fake_db
+def test_deleted_conversation_is_dropped_from_queue(db_pool):
+    chat_history_service.create_conversation("user_1::a", "user_1")
+    chat_history_service.create_conversation("user_1::b", "user_1")
+    chat_history_service.add_message("user_1::a", _message("m1"))
+    chat_history_service.add_message("user_1::b", _message("m2"))
+    chat_history_service.delete_conversation("user_1::a")
+    assert chat_history_service.flush_pending_messages() == 1
+
+
+@_with_fake_db
+def test_outage_requeues_and_flushes_on_shutdown(db_pool):
+    chat_history_service.create_conversation("user_1::a", "user_1")
+    db_pool._pool.conn.fail_with = psycopg2.OperationalError("connection refused")
+    chat_history_service.add_message("user_1::a", _message("m1"))
+    assert chat_history_service.flush_pending_messages() == 0
+    assert chat_history_service.get_write_queue_stats()["pending"] == 1
+
+    fresh = db_pool._pool.conn  # the failed connection was discarded
+    chat_history_service._message_writer.close()
+    assert any(s.startswith("INSERT INTO messages") for s in fresh.statements)
+    assert chat_history_service.get_write_queue_stats()["pending"] == 0
+
+
+@_with_fake_db
+def test_background_flush_after_interval(db_pool):
+    chat_history_service.create_conversation("user_1::a", "user_1")
+    written_before = chat_history_service.get_write_queue_stats()["rows_written"]
+    chat_history_service.add_message("user_1::a", _message("m1"))
+    deadline = time.time() + 2
+    while chat_history_service.get_write_queue_stats()["pending"] and time.time() < deadline:
+        time.sleep(0.02)
+    assert chat_history_service.get_write_queue_stats()["rows_written"] == written_before + 1
+
+
+if __name__ == "__main__":
+    test_batches_messages_across_conversations()
+    test_dedupes_in_cache_and_queue()
+    test_deleted_conversation_is_dropped_from_queue()
+    test_outage_requeues_and_flushes_on_shutdown()
+    test_background_flush_after_interval()
+    print("✅ Chat history write-behind tests passed")
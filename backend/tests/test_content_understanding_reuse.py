@@ -0,0 +1,162 @@
+"""
+Test: Content Understanding analyzers are created once per template and
+reused, polling follows Retry-After, and extraction results are cached by
+content hash so duplicate files skip analysis, with the disk copy pruned
+by age and size.
+
+Uses an httpx MockTransport in place of the Content Understanding service.
+
+Run:  python backend/tests/test_content_understanding_reuse.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import httpx
+
+import hosts.multiagent.foundry_agent_a2a  # noqa: F401  (loads the core package first)
+from hosts.multiagent import a2a_document_processor as processor
+from hosts.multiagent.content_understanding_client import AsyncContentUnderstandingClient
+
+ENDPOINT = "https://cu.test"
+
+
+class FakeContentUnderstanding:
+    def __init__(self, running_polls=1):
+        self.analyzers = set()
+        self.running_polls = running_polls
+        self.calls = []
+        self.polls = {}
+
+    async def __call__(self, request):
+        path = request.url.path
+        self.calls.append((request.method, path))
+        await asyncio.sleep(0.01)
+        if path.startswith("/operations/"):
+            self.polls[path] = self.polls.get(path, 0) + 1
+            if self.polls[path] <= self.running_polls:
+                return httpx.Response(200, json={"status": "Running"}, headers={"retry-after": "0"})
+            markdown = f"extracted {path.rsplit('/', 1)[-1]}"
+            return httpx.Response(200, json={"status": "Succeeded", "result": {"contents": [{"markdown": markdown}]}})
+
+        analyzer_id = path.split("/analyzers/")[1].split(":")[0]
+        if request.method == "GET":
+            return httpx.Response(200 if analyzer_id in self.analyzers else 404, json={})
+        if request.method == "PUT":
+            self.analyzers.add(analyzer_id)
+            return httpx.Response(201, json={}, headers={"operation-location": f"{ENDPOINT}/operations/create-{analyzer_id}"})
+        if request.method == "POST" and path.endswith(":analyze"):
+            if analyzer_id not in self.analyzers:
+                return httpx.Response(404, json={})
+            operation = f"{ENDPOINT}/operations/{request.content.decode()}"
+            return httpx.Response(202, json={}, headers={"operation-location": operation})
+        return httpx.Response(405)
+
+    def count(self, method, suffix=""):
+        return sum(1 for m, p in self.calls if m == method and p.endswith(suffix))
+
+
+def _setup(service, cache_dir):
+    client = AsyncContentUnderstandingClient(ENDPOINT, "2024-12-01-preview", subscription_key="key")
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(service))
+    client._http_loop = asyncio.get_running_loop()
+    processor._async_cu_client = client
+    processor.extraction_cache = processor.ExtractionResultCache(max_entries=8, disk_dir=cache_dir)
+    return client
+
+
+def _write(directory, name, text):
+    path = Path(directory) / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_analyzer_created_once_and_reused():
+    async def run():
+        service = FakeContentUnderstanding()
+        with tempfile.TemporaryDirectory() as tmp:
+            _setup(service, None)
+            first = await processor.process_document_async(_write(tmp, "a.pdf", "alpha"))
+            second = await processor.process_document_async(_write(tmp, "b.pdf", "beta"))
+        assert first == "Document: a.pdf\n\nextracted alpha\n\n"
+        assert second.endswith("extracted beta\n\n")
+        assert service.count("PUT") == 1  # one analyzer for both files
+        assert service.count("POST", ":analyze") == 2
+        assert service.count("DELETE") == 0
+        analyzer_id, _ = processor.load_analyzer_template("document")
+        assert service.analyzers == {analyzer_id}
+        await processor._async_cu_client.aclose()
+    asyncio.run(run())
+
+
+def test_duplicate_content_skips_analysis():
+    async def run():
+        service = FakeContentUnderstanding()
+        with tempfile.TemporaryDirectory() as tmp:
+            _setup(service, str(Path(tmp) / "cache"))
+            paths = [_write(tmp, f"copy{i}.pdf", "same bytes") for i in range(3)]
+            results = await asyncio.gather(*(processor.process_document_async(p) for p in paths))
+            assert service.count("POST", ":analyze") == 1  # concurrent duplicates share one analysis
+            assert results[2] == "Document: copy2.pdf\n\nextracted same bytes\n\n"
+
+            await processor.process_document_async(_write(tmp, "reupload.pdf", "same bytes"))
+            assert service.count("POST", ":analyze") == 1
+            assert processor.extraction_cache.stats()["memory_hits"] == 1
+
+            # A fresh process finds the result on disk
+            processor.extraction_cache = processor.ExtractionResultCache(disk_dir=str(Path(tmp) / "cache"))
+            await processor.process_document_async(_write(tmp, "later.pdf", "same bytes"))
+            assert service.count("POST", ":analyze") == 1
+            assert processor.extraction_cache.stats()["disk_hits"] == 1
+        await processor._async_cu_client.aclose()
+    asyncio.run(run())
+
+
+def test_disk_cache_pruned_by_age_and_size():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = processor.ExtractionResultCache(disk_dir=tmp, max_bytes=3000, max_age_seconds=3600)
+        now = time.time()
+        for i in range(5):
+            cache.put(f"k{i}", {"text": "x" * 900})
+            os.utime(Path(tmp) / f"k{i}.json", (now - 100 + i, now - 100 + i))
+        old = Path(tmp) / "k-old.json"
+        old.write_text("{}")
+        os.utime(old, (now - 7200, now - 7200))
+
+        # A disk hit counts as a use, so k0 outlives k1 and k2
+        processor.ExtractionResultCache(disk_dir=tmp).get("k0")
+        assert cache.prune_disk() == 3
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ["k0.json", "k3.json", "k4.json"]
+        assert cache.stats()["disk_pruned"] == 3
+
+
+def test_polls_follow_retry_after_and_recreate_missing_analyzer():
+    async def run():
+        service = FakeContentUnderstanding(running_polls=3)
+        with tempfile.TemporaryDirectory() as tmp:
+            client = _setup(service, None)
+            started = asyncio.get_running_loop().time()
+            await processor.process_audio_async(_write(tmp, "a.wav", "one"))
+            assert asyncio.get_running_loop().time() - started < 1.0  # no fixed 2s sleeps
+
+            service.analyzers.clear()  # analyzer deleted out of band
+            await processor.process_audio_async(_write(tmp, "b.wav", "two"))
+        assert service.count("PUT") == 2
+        assert service.count("POST", ":analyze") == 3  # 404, then retried after recreating
+        await client.aclose()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_analyzer_created_once_and_reused()
+    test_duplicate_content_skips_analysis()
+    test_disk_cache_pruned_by_age_and_size()
+    test_polls_follow_retry_after_and_recreate_missing_analyzer()
+    print("✅ Content Understanding reuse tests passed")
@@ -0,0 +1,184 @@
+"""
+Test: the legacy document path renders PDF pages in memory and extracts them
+concurrently — results come back in page order, rate limits pause the
+workers and are retried, an unexpected worker error tears the pipeline
+down instead of hanging it, per-page results are cached by image hash, and
+concurrent documents don't share intermediate files.
+
+Uses a fake vision client; no Azure OpenAI call is made.
+
+Run:  python backend/tests/test_doc2md_pipeline.py
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import fitz
+import httpx
+from openai import RateLimitError
+
+import hosts.multiagent.foundry_agent_a2a  # noqa: F401  (loads the core package first)
+from hosts.multiagent import doc2md_utils
+
+os.environ.update({
+    "AZURE_OPENAI_GPT_API_BASE": "https://vision.test",
+    "AZURE_OPENAI_GPT_API_KEY": "key",
+    "AZURE_OPENAI_GPT_API_VERSION": "2024-10-21",
+    "AZURE_OPENAI_GPT_DEPLOYMENT": "gpt-4o",
+})
+doc2md_utils._load_gpt_configuration.cache_clear()
+
+
+class FakeVisionClient:
+    def __init__(self, delay=0.05, rate_limited=0, fail_on_call=None):
+        self.delay = delay
+        self.rate_limited = rate_limited
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, max_tokens):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls == self.fail_on_call:
+                raise ValueError("unexpected response shape")
+            if self.rate_limited:
+                self.rate_limited -= 1
+                response = httpx.Response(429, headers={"retry-after": "0.05"},
+                                          request=httpx.Request("POST", "https://vision.test"))
+                raise RateLimitError("rate limited", response=response, body=None)
+            image = messages[1]["content"][1]["image_url"]["url"]
+            digest = hashlib.sha256(image.encode()).hexdigest()[:8]
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"md-{digest}"))])
+        finally:
+            self.active -= 1
+
+
+def _make_pdf(directory, name, pages):
+    path = Path(directory) / name
+    document = fitz.open()
+    for number in range(pages):
+        document.new_page().insert_text((72, 72), f"{name} page {number + 1}")
+    document.save(str(path))
+    document.close()
+    return str(path)
+
+
+def _expected(pdf_path):
+    import base64
+    document = fitz.open(pdf_path)
+    expected = []
+    for number in range(len(document)):
+        image = base64.b64encode(doc2md_utils._render_page(document, number)).decode()
+        expected.append("md-" + hashlib.sha256(f"data:image/png;base64,{image}".encode()).hexdigest()[:8])
+    document.close()
+    return expected
+
+
+def test_pages_extracted_concurrently_in_order():
+    async def run():
+        doc2md_utils.page_cache = doc2md_utils.PageMarkdownCache(disk_dir=None)
+        client = FakeVisionClient(delay=0.05)
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = _make_pdf(tmp, "report.pdf", 12)
+            started = asyncio.get_running_loop().time()
+            pages = await doc2md_utils.pdf_to_markdown_pages(pdf_path, concurrency=4, client=client)
+            elapsed = asyncio.get_running_loop().time() - started
+            assert pages == _expected(pdf_path)
+        assert client.peak == 4
+        assert elapsed < 12 * 0.05  # well under serial time
+    asyncio.run(run())
+
+
+def test_rate_limit_pauses_and_retries():
+    async def run():
+        doc2md_utils.page_cache = doc2md_utils.PageMarkdownCache(disk_dir=None)
+        client = FakeVisionClient(delay=0.01, rate_limited=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = _make_pdf(tmp, "limits.pdf", 3)
+            pages = await doc2md_utils.pdf_to_markdown_pages(pdf_path, concurrency=3, client=client)
+            assert pages == _expected(pdf_path)  # no page lost to the 429s
+        assert client.calls == 5
+    asyncio.run(run())
+
+
+def test_worker_failure_cancels_the_pipeline():
+    async def run():
+        doc2md_utils.page_cache = doc2md_utils.PageMarkdownCache(disk_dir=None)
+        client = FakeVisionClient(delay=0.01, fail_on_call=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = _make_pdf(tmp, "broken.pdf", 20)
+            try:
+                # The renderer fills the queue long before the failure
+                await asyncio.wait_for(doc2md_utils.pdf_to_markdown_pages(pdf_path, concurrency=2, client=client), 10)
+                raise AssertionError("expected the worker error")
+            except ValueError:
+                pass
+        assert client.calls < 20
+        assert asyncio.all_tasks() == {asyncio.current_task()}  # no renderer or worker left behind
+    asyncio.run(run())
+
+
+def test_page_results_cached_by_image_hash():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            doc2md_utils.page_cache = doc2md_utils.PageMarkdownCache(disk_dir=str(Path(tmp) / "cache"))
+            client = FakeVisionClient(delay=0.0)
+            pdf_path = _make_pdf(tmp, "same.pdf", 3)
+            first = await doc2md_utils.pdf_to_markdown_pages(pdf_path, client=client)
+            doc2md_utils.page_cache = doc2md_utils.PageMarkdownCache(disk_dir=str(Path(tmp) / "cache"))
+            second = await doc2md_utils.pdf_to_markdown_pages(pdf_path, client=client)
+        assert first == second
+        assert client.calls == 3  # second pass served from the disk cache
+        assert doc2md_utils.page_cache.metrics == {"hits": 3, "misses": 0}
+    asyncio.run(run())
+
+
+def test_concurrent_documents_use_private_work_dirs():
+    async def run():
+        doc2md_utils.page_cache = doc2md_utils.PageMarkdownCache(disk_dir=None)
+        seen = []
+        original = doc2md_utils.pdf_to_markdown_pages
+
+        async def record(pdf_path, concurrency=doc2md_utils.DOC2MD_MAX_CONCURRENCY):
+            seen.append(pdf_path)
+            return await original(pdf_path, concurrency, client=FakeVisionClient(delay=0.0))
+
+        doc2md_utils.pdf_to_markdown_pages = record
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                (Path(tmp) / "a").mkdir()
+                (Path(tmp) / "b").mkdir()
+                first = _make_pdf(Path(tmp) / "a", "quarterly.pdf", 2)
+                second = _make_pdf(Path(tmp) / "b", "quarterly.pdf", 3)
+                results = await asyncio.gather(
+                    doc2md_utils.document_to_markdown_pages(first),
+                    doc2md_utils.document_to_markdown_pages(second),
+                )
+        finally:
+            doc2md_utils.pdf_to_markdown_pages = original
+        assert [len(pages) for pages in results] == [2, 3]  # same file name, no collision
+        assert len(set(seen)) == 2 and not any(os.path.exists(path) for path in seen)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_pages_extracted_concurrently_in_order()
+    test_rate_limit_pauses_and_retries()
+    test_worker_failure_cancels_the_pipeline()
+    test_page_results_cached_by_image_hash()
+    test_concurrent_documents_use_private_work_dirs()
+    print("✅ Document page pipeline tests passed")
@@ -0,0 +1,91 @@
+"""
+Test: EmbeddingCache memory LRU, byte-budget eviction and memory-mapped disk tier.
+
+Run:  python backend/tests/test_embedding_cache.py
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from hosts.multiagent.embedding_cache import EmbeddingCache, embedding_cache_key
+from hosts.multiagent.embedding_engine import EmbeddingEngine
+
+
+def test_key_normalizes_whitespace_and_includes_deployment():
+    assert embedding_cache_key("hello   world\n", "a") == embedding_cache_key(" hello world", "a")
+    assert embedding_cache_key("hello world", "a") != embedding_cache_key("hello world", "b")
+
+
+def test_memory_tier_hits_and_evicts_by_size():
+    cache = EmbeddingCache("emb", dim=4, max_memory_bytes=2 * 4 * 4)  # two vectors
+    cache.put("one", [1.0, 0, 0, 0])
+    cache.put("two", [2.0, 0, 0, 0])
+    assert cache.get("one") == [1.0, 0, 0, 0]  # "one" becomes most recent
+    cache.put("three", [3.0, 0, 0, 0])
+    assert cache.get("two") is None
+    assert cache.get("one") == [1.0, 0, 0, 0]
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_entries"] == 2
+    assert stats["misses"] == 1
+
+
+def test_wrong_dimension_is_ignored():
+    cache = EmbeddingCache("emb", dim=4)
+    cache.put("short", [1.0])
+    assert cache.get("short") is None
+
+
+def test_disk_tier_survives_restart_and_overwrites_oldest():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache("emb", dim=3, disk_dir=tmp, disk_capacity=2)
+        cache.put("a", [1.0, 1.0, 1.0])
+        cache.put("b", [2.0, 2.0, 2.0])
+        cache.flush()
+
+        reopened = EmbeddingCache("emb", dim=3, disk_dir=tmp, disk_capacity=2)
+        assert reopened.get("a") == [1.0, 1.0, 1.0]
+        assert reopened.stats()["disk_hits"] == 1
+
+        reopened.put("c", [3.0, 3.0, 3.0])  # evicts "a", the oldest disk row
+        fresh = EmbeddingCache("emb", dim=3, disk_dir=tmp, disk_capacity=2)
+        assert fresh.get("a") is None
+        assert fresh.get("b") == [2.0, 2.0, 2.0]
+        assert fresh.get("c") == [3.0, 3.0, 3.0]
+
+
+def test_engine_skips_api_for_cached_texts():
+    calls = []
+
+    async def create(model, input):
+        calls.append(list(input))
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=[float(len(t)), 0.0]) for i, t in enumerate(input)
+        ])
+
+    async def run():
+        engine = EmbeddingEngine("https://example.openai.azure.com", "key", "emb",
+                                 cache=EmbeddingCache("emb", dim=2))
+        engine._get_client = lambda: SimpleNamespace(embeddings=SimpleNamespace(create=create))
+        engine._semaphore = asyncio.Semaphore(1)
+        assert await engine.embed_many(["a", "bb"]) == [[1.0, 0.0], [2.0, 0.0]]
+        assert await engine.embed_many(["bb", "ccc"]) == [[2.0, 0.0], [3.0, 0.0]]
+        assert await engine.embed("a ") == [1.0, 0.0]
+
+    asyncio.run(run())
+    assert calls == [["a", "bb"], ["ccc"]]
+
+
+if __name__ == "__main__":
+    test_key_normalizes_whitespace_and_includes_deployment()
+    test_memory_tier_hits_and_evicts_by_size()
+    test_wrong_dimension_is_ignored()
+    test_disk_tier_survives_restart_and_overwrites_oldest()
+    test_engine_skips_api_for_cached_texts()
+    print("✅ EmbeddingCache tests passed")
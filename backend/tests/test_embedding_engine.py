@@ -0,0 +1,82 @@
+"""
+Test: EmbeddingEngine batches, dedupes and bounds concurrency.
+
+Uses a fake embeddings client, so no Azure OpenAI access is required.
+
+Run:  python backend/tests/test_embedding_engine.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from hosts.multiagent.embedding_engine import EmbeddingEngine
+
+
+class FakeEmbeddings:
+    def __init__(self, fail_on: str = None):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on = fail_on
+
+    async def create(self, model, input):
+        self.requests.append(list(input))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on in input:
+                raise RuntimeError("boom")
+            return SimpleNamespace(data=[
+                SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)
+            ])
+        finally:
+            self.in_flight -= 1
+
+
+def _engine(fake: FakeEmbeddings, **kwargs) -> EmbeddingEngine:
+    engine = EmbeddingEngine("https://example.openai.azure.com", "key", "embeddings", **kwargs)
+    engine._get_client = lambda: SimpleNamespace(embeddings=fake)
+    engine._semaphore = asyncio.Semaphore(engine.max_concurrency)
+    return engine
+
+
+def test_batches_and_dedupes():
+    async def run():
+        fake = FakeEmbeddings()
+        engine = _engine(fake, max_batch_size=2)
+        vectors = await engine.embed_many(["a", "bb", "a", "ccc", "dddd"])
+        assert vectors == [[1.0], [2.0], [1.0], [3.0], [4.0]]
+        assert fake.requests == [["a", "bb"], ["ccc", "dddd"]]
+    asyncio.run(run())
+
+
+def test_concurrency_cap():
+    async def run():
+        fake = FakeEmbeddings()
+        engine = _engine(fake, max_batch_size=1, max_concurrency=2)
+        await engine.embed_many([str(i) * (i + 1) for i in range(6)])
+        assert len(fake.requests) == 6
+        assert fake.max_in_flight <= 2
+    asyncio.run(run())
+
+
+def test_failed_batch_returns_empty_vectors():
+    async def run():
+        fake = FakeEmbeddings(fail_on="bad")
+        engine = _engine(fake, max_batch_size=1)
+        vectors = await engine.embed_many(["ok", "bad"])
+        assert vectors == [[2.0], []]
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_batches_and_dedupes()
+    test_concurrency_cap()
+    test_failed_batch_returns_empty_vectors()
+    print("✅ EmbeddingEngine tests passed")
@@ -0,0 +1,94 @@
+"""
+Test: EventPipe merges text chunks per contextId, keeps order, applies
+backpressure and delivers batched envelopes to a local HTTP receiver.
+
+Run:  python backend/tests/test_event_pipe.py
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from service.event_pipe import EventPipe
+
+
+def _chunk(ctx, text):
+    return {"eventType": "message_chunk", "contextId": ctx, "chunk": text}
+
+
+def test_merges_chunks_per_context_and_keeps_order():
+    pipe = EventPipe("http://unused/events")
+    pipe.submit(_chunk("a", "Hel"))
+    pipe.submit(_chunk("b", "x"))
+    pipe.submit(_chunk("a", "lo"))
+    pipe.submit({"eventType": "task_updated", "contextId": "a"})
+    pipe.submit(_chunk("a", "!"))
+    batch = pipe._take_batch()
+    assert [(e["eventType"], e["contextId"], e.get("chunk")) for e in batch] == [
+        ("message_chunk", "a", "Hello"),
+        ("message_chunk", "b", "x"),
+        ("task_updated", "a", None),
+        ("message_chunk", "a", "!"),
+    ]
+    # A chunk arriving after its predecessor was taken for sending starts a new event
+    pipe.submit(_chunk("a", "?"))
+    assert pipe._take_batch() == [_chunk("a", "?")]
+
+
+def test_rejects_when_full():
+    pipe = EventPipe("http://unused/events", max_pending=2)
+    assert pipe.submit(_chunk("a", "x"))
+    assert pipe.submit({"eventType": "task", "contextId": "b"})
+    assert not pipe.submit({"eventType": "task", "contextId": "c"})
+    # Chunks that merge into a queued event need no new slot
+    assert pipe.submit(_chunk("a", "y"))
+    assert pipe.stats()["rejected"] == 1 and pipe.depth == 2
+
+
+def test_delivers_envelopes_over_http():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(json.loads(body))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"success": true}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        pipe = EventPipe(f"http://127.0.0.1:{server.server_port}/events", flush_interval=0.05)
+        pipe.start()
+        for i in range(100):
+            pipe.submit(_chunk("ctx", str(i % 10)))
+            pipe.submit({"eventType": "status", "contextId": f"other-{i}"})
+        pipe.close()
+    finally:
+        server.shutdown()
+
+    events = [event for envelope in received for event in envelope["events"]]
+    assert len(received) < 200  # batched, not one POST per event
+    text = "".join(e["chunk"] for e in events if e["eventType"] == "message_chunk")
+    assert text == "".join(str(i % 10) for i in range(100))
+    statuses = [e["contextId"] for e in events if e["eventType"] == "status"]
+    assert statuses == [f"other-{i}" for i in range(100)]
+    assert pipe.stats()["events_failed"] == 0
+
+
+if __name__ == "__main__":
+    test_merges_chunks_per_context_and_keeps_order()
+    test_rejects_when_full()
+    test_delivers_envelopes_over_http()
+    print("✅ EventPipe tests passed")
@@ -0,0 +1,184 @@
+"""
+Test: /api/files is served from a per-session index — storage is scanned
+once (concurrent first requests share the scan), events keep the index
+current, ETags change only when the listing does, pages are sliced from the
+sorted listing, events arriving during a scan are not lost or undone by
+it, and reconciliation applies storage differences without churning still-valid URLs while re-signing those near their real SAS expiry.
+
+Uses a fake scanner; no blob storage or Azure Search is contacted.
+
+Run:  python backend/tests/test_file_index.py
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from service import file_index as fi
+from service.file_index import FileIndex, IndexedFile
+
+
+def _file(file_id, filename, day, uri=None, refresh_at=None):
+    return IndexedFile(id=file_id, filename=filename, size=10, content_type="text/plain",
+                       uploaded_at=f"2026-01-{day:02d}T00:00:00+00:00", uri=uri or f"https://blob/{file_id}?sig=1",
+                       uri_refresh_at=refresh_at if refresh_at is not None else time.time() + 3600)
+
+
+class FakeStorage:
+    def __init__(self, files, processed=()):
+        self.files = list(files)
+        self.processed = set(processed)
+        self.scans = 0
+
+    async def scan(self, session_id):
+        self.scans += 1
+        await asyncio.sleep(0.02)
+        return list(self.files)
+
+    async def lookup(self, session_id):
+        return set(self.processed)
+
+
+def test_scanned_once_and_etag_tracks_changes():
+    async def run():
+        storage = FakeStorage([_file("a", "a.pdf", 1), _file("b", "b.pdf", 2)], processed={"a.pdf"})
+        index = FileIndex(scanner=storage.scan, processed_lookup=storage.lookup)
+        pages = await asyncio.gather(*(index.list_files("s1") for _ in range(3)))
+        assert storage.scans == 1
+        page = pages[0]
+        assert [f["id"] for f in page["files"]] == ["b", "a"]  # most recent first
+        assert [f["status"] for f in page["files"]] == ["uploaded", "analyzed"]
+
+        etag = page["etag"]
+        assert index.not_modified("s1", etag) and index.not_modified("s1", f'W/{etag}, "other"')
+        assert (await index.list_files("s1"))["etag"] == etag
+        assert storage.scans == 1
+
+        index.file_added("s1", _file("c", "c.pdf", 3))
+        assert not index.not_modified("s1", etag)
+        assert (await index.list_files("s1"))["files"][0]["id"] == "c"
+
+        index.file_processed("s1", "c.pdf")
+        index.file_removed("s1", "a", "a.pdf")
+        files = (await index.list_files("s1"))["files"]
+        assert [(f["id"], f["status"]) for f in files] == [("c", "analyzed"), ("b", "uploaded")]
+        assert storage.scans == 1
+
+        index.file_added("unloaded", _file("x", "x.pdf", 1))  # ignored until the session is listed
+        assert index.etag("unloaded") is None
+    asyncio.run(run())
+
+
+def test_pagination():
+    async def run():
+        storage = FakeStorage([_file(f"f{day}", f"{day}.pdf", day) for day in range(1, 6)])
+        index = FileIndex(scanner=storage.scan, processed_lookup=storage.lookup)
+        first = await index.list_files("s1", offset=0, limit=2)
+        assert [f["id"] for f in first["files"]] == ["f5", "f4"]
+        assert first["total"] == 5 and first["next_offset"] == 2
+        last = await index.list_files("s1", offset=4, limit=2)
+        assert [f["id"] for f in last["files"]] == ["f1"] and last["next_offset"] is None
+        assert first["etag"] != last["etag"]
+    asyncio.run(run())
+
+
+def test_reconcile_applies_storage_changes():
+    async def run():
+        storage = FakeStorage([_file("a", "a.pdf", 1), _file("b", "b.pdf", 2)])
+        index = FileIndex(scanner=storage.scan, processed_lookup=storage.lookup)
+        etag = (await index.list_files("s1"))["etag"]
+
+        # Freshly signed URLs alone don't change the listing
+        storage.files = [_file("a", "a.pdf", 1, uri="https://blob/a?sig=2"), _file("b", "b.pdf", 2, uri="https://blob/b?sig=2")]
+        await index.reconcile_active()
+        assert index.not_modified("s1", etag)
+
+        # A file written by a remote agent appears, a deleted one disappears
+        storage.files = [_file("a", "a.pdf", 1), _file("agent", "chart.png", 3)]
+        storage.processed = {"chart.png"}
+        await index.reconcile_active()
+        files = (await index.list_files("s1"))["files"]
+        assert [(f["id"], f["status"]) for f in files] == [("agent", "analyzed"), ("a", "uploaded")]
+        assert files[1]["uri"] == "https://blob/a?sig=1"
+        assert not index.not_modified("s1", etag)
+    asyncio.run(run())
+
+
+def test_events_during_scan_survive_the_merge():
+    async def run():
+        storage = FakeStorage([_file("a", "a.pdf", 1), _file("b", "b.pdf", 2)])
+        index = FileIndex(scanner=storage.scan, processed_lookup=storage.lookup)
+
+        # First load: events arrive before the session exists in the index
+        first = asyncio.ensure_future(index.list_files("s1"))
+        await asyncio.sleep(0)
+        index.file_added("s1", _file("c", "c.pdf", 3))
+        index.file_processed("s1", "a.pdf")
+        page = await first
+        assert {f["id"]: f["status"] for f in page["files"]} == {"c": "uploaded", "b": "uploaded", "a": "analyzed"}
+
+        # Reconcile: the scan started before the add/remove, so it still
+        # lists "a" and misses "d"
+        storage.files.append(_file("c", "c.pdf", 3))
+        reconcile = asyncio.ensure_future(index.reconcile("s1"))
+        await asyncio.sleep(0.005)
+        index.file_added("s1", _file("d", "d.pdf", 4))
+        index.file_removed("s1", "a", "a.pdf")
+        await reconcile
+        assert [f["id"] for f in (await index.list_files("s1"))["files"]] == ["d", "c", "b"]
+
+    asyncio.run(run())
+
+
+def test_urls_are_resigned_before_expiry():
+    async def run():
+        storage = FakeStorage([_file("a", "a.pdf", 1), _file("b", "b.pdf", 2)])
+        index = FileIndex(scanner=storage.scan, processed_lookup=storage.lookup)
+        await index.list_files("s1")
+        # Uploads and agent files are indexed without a known expiry; an expired one too
+        index.file_added("s1", IndexedFile(id="up", filename="up.pdf", size=1, content_type="text/plain",
+                                           uploaded_at="2026-01-03T00:00:00+00:00", uri="https://blob/up?sig=upload"))
+        index.file_added("s1", _file("b", "b.pdf", 2, uri="https://blob/b?sig=old", refresh_at=time.time() - 1))
+        storage.files = [_file(f, f"{f}.pdf", day, uri=f"https://blob/{f}?sig=2") for f, day in (("a", 1), ("b", 2), ("up", 3))]
+        await index.reconcile_active()
+        uris = {f["id"]: f["uri"] for f in (await index.list_files("s1"))["files"]}
+        assert uris == {"a": "https://blob/a?sig=1", "b": "https://blob/b?sig=2", "up": "https://blob/up?sig=2"}
+    asyncio.run(run())
+
+    # Re-signed against the real expiry, not the requested lifetime
+    week = datetime.now(timezone.utc) + timedelta(days=7)
+    assert abs(fi.uri_refresh_time(week) - (week.timestamp() - fi.FILE_SAS_REFRESH_SECONDS)) < 1
+    capped = datetime.now(timezone.utc) + timedelta(hours=2)  # delegation key expiring soon
+    assert time.time() < fi.uri_refresh_time(capped) < capped.timestamp()
+    assert fi.uri_refresh_time(None) is None
+
+
+def test_local_fallback_uses_stable_ids():
+    with tempfile.TemporaryDirectory() as tmp:
+        original = fi.UPLOADS_DIR
+        fi.UPLOADS_DIR = Path(tmp)
+        try:
+            (Path(tmp) / "s1" / "agentfile").mkdir(parents=True)
+            (Path(tmp) / "s1" / "1234-abcd.pdf").write_bytes(b"pdf")
+            (Path(tmp) / "s1" / "agentfile" / "chart.png").write_bytes(b"png")
+            files = {f.filename: f for f in fi._scan_local_files("s1")}
+        finally:
+            fi.UPLOADS_DIR = original
+    assert files["1234-abcd.pdf"].id == "1234-abcd"
+    assert files["chart.png"].id == "agentfile" and files["chart.png"].uri == "/uploads/s1/agentfile"
+
+
+if __name__ == "__main__":
+    test_scanned_once_and_etag_tracks_changes()
+    test_pagination()
+    test_reconcile_applies_storage_changes()
+    test_events_during_scan_survive_the_merge()
+    test_urls_are_resigned_before_expiry()
+    test_local_fallback_uses_stable_ids()
+    print("✅ File index tests passed")
@@ -0,0 +1,136 @@
+"""
+Test: the log_config helpers defer formatting — disabled debug calls never
+format their arguments or call message callables, enabled lines are written
+by the background writer in order, floods are rate limited per category and
+the suppressed count is reported (errors are never suppressed), a full
+queue drops other lines but never errors, and oversized messages keep their
+start and end.
+
+Run:  python backend/tests/test_log_config.py
+"""
+
+import contextlib
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import log_config
+
+
+class Exploding:
+    def __str__(self):
+        raise AssertionError("formatted while disabled")
+
+    __repr__ = __str__
+
+
+def _captured(fn):
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        fn()
+        log_config.flush_logs()
+    return buffer.getvalue().splitlines()
+
+
+def test_disabled_debug_is_not_formatted():
+    original = log_config._DEBUG_ENABLED
+    log_config._DEBUG_ENABLED = False
+    try:
+        def run():
+            log_config.log_debug("payload %s", Exploding())
+            log_config.log_debug(lambda: Exploding().__str__())
+        assert _captured(run) == []
+        assert not log_config.debug_enabled()
+    finally:
+        log_config._DEBUG_ENABLED = original
+
+
+def test_lines_written_in_order_with_deferred_formatting():
+    def run():
+        log_config.log_info("plain")
+        log_config.log_info("event %s: %s", "message", {"chunk": "hi"})
+        log_config.log_warning(lambda: "built " + "lazily")
+        log_config.log_error("100% done")  # no args: '%' left alone
+    assert _captured(run) == [
+        "[INFO] plain",
+        "[INFO] event message: {'chunk': 'hi'}",
+        "[WARNING] built lazily",
+        "[ERROR] 100% done",
+    ]
+
+
+def test_rate_limited_per_category():
+    original = log_config._limiter
+    log_config._limiter = log_config._RateLimiter(rate=0.001, burst=3)
+    try:
+        def flood():
+            for i in range(10):
+                log_config.log_info("[FLOOD] line %d", i)
+            log_config.log_info("[OTHER] still shown")
+        lines = _captured(flood)
+        assert lines == ["[INFO] [FLOOD] line 0", "[INFO] [FLOOD] line 1",
+                         "[INFO] [FLOOD] line 2", "[INFO] [OTHER] still shown"]
+
+        # A burst of real errors is never suppressed
+        errors = _captured(lambda: [log_config.log_error("[FLOOD] failure %d", i) for i in range(10)])
+        assert len(errors) == 10
+
+        log_config._limiter.rate = 1000.0  # refill
+        time.sleep(0.01)
+        assert _captured(lambda: log_config.log_info("[FLOOD] again")) == [
+            "[INFO] [FLOOD] again (7 similar lines suppressed)"
+        ]
+    finally:
+        log_config._limiter = original
+
+
+def test_full_queue_never_drops_errors():
+    writer = log_config._LogWriter(max_queued=5)
+    release = threading.Event()
+    original_run = writer._run
+
+    def stalled_run():
+        release.wait(5)  # a slow console: nothing is drained yet
+        original_run()
+
+    writer._run = stalled_run
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        for i in range(20):
+            writer.write(f"[INFO] line {i}")
+        for i in range(3):
+            writer.write(f"[ERROR] failure {i}", keep=True)
+        release.set()
+        writer.flush()
+    lines = buffer.getvalue().splitlines()
+    assert lines[:5] == [f"[INFO] line {i}" for i in range(5)]
+    assert [line for line in lines if line.startswith("[ERROR]")] == [f"[ERROR] failure {i}" for i in range(3)]
+    assert lines[-1] == "[WARNING] [LOG] Log queue full, dropped 15 lines"
+
+
+def test_long_messages_truncated():
+    limit = log_config.LOG_MAX_MESSAGE_CHARS
+    lines = _captured(lambda: log_config.log_info("payload: %s", "x" * (limit + 50)))
+    assert len(lines) == 1 and "... (59 chars omitted) ..." in lines[0]
+
+    # A long traceback keeps its final line: the exception itself
+    frames = "".join(f'  File "module_{i}.py", line {i}, in handler\n    do_work()\n' for i in range(200))
+    traceback_text = f"Traceback (most recent call last):\n{frames}ValueError: the actual cause"
+    logged = "\n".join(_captured(lambda: log_config.log_error(traceback_text)))
+    assert logged.startswith("[ERROR] Traceback (most recent call last):")
+    assert logged.endswith("ValueError: the actual cause")
+    assert len(logged) < limit + 100
+
+
+if __name__ == "__main__":
+    test_disabled_debug_is_not_formatted()
+    test_lines_written_in_order_with_deferred_formatting()
+    test_rate_limited_per_category()
+    test_full_queue_never_drops_errors()
+    test_long_messages_truncated()
+    print("✅ Logging tests passed")
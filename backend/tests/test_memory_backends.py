@@ -0,0 +1,230 @@
+"""
+Test: LocalVectorIndex and TieredSearchClient behave like the Azure AI Search
+index the memory service was written against, and the full memory path
+(store -> search -> list files -> delete -> clear) runs offline.
+
+Uses deterministic fake embeddings, so no Azure access is required.
+
+Run:  python backend/tests/test_memory_backends.py
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from hosts.multiagent import a2a_memory_service as memory_module
+from hosts.multiagent.a2a_memory_service import A2AMemoryService
+from hosts.multiagent.memory_backends import LocalVectorIndex, TieredSearchClient, parse_filter
+
+DIM = memory_module.vector_dimension
+
+
+class FakeEmbeddingEngine:
+    """Bag-of-words hashing embeddings: shared words -> higher cosine."""
+
+    cache = None
+
+    async def embed_many(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text):
+        vector = np.zeros(DIM, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1.0
+        return vector.tolist()
+
+
+def _doc(doc_id, session, agent, vector, **fields):
+    return {"id": doc_id, "session_id": session, "agent_name": agent,
+            "interaction_vector": vector, **fields}
+
+
+def _unit(i, dim=8):
+    v = [0.0] * dim
+    v[i] = 1.0
+    return v
+
+
+def test_parse_filter():
+    assert parse_filter("session_id eq 's1' and agent_name eq 'O''Brien'") == {
+        "session_id": "s1", "agent_name": "O'Brien"}
+    assert parse_filter("flag eq true") == {"flag": True}
+    assert parse_filter(None) == {}
+
+
+def test_vector_search_filters_and_scores():
+    index = LocalVectorIndex(dim=8, initial_capacity=1)
+    index.upload_documents([
+        _doc("a", "s1", "x", _unit(0)),
+        _doc("b", "s1", "y", [1.0, 1.0] + [0.0] * 6),
+        _doc("c", "s2", "x", _unit(0)),
+    ])
+    results = index.search(vector_queries=[{"vector": _unit(0), "k": 5}],
+                           filter="session_id eq 's1'", select=["id"])
+    assert [r["id"] for r in results] == ["a", "b"]
+    assert abs(results[0]["@search.score"] - 1.0) < 1e-6  # identical vector
+    assert results[1]["@search.score"] < results[0]["@search.score"]
+
+    results = index.search(vector_queries=[{"vector": _unit(0), "k": 5}],
+                           filter="session_id eq 's1' and agent_name eq 'y'")
+    assert [r["id"] for r in results] == ["b"]
+    assert index.search(vector_queries=[{"vector": _unit(0), "k": 1}], filter="session_id eq 's1'")[0]["id"] == "a"
+
+
+def test_delete_compacts_and_persists():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LocalVectorIndex(dim=8, directory=tmp, initial_capacity=2)
+        index.upload_documents([_doc(str(i), "s1", "x", _unit(i), timestamp=f"2024-01-0{i + 1}") for i in range(5)])
+        results = index.upload_documents([{"@search.action": "delete", "id": "1"}])
+        assert results[0].succeeded
+        assert len(index) == 4
+
+        reopened = LocalVectorIndex(dim=8, directory=tmp)
+        assert len(reopened) == 4
+        # The row moved into the deleted slot still returns its own vector
+        hit = reopened.search(vector_queries=[{"vector": _unit(4), "k": 1}], filter="session_id eq 's1'")
+        assert hit[0]["id"] == "4"
+        newest = reopened.search(filter="session_id eq 's1'", order_by=["timestamp desc"], top=2)
+        assert [r["id"] for r in newest] == ["4", "3"]
+
+
+def test_writes_are_journaled_not_rewritten():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LocalVectorIndex(dim=8, directory=tmp, initial_capacity=2)
+        snapshot = Path(tmp) / "documents.json"
+        generation = json.loads(snapshot.read_text())["generation"]
+        for i in range(8):
+            index.upload_documents([_doc(str(i), "s1" if i < 6 else "s2", "x", _unit(i))])
+        index.upload_documents([{"@search.action": "delete", "id": "2"}])
+        index.drop_session("s2")
+        # documents.json was not rewritten; every write went to the journal
+        assert json.loads(snapshot.read_text())["generation"] == generation
+        journal = Path(tmp) / f"documents-{generation}.jsonl"
+        assert len(journal.read_text().splitlines()) == 11
+
+        # A crash mid-append leaves a partial last line; replay stops before it
+        with open(journal, "a") as f:
+            f.write('{"upsert": {"id": "9"')
+        reopened = LocalVectorIndex(dim=8, directory=tmp)
+        assert sorted(d["id"] for d in reopened.search(filter="session_id eq 's1'")) == ["0", "1", "3", "4", "5"]
+        hit = reopened.search(vector_queries=[{"vector": _unit(5), "k": 1}], filter="session_id eq 's1'")
+        assert hit[0]["id"] == "5"
+        # Loading compacted the journal into a new snapshot and removed the old one
+        assert not journal.exists() and list(Path(tmp).glob("documents-*.jsonl")) == []
+
+        reopened.upload_documents([_doc("6", "s1", "x", _unit(6))])
+        reopened.close()
+        assert len(json.loads(snapshot.read_text())["documents"]) == 6
+        assert list(Path(tmp).glob("documents-*.jsonl")) == []
+
+
+def test_tiered_hydrates_once_and_mirrors_writes():
+    remote = LocalVectorIndex(dim=8)
+    remote.upload_documents([_doc("a", "s1", "x", _unit(0)), _doc("b", "s2", "x", _unit(1))])
+    tiered = TieredSearchClient(LocalVectorIndex(dim=8), remote, max_hot_sessions=1)
+
+    query = {"vector": _unit(0), "k": 3}
+    assert [r["id"] for r in tiered.search(vector_queries=[query], filter="session_id eq 's1'")] == ["a"]
+    tiered.upload_documents([_doc("c", "s1", "x", _unit(2))])
+    assert {r["id"] for r in tiered.search(vector_queries=[query], filter="session_id eq 's1'")} == {"a", "c"}
+    assert tiered.stats()["hydrations"] == 1
+
+    tiered.search(vector_queries=[query], filter="session_id eq 's2'")  # evicts s1
+    stats = tiered.stats()
+    assert stats["evictions"] == 1 and stats["hot_sessions"] == 1 and stats["l1_documents"] == 1
+
+    tiered.upload_documents([{"@search.action": "delete", "id": "b"}])
+    assert tiered.search(vector_queries=[query], filter="session_id eq 's2'") == []
+    assert len(remote) == 2
+
+
+class LaggingRemote(LocalVectorIndex):
+    """Remote index whose searches don't see documents until ``index_pending``."""
+
+    def __init__(self, dim):
+        super().__init__(dim)
+        self.pending = set()
+        self.on_search = None
+
+    def upload_documents(self, documents, **kwargs):
+        self.pending.update(d["id"] for d in documents if d.get("@search.action") != "delete")
+        return super().upload_documents(documents)
+
+    def index_pending(self):
+        self.pending.clear()
+
+    def search(self, search_text="*", **kwargs):
+        if self.on_search:
+            self.on_search()
+        return [d for d in super().search(search_text, **kwargs) if d["id"] not in self.pending]
+
+
+def test_tiered_hydration_keeps_unindexed_and_concurrent_writes():
+    remote = LaggingRemote(dim=8)
+    tiered = TieredSearchClient(LocalVectorIndex(dim=8), remote, max_hot_sessions=4)
+    scoped = {"filter": "session_id eq 's1'"}
+
+    # Written while s1 is cold and not yet indexed by the remote
+    tiered.upload_documents([_doc("a", "s1", "x", _unit(0))])
+    remote.on_search = lambda: (setattr(remote, "on_search", None),
+                                tiered.upload_documents([_doc("b", "s1", "x", _unit(1))]))
+    assert {r["id"] for r in tiered.search(**scoped)} == {"a", "b"}
+
+    # Another replica writes straight to the remote; seen once the hot TTL passes
+    remote.index_pending()
+    LocalVectorIndex.upload_documents(remote, [_doc("c", "s1", "x", _unit(2))])
+    assert {r["id"] for r in tiered.search(**scoped)} == {"a", "b"}
+    tiered.hot_ttl = 0
+    assert {r["id"] for r in tiered.search(**scoped)} == {"a", "b", "c"}
+    assert tiered.stats()["revalidations"] == 1
+
+
+def test_memory_service_offline_round_trip():
+    async def run():
+        service = A2AMemoryService(search_client=LocalVectorIndex(DIM), embedding_engine=FakeEmbeddingEngine())
+        await service.store_interaction({
+            "agent_name": "DocumentProcessor",
+            "interaction_id": "doc-1",
+            "outbound_payload": {"file": "invoice.pdf"},
+            "inbound_payload": {"content": "invoice total amount due contoso", "filename": "invoice.pdf"},
+        }, session_id="s1")
+        long_text = " ".join(f"chunk{i} quarterly revenue report" for i in range(6000))
+        await service.store_interaction({
+            "agent_name": "DocumentProcessor",
+            "interaction_id": "doc-2",
+            "filename": "report.pdf",
+            "inbound_payload": {"content": long_text, "filename": "report.pdf"},
+        }, session_id="s1")
+
+        assert service.get_processed_filenames("s1") == {"invoice.pdf", "report.pdf"}
+        assert service.get_processed_filenames("s2") == set()
+
+        results = await service.search_similar_interactions("invoice total amount due contoso", session_id="s1", top_k=3)
+        assert results and "invoice" in json.loads(results[0]["inbound_payload"])["content"]
+        assert await service.search_similar_interactions("invoice", session_id="s2") == []
+
+        assert service.delete_by_filename("s1", "report.pdf")
+        assert service.get_processed_filenames("s1") == {"invoice.pdf"}
+        assert service.clear_all_interactions("s1")
+        assert len(service.search_client) == 0
+        assert service.get_search_backend_stats() == {"backend": "custom", "documents": 0}
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_parse_filter()
+    test_vector_search_filters_and_scores()
+    test_delete_compacts_and_persists()
+    test_writes_are_journaled_not_rewritten()
+    test_tiered_hydrates_once_and_mirrors_writes()
+    test_tiered_hydration_keeps_unindexed_and_concurrent_writes()
+    test_memory_service_offline_round_trip()
+    print("✅ Memory backend tests passed")
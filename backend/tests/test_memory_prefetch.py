@@ -0,0 +1,149 @@
+"""
+Test: memory context for outbound agent messages is looked up once per
+context and query — parallel sibling calls share one in-flight search, a
+lookup over the latency budget sends the message without memory context
+(and still warms the cache), stored-interaction payloads are parsed once
+per interaction, and storing a new interaction invalidates the context.
+
+Uses a fake memory search; no embedding model or search index is contacted.
+
+Run:  python backend/tests/test_memory_prefetch.py
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import hosts.multiagent.foundry_agent_a2a  # noqa: F401  (loads the core package first)
+from hosts.multiagent import memory_prefetch
+from hosts.multiagent.foundry_agent_a2a import FoundryHostAgent2
+from hosts.multiagent.memory_prefetch import MemoryPrefetcher, memory_result_text
+from hosts.multiagent.models import SessionContext
+
+CONTEXT = "user_1::conv"
+
+
+def _result(n, agent="AI Foundry QuickBooks Agent"):
+    payload = {"status": {"message": {"parts": [{"kind": "text", "text": f"Invoice {n} created"}]}}}
+    return {"id": f"interaction-{n}", "agent_name": agent, "inbound_payload": json.dumps(payload)}
+
+
+class FakeSearch:
+    def __init__(self, delay=0.05, results=None):
+        self.delay = delay
+        self.results = results if results is not None else [_result(1), _result(2)]
+        self.calls = []
+
+    async def __call__(self, query, context_id, top_k):
+        self.calls.append((query, context_id, top_k))
+        await asyncio.sleep(self.delay)
+        return self.results
+
+
+def test_concurrent_identical_lookups_share_one_search():
+    async def run():
+        search = FakeSearch()
+        prefetcher = MemoryPrefetcher(search)
+        prefetcher.prefetch("Create the ACME invoice", CONTEXT)
+        results = await asyncio.gather(
+            prefetcher.results("Create the ACME invoice", CONTEXT),
+            prefetcher.results("  create the   ACME invoice ", CONTEXT),
+            prefetcher.results("Create the ACME invoice", CONTEXT),
+        )
+        assert len(search.calls) == 1 and all(r == search.results for r in results)
+        # Another context or query is a separate lookup
+        await prefetcher.results("Create the ACME invoice", "user_2::conv")
+        await prefetcher.results("Email the invoice", CONTEXT)
+        assert len(search.calls) == 3
+
+        # A failing search gives no results rather than an error
+        async def failing(query, context_id, top_k):
+            raise RuntimeError("search index unavailable")
+        prefetcher.search = failing
+        assert await prefetcher.results("Something new", CONTEXT) == []
+    asyncio.run(run())
+
+
+def test_slow_lookup_is_skipped_but_warms_the_cache():
+    async def run():
+        search = FakeSearch(delay=0.3)
+        prefetcher = MemoryPrefetcher(search, budget_ms=50)
+        assert await prefetcher.results("Create the ACME invoice", CONTEXT) is None
+        assert prefetcher.over_budget == 1
+        await asyncio.sleep(0.35)  # the lookup was not cancelled
+        assert await prefetcher.results("Create the ACME invoice", CONTEXT) == search.results
+        assert len(search.calls) == 1
+
+        prefetcher.invalidate(CONTEXT)
+        await prefetcher.results("Create the ACME invoice", CONTEXT, budget_ms=1000)
+        assert len(search.calls) == 2
+    asyncio.run(run())
+
+
+def test_result_text_is_extracted_once_per_interaction():
+    document = {"id": "doc-1", "inbound_payload": json.dumps({"content": "Quarterly report text"})}
+    message = {"inbound_payload": {"parts": [{"root": {"text": "From the root"}}]}}
+    outbound = {"inbound_payload": "not json", "outbound_payload": json.dumps(
+        {"message": {"parts": [{"kind": "text", "text": "Sent"}]}})}
+    legacy = {"inbound_payload": json.dumps({"content": "{'result': 'Legacy output'}"})}
+    assert memory_result_text(document) == "Quarterly report text"
+    assert memory_result_text(message) == "From the root"
+    assert memory_result_text(outbound) == "Sent"
+    assert memory_result_text(legacy) == "Legacy output"
+    assert memory_result_text({"inbound_payload": "{}"}) == ""
+
+    extracted = []
+    original = memory_prefetch.memory_result_text
+    memory_prefetch.memory_result_text = lambda result: extracted.append(result) or original(result)
+    try:
+        prefetcher = MemoryPrefetcher(FakeSearch(), cache_size=2)
+        for _ in range(3):
+            assert prefetcher.result_text(_result(1)) == "Invoice 1 created"
+            assert prefetcher.result_text(_result(2)) == "Invoice 2 created"
+        assert len(extracted) == 2
+        prefetcher.result_text(_result(3))  # evicts interaction-1
+        prefetcher.result_text(_result(1))
+        assert len(extracted) == 4
+    finally:
+        memory_prefetch.memory_result_text = original
+
+
+def _host(search, budget_ms=1000):
+    host = FoundryHostAgent2.__new__(FoundryHostAgent2)
+    host.memory_summary_max_chars = 5000
+    host.memory_prefetcher = MemoryPrefetcher(search, budget_ms=budget_ms)
+    return host
+
+
+def test_sibling_messages_share_the_lookup():
+    async def run():
+        search = FakeSearch()
+        host = _host(search)
+        session = SessionContext(contextId=CONTEXT)
+        message = "Summarize the ACME invoices"
+        host._prefetch_memory(message, CONTEXT)  # as when the tool calls are parsed
+        enriched = await asyncio.gather(*[
+            host._add_context_to_message(message, session, target_agent_name=name)
+            for name in ("Writer", "Reviewer", "Emailer")
+        ])
+        assert len(search.calls) == 1 and search.calls[0][2] == 10
+        for text in enriched:
+            assert "From AI Foundry QuickBooks Agent: Invoice 1 created" in text
+            assert text.endswith(f"Current request: {message}")
+
+        # Over budget: the message goes out without memory context
+        slow = _host(FakeSearch(delay=0.3), budget_ms=20)
+        assert await slow._add_context_to_message(message, session, thread_id="thread-1") == message
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_lookups_share_one_search()
+    test_slow_lookup_is_skipped_but_warms_the_cache()
+    test_result_text_is_extracted_once_per_interaction()
+    test_sibling_messages_share_the_lookup()
+    print("✅ Memory prefetch tests passed")
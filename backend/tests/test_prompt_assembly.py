@@ -0,0 +1,172 @@
+"""
+Test: the planner prompt is assembled within token budgets and in a
+prefix-stable order — consecutive iterations share everything up to the
+newest task, finished tasks are one compact line each, long outputs and
+oversized catalogs are cut to budget, the orchestration loop records the
+prompt size of every planner call, and counting never waits for the token
+encoding to load.
+
+Uses a fake host with a scripted planner; no LLM or remote agent is required.
+
+Run:  python backend/tests/test_prompt_assembly.py
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import hosts.multiagent.foundry_agent_a2a  # noqa: F401  (loads the core package first)
+from hosts.multiagent.capability_index import CapabilityIndex
+from hosts.multiagent.core.workflow_orchestration import WorkflowOrchestration
+from hosts.multiagent.models import AgentModePlan, AgentModeTask, NextStep, SessionContext
+from hosts.multiagent import prompt_assembly
+from hosts.multiagent.prompt_assembly import OMITTED_OUTPUT, PlannerPromptBuilder, count_tokens
+
+AGENTS = [
+    {"name": f"Agent {i}", "description": f"Handles domain {i} requests end to end",
+     "skills": [{"id": f"s{i}", "name": f"Skill {i}", "description": "Does the domain work"}]}
+    for i in range(5)
+]
+
+
+def _task(n, state="completed", result=None, agent="Agent 1"):
+    return AgentModeTask(task_id=f"t{n}", task_description=f"[Step {n}] Do part {n}", recommended_agent=agent,
+                         state=state, output={"result": result or f"part {n} done", "artifacts": ["big"]})
+
+
+def test_consecutive_iterations_share_a_prefix():
+    builder = PlannerPromptBuilder()
+    tasks = [_task(1), _task(2)]
+    first = builder.build("Ship the report", AGENTS, tasks + [_task(3, state="running")])
+    tasks.append(_task(3))
+    second = builder.build("Ship the report", AGENTS, tasks, progress="\n\nWorkflow Progress: 3 done")
+
+    stable = first.text[:first.text.index('"state":"running"')].rsplit("\n", 1)[0]
+    assert second.text.startswith(stable)
+    assert second.stable_prefix_tokens > first.stable_prefix_tokens
+    assert second.text.index("Available Agents") < second.text.index("Tasks So Far") < second.text.index("Plan Status")
+    # one compact line per task, without bulky or volatile fields
+    line = json.dumps({"task_description": "[Step 1] Do part 1", "recommended_agent": "Agent 1",
+                       "state": "completed", "output": {"result": "part 1 done"}}, separators=(",", ":"))
+    assert line in second.text and "created_at" not in second.text and "artifacts" not in second.text
+
+
+def test_smaller_than_pretty_printed_plan():
+    plan = AgentModePlan(goal="Ship the report", tasks=[_task(n, result="x " * 400) for n in range(6)])
+    # The previous prompt: pretty-printed plan with results cut at 500 chars
+    dumped = plan.model_dump()
+    for task in dumped["tasks"]:
+        task["output"] = {"result": task["output"]["result"][:500] + "... [truncated]"}
+    old = f"{json.dumps(dumped, indent=2, default=str)}\n{json.dumps(AGENTS, indent=2)}"
+    prompt = PlannerPromptBuilder().build(plan.goal, AGENTS, plan.tasks)
+    assert prompt.total_tokens < count_tokens(old) * 0.85
+
+    # ...and it no longer grows without bound as tasks complete
+    many = [_task(n, result="x " * 400) for n in range(60)]
+    assert PlannerPromptBuilder().build(plan.goal, AGENTS, many).section_tokens["tasks"] <= 6000
+
+
+def test_section_budgets():
+    builder = PlannerPromptBuilder(agents_tokens=60, plan_tokens=300, task_output_tokens=40)
+    tasks = [_task(n, result="word " * 200) for n in range(6)]
+    prompt = builder.build("Goal", AGENTS, tasks, other_agents=["Agent 9"])
+
+    assert prompt.text.count("... [truncated]") >= 1
+    assert prompt.text.count(OMITTED_OUTPUT) >= 1
+    # outputs are dropped oldest first; the newest result is still there
+    lines = [line for line in prompt.text.splitlines() if line.startswith('{"task_description"')]
+    assert OMITTED_OUTPUT in lines[0] and OMITTED_OUTPUT not in lines[-1]
+    assert prompt.section_tokens["tasks"] <= 300 + 40
+    # agents past the catalog budget are still listed by name
+    assert prompt.omitted_agents[0] == "Agent 9" and "Agent 4" in prompt.omitted_agents
+    assert "cards omitted): Agent 9" in prompt.text
+
+
+class FakeHost(WorkflowOrchestration):
+    def __init__(self):
+        self.cards = {}
+        self.capability_index = CapabilityIndex()
+        self.prompts = []
+        self.planner_calls = 0
+        self._active_conversations = {}
+
+    async def _call_azure_openai_structured(self, system_prompt, user_prompt, response_model, context_id):
+        self.prompts.append(user_prompt)
+        self.planner_calls += 1
+        if self.planner_calls == 1:
+            return NextStep(goal_status="incomplete", reasoning="work",
+                            next_task={"task_description": "Write the summary", "recommended_agent": "Writer"})
+        return NextStep(goal_status="completed", reasoning="done")
+
+    async def _execute_orchestrated_task(self, task, session_context, context_id, workflow,
+                                         user_message, extract_text_fn, previous_task_outputs=None):
+        task.state = "completed"
+        task.output = {"result": "summary written"}
+        return {"output": "summary written", "hitl_pause": False}
+
+    async def _emit_granular_agent_event(self, *args, **kwargs):
+        pass
+
+    async def _emit_plan_update(self, plan, context_id, reasoning=None):
+        pass
+
+    def is_cancelled(self, context_id):
+        return False
+
+    def get_interrupt(self, context_id):
+        return None
+
+    def _extract_text_from_response(self, response):
+        return str(response)
+
+
+def test_loop_records_prompt_tokens():
+    host = FakeHost()
+    session = SessionContext(contextId="user_1::conv")
+    asyncio.run(host._agent_mode_orchestration_loop("Summarize the quarter", "user_1::conv", session))
+    assert host.planner_calls == 2 and len(host.planner_prompt_tokens) == 2
+    assert host.planner_prompt_tokens[1] > host.planner_prompt_tokens[0]
+    assert host.prompts[1].startswith(host.prompts[0].split("(none yet)")[0])
+    assert '"output":{"result":"summary written"}' in host.prompts[1]
+
+
+def test_counting_does_not_wait_for_encoding_load():
+    release = threading.Event()
+
+    class SlowEncoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    class SlowTiktoken:
+        # Stands in for a BPE download that hangs while offline
+        def get_encoding(self, name):
+            release.wait(5)
+            return SlowEncoding()
+
+    saved = prompt_assembly.tiktoken
+    prompt_assembly.tiktoken = SlowTiktoken()
+    try:
+        text = "one two three four five six seven eight"
+        assert count_tokens(text, "slow_test") == 10  # estimated, load still pending
+        loader = prompt_assembly.warm_encoding("slow_test")
+        assert loader is prompt_assembly.warm_encoding("slow_test") and loader.is_alive()
+        release.set()
+        loader.join(timeout=5)
+        assert count_tokens(text, "slow_test") == 8
+    finally:
+        prompt_assembly.tiktoken = saved
+        release.set()
+
+
+if __name__ == "__main__":
+    test_consecutive_iterations_share_a_prefix()
+    test_smaller_than_pretty_printed_plan()
+    test_section_budgets()
+    test_loop_records_prompt_tokens()
+    test_counting_does_not_wait_for_encoding_load()
+    print("✅ Prompt assembly tests passed")
@@ -0,0 +1,241 @@
+"""
+Test: the shared Foundry run driver — streamed run-step events surface tool
+calls as they happen, requires_action is answered immediately (on the stream
+or, when polling, without waiting out a poll interval), polling backs off
+while nothing changes, and runs with no tool outputs or past their deadline
+are cancelled.
+
+Uses an in-process stand-in for the async Agents runs API; no Azure service
+is contacted.
+
+Run:  python backend/tests/test_run_driver.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+remote_agents_dir = Path(__file__).resolve().parents[2] / "remote_agents"
+sys.path.insert(0, str(remote_agents_dir))
+
+from shared import run_driver
+from shared.run_driver import drive_run
+
+
+def _tool_call(call_id, tool_type="function"):
+    return SimpleNamespace(id=call_id, type=tool_type)
+
+
+class FakeRun:
+    """Scripted run: moves through ``phases`` (seconds, status) as time passes."""
+
+    def __init__(self, run_id, phases, tool_calls=()):
+        self.id = run_id
+        self.phases = list(phases)
+        self.tool_calls = list(tool_calls)
+        self.started = time.monotonic()
+        self.submitted = []
+        self.cancelled = False
+        self.last_error = None
+
+    def snapshot(self):
+        if self.cancelled:
+            status = "cancelled"
+        else:
+            elapsed = time.monotonic() - self.started
+            status = "queued"
+            for at, phase in self.phases:
+                if elapsed >= at:
+                    status = phase
+            if status == "requires_action" and self.submitted:
+                status = "completed"
+        required_action = None
+        if status == "requires_action":
+            required_action = SimpleNamespace(
+                type="submit_tool_outputs",
+                submit_tool_outputs=SimpleNamespace(tool_calls=self.tool_calls),
+            )
+        return SimpleNamespace(id=self.id, status=status, required_action=required_action, last_error=self.last_error)
+
+    def steps(self):
+        if time.monotonic() - self.started < self.phases[0][0]:
+            return []
+        details = SimpleNamespace(type="tool_calls", tool_calls=self.tool_calls)
+        return [SimpleNamespace(step_details=details)]
+
+
+class FakeStream:
+    """Async context manager yielding (event_type, data, None) tuples from a queue."""
+
+    def __init__(self, service, run):
+        self.service = service
+        self.run = run
+        self.events = asyncio.Queue()
+        self.task = None
+
+    async def __aenter__(self):
+        self.task = asyncio.ensure_future(self._emit())
+        return self
+
+    async def __aexit__(self, *exc):
+        self.task.cancel()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.events.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def _emit(self):
+        """Push an event whenever the run's state changes."""
+        last = None
+        while True:
+            run = self.run.snapshot()
+            if run.status != last:
+                last = run.status
+                if run.status == "in_progress" and self.run.steps():
+                    await self.events.put(("thread.run.step.created", self.run.steps()[0], None))
+                await self.events.put((f"thread.run.{run.status}", run, None))
+                if run.status in ("completed", "failed", "cancelled"):
+                    await self.events.put(("done", "[DONE]", None))
+                    await self.events.put(None)
+                    return
+                if run.status == "requires_action":
+                    return  # resumed by submit_tool_outputs_stream
+            await asyncio.sleep(0.005)
+
+
+class FakeRuns:
+    def __init__(self, service):
+        self.service = service
+
+    async def create(self, thread_id, agent_id, **kwargs):
+        self.service.calls["create"] += 1
+        return self.service.new_run().snapshot()
+
+    async def get(self, thread_id, run_id):
+        self.service.calls["get"] += 1
+        return self.service.run.snapshot()
+
+    async def submit_tool_outputs(self, thread_id, run_id, **outputs):
+        self.service.submitted_at = time.monotonic()
+        self.service.run.submitted.append(outputs)
+
+    async def cancel(self, thread_id, run_id):
+        self.service.run.cancelled = True
+
+
+class FakeStreamingRuns(FakeRuns):
+    async def stream(self, thread_id, agent_id, **kwargs):
+        self.service.calls["stream"] += 1
+        return FakeStream(self.service, self.service.new_run())
+
+    async def submit_tool_outputs_stream(self, thread_id, run_id, event_handler, **outputs):
+        await self.submit_tool_outputs(thread_id, run_id, **outputs)
+        event_handler.task = asyncio.ensure_future(event_handler._emit())
+
+
+class FakeRunSteps:
+    def __init__(self, service):
+        self.service = service
+
+    async def list(self, thread_id, run_id):
+        for step in self.service.run.steps():
+            yield step
+
+
+class FakeAgentsClient:
+    """Stands in for ``azure.ai.agents.aio.AgentsClient``."""
+
+    def __init__(self, phases, tool_calls=(), streaming=True):
+        self.phases = phases
+        self.tool_calls = tool_calls
+        self.runs = FakeStreamingRuns(self) if streaming else FakeRuns(self)
+        self.run_steps = FakeRunSteps(self)
+        self.run = None
+        self.submitted_at = None
+        self.calls = {"create": 0, "get": 0, "stream": 0}
+
+    def new_run(self):
+        self.run = FakeRun("run_1", self.phases, self.tool_calls)
+        return self.run
+
+
+async def _answer(run):
+    calls = run.required_action.submit_tool_outputs.tool_calls
+    return {"tool_outputs": [{"tool_call_id": c.id, "output": "{}"} for c in calls]}
+
+
+async def _collect(client, handler=_answer, **kwargs):
+    updates = [u async for u in drive_run(client, "thread_1", "agent_1", handler, **kwargs)]
+    return [u.tool_call.id for u in updates if u.tool_call is not None], updates[-1]
+
+
+def test_streaming_dispatches_tool_calls_on_requires_action():
+    async def run():
+        client = FakeAgentsClient([(0.02, "in_progress"), (0.05, "requires_action")], [_tool_call("call_1")])
+        tool_calls, final = await _collect(client)
+        assert tool_calls == ["call_1"]
+        assert final.done and final.error is None and final.run.status == "completed"
+        assert client.run.submitted == [{"tool_outputs": [{"tool_call_id": "call_1", "output": "{}"}]}]
+        assert client.calls == {"create": 0, "get": 0, "stream": 1}
+        # answered within a few event-loop ticks of the run asking
+        assert client.submitted_at - client.run.started < 0.2
+    asyncio.run(run())
+
+
+def test_polling_fallback_backs_off_and_answers_immediately():
+    async def run():
+        client = FakeAgentsClient([(0.02, "in_progress"), (0.6, "requires_action")], [_tool_call("call_1")],
+                                  streaming=False)
+        tool_calls, final = await _collect(client)
+        assert tool_calls == ["call_1"] and final.error is None and final.run.status == "completed"
+        assert client.calls["create"] == 1
+        # 0.25s, 0.375s... instead of a poll every 2s, with no extra sleep before submitting
+        assert client.calls["get"] <= 6
+        assert client.submitted_at - client.run.started < 0.6 + run_driver.RUN_POLL_MAX_SECONDS
+    asyncio.run(run())
+
+
+def test_stream_failure_falls_back_to_polling():
+    async def run():
+        client = FakeAgentsClient([(0.0, "in_progress"), (0.01, "completed")])
+
+        async def broken_stream(**kwargs):
+            raise RuntimeError("streaming not supported")
+        client.runs.stream = broken_stream
+        tool_calls, final = await _collect(client)
+        assert final.error is None and final.run.status == "completed" and client.calls["create"] == 1
+    asyncio.run(run())
+
+
+def test_missing_outputs_and_timeout_cancel_the_run():
+    async def run():
+        async def no_outputs(run):
+            return None
+        client = FakeAgentsClient([(0.0, "requires_action")], [_tool_call("call_1")])
+        _, final = await _collect(client, handler=no_outputs)
+        assert final.error == "Run is stuck in requires_action state - please try again"
+        assert client.run.cancelled
+
+        client = FakeAgentsClient([(0.0, "in_progress")], streaming=False)
+        _, final = await _collect(client, timeout=0.3)
+        assert final.error == "Request timed out" and client.run.cancelled
+
+        client = FakeAgentsClient([(0.0, "in_progress"), (0.01, "failed")])
+        _, final = await _collect(client)
+        assert final.error == "Run ended with status 'failed'"
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_streaming_dispatches_tool_calls_on_requires_action()
+    test_polling_fallback_backs_off_and_answers_immediately()
+    test_stream_failure_falls_back_to_polling()
+    test_missing_outputs_and_timeout_cancel_the_run()
+    print("✅ Run driver tests passed")
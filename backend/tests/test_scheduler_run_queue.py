@@ -0,0 +1,209 @@
+"""
+Test: due schedule runs go through a bounded run queue — global and
+per-session caps hold, a schedule still queued or running isn't queued
+again, start lag is measured, only the leader replica fires, recurring
+triggers are jittered, schedules changed on other replicas are adopted,
+and runs read the workflow definition as currently stored.
+
+Uses in-memory runners and a fake leader lock; no database is contacted.
+
+Run:  python backend/tests/test_scheduler_run_queue.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+os.environ.pop("DATABASE_URL", None)
+
+from service.scheduler_service import ScheduledWorkflow, ScheduleRunQueue, ScheduleType, WorkflowScheduler
+
+
+class Runner:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = {}
+        self.peak = 0
+        self.started = []
+
+    async def __call__(self, schedule_id):
+        session = schedule_id.split("/")[0]
+        self.started.append(schedule_id)
+        self.active[session] = self.active.get(session, 0) + 1
+        self.peak = max(self.peak, sum(self.active.values()))
+        assert self.active[session] <= 1, "per-session cap exceeded"
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active[session] -= 1
+
+
+def test_caps_and_deduplication():
+    async def run():
+        runner = Runner()
+        queue = ScheduleRunQueue(runner, max_concurrent=3, max_per_session=1, max_queued=10)
+        for session in ("a", "b", "c", "d"):
+            for n in range(2):
+                assert queue.submit(f"{session}/{n}", session, due_at=time.time() - 1.0)
+        assert not queue.submit("a/0", "a")  # already running
+        assert queue.stats()["running"] == 3 and queue.stats()["queue_depth"] == 5
+        # d is blocked only by the global cap, a's second run only by its session
+        await asyncio.sleep(0)
+        assert runner.started == ["a/0", "b/0", "c/0"]
+        while queue.stats()["running"] or queue.stats()["queue_depth"]:
+            await asyncio.sleep(0.01)
+        stats = queue.stats()
+        assert runner.peak == 3 and len(runner.started) == 8
+        assert stats["completed"] == 8 and stats["deduplicated"] == 1
+        assert stats["max_start_lag_seconds"] >= 1.0
+    asyncio.run(run())
+
+
+def test_full_queue_rejects():
+    async def run():
+        queue = ScheduleRunQueue(Runner(), max_concurrent=1, max_per_session=1, max_queued=1)
+        assert queue.submit("a/0", "a") and queue.submit("a/1", "a")
+        assert not queue.submit("a/2", "a")
+        assert queue.stats()["rejected"] == 1
+        await queue.stop(timeout=0.01)
+        assert queue.stats()["queue_depth"] == 0 and queue.stats()["running"] == 0
+    asyncio.run(run())
+
+
+class FakeLeaderLock:
+    def __init__(self, leader):
+        self.is_leader = leader
+
+    def check(self):
+        return self.is_leader
+
+    def close(self):
+        pass
+
+
+def _scheduler(tmp):
+    scheduler = WorkflowScheduler(data_dir=tmp)
+    scheduler.run_queue = ScheduleRunQueue(Runner(delay=0.0))
+    return scheduler
+
+
+def test_only_leader_enqueues():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            scheduler = _scheduler(tmp)
+            schedule = scheduler.create_schedule("wf", "Report", "s1", ScheduleType.INTERVAL, interval_minutes=5)
+            scheduler._leader_lock = FakeLeaderLock(leader=False)
+            await scheduler._enqueue_scheduled_workflow(schedule.id)
+            assert scheduler.run_queue.stats()["enqueued"] == 0 and not scheduler.stats()["leader"]
+
+            scheduler._leader_lock.is_leader = True
+            await scheduler._enqueue_scheduled_workflow(schedule.id)
+            assert scheduler.run_queue.stats()["enqueued"] == 1
+    asyncio.run(run())
+
+
+def test_recurring_triggers_are_jittered():
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = _scheduler(tmp)
+        daily = ScheduledWorkflow(id="d", workflow_id="wf", workflow_name="Report", session_id="s1",
+                                  schedule_type=ScheduleType.DAILY, time_of_day="09:00")
+        once = ScheduledWorkflow(id="o", workflow_id="wf", workflow_name="Report", session_id="s1",
+                                 schedule_type=ScheduleType.ONCE, run_at="2030-01-01T09:00:00")
+        assert scheduler._create_trigger(daily).jitter == 30
+        assert not hasattr(scheduler._create_trigger(once), "jitter")
+
+
+def test_adopts_schedules_from_other_replicas():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            scheduler = _scheduler(tmp)
+            await scheduler.start()
+            try:
+                kept = scheduler.create_schedule("wf", "Kept", "s1", ScheduleType.INTERVAL, interval_minutes=5)
+                scheduler.create_schedule("wf", "Deleted", "s1", ScheduleType.INTERVAL, interval_minutes=5)
+                added = ScheduledWorkflow(id="new", workflow_id="wf2", workflow_name="Added", session_id="s2",
+                                          schedule_type=ScheduleType.INTERVAL, interval_minutes=10)
+                scheduler._apply_schedule_rows([kept.to_dict(), added.to_dict()])
+                assert set(scheduler.schedules) == {kept.id, "new"}
+                assert {job.id for job in scheduler.scheduler.get_jobs()} == {kept.id, "new"}
+            finally:
+                await scheduler.stop()
+    asyncio.run(run())
+
+
+def test_runs_read_current_workflow_definition():
+    from service import chat_history_service
+    from service.workflow_service import Workflow, WorkflowService
+
+    class Cursor:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def execute(self, sql, params):
+            self.name = params[0].lower()
+
+        def fetchone(self):
+            return next((row for row in self.rows if row["name"].lower() == self.name), None)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+    class Connection:
+        def __init__(self, rows):
+            self.rows, self.borrowed = rows, 0
+
+        def cursor(self, cursor_factory=None):
+            self.borrowed += 1
+            return Cursor(self.rows)
+
+        def rollback(self):
+            pass
+
+    now = datetime.now(timezone.utc)
+    row = {"id": "wf1", "name": "Report", "description": "", "category": "Custom", "user_id": "u1",
+           "steps": [{"agentName": "Edited Agent"}], "connections": [], "goal": "", "is_custom": True,
+           "created_at": now, "updated_at": now}
+    conn = Connection([row])
+
+    @contextmanager
+    def fake_db_connection():
+        yield conn
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = WorkflowService(workflows_file=Path(tmp) / "workflows.json")
+    service.use_database = True
+    service.workflows["wf1"] = Workflow(id="wf1", name="Report", description="", category="Custom",
+                                        user_id="u1", steps=[{"agentName": "Stale Agent"}], connections=[])
+    original = chat_history_service.db_connection
+    chat_history_service.db_connection = fake_db_connection
+    try:
+        # Edited on another replica: the run sees the stored steps, and the cache is refreshed
+        assert service.fetch_workflow_by_name("report").steps == [{"agentName": "Edited Agent"}]
+        assert service.get_workflow("wf1").steps == [{"agentName": "Edited Agent"}]
+        # Deleted elsewhere: not run, and dropped from the cache
+        conn.rows = []
+        assert service.fetch_workflow_by_name("Report") is None and service.get_workflow("wf1") is None
+        assert conn.borrowed == 2
+    finally:
+        chat_history_service.db_connection = original
+
+
+if __name__ == "__main__":
+    test_caps_and_deduplication()
+    test_full_queue_rejects()
+    test_only_leader_enqueues()
+    test_recurring_triggers_are_jittered()
+    test_adopts_schedules_from_other_replicas()
+    test_runs_read_current_workflow_definition()
+    print("✅ Scheduler run queue tests passed")
@@ -0,0 +1,180 @@
+"""
+Test: uploads stream to disk and to blob blocks chunk by chunk — blocks are
+staged concurrently and committed in order, identical content is
+deduplicated until the file is deleted, blob failures fall back to the
+local copy, and the user-delegation key behind SAS URLs is fetched once
+and reused (and retried after a cooldown when fetching it fails).
+
+Uses fake blob clients; no storage account is contacted.
+
+Run:  python backend/tests/test_streaming_upload.py
+"""
+
+import asyncio
+import base64
+import io
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from azure.storage.blob import UserDelegationKey
+from starlette.datastructures import UploadFile
+
+from service.blob_uploads import BlobStore, UploadDeduper, stream_upload
+
+
+class FakeBlobClient:
+    url = "https://account.blob.core.windows.net/a2a-files/uploads/s1/f1/report.pdf"
+    account_name = "account"
+    container_name = "a2a-files"
+    blob_name = "uploads/s1/f1/report.pdf"
+
+    def __init__(self, delay=0.02, fail_on_block=None):
+        self.delay = delay
+        self.fail_on_block = fail_on_block
+        self.staged = {}
+        self.committed = None
+        self.active = 0
+        self.peak = 0
+
+    async def stage_block(self, block_id, data, length):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if len(self.staged) == self.fail_on_block:
+                raise ConnectionError("storage unavailable")
+            self.staged[block_id] = data
+        finally:
+            self.active -= 1
+
+    async def commit_block_list(self, block_ids, **kwargs):
+        self.committed = (list(block_ids), kwargs)
+
+
+def _upload(data, name="report.pdf"):
+    return UploadFile(file=io.BytesIO(data), filename=name)
+
+
+def test_streams_blocks_concurrently_in_order():
+    async def run():
+        data = bytes(range(256)) * 400  # 100 KiB
+        blob = FakeBlobClient()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.pdf"
+            result = await stream_upload(_upload(data), path, blob_client=blob,
+                                         commit_kwargs={"metadata": {"file_id": "f1"}}, chunk_size=8192)
+            assert path.read_bytes() == data
+        block_ids, kwargs = blob.committed
+        assert len(block_ids) == 13 and kwargs == {"metadata": {"file_id": "f1"}}
+        assert b"".join(blob.staged[block_id] for block_id in block_ids) == data
+        assert [base64.b64decode(b).decode() for b in block_ids[:2]] == ["00000000", "00000001"]
+        assert 1 < blob.peak <= 4  # staged concurrently, bounded
+        assert result.size == len(data) and result.blob_client is blob
+    asyncio.run(run())
+
+
+def test_duplicate_content_is_not_committed_again():
+    async def run():
+        deduper = UploadDeduper()
+        with tempfile.TemporaryDirectory() as tmp:
+            first = await stream_upload(_upload(b"same"), Path(tmp) / "a.pdf", blob_client=FakeBlobClient(),
+                                        dedupe_scope="s1:a.pdf", deduper=deduper)
+            deduper.remember("s1:a.pdf", first.sha256, {"file_id": "first"})
+
+            blob = FakeBlobClient()
+            second = await stream_upload(_upload(b"same"), Path(tmp) / "b.pdf", blob_client=blob,
+                                         dedupe_scope="s1:a.pdf", deduper=deduper)
+            assert second.duplicate == {"file_id": "first"}
+            assert blob.committed is None and not (Path(tmp) / "b.pdf").exists()
+
+            other_session = await stream_upload(_upload(b"same"), Path(tmp) / "c.pdf",
+                                                dedupe_scope="s2:a.pdf", deduper=deduper)
+            assert other_session.duplicate is None
+
+            # Deleting the file forgets it, so the same bytes are stored again
+            assert deduper.forget("s2", file_id="first") == 0
+            assert deduper.forget("s1", file_id="first") == 1
+            third = await stream_upload(_upload(b"same"), Path(tmp) / "d.pdf", blob_client=blob,
+                                        dedupe_scope=UploadDeduper.scope("s1", "a.pdf"), deduper=deduper)
+            assert third.duplicate is None and blob.committed is not None
+            deduper.remember(UploadDeduper.scope("s1", "a.pdf"), third.sha256, {"file_id": "third"})
+            assert deduper.forget("s1", "a.pdf") == 1
+    asyncio.run(run())
+
+
+def test_blob_failure_keeps_local_copy():
+    async def run():
+        blob = FakeBlobClient(delay=0.0, fail_on_block=1)
+        data = b"x" * 50000
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.pdf"
+            result = await stream_upload(_upload(data), path, blob_client=blob, chunk_size=8192)
+            assert path.read_bytes() == data
+        assert result.blob_client is None and blob.committed is None
+    asyncio.run(run())
+
+
+def test_user_delegation_key_is_cached():
+    class FakeService:
+        calls = 0
+
+        async def get_user_delegation_key(self, key_start_time, key_expiry_time):
+            FakeService.calls += 1
+            key = UserDelegationKey()
+            key.signed_oid = key.signed_tid = "00000000-0000-0000-0000-000000000000"
+            key.signed_start = key_start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+            key.signed_expiry = key_expiry_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+            key.signed_service, key.signed_version = "b", "2023-11-03"
+            key.value = base64.b64encode(b"k" * 32).decode()
+            return key
+
+    async def run():
+        store = BlobStore()
+        store._service = FakeService()
+        urls = [await store.sas_url(FakeBlobClient()) for _ in range(3)]
+        assert FakeService.calls == 1
+        assert all(url.startswith(FakeBlobClient.url + "?") and "sig=" in url for url in urls)
+
+        store._delegation_key_expiry = datetime.now(timezone.utc) + timedelta(minutes=30)  # nearly expired
+        await store.sas_url(FakeBlobClient())
+        assert FakeService.calls == 2
+
+        # A week-long SAS is capped at the delegation key's expiry, and reported as such
+        _, expiry = await store.signed_url(FakeBlobClient(), hours=7 * 24)
+        assert expiry == store._delegation_key_expiry < datetime.now(timezone.utc) + timedelta(days=2)
+    asyncio.run(run())
+
+
+def test_delegation_failure_is_retried_after_cooldown():
+    class FlakyService:
+        calls = 0
+
+        async def get_user_delegation_key(self, key_start_time, key_expiry_time):
+            FlakyService.calls += 1
+            raise RuntimeError("token endpoint unavailable")
+
+    async def run():
+        store = BlobStore()
+        store._service = FlakyService()
+        assert await store.sas_url(FakeBlobClient()) == FakeBlobClient.url
+        assert await store.sas_url(FakeBlobClient()) == FakeBlobClient.url
+        assert FlakyService.calls == 1  # cooling down, not latched
+
+        store._delegation_retry_at = 0.0  # cooldown over
+        await store.sas_url(FakeBlobClient())
+        assert FlakyService.calls == 2
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_streams_blocks_concurrently_in_order()
+    test_duplicate_content_is_not_committed_again()
+    test_blob_failure_keeps_local_copy()
+    test_user_delegation_key_is_cached()
+    test_delegation_failure_is_retried_after_cooldown()
+    print("✅ Streaming upload tests passed")
@@ -0,0 +1,245 @@
+"""
+Test: host background tasks run in supervised pools — each pool caps how
+many coroutines run at once, the progress pool drops its oldest queued
+events when full while status/memory/persistence pools never drop (``put``
+waits for room and is woken, also across loops), failures are logged and counted, tasks submitted from another
+event loop thread run on that loop, ``drain`` finishes or cancels what is
+left on shutdown, and stats report backlog and latency percentiles.
+
+No service is contacted.
+
+Run:  python backend/tests/test_task_supervisor.py
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from service.task_supervisor import BLOCK, DROP_OLDEST, TaskPool, TaskSupervisor, get_task_supervisor
+
+
+def test_concurrency_limit():
+    async def main():
+        pool = TaskPool("test.limit", concurrency=2, max_queue=10)
+        running = peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        for _ in range(6):
+            assert pool.submit(job())
+        assert pool.stats()["backlog"] == 4
+        assert await pool.drain(timeout=2) == 0
+        stats = pool.stats()
+        assert peak == 2 and stats["completed"] == 6 and stats["peak_backlog"] == 4
+        assert stats["queue_wait_ms"]["max"] >= stats["queue_wait_ms"]["p50"] > 0
+
+    asyncio.run(main())
+
+
+def test_telemetry_drops_oldest():
+    async def main():
+        pool = TaskPool("test.telemetry", concurrency=1, max_queue=2, drop_policy=DROP_OLDEST)
+        ran = []
+        release = asyncio.Event()
+
+        async def event(n):
+            if n == 0:
+                await release.wait()
+            ran.append(n)
+
+        for n in range(5):
+            assert pool.submit(event(n))
+        release.set()
+        await pool.drain(timeout=2)
+        # 1 and 2 were superseded by newer events while 0 held the only slot
+        assert ran == [0, 3, 4] and pool.stats()["dropped"] == 2
+
+    asyncio.run(main())
+
+
+def test_block_pools_never_drop():
+    async def main():
+        pool = TaskPool("test.block", concurrency=1, max_queue=1, drop_policy=BLOCK)
+        ran = []
+
+        async def write(n):
+            await asyncio.sleep(0.01)
+            ran.append(n)
+
+        # submit admits past the bound instead of dropping
+        for n in range(3):
+            assert pool.submit(write(n))
+        assert pool.stats()["overflowed"] == 1
+
+        # put waits for queue room (backpressure)
+        waiter = asyncio.create_task(pool.put(write(3)))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert await waiter
+        await pool.drain(timeout=2)
+        assert ran == [0, 1, 2, 3] and pool.stats()["dropped"] == 0
+
+    asyncio.run(main())
+
+
+def test_put_is_woken_from_another_loop():
+    """A put() waiting on one loop is woken when a task on another loop frees room."""
+    pool = TaskPool("test.wake", concurrency=1, max_queue=0, drop_policy=BLOCK)
+    worker_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=worker_loop.run_forever, daemon=True)
+    thread.start()
+    release = threading.Event()
+
+    async def hold():
+        await asyncio.to_thread(release.wait)
+
+    async def start_holder():
+        pool.submit(hold())
+
+    async def main():
+        waiter = asyncio.create_task(pool.put(asyncio.sleep(0)))
+        await asyncio.sleep(0.05)
+        assert not waiter.done() and pool._room_waiters
+        release.set()
+        assert await asyncio.wait_for(waiter, timeout=1)
+        await pool.drain(timeout=1)
+
+    try:
+        asyncio.run_coroutine_threadsafe(start_holder(), worker_loop).result(timeout=2)
+        asyncio.run(main())
+        assert pool.stats()["overflowed"] == 0
+    finally:
+        worker_loop.call_soon_threadsafe(worker_loop.stop)
+        thread.join(timeout=2)
+        worker_loop.close()
+
+
+def test_failures_are_counted():
+    async def main():
+        pool = TaskPool("test.failures", concurrency=4, max_queue=4)
+
+        async def broken():
+            raise RuntimeError("memory service unavailable")
+
+        async def fine():
+            pass
+
+        pool.submit(broken())
+        pool.submit(fine())
+        await pool.drain(timeout=2)
+        stats = pool.stats()
+        assert stats["failed"] == 1 and stats["completed"] == 1 and stats["active"] == 0
+
+    asyncio.run(main())
+
+
+def test_no_loop_and_closed_pool():
+    pool = TaskPool("test.closed", concurrency=1, max_queue=1)
+
+    async def job():
+        pass
+
+    assert pool.submit(job()) is False  # outside any event loop
+
+    async def main():
+        await pool.drain(timeout=0)
+        assert pool.submit(job()) is False
+        assert pool.stats()["dropped"] == 1
+
+    asyncio.run(main())
+
+
+def test_tasks_run_on_submitting_loop():
+    """The host runs on its own loop thread; drain runs on the server's loop."""
+    pool = TaskPool("test.threads", concurrency=2, max_queue=100)
+    host_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=host_loop.run_forever, daemon=True)
+    thread.start()
+    seen = []
+
+    async def job():
+        await asyncio.sleep(0.005)
+        seen.append(asyncio.get_running_loop())
+
+    async def submit_all():
+        for _ in range(10):
+            pool.submit(job())
+
+    try:
+        asyncio.run_coroutine_threadsafe(submit_all(), host_loop).result(timeout=2)
+        assert asyncio.run(pool.drain(timeout=2)) == 0
+        assert len(seen) == 10 and all(loop is host_loop for loop in seen)
+    finally:
+        host_loop.call_soon_threadsafe(host_loop.stop)
+        thread.join(timeout=2)
+        host_loop.close()
+
+
+def test_drain_cancels_leftovers():
+    async def main():
+        supervisor = TaskSupervisor({
+            "slow": TaskPool("test.slow", concurrency=1, max_queue=5),
+            "fast": TaskPool("test.fast", concurrency=1, max_queue=5),
+        })
+        cancelled = asyncio.Event()
+
+        async def stuck():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def fine():
+            pass
+
+        supervisor.submit("slow", stuck())
+        supervisor.submit("slow", fine())  # still queued behind the stuck task
+        supervisor.submit("fast", fine())
+        assert await supervisor.drain(timeout=0.1) == {"slow": 2, "fast": 0}
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        stats = supervisor.stats()
+        assert stats["slow"]["cancelled"] == 1 and stats["slow"]["dropped"] == 1
+        assert stats["slow"]["active"] == 0 and stats["fast"]["completed"] == 1
+
+    asyncio.run(main())
+
+
+def test_default_pools():
+    pools = get_task_supervisor().pools
+    # Only progress events may be dropped; status/terminal events never are
+    assert pools["progress"].drop_policy == DROP_OLDEST
+    assert all(pools[name].drop_policy == BLOCK for name in ("telemetry", "memory", "persistence"))
+
+    import hosts.multiagent.foundry_agent_a2a as host_module
+    import inspect
+
+    source = inspect.getsource(host_module)
+    assert "asyncio.create_task(self._emit" not in source
+    # The send_message response path never waits on memory/persistence queues
+    assert "await enqueue(" not in source
+    assert 'spawn("memory"' in source and 'spawn("persistence"' in source
+    assert 'spawn("progress", self._emit_simple_task_status' not in source
+
+
+if __name__ == "__main__":
+    test_concurrency_limit()
+    test_telemetry_drops_oldest()
+    test_block_pools_never_drop()
+    test_put_is_woken_from_another_loop()
+    test_failures_are_counted()
+    test_no_loop_and_closed_pool()
+    test_tasks_run_on_submitting_loop()
+    test_drain_cancels_leftovers()
+    test_default_pools()
+    print("✅ Task supervisor tests passed")
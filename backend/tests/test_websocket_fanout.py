@@ -0,0 +1,102 @@
+"""
+Test: WebSocketManager fans out through per-connection queues, so one slow
+client neither delays its tenant's other clients nor grows memory unbounded.
+
+Uses in-memory fake sockets; no server is started.
+
+Run:  python backend/tests/test_websocket_fanout.py
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from service.websocket_server import ConnectionSender, WebSocketManager
+
+
+class FakeSocket:
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.client = name
+        self.delay = delay
+        self.received = []
+        self.closed_with = None
+
+    async def send_text(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(json.loads(message))
+
+    async def close(self, code=1000, reason=None):
+        self.closed_with = code
+
+
+def _attach(manager, websocket, tenant_id, **sender_kwargs):
+    manager.active_connections.add(websocket)
+    manager.senders[websocket] = ConnectionSender(
+        websocket, manager._on_send_failed, manager.send_latencies_ms, **sender_kwargs
+    )
+    manager.register_tenant_connection(websocket, tenant_id)
+
+
+def test_slow_client_does_not_block_tenant():
+    async def run():
+        manager = WebSocketManager()
+        fast, slow = FakeSocket("fast"), FakeSocket("slow", delay=0.2)
+        _attach(manager, fast, "user_1")
+        _attach(manager, slow, "user_1")
+
+        started = asyncio.get_running_loop().time()
+        for i in range(5):
+            assert await manager.smart_broadcast({"eventType": "status", "contextId": "user_1", "n": i}) == 2
+        assert asyncio.get_running_loop().time() - started < 0.05  # enqueue only
+
+        await asyncio.sleep(0.05)
+        assert [e["n"] for e in fast.received] == [0, 1, 2, 3, 4]
+        assert len(slow.received) <= 1
+        stats = manager.get_send_stats()
+        assert stats["queue_depth_max"] >= 3 and stats["connections"] == 2
+    asyncio.run(run())
+
+
+def test_overflowing_client_is_disconnected():
+    async def run():
+        manager = WebSocketManager()
+        fast, stuck = FakeSocket("fast"), FakeSocket("stuck", delay=10)
+        _attach(manager, fast, "user_1")
+        _attach(manager, stuck, "user_1", max_queue=2)
+
+        for i in range(5):
+            await manager.broadcast_to_tenant({"eventType": "status", "n": i}, "user_1")
+        await asyncio.sleep(0.05)
+
+        assert stuck.closed_with == 1013
+        assert stuck not in manager.active_connections
+        assert manager.tenant_connections["user_1"] == {fast}
+        assert len(fast.received) == 5
+        assert manager.get_send_stats()["slow_consumer_disconnects"] == 1
+    asyncio.run(run())
+
+
+def test_send_timeout_disconnects():
+    async def run():
+        manager = WebSocketManager()
+        hung = FakeSocket("hung", delay=10)
+        _attach(manager, hung, "user_2", send_timeout=0.05)
+        await manager.broadcast_to_tenant({"eventType": "status"}, "user_2")
+        await asyncio.sleep(0.15)
+        assert hung.closed_with == 1011
+        assert manager.get_send_stats()["send_failures"] == 1
+        assert "user_2" not in manager.tenant_connections
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_slow_client_does_not_block_tenant()
+    test_overflowing_client_is_disconnected()
+    test_send_timeout_disconnects()
+    print("✅ WebSocket fan-out tests passed")
@@ -0,0 +1,127 @@
+"""
+Test: tenant event history is a bounded ring buffer with sequence numbers,
+survives a brief disconnect, and replays only events after ``last_seq`` —
+never message events (reloaded from history) and nothing across a server
+restart (epoch change).
+
+Uses in-memory fake sockets; no server is started.
+
+Run:  python backend/tests/test_websocket_replay.py
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from service.websocket_server import ConnectionSender, TenantEventLog, WebSocketManager
+
+
+class FakeSocket:
+    client = "fake"
+
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, message):
+        self.received.append(json.loads(message))
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def _attach(manager, websocket, tenant_id):
+    manager.active_connections.add(websocket)
+    manager.senders[websocket] = ConnectionSender(websocket, manager._on_send_failed, manager.send_latencies_ms)
+    manager.register_tenant_connection(websocket, tenant_id)
+
+
+def test_ring_buffer_limits():
+    log = TenantEventLog(max_events=3, max_bytes=30, idle_seconds=60, max_tenants=2)
+    for seq in range(1, 6):
+        log.append("t1", seq, f"event-{seq}")  # 7 bytes each
+    assert log.since("t1", 0) == ["event-3", "event-4", "event-5"]
+    assert log.since("t1", 4) == ["event-5"]
+
+    log.append("t1", 6, "x" * 20)  # byte budget drops older events
+    assert log.since("t1", 0) == ["event-5", "x" * 20]
+
+    log.append("t2", 7, "a")
+    log.append("t3", 8, "b")  # over max_tenants: least recently active (t1) goes
+    assert "t1" not in log and "t2" in log and "t3" in log
+
+
+def test_idle_tenants_are_evicted():
+    log = TenantEventLog(idle_seconds=0.01)
+    log.append("old", 1, "a")
+    time.sleep(0.02)
+    log.append("new", 2, "b")
+    assert "old" not in log and log.stats()["evictions"] == 1
+
+
+def test_reconnect_replays_missed_events():
+    async def run():
+        manager = WebSocketManager()
+        first = FakeSocket()
+        _attach(manager, first, "user_1")
+        await manager.smart_broadcast({"eventType": "status", "contextId": "user_1", "n": 1})
+        await asyncio.sleep(0.01)
+        last_seen = first.received[-1]["seq"]
+
+        await manager.disconnect(first)
+        for n in (2, 3):
+            await manager.smart_broadcast({"eventType": "status", "contextId": "user_1::conv", "n": n})
+            await manager.smart_broadcast({"eventType": "message", "contextId": "user_1::conv", "n": -n})
+        await manager.smart_broadcast({"eventType": "status", "contextId": "user_2", "n": 99})
+
+        second = FakeSocket()
+        _attach(manager, second, "user_1")
+        assert manager.replay_events(second, "user_1", last_seen) == 2
+        assert manager.replay_events(second, "user_1", 10_000) == 0  # client ahead (server restarted)
+        # A last_seq from another server epoch is meaningless here, even if it looks valid
+        assert manager.replay_events(second, "user_1", last_seen, epoch="previous-process") == 0
+        assert manager.replay_events(second, "user_1", 10_000, epoch=manager.session_id) == 0
+        await asyncio.sleep(0.01)
+        assert [e["n"] for e in second.received] == [2, 3]
+        seqs = [e["seq"] for e in second.received]
+        assert seqs == sorted(seqs) and seqs[0] > last_seen
+    asyncio.run(run())
+
+
+def test_connect_queues_replay_history_and_session_in_order():
+    async def run():
+        manager = WebSocketManager()
+        manager.get_agent_registry = lambda: []
+        first = FakeSocket()
+        _attach(manager, first, "user_1")
+        await manager.broadcast_event({"eventType": "agent_status", "n": 0})  # global, kept in event_history
+        for n in range(1, 4):
+            await manager.smart_broadcast({"eventType": "status", "contextId": "user_1", "n": n})
+        await asyncio.sleep(0.01)
+        await manager.disconnect(first)
+
+        second = FakeSocket()
+        await manager.connect(second, tenant_id="user_1", last_seq=first.received[1]["seq"],
+                              epoch=manager.session_id)
+        await asyncio.sleep(0.01)
+        # Replayed events first, then recent history (older seq), session_started last
+        assert [(e["eventType"], e.get("n")) for e in second.received] == [
+            ("status", 2), ("status", 3), ("agent_status", 0), ("auth_status", None), ("session_started", None)]
+        assert second.received[-1]["data"]["lastSeq"] == manager.last_seq
+        await manager.disconnect(second)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_ring_buffer_limits()
+    test_idle_tenants_are_evicted()
+    test_reconnect_replays_missed_events()
+    test_connect_queues_replay_history_and_session_in_order()
+    print("✅ WebSocket replay tests passed")
@@ -0,0 +1,196 @@
+"""
+Test: designer workflows compile to a DAG and run without per-step planner
+calls — parallel siblings overlap, EVALUATE picks the branch, a failed step
+fails everything downstream without dispatching it, HITL pauses and resumes,
+and per-step critical-path timing is reported.
+
+Uses a fake host with stubbed agent calls; no LLM or remote agent is required.
+
+Run:  python backend/tests/test_workflow_dag.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+import hosts.multiagent.foundry_agent_a2a  # noqa: F401  (loads the core package first)
+from backend_production import generate_workflow_text
+from hosts.multiagent.core.workflow_orchestration import WorkflowOrchestration
+from hosts.multiagent.models import SessionContext
+from hosts.multiagent.workflow_dag import compile_workflow
+
+BRANCHING_WORKFLOW = """1. [Research Agent] Gather the numbers
+2a. [Legal Agent] Review the contract
+2b. [Tech Agent] Assess feasibility
+   including hosting costs
+3. [EVALUATE] Is the deal viable?
+   IF-TRUE → 4. [Email Agent] Send the offer
+   IF-FALSE → 5. [Email Agent] Send a decline
+6. [Report Agent] Summarize the outcome"""
+
+
+class FakeHost(WorkflowOrchestration):
+    def __init__(self, evaluation=True, delays=None, hitl_agent=None, failing_agent=None):
+        self.evaluation = evaluation
+        self.failing_agent = failing_agent
+        self.delays = delays or {}
+        self.hitl_agent = hitl_agent
+        self.calls = []
+        self.contexts = {}
+        self.events = []
+        self.planner_calls = 0
+        self.cards = {}
+        self._active_conversations = {}
+
+    async def _execute_orchestrated_task(self, task, session_context, context_id, workflow,
+                                         user_message, extract_text_fn, previous_task_outputs=None):
+        agent = task.recommended_agent
+        self.calls.append(agent)
+        self.contexts[agent] = list(previous_task_outputs or [])
+        await asyncio.sleep(self.delays.get(agent, 0.01))
+        if agent == self.failing_agent:
+            raise RuntimeError(f"{agent} is unavailable")
+        if agent == "EVALUATE":
+            verdict = "TRUE" if self.evaluation else "FALSE"
+            task.state = "completed"
+            task.output = {"result": f"{verdict}: checked", "reasoning": "checked", "evaluation": True}
+            return {"output": verdict, "hitl_pause": False}
+        if agent == self.hitl_agent:
+            self.hitl_agent = None
+            session_context.pending_input_agent = agent
+            task.state = "input_required"
+            task.output = {"result": f"{agent} needs approval"}
+            return {"output": f"{agent} needs approval", "hitl_pause": True}
+        task.state = "completed"
+        task.output = {"result": f"{agent} done"}
+        return {"output": f"{agent} done", "hitl_pause": False}
+
+    async def _call_azure_openai_structured(self, *args, **kwargs):
+        self.planner_calls += 1
+        raise AssertionError("planner must not be called for compiled workflows")
+
+    async def _emit_granular_agent_event(self, agent_name, text, context_id, event_type=None, metadata=None):
+        self.events.append((agent_name, event_type, metadata or {}))
+
+    async def _emit_plan_update(self, plan, context_id, reasoning=None):
+        self.plan = plan
+
+    def is_cancelled(self, context_id):
+        return False
+
+    def get_interrupt(self, context_id):
+        return None
+
+    def _extract_text_from_response(self, response):
+        return str(response)
+
+
+def _run(host, session_context, user_message="Close the deal"):
+    return asyncio.run(host._agent_mode_orchestration_loop(
+        user_message, "user_1::conv", session_context, workflow=BRANCHING_WORKFLOW
+    ))
+
+
+def test_compile_parallel_groups_and_branches():
+    dag = compile_workflow(BRANCHING_WORKFLOW)
+    assert list(dag.nodes) == ["1", "2a", "2b", "3", "4", "5", "6"]
+    assert dag.nodes["2a"].deps == dag.nodes["2b"].deps == ["1"]
+    assert dag.nodes["2b"].description == "Assess feasibility including hosting costs"
+    assert dag.nodes["3"].deps == ["2a", "2b"]
+    assert dag.nodes["4"].condition == ("3", True) and dag.nodes["5"].condition == ("3", False)
+    assert dag.nodes["6"].deps == ["3", "4", "5"]
+    assert dag.ancestors("4") == ["1", "2a", "2b", "3"]
+    assert compile_workflow(BRANCHING_WORKFLOW) is dag  # compiled once per text
+
+
+def test_compile_designer_output():
+    steps = [
+        {"id": "a", "order": 0, "agentName": "Research Agent", "description": "Research"},
+        {"id": "b", "order": 1, "agentName": "Legal Agent", "description": "Review"},
+        {"id": "c", "order": 2, "agentName": "Tech Agent", "description": "Assess"},
+        {"id": "d", "order": 3, "agentName": "Report Agent", "description": "Report"},
+    ]
+    connections = [
+        {"fromStepId": "a", "toStepId": "b"},
+        {"fromStepId": "a", "toStepId": "c"},
+        {"fromStepId": "b", "toStepId": "d"},
+        {"fromStepId": "c", "toStepId": "d"},
+    ]
+    dag = compile_workflow(generate_workflow_text(steps, connections))
+    agents = {node.agent: node for node in dag.nodes.values()}
+    assert agents["Legal Agent"].deps == agents["Tech Agent"].deps == [agents["Research Agent"].label]
+    assert set(agents["Report Agent"].deps) == {agents["Legal Agent"].label, agents["Tech Agent"].label}
+    assert compile_workflow("Just do whatever seems best") is None
+    assert compile_workflow("1. [A] x\n   IF-TRUE → 2. [B] y") is None  # branch without EVALUATE
+
+
+def test_executes_dag_without_planner():
+    host = FakeHost(evaluation=False, delays={"Legal Agent": 0.15, "Tech Agent": 0.15})
+    session_context = SessionContext()
+    outputs = _run(host, session_context)
+
+    assert host.planner_calls == 0
+    email_tasks = [t.task_description for t in host.plan.tasks if t.recommended_agent == "Email Agent"]
+    assert email_tasks == ["[Step 5] Send a decline"]
+    assert host.calls[-1] == "Report Agent"
+    assert "Email Agent done" in outputs and "Report Agent done" in outputs
+    assert host.contexts["Email Agent"][0] == "Research Agent done"
+    assert set(host.contexts["Email Agent"]) == {"Research Agent done", "Legal Agent done", "Tech Agent done", "FALSE"}
+
+    timing = host.workflow_step_timings
+    assert set(timing["steps"]) == {"1", "2a", "2b", "3", "5", "6"}
+    legal, tech = timing["steps"]["2a"], timing["steps"]["2b"]
+    assert tech["start_ms"] < legal["start_ms"] + legal["duration_ms"]  # 2a and 2b overlapped
+    assert timing["total_ms"] < 280
+    assert timing["critical_path"][0] == "1" and timing["critical_path"][-1] == "6"
+    assert "4" not in timing["critical_path"]
+    assert any(meta.get("phase") == "workflow_timing" for _, _, meta in host.events)
+    assert any(meta.get("phase") == "complete" for _, _, meta in host.events)
+
+
+def test_failure_fails_downstream_steps():
+    dag = compile_workflow(BRANCHING_WORKFLOW)
+    assert dag.blocked({"1": "completed", "2a": "failed", "2b": "completed"}) == {
+        "3": "2a", "4": "2a", "5": "2a", "6": "2a"}
+    assert dag.blocked({"1": "completed", "2a": "completed", "2b": "running"}) == {}
+    assert dag.ready({"1": "completed", "2a": "failed", "2b": "completed"}) == []
+
+    host = FakeHost(failing_agent="Legal Agent")
+    _run(host, SessionContext())
+    assert sorted(host.calls) == ["Legal Agent", "Research Agent", "Tech Agent"]
+    states = {t.task_description.split("]")[0][6:]: t for t in host.plan.tasks}
+    assert states["2a"].state == "failed" and states["2b"].state == "completed"
+    for label in ("3", "4", "5", "6"):
+        assert states[label].state == "failed"
+        assert "upstream step 2a failed" in states[label].error_message
+    assert host.planner_calls == 0
+
+
+def test_hitl_pauses_and_resumes():
+    host = FakeHost(evaluation=True, hitl_agent="Legal Agent")
+    session_context = SessionContext()
+    _run(host, session_context)
+    plan = session_context.current_plan
+    assert plan is not None
+    assert "EVALUATE" not in host.calls  # nothing downstream of the paused step ran
+    assert host.calls.count("Tech Agent") == 1
+
+    host.calls.clear()
+    outputs = _run(host, session_context, user_message="Approved")
+    assert session_context.current_plan is None
+    assert host.calls == ["EVALUATE", "Email Agent", "Report Agent"]  # earlier steps not re-run
+    assert any("[User Response]: Approved" in text for text in host.contexts["EVALUATE"])
+    assert "Report Agent done" in outputs
+    assert host.planner_calls == 0
+
+
+if __name__ == "__main__":
+    test_compile_parallel_groups_and_branches()
+    test_compile_designer_output()
+    test_executes_dag_without_planner()
+    test_failure_fails_downstream_steps()
+    test_hitl_pauses_and_resumes()
+    print("✅ Workflow DAG tests passed")
@@ -22,6 +22,11 @@ from .file_parts import (
     convert_artifact_dict_to_file_part,
 )
 
+from .bounded_state import (
+    BoundedStore,
+    bounded_store_stats,
+)
+
 __all__ = [
     # Tenant utils
     "create_context_id",
@@ -41,4 +46,7 @@ __all__ = [
     "is_image_part",
     "extract_all_images",
     "convert_artifact_dict_to_file_part",
+    # Bounded state
+    "BoundedStore",
+    "bounded_store_stats",
 ]
@@ -0,0 +1,298 @@
+"""
+Bounded, evicting key-value stores for per-conversation state.
+
+The host agent and conversation server keep a lot of state keyed by
+conversation: session contexts, response ids, cancellation flags, cached
+file parts. As plain dicts these only ever grow. ``BoundedStore`` is a
+drop-in ``MutableMapping`` that evicts:
+
+- the least recently used entries past ``max_entries``
+- entries not read or written for ``ttl_seconds``
+- the least recently used entries while the stored values' total size is
+  over ``max_bytes`` (sizes are measured by ``sizeof`` when a value is
+  stored; later in-place mutation isn't tracked)
+
+With ``spill_dir`` and ``dump``/``load`` functions, entries evicted for
+count or size are written to disk instead of dropped and read back on the
+next access. Spilled entries still expire after ``ttl_seconds`` and are
+capped at ``max_spill_bytes``.
+
+Each store registers under its name; ``bounded_store_stats()`` reports
+entries, bytes, hits, misses and evictions by reason for all of them.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from log_config import log_warning
+
+# Defaults for state keyed by conversation (context id)
+CONTEXT_STATE_MAX_ENTRIES = int(os.getenv("CONTEXT_STATE_MAX_ENTRIES", "2000"))
+CONTEXT_STATE_TTL_SECONDS = float(os.getenv("CONTEXT_STATE_TTL_SECONDS", str(24 * 3600)))
+
+_stores: "weakref.WeakValueDictionary[str, BoundedStore]" = weakref.WeakValueDictionary()
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """Rough size of a value in bytes: string and bytes payloads, summed through containers and objects."""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if _depth < 4:
+        if isinstance(value, dict):
+            return 64 + sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items())
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return 56 + sum(approx_size(v, _depth + 1) for v in value)
+        if hasattr(value, "__dict__"):
+            return 48 + approx_size(vars(value), _depth + 1)
+    return sys.getsizeof(value)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    touched: float
+
+
+@dataclass
+class _Spilled:
+    path: Path
+    size: int
+    touched: float
+
+
+class BoundedStore(MutableMapping):
+    """A dict with LRU, idle-TTL and byte-size eviction, and optional spill-to-disk.
+
+    Args:
+        name: Name reported by ``bounded_store_stats``
+        max_entries: Entries kept in memory (None = unbounded)
+        ttl_seconds: Idle time after which an entry expires (None = never)
+        max_bytes: Total ``sizeof`` of values kept in memory (None = unbounded)
+        sizeof: Size function for values
+        spill_dir: Directory for entries evicted for count or size
+        dump: Serializes a value for spilling (required with ``spill_dir``)
+        load: Restores a spilled value (required with ``spill_dir``)
+        max_spill_bytes: Total size of spilled files (None = unbounded)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = approx_size,
+        spill_dir: Optional[Path] = None,
+        dump: Optional[Callable[[Any], bytes]] = None,
+        load: Optional[Callable[[bytes], Any]] = None,
+        max_spill_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if spill_dir is not None and (dump is None or load is None):
+            raise ValueError("spill_dir requires dump and load functions")
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.dump = dump
+        self.load = load
+        self.max_spill_bytes = max_spill_bytes
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._spilled: "OrderedDict[Hashable, _Spilled]" = OrderedDict()
+        self.bytes = 0
+        self.spilled_bytes = 0
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "evicted_lru": 0,
+            "evicted_ttl": 0,
+            "evicted_bytes": 0,
+            "spilled": 0,
+            "reloaded": 0,
+        }
+        _stores[name] = self
+
+    # -- Eviction ----------------------------------------------------------
+
+    def _expired(self, touched: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - touched > self.ttl_seconds
+
+    def _purge_expired(self, now: float) -> None:
+        # Both maps are in last-touched order, so expired entries are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._expired(entry.touched, now):
+                break
+            del self._entries[key]
+            self.bytes -= entry.size
+            self.metrics["evicted_ttl"] += 1
+        while self._spilled:
+            key, spilled = next(iter(self._spilled.items()))
+            if not self._expired(spilled.touched, now):
+                break
+            self._remove_spilled(key)
+            self.metrics["evicted_ttl"] += 1
+
+    def _enforce_limits(self) -> None:
+        while self.max_entries is not None and len(self._entries) > self.max_entries:
+            self._evict_oldest("evicted_lru")
+        # A single oversized value is kept rather than evicted on insert
+        while self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1:
+            self._evict_oldest("evicted_bytes")
+
+    def _evict_oldest(self, reason: str) -> None:
+        key, entry = self._entries.popitem(last=False)
+        self.bytes -= entry.size
+        self.metrics[reason] += 1
+        if self.spill_dir is not None:
+            self._spill(key, entry)
+
+    # -- Spill to disk -----------------------------------------------------
+
+    def _spill(self, key: Hashable, entry: _Entry) -> None:
+        path = self.spill_dir / f"{hashlib.sha256(repr(key).encode('utf-8')).hexdigest()}.bin"
+        try:
+            data = self.dump(entry.value)
+            path.write_bytes(data)
+        except Exception as e:
+            log_warning(f"[BoundedStore:{self.name}] Could not spill entry to disk, dropping it: {e}")
+            return
+        self._spilled[key] = _Spilled(path, len(data), entry.touched)
+        self.spilled_bytes += len(data)
+        self.metrics["spilled"] += 1
+        while self.max_spill_bytes is not None and self.spilled_bytes > self.max_spill_bytes and self._spilled:
+            self._remove_spilled(next(iter(self._spilled)))
+            self.metrics["evicted_bytes"] += 1
+
+    def _remove_spilled(self, key: Hashable, unlink: bool = True) -> _Spilled:
+        spilled = self._spilled.pop(key)
+        self.spilled_bytes -= spilled.size
+        if unlink:
+            spilled.path.unlink(missing_ok=True)
+        return spilled
+
+    def _reload(self, key: Hashable, now: float) -> Any:
+        spilled = self._remove_spilled(key, unlink=False)
+        try:
+            value = self.load(spilled.path.read_bytes())
+        except Exception as e:
+            log_warning(f"[BoundedStore:{self.name}] Could not reload spilled entry: {e}")
+            raise KeyError(key) from e
+        finally:
+            spilled.path.unlink(missing_ok=True)
+        self.metrics["reloaded"] += 1
+        size = self.sizeof(value)
+        self._entries[key] = _Entry(value, size, now)
+        self.bytes += size
+        self._enforce_limits()
+        return value
+
+    # -- Mapping interface -------------------------------------------------
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            now = self._clock()
+            self._purge_expired(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.touched = now
+                self._entries.move_to_end(key)
+                self.metrics["hits"] += 1
+                return entry.value
+            if key in self._spilled:
+                try:
+                    value = self._reload(key, now)
+                except KeyError:
+                    self.metrics["misses"] += 1
+                    raise
+                self.metrics["hits"] += 1
+                return value
+            self.metrics["misses"] += 1
+            raise KeyError(key)
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            now = self._clock()
+            self._purge_expired(now)
+            self._discard(key)
+            size = self.sizeof(value)
+            self._entries[key] = _Entry(value, size, now)
+            self.bytes += size
+            self._enforce_limits()
+
+    def _discard(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+            return True
+        if key in self._spilled:
+            self._remove_spilled(key)
+            return True
+        return False
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            if not self._discard(key):
+                raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        # Membership doesn't count as a use: it neither refreshes nor counts a hit
+        with self._lock:
+            self._purge_expired(self._clock())
+            return key in self._entries or key in self._spilled
+
+    def __iter__(self) -> Iterator[Hashable]:
+        # Iterate over a snapshot; reading values while iterating reorders the store
+        with self._lock:
+            self._purge_expired(self._clock())
+            return iter(list(self._entries) + list(self._spilled))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return len(self._entries) + len(self._spilled)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._spilled):
+                self._remove_spilled(key)
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.metrics,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "spilled_entries": len(self._spilled),
+                "spilled_bytes": self.spilled_bytes,
+            }
+
+    def __repr__(self) -> str:
+        return f"BoundedStore({self.name!r}, entries={len(self._entries)}, spilled={len(self._spilled)})"
+
+
+def bounded_store_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every live ``BoundedStore``, by name."""
+    return {name: store.stats() for name, store in list(_stores.items())}
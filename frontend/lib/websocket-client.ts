@@ -33,6 +33,9 @@ export class WebSocketClient {
   private isInitializing: boolean = false; // Prevent concurrent initialization
   private pingInterval: NodeJS.Timeout | null = null; // Keepalive ping interval
   private hasEverConnected: boolean = false; // Track if we've ever had a successful connection
+  private lastSeq: number | null = null; // Sequence number of the last broadcast event, for replay on reconnect
+  private lastSeqTenantId: string | null = null; // Tenant lastSeq was received for
+  private serverEpoch: string | null = null; // Server epoch lastSeq belongs to (changes on backend restart)
 
   constructor(config: WebSocketConfig) {
     this.config = {
@@ -161,6 +164,19 @@ export class WebSocketClient {
             params.push(`tenantId=${encodeURIComponent(tenantId)}`);
           }
           
+          // Ask the server to replay tenant events missed while disconnected.
+          // Sequence numbers are per tenant stream: forget them when the tenant changes
+          if (tenantId !== this.lastSeqTenantId) {
+            this.lastSeq = null;
+            this.lastSeqTenantId = tenantId;
+          }
+          if (this.lastSeq !== null) {
+            params.push(`last_seq=${this.lastSeq}`);
+            if (this.serverEpoch) {
+              params.push(`epoch=${encodeURIComponent(this.serverEpoch)}`);
+            }
+          }
+          
           if (params.length > 0) {
             const separator = wsUrl.includes('?') ? '&' : '?';
             wsUrl = `${wsUrl}${separator}${params.join('&')}`;
@@ -238,6 +254,10 @@ export class WebSocketClient {
             try {
               logDebug('[WebSocket] Raw message received:', event.data.slice(0, 200));
               const data = JSON.parse(event.data);
+              if (typeof data.seq === 'number') {
+                // Recent history sent on connect carries older seqs than the replay
+                this.lastSeq = Math.max(this.lastSeq ?? 0, data.seq);
+              }
               this.handleEvent(data);
             } catch (error) {
               console.error("[WebSocket] Error parsing message:", error);
@@ -409,6 +429,15 @@ export class WebSocketClient {
           // Clear collaborative session on restart UNLESS user just joined
           const BACKEND_SESSION_KEY = 'a2a_backend_session_id';
           const newBackendSessionId = eventData?.data?.sessionId || eventData?.sessionId;
+          const newEpoch = eventData?.data?.epoch || newBackendSessionId;
+          if (newEpoch && newEpoch !== this.serverEpoch) {
+            // New server epoch: sequence numbers restarted, so a stale lastSeq would
+            // skip events. Components resync fully from the session change below.
+            if (this.serverEpoch !== null) {
+              this.lastSeq = null;
+            }
+            this.serverEpoch = newEpoch;
+          }
           const storedBackendSessionId = localStorage.getItem(BACKEND_SESSION_KEY);
           const justJoined = sessionStorage.getItem('a2a_collaborative_session_just_joined');
           const currentCollabSession = sessionStorage.getItem('a2a_collaborative_session');
@@ -42,6 +42,7 @@ Common symptoms when TPM is too low:
 Reference: https://learn.microsoft.com/en-us/answers/questions/2237624/getting-rate-limit-exceeded-when-testing-ai-agent
 """
 import os
+import sys
 import time
 import datetime
 import asyncio
@@ -50,11 +51,20 @@ import json
 from typing import Optional, Dict, List
 
 from azure.ai.agents import AgentsClient
+from azure.ai.agents.aio import AgentsClient as AsyncAgentsClient
 from azure.ai.agents.models import Agent, ThreadMessage, ThreadRun, AgentThread, ToolOutput, BingGroundingTool, ListSortOrder, FilePurpose, FileSearchTool, RequiredMcpToolCall, ToolApproval
 from azure.ai.projects import AIProjectClient
 from azure.identity import DefaultAzureCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
 import glob
 
+try:
+    from shared.run_driver import drive_run
+except ImportError:
+    # Running from the repo checkout rather than the deployed image
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from shared.run_driver import drive_run
+
 from agent_config import AGENT_ID, VECTOR_STORE_NAME, AGENT_FULL_TITLE, MODEL_DEPLOYMENT_NAME
 
 logger = logging.getLogger(__name__)
@@ -86,6 +96,7 @@ class FoundryTemplateAgent:
         self.threads: Dict[str, str] = {}  # thread_id -> thread_id mapping
         self._file_search_tool = None  # Cache the file search tool
         self._agents_client = None  # Cache the agents client
+        self._async_agents_client = None  # Cache the async agents client used for runs
         self._project_client = None  # Cache the project client
         
     def _get_client(self) -> AgentsClient:
@@ -96,6 +107,15 @@ class FoundryTemplateAgent:
                 credential=self.credential,
             )
         return self._agents_client
+
+    def _get_async_client(self) -> AsyncAgentsClient:
+        """Get a cached async AgentsClient so runs don't block the event loop."""
+        if self._async_agents_client is None:
+            self._async_agents_client = AsyncAgentsClient(
+                endpoint=self.endpoint,
+                credential=AsyncDefaultAzureCredential(),
+            )
+        return self._async_agents_client
         
     def _get_project_client(self) -> AIProjectClient:
         """Get a cached AIProjectClient instance to reduce API calls."""
@@ -308,16 +328,16 @@ Current date and time: {datetime.datetime.now().isoformat()}
             # Return thread info - we'll need to get it fresh each time
             pass
             
-        client = self._get_client()
-        thread = client.threads.create()
+        client = self._get_async_client()
+        thread = await client.threads.create()
         self.threads[thread.id] = thread.id
         logger.info(f"Created thread: {thread.id}")
         return thread
     
     async def send_message(self, thread_id: str, content: str, role: str = "user") -> ThreadMessage:
         """Send a message to the conversation thread."""
-        client = self._get_client()
-        message = client.messages.create(
+        client = self._get_async_client()
+        message = await client.messages.create(
             thread_id=thread_id,
             role=role,
             content=content
@@ -335,93 +355,28 @@ Current date and time: {datetime.datetime.now().isoformat()}
             await self.create_agent()
 
         await self.send_message(thread_id, user_message)
-        client = self._get_client()
-        run = client.runs.create(thread_id=thread_id, agent_id=self.agent.id)
-
-        max_iterations = 25
-        iterations = 0
-        retry_count = 0
-        max_retries = 3
+        client = self._get_async_client()
         tool_calls_yielded = set()
-        stuck_run_count = 0
-        max_stuck_runs = 3
-
-        while run.status in ["queued", "in_progress", "requires_action"] and iterations < max_iterations:
-            iterations += 1
-            await asyncio.sleep(2)
-            
-            # Check for new tool calls in real-time (only show what we can actually detect)
-            try:
-                run_steps = client.run_steps.list(thread_id, run.id)
-                for run_step in run_steps:
-                    if (hasattr(run_step, "step_details") and
-                        hasattr(run_step.step_details, "type") and
-                        run_step.step_details.type == "tool_calls" and
-                        hasattr(run_step.step_details, "tool_calls")):
-                        for tool_call in run_step.step_details.tool_calls:
-                            if tool_call and hasattr(tool_call, "type"):
-                                tool_type = tool_call.type
-                                if tool_type not in tool_calls_yielded:
-                                    # Show actual tool calls that we can detect
-                                    tool_description = self._get_tool_description(tool_type, tool_call)
-                                    yield f"🛠️ Remote agent executing: {tool_description}"
-                                    tool_calls_yielded.add(tool_type)
-            except Exception as e:
-                # Continue if we can't get run steps yet
-                pass
 
-            try:
-                run = client.runs.get(thread_id=thread_id, run_id=run.id)
-            except Exception as e:
-                if "rate limit" in str(e).lower() or "429" in str(e):
-                    retry_count += 1
-                    if retry_count <= max_retries:
-                        backoff_time = min(15 * (2 ** retry_count), 45)
-                        await asyncio.sleep(backoff_time)
-                        continue
-                    else:
-                        yield "Error: Rate limit exceeded, please try again later"
-                        return
-                else:
-                    yield f"Error: {str(e)}"
+        # Run and run-step events stream in as they happen; tool calls are
+        # answered as soon as the run asks for them
+        async for update in drive_run(client, thread_id, self.agent.id, self._tool_outputs_for):
+            tool_call = update.tool_call
+            if tool_call is not None and hasattr(tool_call, "type"):
+                tool_type = tool_call.type
+                if tool_type not in tool_calls_yielded:
+                    # Show actual tool calls that we can detect
+                    tool_description = self._get_tool_description(tool_type, tool_call)
+                    yield f"🛠️ Remote agent executing: {tool_description}"
+                    tool_calls_yielded.add(tool_type)
+            if update.done:
+                if update.error:
+                    logger.debug(f"Run finished with error: {update.error}")
+                    yield f"Error: {update.error}"
                     return
 
-            if run.status == "failed":
-                logger.debug(f"Full run object on failure: {run}")
-                logger.debug(f"run.last_error: {run.last_error}")
-                yield f"Error: {run.last_error}"
-                return
-
-            if run.status == "requires_action":
-                logger.info(f"Run {run.id} requires action - checking for tool calls")
-                try:
-                    # Check if there are actually tool calls to handle
-                    if hasattr(run, 'required_action') and run.required_action:
-                        logger.info(f"Found required action: {run.required_action}")
-                        await self._handle_tool_calls(run, thread_id)
-                    else:
-                        logger.warning(f"Run status is 'requires_action' but no required_action found - this may indicate a stuck run")
-                        stuck_run_count += 1
-                        if stuck_run_count >= max_stuck_runs:
-                            logger.error(f"Run {run.id} is stuck in requires_action state without tool calls after {stuck_run_count} attempts")
-                            yield f"Error: Run is stuck in requires_action state - please try again"
-                            return
-                        # Try to get the run again to see if it has progressed
-                        run = client.runs.get(thread_id=thread_id, run_id=run.id)
-                except Exception as e:
-                    yield f"Error handling tool calls: {str(e)}"
-                    return
-
-        if run.status == "failed":
-            yield f"Error: {run.last_error}"
-            return
-
-        if iterations >= max_iterations:
-            yield "Error: Request timed out"
-            return
-
         # After run is complete, yield the assistant's response(s) with citation formatting
-        messages = list(client.messages.list(thread_id=thread_id, order=ListSortOrder.ASCENDING))
+        messages = [msg async for msg in client.messages.list(thread_id=thread_id, order=ListSortOrder.ASCENDING)]
         logger.debug(f"Found {len(messages)} messages in thread")
         for msg in reversed(messages):
             logger.debug(f"Processing message: role={msg.role}, content_count={len(msg.content) if msg.content else 0}")
@@ -574,126 +529,53 @@ Current date and time: {datetime.datetime.now().isoformat()}
     
 
     
-    async def _handle_tool_calls(self, run: ThreadRun, thread_id: str):
-        """Handle tool calls during agent execution."""
-        logger.info(f"Handling tool calls for run {run.id}")
-        
-        if not hasattr(run, 'required_action') or not run.required_action:
-            logger.warning(f"No required action found in run {run.id}")
-            return
-            
-        required_action = run.required_action
-        logger.info(f"Required action type: {type(required_action)}")
-        logger.info(f"Required action attributes: {dir(required_action)}")
-        
-        if not hasattr(required_action, 'submit_tool_outputs') or not required_action.submit_tool_outputs:
-            logger.warning(f"No tool outputs required in run {run.id}")
-            return
-            
-        try:
-            tool_calls = required_action.submit_tool_outputs.tool_calls
-            if not tool_calls:
-                logger.warning("No tool calls found in required action")
-                return
-            
-            tool_outputs = []
+    async def _tool_outputs_for(self, run: ThreadRun) -> Optional[Dict]:
+        """Build the tool outputs (or MCP approvals) a requires_action run is waiting for.
 
-            async def handle_single_tool_call(tool_call):
-                function_name = tool_call.function.name
-                arguments = tool_call.function.arguments
-                logger.info(f"Processing tool call: {function_name} with args: {arguments}")
-                logger.debug(f"Tool call ID: {tool_call.id}")
-                
-                # For Bing grounding and file search tool calls, they're handled automatically by the system
-                logger.info(f"Skipping system tool call: {function_name} (handled automatically)")
-                # Return empty output to acknowledge the tool call was processed
-                return {
-                    "tool_call_id": tool_call.id,
-                    "output": "{}"
-                }
-
-            # Run all tool calls in parallel
-            results = await asyncio.gather(
-                *(handle_single_tool_call(tc) for tc in tool_calls)
-            )
-            # Filter out any None results (e.g., skipped system tool calls)
-            tool_outputs = [r for r in results if r is not None]
-
-            if not tool_outputs:
-                logger.info("No valid tool outputs generated - submitting empty outputs to move run forward")
-                # Submit empty tool outputs to move the run forward
-                tool_outputs = [{"tool_call_id": tc.id, "output": "{}"} for tc in tool_calls if hasattr(tc, 'id') and tc.id]
-                
-            logger.debug(f"Tool outputs to submit: {tool_outputs}")
-            
-        except Exception as e:
-            logger.error(f"Error processing tool calls: {e}")
-            logger.error(f"Required action structure: {required_action}")
-            raise
-        
-        # Submit the tool outputs or approvals
-        client = self._get_client()
-        try:
-            if action_type == "submit_tool_outputs":
-                # Create tool outputs in the expected format
-                formatted_outputs = []
-                for output in tool_outputs:
-                    formatted_outputs.append(ToolOutput(
-                        tool_call_id=output["tool_call_id"],
-                        output=output["output"]
-                    ))
-                
-                logger.debug(f"Submitting formatted tool outputs: {formatted_outputs}")
-                
-                client.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run.id,
-                    tool_outputs=formatted_outputs
-                )
-                logger.info(f"Submitted {len(formatted_outputs)} tool outputs")
-            elif action_type == "submit_tool_approval":
-                # For tool approvals, we need to approve the MCP tool calls
-                logger.info(f"Handling tool approval for {len(tool_calls)} tool calls")
-                
-                tool_approvals = []
-                for tool_call in tool_calls:
-                    if isinstance(tool_call, RequiredMcpToolCall):
-                        try:
-                            logger.info(f"Approving MCP tool call: {tool_call}")
-                            tool_approvals.append(
-                                ToolApproval(
-                                    tool_call_id=tool_call.id,
-                                    approve=True,
-                                    headers={}  # Add any required headers here
-                                )
-                            )
-                        except Exception as e:
-                            logger.error(f"Error approving tool_call {tool_call.id}: {e}")
-                
-                if tool_approvals:
-                    client.runs.submit_tool_outputs(
-                        thread_id=thread_id,
-                        run_id=run.id,
-                        tool_approvals=tool_approvals
+        Returns None when there is nothing to submit, which cancels the run.
+        """
+        logger.info(f"Handling tool calls for run {run.id}")
+        required_action = getattr(run, 'required_action', None)
+        if not required_action:
+            logger.warning(f"Run status is 'requires_action' but no required_action found in run {run.id}")
+            return None
+
+        action_type = getattr(required_action, 'type', None)
+        if action_type == "submit_tool_approval":
+            # For tool approvals, we need to approve the MCP tool calls
+            tool_calls = required_action.submit_tool_approval.tool_calls or []
+            logger.info(f"Handling tool approval for {len(tool_calls)} tool calls")
+            tool_approvals = []
+            for tool_call in tool_calls:
+                if isinstance(tool_call, RequiredMcpToolCall):
+                    logger.info(f"Approving MCP tool call: {tool_call}")
+                    tool_approvals.append(
+                        ToolApproval(
+                            tool_call_id=tool_call.id,
+                            approve=True,
+                            headers={}  # Add any required headers here
+                        )
                     )
-                    logger.info(f"Approved {len(tool_approvals)} MCP tool calls")
-                else:
-                    logger.warning("No valid tool approvals to submit")
-        except Exception as e:
-            logger.error(f"Failed to submit tool outputs: {e}")
-            logger.error(f"Raw tool outputs structure: {tool_outputs}")
-            # Try submitting without ToolOutput wrapper as fallback
-            try:
-                logger.info("Trying fallback submission with raw dict format")
-                client.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run.id,
-                    tool_outputs=tool_outputs
-                )
-                logger.info(f"Fallback submission successful")
-            except Exception as e2:
-                logger.error(f"Fallback submission also failed: {e2}")
-                raise e
+            if not tool_approvals:
+                logger.warning("No valid tool approvals to submit")
+                return None
+            return {"tool_approvals": tool_approvals}
+
+        submit_tool_outputs = getattr(required_action, 'submit_tool_outputs', None)
+        tool_calls = getattr(submit_tool_outputs, 'tool_calls', None)
+        if not tool_calls:
+            logger.warning("No tool calls found in required action")
+            return None
+
+        tool_outputs = []
+        for tool_call in tool_calls:
+            function = getattr(tool_call, 'function', None)
+            logger.info(f"Skipping system tool call: {getattr(function, 'name', tool_call.type)} (handled automatically)")
+            # For Bing grounding and file search tool calls, they're handled automatically by the system;
+            # an empty output acknowledges the tool call and moves the run forward
+            tool_outputs.append(ToolOutput(tool_call_id=tool_call.id, output="{}"))
+        logger.debug(f"Tool outputs to submit: {tool_outputs}")
+        return {"tool_outputs": tool_outputs}
         
     def _get_readable_file_name(self, citation: Dict) -> str:
         """Get meaningful citation text based on content, not just file names."""
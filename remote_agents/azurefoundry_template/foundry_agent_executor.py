@@ -10,12 +10,20 @@ import asyncio
 import logging
 import base64
 import os
+import sys
 import tempfile
 import time
 from typing import Optional, Dict, List
 
 from foundry_agent import FoundryTemplateAgent
 
+try:
+    from shared.bounded_state import BoundedStore
+except ImportError:
+    # Running from the repo checkout rather than the deployed image
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from shared.bounded_state import BoundedStore
+
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
@@ -70,7 +78,8 @@ class FoundryTemplateAgentExecutor(AgentExecutor):
                     raise
 
     def __init__(self, card: AgentCard):
-        self._active_threads: Dict[str, str] = {}  # context_id -> thread_id mapping
+        # context_id -> thread_id mapping; idle conversations are evicted
+        self._active_threads: Dict[str, str] = BoundedStore("active_threads")
         self._waiting_for_input: Dict[str, str] = {}
         self._pending_updaters: Dict[str, TaskUpdater] = {}
         self._input_events: Dict[str, asyncio.Event] = {}
@@ -0,0 +1,111 @@
+"""Bounded per-conversation state for remote agent executors.
+
+Executors keep maps keyed by A2A context id (context -> Foundry thread id,
+pending input events, ...). As plain dicts they grow with every
+conversation the agent ever served. ``BoundedStore`` is a drop-in
+``MutableMapping`` that drops the least recently used entries past
+``max_entries`` and entries idle for ``ttl_seconds``, and counts hits,
+misses and evictions.
+
+It follows the interface of the backend's ``utils.bounded_state`` store,
+without byte accounting or spill-to-disk, which executor state doesn't need.
+
+Usage in an executor:
+    from shared.bounded_state import BoundedStore
+
+    self._active_threads = BoundedStore("active_threads")
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_STATE_MAX_ENTRIES = int(os.environ.get("EXECUTOR_STATE_MAX_ENTRIES", "1000"))
+EXECUTOR_STATE_TTL_SECONDS = float(os.environ.get("EXECUTOR_STATE_TTL_SECONDS", str(6 * 3600)))
+
+
+class BoundedStore(MutableMapping):
+    """A dict with LRU and idle-TTL eviction."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Optional[int] = EXECUTOR_STATE_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = EXECUTOR_STATE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.RLock()
+        # key -> (value, last touched), in last-touched order
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0, "evicted_lru": 0, "evicted_ttl": 0}
+
+    def _purge_expired(self, now: float) -> None:
+        if self.ttl_seconds is None:
+            return
+        while self._entries:
+            key, (_, touched) = next(iter(self._entries.items()))
+            if now - touched <= self.ttl_seconds:
+                break
+            del self._entries[key]
+            self.metrics["evicted_ttl"] += 1
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            now = self._clock()
+            self._purge_expired(now)
+            if key not in self._entries:
+                self.metrics["misses"] += 1
+                raise KeyError(key)
+            value = self._entries[key][0]
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            now = self._clock()
+            self._purge_expired(now)
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self.metrics["evicted_lru"] += 1
+                logger.debug(f"[{self.name}] Evicted state for {evicted}")
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            del self._entries[key]
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return key in self._entries
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.metrics, "entries": len(self._entries)}
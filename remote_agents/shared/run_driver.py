@@ -0,0 +1,262 @@
+"""Shared run driver for Azure AI Foundry agents.
+
+Agents used to start a run and then loop ``await asyncio.sleep(2)`` plus the
+synchronous ``client.run_steps.list`` / ``client.runs.get`` calls, which
+blocked the agent's event loop and added up to two seconds to every turn.
+``drive_run`` works on the async ``azure.ai.agents.aio.AgentsClient`` instead:
+
+- It starts the run with the streaming runs API and reacts to run and
+  run-step events as they arrive.
+- Tool calls are dispatched as soon as ``requires_action`` is observed; the
+  outputs are submitted on the same stream.
+- When streaming is unavailable (older SDK, or the stream fails) it polls
+  with adaptive backoff: ``RUN_POLL_INITIAL_SECONDS`` after every change,
+  growing to ``RUN_POLL_MAX_SECONDS`` while nothing happens.
+
+Usage in an agent:
+    from shared.run_driver import drive_run
+
+    async for update in drive_run(async_client, thread_id, self.agent.id, self._tool_outputs_for):
+        if update.tool_call is not None:
+            yield f"🛠️ Remote agent executing: {update.tool_call.type}"
+        if update.done:
+            run, error = update.run, update.error
+
+``on_requires_action(run)`` returns the keyword arguments for
+``submit_tool_outputs`` (``{"tool_outputs": [...]}`` or
+``{"tool_approvals": [...]}``), or None to cancel the run.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+RUN_POLL_INITIAL_SECONDS = float(os.environ.get("RUN_POLL_INITIAL_SECONDS", "0.25"))
+RUN_POLL_MAX_SECONDS = float(os.environ.get("RUN_POLL_MAX_SECONDS", "2.0"))
+RUN_POLL_BACKOFF = 1.5
+RUN_TIMEOUT_SECONDS = float(os.environ.get("RUN_TIMEOUT_SECONDS", "300"))
+RUN_STREAMING_ENABLED = os.environ.get("RUN_STREAMING_ENABLED", "true").lower() in ("true", "1", "yes")
+RATE_LIMIT_RETRIES = 3
+
+ACTIVE_STATUSES = {"queued", "in_progress", "requires_action", "cancelling"}
+
+ToolOutputsHandler = Callable[[Any], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass
+class RunUpdate:
+    """One observation of a run: a newly seen tool call, or the finished run."""
+    tool_call: Any = None
+    run: Any = None
+    done: bool = False
+    error: Optional[str] = None
+
+
+class _RunAborted(Exception):
+    """The run was abandoned; the message is reported to the caller."""
+
+
+def _status(run) -> str:
+    status = getattr(run, "status", "") or ""
+    return str(getattr(status, "value", status))
+
+
+def _event_name(event_type) -> str:
+    return str(getattr(event_type, "value", event_type) or "")
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    text = str(error).lower()
+    return "rate limit" in text or "429" in text
+
+
+def _action_key(run) -> str:
+    """Identifies one ``requires_action`` round by the tool calls it asks for."""
+    required_action = getattr(run, "required_action", None)
+    for attr in ("submit_tool_outputs", "submit_tool_approval"):
+        tool_calls = getattr(getattr(required_action, attr, None), "tool_calls", None)
+        if tool_calls:
+            return ",".join(str(getattr(tool_call, "id", "")) for tool_call in tool_calls)
+    return str(getattr(run, "id", ""))
+
+
+def _new_tool_calls(step, seen: Set[str]):
+    """Tool calls in a run step that haven't been reported yet."""
+    details = getattr(step, "step_details", None)
+    if _event_name(getattr(details, "type", "")) != "tool_calls":
+        return
+    for tool_call in getattr(details, "tool_calls", None) or []:
+        key = getattr(tool_call, "id", None) or repr(tool_call)
+        if tool_call is not None and key not in seen:
+            seen.add(key)
+            yield tool_call
+
+
+class RunDriver:
+    """Drives one run to a terminal state; see ``drive_run``."""
+
+    def __init__(
+        self,
+        client,
+        thread_id: str,
+        agent_id: str,
+        on_requires_action: ToolOutputsHandler,
+        timeout: float = RUN_TIMEOUT_SECONDS,
+        stream: bool = RUN_STREAMING_ENABLED,
+        run_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        self.client = client
+        self.thread_id = thread_id
+        self.agent_id = agent_id
+        self.on_requires_action = on_requires_action
+        self.timeout = timeout
+        self.stream = stream
+        self.run_kwargs = run_kwargs or {}
+        self.run = None
+        self.deadline = 0.0
+        self._seen_tool_calls: Set[str] = set()
+        self._handled_action: Optional[str] = None
+
+    async def updates(self) -> AsyncIterator[RunUpdate]:
+        self.deadline = time.monotonic() + self.timeout
+        try:
+            if self.stream and hasattr(self.client.runs, "stream"):
+                try:
+                    async for update in self._stream():
+                        yield update
+                except _RunAborted:
+                    raise
+                except Exception as e:
+                    # Not fatal: the run (if it started) is picked up by polling
+                    logger.warning(f"Run streaming unavailable, polling instead: {e}")
+                if self.run is not None and _status(self.run) not in ACTIVE_STATUSES:
+                    yield self._finished()
+                    return
+            if self.run is None:
+                self.run = await self.client.runs.create(
+                    thread_id=self.thread_id, agent_id=self.agent_id, **self.run_kwargs
+                )
+            async for update in self._poll():
+                yield update
+            yield self._finished()
+        except _RunAborted as e:
+            # Leave the thread free for the next message
+            await self._cancel()
+            yield RunUpdate(run=self.run, done=True, error=str(e))
+
+    def _finished(self) -> RunUpdate:
+        status = _status(self.run)
+        if status == "completed":
+            return RunUpdate(run=self.run, done=True)
+        error = getattr(self.run, "last_error", None) or f"Run ended with status '{status}'"
+        return RunUpdate(run=self.run, done=True, error=str(error))
+
+    async def _stream(self) -> AsyncIterator[RunUpdate]:
+        async with await self.client.runs.stream(
+            thread_id=self.thread_id, agent_id=self.agent_id, **self.run_kwargs
+        ) as stream:
+            async for event_type, event_data, _ in stream:
+                name = _event_name(event_type)
+                self._check_deadline()
+                if name.startswith("thread.run.step."):
+                    for tool_call in _new_tool_calls(event_data, self._seen_tool_calls):
+                        yield RunUpdate(tool_call=tool_call)
+                elif name.startswith("thread.run."):
+                    self.run = event_data
+                    if _status(event_data) == "requires_action":
+                        await self._submit_tool_outputs(event_data, stream)
+                elif name == "error":
+                    raise RuntimeError(f"Run stream error: {event_data}")
+                elif name == "done":
+                    break
+
+    async def _poll(self) -> AsyncIterator[RunUpdate]:
+        delay = RUN_POLL_INITIAL_SECONDS
+        rate_limited = 0
+        while _status(self.run) in ACTIVE_STATUSES:
+            self._check_deadline()
+            changed = False
+            if _status(self.run) == "requires_action" and _action_key(self.run) != self._handled_action:
+                await self._submit_tool_outputs(self.run)
+                changed = True
+            else:
+                await asyncio.sleep(delay)
+
+            try:
+                async for step in self.client.run_steps.list(thread_id=self.thread_id, run_id=self.run.id):
+                    for tool_call in _new_tool_calls(step, self._seen_tool_calls):
+                        changed = True
+                        yield RunUpdate(tool_call=tool_call)
+            except Exception as e:
+                logger.debug(f"Run steps not available yet: {e}")
+
+            previous_status = _status(self.run)
+            try:
+                self.run = await self.client.runs.get(thread_id=self.thread_id, run_id=self.run.id)
+                rate_limited = 0
+            except Exception as e:
+                if not _is_rate_limited(e) or rate_limited >= RATE_LIMIT_RETRIES:
+                    raise _RunAborted("Rate limit exceeded, please try again later" if _is_rate_limited(e) else str(e))
+                rate_limited += 1
+                await asyncio.sleep(min(15 * (2 ** rate_limited), 45))
+                continue
+            if _status(self.run) != previous_status:
+                changed = True
+            delay = RUN_POLL_INITIAL_SECONDS if changed else min(delay * RUN_POLL_BACKOFF, RUN_POLL_MAX_SECONDS)
+
+    async def _submit_tool_outputs(self, run, stream=None) -> None:
+        """Ask the agent for tool outputs and submit them (on ``stream`` when streaming).
+
+        The run is abandoned if the agent has no outputs to give or the
+        submission fails.
+        """
+        self._handled_action = _action_key(run)
+        outputs = await self.on_requires_action(run)
+        if outputs is None:
+            raise _RunAborted("Run is stuck in requires_action state - please try again")
+        try:
+            if stream is not None:
+                await self.client.runs.submit_tool_outputs_stream(
+                    thread_id=self.thread_id, run_id=run.id, event_handler=stream, **outputs
+                )
+            else:
+                await self.client.runs.submit_tool_outputs(thread_id=self.thread_id, run_id=run.id, **outputs)
+        except Exception as e:
+            raise _RunAborted(f"Error handling tool calls: {e}")
+
+    def _check_deadline(self) -> None:
+        if time.monotonic() > self.deadline:
+            raise _RunAborted("Request timed out")
+
+    async def _cancel(self) -> None:
+        if self.run is None or _status(self.run) not in ACTIVE_STATUSES:
+            return
+        try:
+            await self.client.runs.cancel(thread_id=self.thread_id, run_id=self.run.id)
+        except Exception as e:
+            logger.debug(f"Could not cancel run {self.run.id}: {e}")
+
+
+async def drive_run(
+    client,
+    thread_id: str,
+    agent_id: str,
+    on_requires_action: ToolOutputsHandler,
+    timeout: float = RUN_TIMEOUT_SECONDS,
+    stream: bool = RUN_STREAMING_ENABLED,
+    **run_kwargs,
+) -> AsyncIterator[RunUpdate]:
+    """Start a run on ``thread_id`` and yield ``RunUpdate``s until it finishes.
+
+    The last update has ``done=True`` with the final run, and ``error`` set
+    unless the run completed. Runs abandoned on timeout, on API errors or
+    because ``on_requires_action`` returned None are cancelled.
+    """
+    driver = RunDriver(client, thread_id, agent_id, on_requires_action, timeout, stream, run_kwargs)
+    async for update in driver.updates():
+        yield update